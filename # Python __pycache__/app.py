@@ -1,147 +1,94 @@
-from flask import Flask, render_template, jsonify, request, session, redirect, url_for, flash
-from flask_sqlalchemy import SQLAlchemy
-from flask_login import LoginManager, UserMixin, login_user, login_required, current_user, logout_user
+from flask import Flask, Blueprint, render_template, jsonify, request, session, redirect, url_for, flash
+from flask import Response, send_file, stream_with_context, abort, current_app, g
+from flask_login import LoginManager, login_user, login_required, current_user, logout_user
+from sqlalchemy.orm import joinedload
 from datetime import datetime
 import os
 import json
 import logging
-from config import config, Categories, Emoji
+from config import config, Categories, Emoji, COLOR_HEX, DEFAULT_COLOR_HEX
+from models import db, User, Product, Order, Cart, OrderItem, StockReservation, ProductRecommendation
+from metrics import RequestMetrics
+from querybudget import QueryGuard, query_budget
+from assets import AssetPipeline
+from template_cache import TemplateCache
+from shared_cache import SharedCache, CATALOG
+from reservations import ReservationSweeper
+from promotions import PromotionScheduler
+from identity import UserIdentityCache
+from telegram_auth import TelegramAuth, InitDataError
+from promo_codes import PromoCodeTable, PromoError
+import order_history
+import product_lists
+import notifications
+from outbox import OrderOutbox
+from idempotency import IdempotencyStore
+from ratelimit import RateLimiter, rate_limit
+from recommendations import similar_products as similar_products_for
+from structured_logging import setup_logging, RequestLogging
+from profiler import RouteProfiler, ProfilerBusy
 
-# Настройка логгирования
-logging.basicConfig(level=logging.INFO)
+# Журнал пишется фоновым потоком: запрос только кладет запись в очередь
+setup_logging(config.LOG_LEVEL, config.LOG_FORMAT, config.LOG_DEBUG_SAMPLE, config.LOG_QUEUE_SIZE)
 logger = logging.getLogger('VogueEliteWeb')
 
-app = Flask(__name__)
-app.config.from_object(config)
+# Расширения без привязки к приложению (подключаются в create_app)
+login_manager = LoginManager()
+login_manager.login_view = 'shop.login_telegram'
 
-# Настройка базы данных
-db = SQLAlchemy(app)
+# request_id и время запроса в журнале
+request_logging = RequestLogging()
 
-# Настройка Flask-Login
-login_manager = LoginManager()
-login_manager.init_app(app)
-login_manager.login_view = 'login'
-
-# Модели базы данных
-class User(db.Model, UserMixin):
-    __tablename__ = 'users'
-    id = db.Column(db.Integer, primary_key=True)
-    telegram_id = db.Column(db.Integer, unique=True)
-    username = db.Column(db.String(100))
-    first_name = db.Column(db.String(100), nullable=False)
-    last_name = db.Column(db.String(100))
-    phone = db.Column(db.String(20))
-    email = db.Column(db.String(100))
-    is_admin = db.Column(db.Boolean, default=False)
-    is_vip = db.Column(db.Boolean, default=False)
-    total_orders = db.Column(db.Integer, default=0)
-    total_spent = db.Column(db.Float, default=0.0)
-    referral_code = db.Column(db.String(50), unique=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    last_activity = db.Column(db.DateTime, default=datetime.utcnow)
-
-class Product(db.Model):
-    __tablename__ = 'products'
-    id = db.Column(db.Integer, primary_key=True)
-    article = db.Column(db.String(50), unique=True, nullable=False)
-    name = db.Column(db.String(200), nullable=False)
-    description = db.Column(db.Text)
-    detailed_description = db.Column(db.Text)
-    price = db.Column(db.Float, nullable=False)
-    old_price = db.Column(db.Float)
-    discount = db.Column(db.Integer, default=0)
-    category = db.Column(db.String(100), nullable=False)
-    subcategory = db.Column(db.String(100))
-    size = db.Column(db.String(100))
-    color = db.Column(db.String(100))
-    material = db.Column(db.String(200))
-    brand = db.Column(db.String(100))
-    season = db.Column(db.String(50))
-    country = db.Column(db.String(50))
-    image_url = db.Column(db.String(500))
-    images = db.Column(db.Text)  # JSON строки с изображениями
-    is_new = db.Column(db.Boolean, default=False)
-    is_hit = db.Column(db.Boolean, default=False)
-    is_exclusive = db.Column(db.Boolean, default=False)
-    is_limited = db.Column(db.Boolean, default=False)
-    is_active = db.Column(db.Boolean, default=True)
-    stock = db.Column(db.Integer, default=0)
-    reserved = db.Column(db.Integer, default=0)
-    weight = db.Column(db.Float)
-    dimensions = db.Column(db.String(100))
-    care_instructions = db.Column(db.Text)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-
-class Order(db.Model):
-    __tablename__ = 'orders'
-    id = db.Column(db.Integer, primary_key=True)
-    order_number = db.Column(db.String(50), unique=True, nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    status = db.Column(db.String(50), default='new')
-    total_amount = db.Column(db.Float, nullable=False)
-    discount_amount = db.Column(db.Float, default=0.0)
-    delivery_cost = db.Column(db.Float, default=0.0)
-    final_amount = db.Column(db.Float, nullable=False)
-    delivery_address = db.Column(db.Text)
-    delivery_type = db.Column(db.String(50), default='courier')
-    payment_method = db.Column(db.String(50))
-    payment_status = db.Column(db.String(50), default='pending')
-    promo_code = db.Column(db.String(50))
-    customer_notes = db.Column(db.Text)
-    admin_notes = db.Column(db.Text)
-    items_json = db.Column(db.Text, nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    user = db.relationship('User', backref=db.backref('orders', lazy=True))
-
-class Cart(db.Model):
-    __tablename__ = 'cart'
-    id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
-    quantity = db.Column(db.Integer, default=1)
-    selected_size = db.Column(db.String(50))
-    selected_color = db.Column(db.String(50))
-    price_at_addition = db.Column(db.Float)
-    added_at = db.Column(db.DateTime, default=datetime.utcnow)
-    user = db.relationship('User', backref=db.backref('cart_items', lazy=True))
-    product = db.relationship('Product', backref=db.backref('cart_entries', lazy=True))
+# Сэмплирующий профилировщик, который админ запускает на воркере
+route_profiler = RouteProfiler()
+
+# Метрики производительности по маршрутам
+request_metrics = RequestMetrics()
+
+# Предупреждения о N+1 в режиме разработки
+query_guard = QueryGuard()
+
+# Статика с хешем в имени и вечным кэшем
+asset_pipeline = AssetPipeline()
+
+# Кэш, общий для воркеров машины: каталог, корзины, фрагменты шаблонов
+shared_cache = SharedCache()
+
+# Байткод шаблонов и кэш фрагментов ({% cache %})
+template_cache = TemplateCache()
+reservation_sweeper = ReservationSweeper()
+promotion_scheduler = PromotionScheduler()
+
+# Снимки пользователей для current_user (без запроса к users на каждый запрос)
+identity_cache = UserIdentityCache()
+
+# Проверка initData Telegram WebApp
+telegram_auth = TelegramAuth()
+
+# Промокоды: проверка по словарю в памяти, лимиты - счетчиками в БД
+promo_codes = PromoCodeTable()
+
+# Уведомления покупателей (SSE)
+notification_hub = notifications.NotificationHub()
+
+# События заказов для Telegram-бота
+order_outbox = OrderOutbox()
+
+# Idempotency-Key для заказа и корзины
+idempotency = IdempotencyStore()
+
+# Лимиты частоты запросов (корзины токенов в общей памяти воркеров)
+rate_limiter = RateLimiter()
+
+# Маршруты магазина
+shop = Blueprint('shop', __name__)
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
-
-# Создаем таблицы при первом запуске
-with app.app_context():
-    db.create_all()
-    
-    # Создаем тестовые товары если их нет
-    if Product.query.count() == 0:
-        test_products = [
-            Product(
-                article=f"VOGUE{str(i).zfill(3)}",
-                name=f"Эксклюзивное платье {i}",
-                description=f"Роскошное платье премиум-класса {i}",
-                price=25000 + i*5000,
-                category=Categories.DRESSES,
-                size="XS,S,M,L,XL",
-                color="Черный, Белый, Красный",
-                material="Шелк, Кружево",
-                brand="VOGUE ÉLITE",
-                image_url="https://images.unsplash.com/photo-1595777457583-95e059d581b8?w=800&h=1200&fit=crop&q=80",
-                is_new=True if i < 3 else False,
-                is_exclusive=True,
-                stock=10
-            ) for i in range(1, 6)
-        ]
-        db.session.add_all(test_products)
-        db.session.commit()
-        logger.info("Созданы тестовые товары")
+    return identity_cache.get(int(user_id))
 
-# Контекстный процессор для передачи данных во все шаблоны
-@app.context_processor
-def inject_globals():
+# Общие данные для всех шаблонов (регистрируются один раз в create_app)
+def template_globals():
     return {
         'shop_name': config.SHOP_NAME,
         'shop_slogan': config.SHOP_SLOGAN,
@@ -149,11 +96,69 @@ def inject_globals():
         'shop_email': config.SHOP_EMAIL,
         'support_username': config.SUPPORT_USERNAME,
         'emoji': Emoji,
-        'categories': Categories
+        'categories': Categories,
+        'cart_summary': cart_summary,
+        'get_color_hex': get_color_hex
+    }
+
+# Образец цвета для кнопки варианта на странице товара
+def get_color_hex(name):
+    return COLOR_HEX.get((name or '').strip().lower(), DEFAULT_COLOR_HEX)
+
+# Сброс кэшей каталога после массовых UPDATE товаров (акции, возврат резерва)
+def invalidate_catalog():
+    template_cache.invalidate()
+    shared_cache.invalidate(CATALOG)
+
+# Число товаров и сумма корзины для шапки; сбрасывается при изменении корзины
+def cart_summary():
+    if not current_user.is_authenticated:
+        return {'count': 0, 'total': 0}
+    if 'cart_summary' in g:
+        return g.cart_summary
+    
+    def load():
+        count, total = db.session.query(
+            db.func.coalesce(db.func.sum(Cart.quantity), 0),
+            db.func.coalesce(db.func.sum(Cart.quantity * Product.price), 0)
+        ).join(Product, Product.id == Cart.product_id)\
+            .filter(Cart.user_id == current_user.id).one()
+        return {'count': int(count), 'total': float(total)}
+    g.cart_summary = shared_cache.get_or_set(f'cart:{current_user.id}', 'summary', load)
+    return g.cart_summary
+
+# Категории каталога (distinct по всем товарам)
+def catalog_categories():
+    def load():
+        rows = db.session.query(Product.category).distinct().all()
+        return [c[0] for c in rows if c[0]]
+    return shared_cache.get_or_set(CATALOG, 'categories', load)
+
+# Суммы корзины: товары, скидка по промокоду, доставка и итог
+def cart_totals(cart_items, promo_code=None):
+    lines = [(item.product.category, item.product.price * item.quantity)
+             for item in cart_items if item.product]
+    total = sum(amount for _, amount in lines)
+    promo, discount, promo_error = None, 0, None
+    if promo_code:
+        try:
+            promo, discount = promo_codes.validate(promo_code, lines, total)
+        except PromoError as e:
+            promo_error = str(e)
+    # Порог бесплатной доставки считается от суммы товаров без скидки
+    delivery_cost = 0 if total >= config.FREE_DELIVERY_THRESHOLD else config.DELIVERY_COST
+    return {
+        'total': total,
+        'promo': promo,
+        'promo_error': promo_error,
+        'discount_amount': discount,
+        'delivery_cost': delivery_cost,
+        'final_amount': total - discount + delivery_cost
     }
 
 # Главная страница
-@app.route('/')
+@shop.route('/')
+@query_budget(5)
 def index():
     new_products = Product.query.filter_by(is_new=True, is_active=True).limit(8).all()
     hit_products = Product.query.filter_by(is_hit=True, is_active=True).limit(8).all()
@@ -165,7 +170,8 @@ def index():
                          exclusive_products=exclusive_products)
 
 # Каталог
-@app.route('/catalog')
+@shop.route('/catalog')
+@query_budget(5)
 def catalog_page():
     category = request.args.get('category', 'all')
     page = request.args.get('page', 1, type=int)
@@ -181,8 +187,7 @@ def catalog_page():
     )
     
     # Получаем все категории
-    categories = db.session.query(Product.category).distinct().all()
-    categories = [c[0] for c in categories if c[0]]
+    categories = catalog_categories()
     
     return render_template('catalog.html',
                          products=products,
@@ -190,81 +195,105 @@ def catalog_page():
                          current_category=category)
 
 # Страница товара
-@app.route('/product/<int:product_id>')
+@shop.route('/product/<int:product_id>')
+@query_budget(5)
 def product_detail(product_id):
     product = Product.query.get_or_404(product_id)
     
-    # Аналогичные товары
-    similar_products = Product.query.filter(
-        Product.category == product.category,
-        Product.id != product.id,
-        Product.is_active == True
-    ).limit(4).all()
+    # Аналогичные товары (заранее посчитаны flask recommendations build)
+    similar_products = similar_products_for(product, limit=4)
     
     return render_template('product.html',
                          product=product,
                          similar_products=similar_products)
 
 # Корзина
-@app.route('/cart')
+@shop.route('/cart')
+@query_budget(3)
 @login_required
 def cart_page():
-    cart_items = Cart.query.filter_by(user_id=current_user.id).all()
-    total = sum(item.product.price * item.quantity for item in cart_items if item.product)
-    
-    # Расчет доставки
-    delivery_cost = 0 if total >= config.FREE_DELIVERY_THRESHOLD else config.DELIVERY_COST
-    final_amount = total + delivery_cost
+    cart_items = Cart.query.options(joinedload(Cart.product))\
+        .filter_by(user_id=current_user.id).all()
+    totals = cart_totals(cart_items, session.get('promo_code'))
     
     return render_template('cart.html',
                          cart_items=cart_items,
-                         total=total,
-                         delivery_cost=delivery_cost,
-                         final_amount=final_amount,
-                         free_delivery_threshold=config.FREE_DELIVERY_THRESHOLD)
+                         free_delivery_threshold=config.FREE_DELIVERY_THRESHOLD,
+                         **totals)
 
 # Оформление заказа
-@app.route('/checkout')
+@shop.route('/checkout')
+@query_budget(3)
 @login_required
 def checkout():
-    cart_items = Cart.query.filter_by(user_id=current_user.id).all()
+    cart_items = Cart.query.options(joinedload(Cart.product))\
+        .filter_by(user_id=current_user.id).all()
     
     if not cart_items:
         flash('Ваша корзина пуста', 'warning')
-        return redirect(url_for('cart_page'))
+        return redirect(url_for('shop.cart_page'))
     
-    total = sum(item.product.price * item.quantity for item in cart_items if item.product)
-    delivery_cost = 0 if total >= config.FREE_DELIVERY_THRESHOLD else config.DELIVERY_COST
-    final_amount = total + delivery_cost
+    totals = cart_totals(cart_items, session.get('promo_code'))
     
-    return render_template('checkout.html',
-                         cart_items=cart_items,
-                         total=total,
-                         delivery_cost=delivery_cost,
-                         final_amount=final_amount)
+    return render_template('checkout.html', cart_items=cart_items, **totals)
 
-# История заказов
-@app.route('/orders')
+# История заказов (первая страница; следующие - через /api/orders?cursor=...)
+@shop.route('/orders')
+@query_budget(2)
 @login_required
 def orders():
-    user_orders = Order.query.filter_by(user_id=current_user.id)\
-        .order_by(Order.created_at.desc()).all()
+    user_orders, next_cursor = order_history.paginate(
+        Order.query.filter_by(user_id=current_user.id))
     
-    return render_template('orders.html', orders=user_orders)
+    return render_template('orders.html', orders=user_orders, next_cursor=next_cursor,
+                           status_text=notifications.ORDER_STATUS_TEXT)
+
+# Страница истории заказов для бесконечной прокрутки
+@shop.route('/api/orders', methods=['GET'])
+@query_budget(2)
+@login_required
+def api_orders():
+    try:
+        page, next_cursor = order_history.paginate(
+            Order.query.filter_by(user_id=current_user.id),
+            cursor=request.args.get('cursor'),
+            limit=request.args.get('limit', type=int))
+    except order_history.CursorError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    return jsonify({
+        'orders': [order_history.order_summary(o) for o in page],
+        'next_cursor': next_cursor
+    })
+
+# Позиции заказа загружаются при раскрытии заказа в списке
+@shop.route('/api/orders/<int:order_id>/items', methods=['GET'])
+@query_budget(3)
+@login_required
+def api_order_items(order_id):
+    order = Order.query.get_or_404(order_id)
+    if order.user_id != current_user.id and not current_user.is_admin:
+        return jsonify({'error': 'Доступ запрещен'}), 403
+    return jsonify({
+        'order_number': order.order_number,
+        'delivery_address': order.delivery_address,
+        'items': order_history.order_items(order)
+    })
 
 # Профиль пользователя
-@app.route('/profile')
+@shop.route('/profile')
+@query_budget(1)
 @login_required
 def profile():
-    return render_template('profile.html', user=current_user)
+    return render_template('dashboard.html', user=current_user)
 
 # Админ-панель
-@app.route('/admin')
+@shop.route('/admin')
+@query_budget(8)
 @login_required
 def admin_panel():
     if not current_user.is_admin:
         flash('Доступ запрещен', 'danger')
-        return redirect(url_for('index'))
+        return redirect(url_for('shop.index'))
     
     # Статистика
     total_users = User.query.count()
@@ -273,7 +302,8 @@ def admin_panel():
     total_revenue = db.session.query(db.func.sum(Order.final_amount)).scalar() or 0
     
     # Последние заказы
-    recent_orders = Order.query.order_by(Order.created_at.desc()).limit(10).all()
+    recent_orders = Order.query.options(joinedload(Order.user))\
+        .order_by(Order.created_at.desc()).limit(10).all()
     
     # Последние пользователи
     recent_users = User.query.order_by(User.created_at.desc()).limit(10).all()
@@ -287,25 +317,170 @@ def admin_panel():
                          recent_users=recent_users)
 
 # API для управления товарами
-@app.route('/api/products', methods=['GET'])
+@shop.route('/api/products', methods=['GET'])
+@rate_limit(ip='30/minute')
+@query_budget(1)
 def api_products():
-    products = Product.query.filter_by(is_active=True).all()
-    return jsonify([{
-        'id': p.id,
-        'article': p.article,
-        'name': p.name,
-        'description': p.description,
-        'price': p.price,
-        'old_price': p.old_price,
-        'discount': p.discount,
-        'category': p.category,
-        'image_url': p.image_url,
-        'stock': p.stock
-    } for p in products])
+    def load():
+        products = Product.query.filter_by(is_active=True).all()
+        return [{
+            'id': p.id,
+            'article': p.article,
+            'name': p.name,
+            'description': p.description,
+            'price': p.price,
+            'old_price': p.old_price,
+            'discount': p.discount,
+            'category': p.category,
+            'image_url': p.image_url,
+            'stock': p.stock
+        } for p in products]
+    return jsonify(shared_cache.get_or_set(CATALOG, 'api-products', load))
+
+# Похожие товары (для бота и виджетов)
+@shop.route('/api/products/<int:product_id>/similar', methods=['GET'])
+@query_budget(1)
+def api_similar_products(product_id):
+    limit = min(request.args.get('limit', 4, type=int), 20)
+    
+    def load():
+        similar = Product.query\
+            .join(ProductRecommendation, ProductRecommendation.similar_id == Product.id)\
+            .filter(ProductRecommendation.product_id == product_id, Product.is_active == True)\
+            .order_by(ProductRecommendation.rank)\
+            .limit(limit).all()
+        return [{
+            'id': p.id,
+            'article': p.article,
+            'name': p.name,
+            'price': p.price,
+            'category': p.category,
+            'image_url': p.image_url
+        } for p in similar]
+    return jsonify(shared_cache.get_or_set(CATALOG, ('similar', product_id, limit), load))
+
+# Самые популярные в избранном (для подборок на витрине)
+@shop.route('/api/products/most-wishlisted', methods=['GET'])
+@query_budget(1)
+def api_most_wishlisted():
+    limit = min(request.args.get('limit', 20, type=int), 100)
+    return jsonify([
+        dict(product_lists.card(product), wishlist_count=count)
+        for product, count in product_lists.most_wishlisted(limit)
+    ])
+
+# Фиды каталога для маркетплейсов и рекламных площадок
+@shop.route('/feeds/catalog.<any(csv, jsonl, yml):fmt>')
+@query_budget(1)
+def catalog_feed(fmt):
+    from catalog_export import FEED_FORMATS, catalog_version, feed_cache
+    token = config.FEED_TOKEN
+    if token and request.args.get('token') != token:
+        abort(403)
+    
+    cache = feed_cache()
+    version = catalog_version()
+    path = cache.lookup(fmt, version)
+    if path is not None:
+        # Каталог не менялся - готовый файл, с поддержкой If-None-Match и Range
+        return send_file(path, mimetype=FEED_FORMATS[fmt], etag=version,
+                         download_name=f'catalog.{fmt}', conditional=True)
+    
+    response = Response(stream_with_context(cache.generate(fmt, version)),
+                        mimetype=FEED_FORMATS[fmt])
+    response.set_etag(version)
+    response.headers['Content-Disposition'] = f'inline; filename=catalog.{fmt}'
+    return response
+
+# Браузер заказов для админа: фильтры и постраничный вывод по курсору
+@shop.route('/api/admin/orders', methods=['GET'])
+@query_budget(2)
+@login_required
+def api_admin_orders():
+    if not current_user.is_admin:
+        return jsonify({'error': 'Доступ запрещен'}), 403
+    try:
+        query = order_history.apply_admin_filters(Order.query, request.args)
+        page, next_cursor = order_history.paginate(
+            query,
+            cursor=request.args.get('cursor'),
+            limit=request.args.get('limit', type=int))
+    except order_history.CursorError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    return jsonify({
+        'orders': [order_history.order_summary(o) for o in page],
+        'next_cursor': next_cursor
+    })
+
+# Смена статуса заказа админом (покупатель получает уведомление)
+@shop.route('/api/admin/orders/<int:order_id>/status', methods=['POST'])
+@query_budget(5)
+@login_required
+def api_admin_order_status(order_id):
+    if not current_user.is_admin:
+        return jsonify({'error': 'Доступ запрещен'}), 403
+    status = (request.get_json(silent=True) or {}).get('status')
+    if status not in notifications.ORDER_STATUS_TEXT:
+        return jsonify({'success': False, 'message': 'Неизвестный статус'}), 400
+    order = Order.query.get_or_404(order_id)
+    order.status = status
+    db.session.commit()
+    return jsonify({'success': True, 'order': order_history.order_summary(order)})
+
+# Аналитика продаж для админа (агрегаты по order_items)
+@shop.route('/api/admin/sales', methods=['GET'])
+@query_budget(4)
+@login_required
+def api_admin_sales():
+    if not current_user.is_admin:
+        return jsonify({'error': 'Доступ запрещен'}), 403
+    from sales import sales_report
+    days = request.args.get('days', 30, type=int)
+    limit = request.args.get('limit', 10, type=int)
+    return jsonify(sales_report(days=days, limit=min(limit, 100)))
+
+# Профилирование воркера, принявшего запрос: POST {"seconds": N} - все запросы
+# за N секунд (all_threads - все потоки), {"endpoint": ..., "requests": N} - N
+# следующих запросов маршрута. GET - состояние и сохраненные профили
+@shop.route('/api/admin/profiler', methods=['GET', 'POST'])
+@query_budget(1)
+@login_required
+def api_admin_profiler():
+    if not current_user.is_admin:
+        return jsonify({'error': 'Доступ запрещен'}), 403
+    if request.method == 'GET':
+        return jsonify(route_profiler.status())
+    data = request.get_json(silent=True) or {}
+    try:
+        profile = route_profiler.arm_requests(
+            seconds=data.get('seconds'), endpoint=data.get('endpoint'),
+            requests=data.get('requests'), all_threads=bool(data.get('all_threads')))
+    except ProfilerBusy as e:
+        return jsonify({'success': False, 'message': str(e)}), 409
+    except (TypeError, ValueError) as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    profile['download_url'] = url_for('shop.api_admin_profile_download', profile_id=profile['id'])
+    return jsonify({'success': True, 'profile': profile}), 202
+
+# Скачать профиль в формате collapsed (flamegraph.pl, speedscope)
+@shop.route('/api/admin/profiler/<profile_id>.collapsed', methods=['GET'])
+@query_budget(1)
+@login_required
+def api_admin_profile_download(profile_id):
+    if not current_user.is_admin:
+        return jsonify({'error': 'Доступ запрещен'}), 403
+    path = route_profiler.path(profile_id)
+    if path is None:
+        return jsonify({'success': False, 'message': 'Профиль не найден или еще не готов'}), 404
+    return send_file(path, mimetype='text/plain', as_attachment=True,
+                     download_name=f"{profile_id}.collapsed", max_age=0)
 
 # API для добавления в корзину
-@app.route('/api/cart/add', methods=['POST'])
+@shop.route('/api/cart/add', methods=['POST'])
+@rate_limit(ip='240/minute', user='60/minute')
+@query_budget(6)
 @login_required
+@idempotency.idempotent
 def api_add_to_cart():
     data = request.json
     product_id = data.get('product_id')
@@ -346,14 +521,177 @@ def api_add_to_cart():
     
     return jsonify({'success': True, 'message': 'Товар добавлен в корзину'})
 
+# Количества со страницы корзины: {items: [{item_id, quantity}]}, 0 - убрать позицию
+@shop.route('/api/cart/sync', methods=['POST'])
+@rate_limit(ip='240/minute', user='60/minute')
+@query_budget(4)
+@login_required
+@idempotency.idempotent
+def api_cart_sync():
+    quantities = {}
+    for item in (request.get_json(silent=True) or {}).get('items') or ():
+        try:
+            quantities[int(item['item_id'])] = int(item['quantity'])
+        except (KeyError, TypeError, ValueError):
+            continue
+    
+    updated = 0
+    if quantities:
+        rows = Cart.query.filter(Cart.user_id == current_user.id, Cart.id.in_(quantities)).all()
+        for row in rows:
+            quantity = quantities[row.id]
+            if quantity <= 0:
+                db.session.delete(row)
+            elif row.quantity != quantity:
+                row.quantity = min(quantity, 99)
+            else:
+                continue
+            updated += 1
+        db.session.commit()
+    
+    return jsonify({'success': True, 'updated': updated})
+
+# Промокод корзины: POST - проверить и запомнить, DELETE - убрать
+@shop.route('/api/cart/promo', methods=['POST', 'DELETE'])
+@query_budget(3)
+@login_required
+def api_cart_promo():
+    if request.method == 'DELETE':
+        session.pop('promo_code', None)
+        return jsonify({'success': True})
+    
+    data = request.get_json(silent=True) or {}
+    cart_items = Cart.query.options(joinedload(Cart.product))\
+        .filter_by(user_id=current_user.id).all()
+    totals = cart_totals(cart_items, data.get('code'))
+    if totals['promo'] is None:
+        return jsonify({'success': False, 'message': totals['promo_error'] or 'Введите промокод'}), 400
+    
+    promo = totals['promo']
+    session['promo_code'] = promo.code
+    return jsonify({
+        'success': True,
+        'code': promo.code,
+        'discount_type': promo.discount_type,
+        'value': promo.value,
+        'min_amount': promo.min_amount,
+        'categories': sorted(promo.categories) if promo.categories else None,
+        'total': totals['total'],
+        'discount_amount': totals['discount_amount'],
+        'delivery_cost': totals['delivery_cost'],
+        'final_amount': totals['final_amount']
+    })
+
+# Избранное и сравнение: GET - список (?cards=0 - только id), POST - пачка изменений
+@shop.route('/api/<any(wishlist, compare):kind>', methods=['GET', 'POST'])
+@query_budget(7)
+@login_required
+def api_product_list(kind):
+    if request.method == 'GET':
+        ids = product_lists.get_ids(current_user.id, kind)
+        if request.args.get('cards') == '0':
+            return jsonify({'ids': ids})
+        return jsonify({'ids': ids, 'products': product_lists.product_cards(ids)})
+    
+    data = request.get_json(force=True, silent=True) or {}
+    try:
+        ids = product_lists.update_list(current_user.id, kind,
+                                        add=data.get('add'), remove=data.get('remove'))
+    except product_lists.ListConflict as e:
+        return jsonify({'success': False, 'message': str(e)}), 409
+    except product_lists.ListError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    return jsonify({'success': True, 'ids': ids})
+
+# Текущий пользователь для main.js (401 - не вошел)
+@shop.route('/api/auth/check', methods=['GET'])
+@query_budget(1)
+def api_auth_check():
+    if not current_user.is_authenticated:
+        return jsonify({'authenticated': False}), 401
+    return jsonify({
+        'authenticated': True,
+        'id': current_user.id,
+        'first_name': current_user.first_name,
+        'last_name': current_user.last_name,
+        'username': current_user.username,
+        'is_admin': current_user.is_admin
+    })
+
+# Непрочитанные уведомления (для клиентов без EventSource)
+@shop.route('/api/notifications/unread', methods=['GET'])
+@query_budget(2)
+@login_required
+def api_notifications_unread():
+    return jsonify(notifications.unread(current_user.id,
+                                        after_id=request.args.get('after', 0, type=int)))
+
+# Отметить уведомления прочитанными (ids не передан - все)
+@shop.route('/api/notifications/read', methods=['POST'])
+@query_budget(2)
+@login_required
+def api_notifications_read():
+    ids = (request.get_json(silent=True) or {}).get('ids')
+    if ids is not None and not (isinstance(ids, list) and all(isinstance(i, int) for i in ids)):
+        return jsonify({'success': False, 'message': 'ids: ожидается список id'}), 400
+    return jsonify({'success': True, 'count': notifications.mark_read(current_user.id, ids)})
+
+# Поток уведомлений (Server-Sent Events); соединение ждет без запросов к БД
+@shop.route('/api/notifications/stream', methods=['GET'])
+@query_budget(3)
+@login_required
+def api_notifications_stream():
+    subscription = notification_hub.subscribe(current_app._get_current_object(), current_user.id)
+    if subscription is None:
+        response = jsonify({'success': False, 'message': 'Сервер перегружен, повторите позже'})
+        response.status_code = 503
+        response.headers['Retry-After'] = '30'
+        return response
+    # После переподключения клиент присылает id последнего полученного события
+    last_id = request.headers.get('Last-Event-ID', 0, type=int)
+    backlog = notifications.unread(current_user.id, after_id=last_id)
+    db.session.remove()  # соединение с БД не держится, пока открыт поток
+    
+    response = Response(notification_hub.stream(subscription, backlog),
+                        mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+# Пачка событий заказов для отправки ботом (Authorization: Bearer BOT_API_TOKEN)
+@shop.route('/api/bot/outbox/claim', methods=['POST'])
+@query_budget(4)
+def api_bot_outbox_claim():
+    order_outbox.check_token()
+    data = request.get_json(silent=True) or {}
+    limit = data.get('limit') or config.OUTBOX_BATCH_SIZE
+    if isinstance(limit, bool) or not isinstance(limit, int):
+        return jsonify({'success': False, 'message': 'limit должен быть целым числом'}), 400
+    limit = min(max(limit, 1), 500)
+    return jsonify({'events': order_outbox.claim(limit)})
+
+# Подтверждение отправки: {sent: [id], failed: [{id, error, retry, retry_after}]}
+@shop.route('/api/bot/outbox/ack', methods=['POST'])
+@query_budget(3)
+def api_bot_outbox_ack():
+    order_outbox.check_token()
+    data = request.get_json(silent=True) or {}
+    sent = [i for i in data.get('sent') or () if isinstance(i, int)]
+    failed = [f for f in data.get('failed') or () if isinstance(f, dict) and isinstance(f.get('id'), int)]
+    return jsonify({'success': True, 'sent': order_outbox.ack(sent, failed)})
+
 # API для создания заказа
-@app.route('/api/order/create', methods=['POST'])
+@shop.route('/api/order/create', methods=['POST'])
+@rate_limit(ip='30/minute', user='10/minute')
+@query_budget(17)
 @login_required
+@idempotency.idempotent
 def api_create_order():
     data = request.json
     
     # Получаем товары из корзины
-    cart_items = Cart.query.filter_by(user_id=current_user.id).all()
+    cart_items = Cart.query.options(joinedload(Cart.product))\
+        .filter_by(user_id=current_user.id).all()
     
     if not cart_items:
         return jsonify({'success': False, 'message': 'Корзина пуста'}), 400
@@ -366,16 +704,25 @@ def api_create_order():
                 'message': f'Недостаточно товара: {item.product.name}'
             }), 400
     
-    # Рассчитываем сумму
-    total = sum(item.product.price * item.quantity for item in cart_items)
-    delivery_cost = 0 if total >= config.FREE_DELIVERY_THRESHOLD else config.DELIVERY_COST
-    final_amount = total + delivery_cost
+    # Рассчитываем сумму (промокод из запроса или примененный в корзине)
+    promo_code = data.get('promo_code') or session.get('promo_code')
+    totals = cart_totals(cart_items, promo_code)
+    if promo_code and totals['promo'] is None:
+        session.pop('promo_code', None)
+        return jsonify({'success': False, 'message': totals['promo_error']}), 400
+    total = totals['total']
+    delivery_cost = totals['delivery_cost']
+    final_amount = totals['final_amount']
     
     # Создаем заказ
     order_number = f"ORD{datetime.now().strftime('%Y%m%d')}{current_user.id:04d}{Order.query.count() + 1:04d}"
     
     # Подготавливаем данные товаров
+    created_at = datetime.utcnow()
+    expires_at = reservation_sweeper.expires_at(created_at)
     items_data = []
+    order_items = []
+    reservations = []
     for item in cart_items:
         items_data.append({
             'product_id': item.product_id,
@@ -386,32 +733,66 @@ def api_create_order():
             'size': item.selected_size,
             'color': item.selected_color
         })
+        order_items.append(OrderItem(
+            product_id=item.product_id,
+            article=item.product.article,
+            name=item.product.name,
+            category=item.product.category,
+            price=item.product.price,
+            quantity=item.quantity,
+            size=item.selected_size,
+            color=item.selected_color,
+            created_at=created_at
+        ))
         
-        # Резервируем товар
+        # Резервируем товар до оплаты (снимает ReservationSweeper)
         item.product.stock -= item.quantity
         item.product.reserved += item.quantity
+        reservations.append(StockReservation(
+            product_id=item.product_id,
+            quantity=item.quantity,
+            expires_at=expires_at
+        ))
     
     order = Order(
         order_number=order_number,
         user_id=current_user.id,
         total_amount=total,
+        discount_amount=totals['discount_amount'],
         delivery_cost=delivery_cost,
         final_amount=final_amount,
+        promo_code=totals['promo'].code if totals['promo'] else None,
         delivery_address=data.get('address'),
         delivery_type=data.get('delivery_type', 'courier'),
         payment_method=data.get('payment_method'),
-        items_json=json.dumps(items_data, ensure_ascii=False)
+        items_json=json.dumps(items_data, ensure_ascii=False),
+        items=order_items,
+        reservations=reservations,
+        created_at=created_at
     )
     
     # Очищаем корзину
     Cart.query.filter_by(user_id=current_user.id).delete()
     
-    # Обновляем статистику пользователя
-    current_user.total_orders += 1
-    current_user.total_spent += final_amount
+    # Обновляем статистику пользователя атомарно в БД (current_user - снимок из кэша)
+    User.query.filter_by(id=current_user.id).update({
+        User.total_orders: User.total_orders + 1,
+        User.total_spent: User.total_spent + final_amount
+    }, synchronize_session=False)
     
     db.session.add(order)
+    if totals['promo']:
+        # Лимиты проверяются атомарно в той же транзакции, что и заказ
+        try:
+            promo_codes.redeem(totals['promo'], current_user.id, order)
+        except PromoError as e:
+            db.session.rollback()
+            session.pop('promo_code', None)
+            return jsonify({'success': False, 'message': str(e)}), 400
     db.session.commit()
+    identity_cache.invalidate(current_user.id)
+    shared_cache.invalidate(f'cart:{current_user.id}')  # корзина очищена DELETE без ORM
+    session.pop('promo_code', None)
     
     return jsonify({
         'success': True,
@@ -419,29 +800,126 @@ def api_create_order():
         'message': 'Заказ успешно создан!'
     })
 
-# Авторизация через Telegram
-@app.route('/login/telegram')
+# Авторизация через Telegram WebApp (initData отправляет layout.js)
+@shop.route('/login/telegram', methods=['GET', 'POST'])
+@query_budget(4)
 def login_telegram():
-    # Здесь будет логика авторизации через Telegram Web App
-    return "Telegram Login"
+    if request.method == 'GET':
+        return render_template('login.html')
+    
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        data = {}
+    try:
+        user_id = telegram_auth.authenticate(data.get('init_data'))
+    except InitDataError as e:
+        return jsonify({'success': False, 'message': str(e)}), e.status
+    
+    user = identity_cache.get(user_id)
+    if user is None:
+        return jsonify({'success': False, 'message': 'Пользователь не найден'}), 403
+    login_user(user, remember=True)
+    
+    # Возврат только на страницу этого же сайта
+    next_url = data.get('next') or ''
+    if not isinstance(next_url, str) or not next_url.startswith('/') or next_url.startswith('//'):
+        next_url = url_for('shop.index')
+    return jsonify({'success': True, 'next': next_url})
 
 # Выход
-@app.route('/logout')
+@shop.route('/logout')
+@query_budget(1)
 @login_required
 def logout():
     logout_user()
-    return redirect(url_for('index'))
+    return redirect(url_for('shop.index'))
 
 # Обработчик ошибок
-@app.errorhandler(404)
+@shop.app_errorhandler(404)
 def page_not_found(e):
     return render_template('404.html'), 404
 
-@app.errorhandler(500)
+@shop.app_errorhandler(500)
 def internal_server_error(e):
     return render_template('500.html'), 500
 
+def create_app(config_object=config):
+    """Фабрика приложения: без обращений к БД, только регистрация компонентов"""
+    app = Flask(__name__)
+    app.config.from_object(config_object)
+    
+    request_logging.init_app(app)
+    route_profiler.init_app(app)
+    db.init_app(app)
+    login_manager.init_app(app)
+    shared_cache.init_app(app)
+    shared_cache.watch(CATALOG, Product)
+    shared_cache.watch(lambda item: f'cart:{item.user_id}', Cart)
+    identity_cache.init_app(app, cache=shared_cache)
+    telegram_auth.init_app(app)
+    promo_codes.init_app(app, cache=shared_cache)
+    notification_hub.init_app(app)
+    order_outbox.init_app(app)
+    idempotency.init_app(app)
+    rate_limiter.init_app(app)
+    request_metrics.init_app(app)
+    query_guard.init_app(app)
+    asset_pipeline.init_app(app)
+    template_cache.init_app(app, watch_models=(Product,), cache=shared_cache)
+    reservation_sweeper.init_app(app, on_release=invalidate_catalog)
+    promotion_scheduler.init_app(app, on_change=invalidate_catalog)
+    app.jinja_env.globals.update(template_globals())
+    
+    app.register_blueprint(shop)
+    
+    from manage import db_cli
+    from assets import assets_cli
+    from sales import sales_cli
+    from reservations import reservations_cli
+    from shared_cache import cache_cli
+    from outbox import outbox_cli
+    from promotions import promotions_cli
+    from promo_codes import promo_cli
+    from catalog_import import products_cli
+    import catalog_export  # noqa: F401 - команда flask products export
+    from recommendations import recommendations_cli
+    app.cli.add_command(db_cli)
+    app.cli.add_command(assets_cli)
+    app.cli.add_command(sales_cli)
+    app.cli.add_command(reservations_cli)
+    app.cli.add_command(cache_cli)
+    app.cli.add_command(outbox_cli)
+    app.cli.add_command(promotions_cli)
+    app.cli.add_command(promo_cli)
+    app.cli.add_command(products_cli)
+    app.cli.add_command(recommendations_cli)
+    
+    return app
+
+def warm_up(app):
+    """Подготовка общего состояния в мастер-процессе gunicorn (preload_app).
+    
+    Шаблоны компилируются один раз до fork, а gc.freeze() убирает созданные
+    объекты из сборщика мусора, чтобы воркеры делили эти страницы памяти
+    (copy-on-write) и не копировали их при первой сборке.
+    """
+    import gc
+    for name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(name)
+    gc.collect()
+    gc.freeze()
+
+app = create_app()
+
 # Запуск приложения
 if __name__ == '__main__':
+    # Для локальной разработки схема и тестовые товары создаются автоматически
+    from manage import create_schema, seed_products
+    with app.app_context():
+        create_schema()
+        seed_products()
+    reservation_sweeper.start(app)
+    promotion_scheduler.start(app)
+    
     port = int(os.environ.get('PORT', 8080))
     app.run(host='0.0.0.0', port=port, debug=True)
\ No newline at end of file
@@ -0,0 +1,189 @@
+# assets.py - сборка статики: минификация, хеш в имени, gzip/brotli, вечный кэш
+import os
+import re
+import json
+import gzip
+import hashlib
+import mimetypes
+import click
+from flask import current_app, request, send_from_directory, url_for, abort
+from flask.cli import AppGroup
+
+try:
+    import rjsmin
+except ImportError:  # без rjsmin JS только сжимается
+    rjsmin = None
+
+try:
+    import brotli
+except ImportError:  # без brotli отдается только gzip
+    brotli = None
+
+# Какие файлы из static/ собираются
+ASSET_EXTENSIONS = ('.css', '.js')
+
+# Кэш на год: имя файла меняется вместе с содержимым
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+assets_cli = AppGroup('assets', help='Сборка статических файлов.')
+
+_CSS_TOKENS = re.compile(
+    r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')'  # строки не трогаем
+    r'|(/\*.*?\*/)'                               # комментарии удаляем
+    r'|(\s+)',                                    # пробелы схлопываем
+    re.S
+)
+_CSS_PUNCTUATION = re.compile(r'\s*([{};,>])\s*')
+
+
+def minify_css(source):
+    """Консервативная минификация CSS: комментарии и лишние пробелы вне строк"""
+    out = []
+    plain = []
+
+    def flush():
+        text = _CSS_PUNCTUATION.sub(r'\1', ''.join(plain))
+        out.append(text.replace(';}', '}'))
+        plain.clear()
+
+    pos = 0
+    for m in _CSS_TOKENS.finditer(source):
+        plain.append(source[pos:m.start()])
+        string, comment, space = m.groups()
+        if string:
+            flush()
+            out.append(string)
+        elif space:
+            plain.append(' ')
+        pos = m.end()
+    plain.append(source[pos:])
+    flush()
+    return ''.join(out).strip()
+
+
+def minify_js(source):
+    return rjsmin.jsmin(source) if rjsmin is not None else source
+
+
+def build_assets(static_folder, dist_folder):
+    """Собрать все CSS/JS из static_folder в dist_folder. Возвращает манифест"""
+    manifest = {}
+    dist_folder = os.path.abspath(dist_folder)
+    for root, dirs, files in os.walk(static_folder):
+        dirs[:] = [d for d in dirs if os.path.abspath(os.path.join(root, d)) != dist_folder]
+        for name in sorted(files):
+            if not name.endswith(ASSET_EXTENSIONS):
+                continue
+            source_path = os.path.join(root, name)
+            logical = os.path.relpath(source_path, static_folder).replace(os.sep, '/')
+            with open(source_path, encoding='utf-8') as f:
+                source = f.read()
+            minified = minify_css(source) if name.endswith('.css') else minify_js(source)
+            data = minified.encode('utf-8')
+
+            digest = hashlib.sha256(data).hexdigest()[:12]
+            stem, ext = os.path.splitext(logical)
+            hashed = f"{stem}.{digest}{ext}"
+            manifest[logical] = hashed
+
+            target = os.path.join(dist_folder, hashed)
+            if os.path.exists(target):
+                continue  # то же содержимое уже собрано
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            _write(target, data)
+            _write_if_smaller(f"{target}.gz", gzip.compress(data, compresslevel=9, mtime=0), data)
+            if brotli is not None:
+                _write_if_smaller(f"{target}.br", brotli.compress(data, quality=11), data)
+
+    _write(os.path.join(dist_folder, 'manifest.json'),
+           json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return manifest
+
+
+def _write(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _write_if_smaller(path, compressed, original):
+    if len(compressed) < len(original):
+        _write(path, compressed)
+
+
+class AssetPipeline:
+    """Выдача собранной статики и помощник asset_url для шаблонов.
+
+    asset_url('css/style.css') принимает то же имя, что url_for('static', filename=...).
+    Если файл собран, возвращается адрес с хешем в имени, иначе обычный /static/.
+    """
+
+    def __init__(self, app=None):
+        self.manifest = {}
+        self.served = frozenset()
+        self.dist_folder = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.dist_folder = app.config.get('ASSETS_DIST_DIR') or os.path.join(app.static_folder, 'dist')
+        self.set_manifest(self.load_manifest())
+        app.add_url_rule('/assets/<path:filename>', 'assets', self.serve)
+        app.add_template_global(self.asset_url, 'asset_url')
+        app.extensions['assets'] = self
+
+    def load_manifest(self):
+        try:
+            with open(os.path.join(self.dist_folder, 'manifest.json'), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def set_manifest(self, manifest):
+        self.manifest = manifest
+        # Отдаются только файлы из манифеста
+        self.served = frozenset(manifest.values())
+
+    def asset_url(self, filename):
+        hashed = self.manifest.get(filename)
+        if hashed is None:
+            return url_for('static', filename=filename)
+        return url_for('assets', filename=hashed)
+
+    def serve(self, filename):
+        if filename not in self.served:
+            abort(404)
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        accepted = request.accept_encodings
+        for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+            if accepted[encoding] and os.path.exists(os.path.join(self.dist_folder, filename + suffix)):
+                response = send_from_directory(self.dist_folder, filename + suffix,
+                                               mimetype=mimetype, max_age=31536000)
+                response.headers['Content-Encoding'] = encoding
+                break
+        else:
+            response = send_from_directory(self.dist_folder, filename,
+                                           mimetype=mimetype, max_age=31536000)
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        response.vary.add('Accept-Encoding')
+        return response
+
+
+@assets_cli.command('build')
+def build_command():
+    """Минифицировать, захешировать и сжать CSS/JS."""
+    app = current_app
+    pipeline = app.extensions['assets']
+    manifest = build_assets(app.static_folder, pipeline.dist_folder)
+    pipeline.set_manifest(manifest)
+
+    original = compressed = 0
+    for logical, hashed in manifest.items():
+        original += os.path.getsize(os.path.join(app.static_folder, logical))
+        target = os.path.join(pipeline.dist_folder, hashed)
+        best = min((p for p in (target + '.br', target + '.gz', target) if os.path.exists(p)),
+                   key=os.path.getsize)
+        compressed += os.path.getsize(best)
+    click.echo(f"Собрано файлов: {len(manifest)}, "
+               f"{original // 1024} КБ -> {compressed // 1024} КБ после сжатия")
@@ -0,0 +1,303 @@
+# benchmarks/bot_load.py - нагрузочный прогон обработчиков бота на локальном Bot API
+#
+# Запуск: python benchmarks/bot_load.py [--updates 5000] [--users 500] [--concurrency 8]
+#                                       [--latency 0.02] [--rate-limited 0.01] [--errors 0]
+#                                       [--broadcasts 20] [--tracemalloc] [--json]
+# Поднимает benchmarks/fake_telegram.py в этом процессе, создает VogueEliteBot
+# с временной базой (без фоновых задач) и прогоняет синтетические обновления:
+# /start, меню, каталог с выбором категории и товара, рассылки администратора.
+# Обновления одного чата обрабатываются по порядку, разные чаты - в
+# --concurrency потоках. Отчет: задержка обработчиков по видам обновлений,
+# число вызовов Bot API и рост памяти процесса.
+import os
+import sys
+import json
+import math
+import time
+import functools
+import random
+import logging
+import argparse
+import tempfile
+import tracemalloc
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_telegram import FakeTelegram  # noqa: E402  (benchmarks/fake_telegram.py)
+
+ADMIN_ID = 900000001
+FIRST_CHAT = 700000001
+
+CATEGORIES = ('Платья', 'Костюмы', 'Брюки', 'Юбки', 'Куртки', 'Пальто', 'Обувь', 'Сумки',
+              'Украшения', 'Аксессуары')
+MENU_BUTTONS = (('DRESS', 'Каталог'), ('CART', 'Корзина'), ('ORDER', 'Заказы'), ('USER', 'Профиль'),
+                ('SUPPORT', 'Поддержка'), ('SALE', 'Скидки'), ('WEBSITE', 'Веб-версия'))
+
+
+@functools.lru_cache(maxsize=None)
+def menu_buttons():
+    """Тексты кнопок главного меню. config импортируется только после подмены окружения"""
+    from config import Emoji
+    return tuple(f"{getattr(Emoji, icon)} {label}" for icon, label in MENU_BUTTONS)
+
+
+class UpdateFactory:
+    """Словари Update в формате Bot API с возрастающими update_id"""
+
+    def __init__(self):
+        self._next_id = 0
+
+    def _id(self):
+        self._next_id += 1
+        return self._next_id
+
+    @staticmethod
+    def _user(chat_id):
+        return {'id': chat_id, 'is_bot': False, 'first_name': f"Покупатель {chat_id}",
+                'username': f"buyer{chat_id}", 'language_code': 'ru'}
+
+    def message(self, chat_id, text):
+        update_id = self._id()
+        message = {
+            'message_id': update_id,
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'from': self._user(chat_id),
+            'text': text,
+        }
+        if text.startswith('/'):
+            message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text.split()[0])}]
+        return {'update_id': update_id, 'message': message}
+
+    def callback(self, chat_id, data):
+        update_id = self._id()
+        return {'update_id': update_id, 'callback_query': {
+            'id': str(update_id),
+            'from': self._user(chat_id),
+            'chat_instance': str(chat_id),
+            'data': data,
+            'message': {'message_id': update_id, 'date': int(time.time()),
+                        'chat': {'id': chat_id, 'type': 'private'}, 'from': {'id': 1, 'is_bot': True,
+                                                                           'first_name': 'Fake Bot'},
+                        'text': 'Каталог'},
+        }}
+
+
+def kind_of(update):
+    """Вид обновления для отчета: команда, кнопка меню, текст или префикс callback"""
+    if 'callback_query' in update:
+        return 'callback ' + update['callback_query']['data'].split('_')[0]
+    text = update['message']['text']
+    if text.startswith('/'):
+        return text.split()[0]
+    return 'кнопка меню' if text in menu_buttons() else 'текст'
+
+
+def customer_session(factory, rnd, chat_id, products):
+    """Одно посещение покупателя: /start и несколько действий"""
+    updates = [factory.message(chat_id, '/start')]
+    for _ in range(rnd.randint(1, 4)):
+        action = rnd.random()
+        if action < 0.45:
+            category = rnd.choice(CATEGORIES)
+            updates += [factory.message(chat_id, '/catalog'),
+                        factory.callback(chat_id, f"cat_{category}"),
+                        factory.callback(chat_id, f"product_{rnd.randint(1, products)}")]
+        elif action < 0.8:
+            updates.append(factory.message(chat_id, rnd.choice(menu_buttons())))
+        elif action < 0.9:
+            updates.append(factory.message(chat_id, rnd.choice(('/profile', '/orders', '/discount'))))
+        else:
+            updates.append(factory.message(chat_id, 'Здравствуйте, есть это платье в размере M?'))
+    return updates
+
+
+def broadcast_session(factory, rnd, chat_id):
+    """Рассылка администратора: /broadcast, текст, выбор аудитории и отправка"""
+    return [factory.message(chat_id, '/broadcast'),
+            factory.message(chat_id, f"<b>Скидки недели</b> до {rnd.choice((20, 30, 40))}%"),
+            factory.callback(chat_id, rnd.choice(('broadcast_all', 'broadcast_vip'))),
+            factory.callback(chat_id, 'broadcast_send')]
+
+
+def build_chats(updates, users, broadcasts, products, seed):
+    """Обновления по чатам (порядок внутри чата сохраняется) до --updates штук"""
+    rnd = random.Random(seed)
+    factory = UpdateFactory()
+    chats = defaultdict(list)
+    for _ in range(broadcasts):
+        chats[ADMIN_ID] += broadcast_session(factory, rnd, ADMIN_ID)
+    total = sum(len(u) for u in chats.values())
+    while total < updates:
+        chat_id = FIRST_CHAT + rnd.randrange(users)
+        session = customer_session(factory, rnd, chat_id, products)
+        chats[chat_id] += session
+        total += len(session)
+    return list(chats.values())
+
+
+class ErrorLog(logging.Handler):
+    """Ошибки, которые обработчики бота пишут в журнал и не пробрасывают"""
+
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.messages = Counter()
+
+    def emit(self, record):
+        self.messages[record.getMessage().splitlines()[0][:120]] += 1
+
+
+def rss_mb():
+    """Резидентная память процесса (Linux), иначе пик из getrusage"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def run(args):
+    workdir = tempfile.mkdtemp(prefix='bot_load_')
+    fake = FakeTelegram(latency=args.latency, jitter=args.jitter, rate_limited=args.rate_limited,
+                        errors=args.errors, chat_rate=args.chat_rate, seed=args.seed)
+    url = fake.start()
+    # Настоящий токен и Telegram не участвуют: config читает окружение при импорте
+    os.environ.update({
+        'BOT_TOKEN': '100000:LOAD-TEST-TOKEN',
+        'TELEGRAM_API_URL': url,
+        'ADMIN_ID': str(ADMIN_ID),
+        'RENDER_EXTERNAL_URL': f"{url}/web",  # запросы к веб-приложению получают 404 сразу
+    })
+    from bot import VogueEliteBot, Database
+
+    # Журнал бота не печатается, его ошибки считаются
+    error_log = ErrorLog()
+    for name in ('VogueEliteBot', 'TeleBot'):
+        logger = logging.getLogger(name)
+        logger.handlers, logger.propagate = [error_log], False
+    db = Database(os.path.join(workdir, 'bot.db'))
+    rnd = random.Random(args.seed)
+    db.update_product_cache([
+        {'id': i, 'article': f"SYN{i:07d}", 'name': f"Товар {i}", 'price': rnd.randrange(1500, 150000, 100),
+         'category': rnd.choice(CATEGORIES), 'image_url': f"https://example.com/img/{i}.jpg"}
+        for i in range(1, args.products + 1)
+    ])
+    bot = VogueEliteBot(db=db, background_tasks=False)
+    # Обработчики выполняются в потоке драйвера: так меряется их время, а не очередь пула telebot
+    bot.bot.threaded = False
+
+    chats = build_chats(args.updates, args.users, args.broadcasts, args.products, args.seed)
+    from telebot import types
+    chats = [[(kind_of(u), types.Update.de_json(u)) for u in chat] for chat in chats]
+    fake.reset()
+
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+
+    def replay(chat):
+        for kind, update in chat:
+            t0 = time.perf_counter()
+            try:
+                bot.bot.process_new_updates([update])
+            except Exception:
+                errors[kind] += 1
+            latencies[kind].append(time.perf_counter() - t0)
+
+    if args.tracemalloc:
+        tracemalloc.start()
+        before_snapshot = tracemalloc.take_snapshot()
+    rss_before = rss_mb()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        list(pool.map(replay, chats))
+    elapsed = time.perf_counter() - started
+    rss_after = rss_mb()
+
+    total = sum(len(v) for v in latencies.values())
+    api = fake.stats()
+    report = {
+        'updates': total,
+        'chats': len(chats),
+        'concurrency': args.concurrency,
+        'elapsed_s': round(elapsed, 2),
+        'updates_per_s': round(total / elapsed, 1),
+        'injected': {'latency_s': args.latency, 'rate_limited': args.rate_limited, 'errors': args.errors},
+        'handlers': {
+            kind: {
+                'count': len(values),
+                'errors': errors.get(kind, 0),
+                'p50_ms': round(percentile(values, 50) * 1000, 2),
+                'p95_ms': round(percentile(values, 95) * 1000, 2),
+                'p99_ms': round(percentile(values, 99) * 1000, 2),
+            } for kind, values in sorted(latencies.items(), key=lambda item: -len(item[1]))
+        },
+        'logged_errors': dict(error_log.messages.most_common(20)),
+        'api': dict(api, calls_per_update=round(api['calls'] / total, 2) if total else 0),
+        'memory': {
+            'rss_before_mb': round(rss_before, 1),
+            'rss_after_mb': round(rss_after, 1),
+            'rss_growth_mb': round(rss_after - rss_before, 1),
+            'user_states': len(bot.user_states),
+        },
+    }
+    if args.tracemalloc:
+        growth = tracemalloc.take_snapshot().compare_to(before_snapshot, 'lineno')[:10]
+        report['memory']['top_growth'] = [
+            {'where': str(stat.traceback), 'kb': round(stat.size_diff / 1024, 1)} for stat in growth
+        ]
+        tracemalloc.stop()
+    fake.stop()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Нагрузочный прогон бота на локальном Bot API')
+    parser.add_argument('--updates', type=int, default=5000)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=8, help='потоков обработки')
+    parser.add_argument('--broadcasts', type=int, default=20, help='рассылок администратора')
+    parser.add_argument('--products', type=int, default=1000, help='товаров в кэше бота')
+    parser.add_argument('--latency', type=float, default=0.02, help='задержка Bot API, с')
+    parser.add_argument('--jitter', type=float, default=0.01)
+    parser.add_argument('--rate-limited', type=float, default=0, help='доля ответов 429')
+    parser.add_argument('--errors', type=float, default=0, help='доля ответов 500')
+    parser.add_argument('--chat-rate', type=float, default=0, help='сообщений в секунду в чат до 429')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--tracemalloc', action='store_true', help='места роста памяти (медленнее)')
+    parser.add_argument('--json', action='store_true', help='вывести результат в JSON')
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+    print(f"Обновлений: {report['updates']} в {report['chats']} чатах за {report['elapsed_s']} с "
+          f"({report['updates_per_s']}/с, потоков {report['concurrency']})")
+    print(f"\n{'обновление':<20}{'всего':>8}{'ошибок':>8}{'p50 мс':>10}{'p95 мс':>10}{'p99 мс':>10}")
+    for kind, h in report['handlers'].items():
+        print(f"{kind:<20}{h['count']:>8}{h['errors']:>8}{h['p50_ms']:>10.2f}{h['p95_ms']:>10.2f}{h['p99_ms']:>10.2f}")
+    for message, count in report['logged_errors'].items():
+        print(f"  в журнале x{count}: {message}")
+    api = report['api']
+    print(f"\nВызовов Bot API: {api['calls']} ({api['calls_per_update']} на обновление), "
+          f"подмешано ошибок: {api['injected'] or 0}")
+    for method, count in api['by_method'].items():
+        print(f"  {method:<24}{count:>8}")
+    memory = report['memory']
+    print(f"\nПамять: {memory['rss_before_mb']} -> {memory['rss_after_mb']} МБ "
+          f"(+{memory['rss_growth_mb']}), состояний пользователей: {memory['user_states']}")
+    for item in memory.get('top_growth', ()):
+        print(f"  {item['kb']:>10} КБ  {item['where']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+# benchmarks/dataset.py - синтетический каталог для бенчмарков (товары, покупатели, корзины, заказы)
+#
+# Запуск: python benchmarks/dataset.py --scale 100k [--seed 1] [--out catalog.db]
+# Одинаковые --scale и --seed дают одинаковые данные. Файл собирается рядом
+# под временным именем и переименовывается в конце: прерванная генерация
+# не оставляет полуготовую базу, которую бенчмарк принял бы за готовую.
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Масштаб - число товаров; покупателей в 10 раз меньше, заказов - вдвое
+SCALES = {'1k': 1000, '100k': 100000, '1m': 1000000}
+
+CHUNK = 10000
+
+CATEGORIES = ('Платья', 'Костюмы', 'Блузы', 'Брюки', 'Юбки', 'Куртки',
+              'Пальто', 'Аксессуары', 'Обувь', 'Сумки', 'Украшения')
+SIZES = ('XS', 'S', 'M', 'L', 'XL')
+COLORS = ('Черный', 'Белый', 'Красный', 'Бежевый', 'Синий', 'Зеленый')
+STATUSES = ('new', 'processing', 'shipped', 'delivered', 'delivered', 'delivered', 'cancelled')
+
+# Точка отсчета дат: не зависит от дня запуска
+EPOCH = datetime(2024, 1, 1)
+
+
+def scale_size(scale):
+    if scale in SCALES:
+        return SCALES[scale]
+    try:
+        return int(scale)
+    except ValueError:
+        raise ValueError(f"Неизвестный масштаб {scale!r}: {', '.join(SCALES)} или число товаров")
+
+
+def default_path(scale, seed, directory=None):
+    directory = directory or os.path.join(tempfile.gettempdir(), 'fashion_bench')
+    return os.path.join(directory, f"catalog-{scale}-s{seed}.db")
+
+
+def counts(products):
+    users = max(products // 10, 100)
+    return {'products': products, 'users': users, 'carts': users // 2, 'orders': products // 2}
+
+
+def _chunks(rows):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= CHUNK:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _products(rnd, n):
+    for i in range(1, n + 1):
+        price = rnd.randrange(1500, 150000, 100)
+        discount = rnd.choice((0, 0, 0, 10, 20, 30))
+        yield {
+            'id': i,
+            'article': f"SYN{i:07d}",
+            'name': f"{rnd.choice(CATEGORIES)[:-1]} {i}",
+            'description': f"Синтетический товар {i}",
+            'price': price,
+            'old_price': round(price / (1 - discount / 100), -2) if discount else None,
+            'discount': discount,
+            'category': rnd.choice(CATEGORIES),
+            'size': ','.join(SIZES),
+            'color': ', '.join(rnd.sample(COLORS, 3)),
+            'brand': f"Бренд {rnd.randrange(200)}",
+            'image_url': f"https://example.com/img/{i}.jpg",
+            'is_new': rnd.random() < 0.05,
+            'is_hit': rnd.random() < 0.05,
+            'is_exclusive': rnd.random() < 0.02,
+            'is_active': rnd.random() < 0.97,
+            'stock': rnd.randrange(50, 1000),
+            'reserved': 0,
+            'created_at': EPOCH + timedelta(minutes=i),
+        }
+
+
+def _users(n):
+    for i in range(1, n + 1):
+        yield {
+            'id': i,
+            'telegram_id': 1000000 + i,
+            'first_name': f"Покупатель {i}",
+            'username': f"buyer{i}",
+            'referral_code': f"SYNREF{i:07d}",
+            'is_admin': i == 1,
+            'total_orders': 0,
+            'total_spent': 0.0,
+            'created_at': EPOCH,
+        }
+
+
+def _carts(rnd, users, products):
+    # Корзины у первой половины покупателей: бенчмарк берет их для /cart
+    for user_id in range(1, users + 1):
+        for product_id in rnd.sample(range(1, products + 1), rnd.randint(1, 3)):
+            yield {
+                'user_id': user_id,
+                'product_id': product_id,
+                'quantity': rnd.randint(1, 2),
+                'selected_size': rnd.choice(SIZES),
+                'selected_color': COLORS[0],
+                'price_at_addition': 5000.0,
+                'added_at': EPOCH,
+            }
+
+
+def _orders(rnd, n, users, products, items):
+    for order_id in range(1, n + 1):
+        created_at = EPOCH + timedelta(seconds=rnd.randrange(365 * 86400))
+        lines = []
+        for product_id in rnd.sample(range(1, products + 1), rnd.randint(1, 4)):
+            line = {'product_id': product_id, 'article': f"SYN{product_id:07d}",
+                    'name': f"Товар {product_id}", 'price': float(rnd.randrange(1500, 150000, 100)),
+                    'quantity': rnd.randint(1, 2), 'size': rnd.choice(SIZES), 'color': COLORS[0]}
+            lines.append(line)
+            items.append(dict(line, order_id=order_id, category=rnd.choice(CATEGORIES),
+                              created_at=created_at))
+        total = sum(line['price'] * line['quantity'] for line in lines)
+        yield {
+            'id': order_id,
+            'order_number': f"SYN{order_id:09d}",
+            'user_id': rnd.randint(1, users),
+            'status': rnd.choice(STATUSES),
+            'total_amount': total,
+            'discount_amount': 0.0,
+            'delivery_cost': 0.0,
+            'final_amount': total,
+            'payment_method': 'card',
+            'payment_status': 'paid',
+            'items_json': json.dumps(lines, ensure_ascii=False),
+            'created_at': created_at,
+            'updated_at': created_at,
+        }
+
+
+def generate(path, scale, seed=1):
+    """Собрать базу в path (перезаписывает). Возвращает число строк по таблицам"""
+    sys.path.insert(0, ROOT)
+    from sqlalchemy import create_engine, event
+    from models import db, Product, User, Cart, Order, OrderItem
+
+    size = scale_size(scale)
+    sizes = counts(size)
+    rnd = random.Random(seed)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    partial = path + '.partial'
+    if os.path.exists(partial):
+        os.remove(partial)
+
+    engine = create_engine(f"sqlite:///{partial}")
+
+    # Надежность записи не нужна: файл либо достраивается целиком, либо выбрасывается
+    @event.listens_for(engine, 'connect')
+    def _fast_writes(conn, record):
+        conn.execute('PRAGMA journal_mode=OFF')
+        conn.execute('PRAGMA synchronous=OFF')
+
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for chunk in _chunks(_products(rnd, size)):
+            conn.execute(Product.__table__.insert(), chunk)
+        for chunk in _chunks(_users(sizes['users'])):
+            conn.execute(User.__table__.insert(), chunk)
+        for chunk in _chunks(_carts(rnd, sizes['carts'], size)):
+            conn.execute(Cart.__table__.insert(), chunk)
+        items = []
+        for chunk in _chunks(_orders(rnd, sizes['orders'], sizes['users'], size, items)):
+            conn.execute(Order.__table__.insert(), chunk)
+            conn.execute(OrderItem.__table__.insert(), items)
+            items.clear()
+    engine.dispose()
+    os.replace(partial, path)
+    return sizes
+
+
+def ensure(scale, seed=1, path=None):
+    """Путь к готовой базе масштаба: собирается один раз и переиспользуется"""
+    path = path or default_path(scale, seed)
+    if not os.path.exists(path):
+        generate(path, scale, seed)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Синтетический каталог для бенчмарков')
+    parser.add_argument('--scale', default='1k', help=f"{', '.join(SCALES)} или число товаров")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--out', help='файл SQLite (по умолчанию во временном каталоге)')
+    args = parser.parse_args()
+
+    path = args.out or default_path(args.scale, args.seed)
+    started = time.perf_counter()
+    sizes = generate(path, args.scale, args.seed)
+    print(f"{path}: " + ', '.join(f"{table} {count}" for table, count in sizes.items())
+          + f" за {time.perf_counter() - started:.1f} с")
+
+
+if __name__ == '__main__':
+    main()
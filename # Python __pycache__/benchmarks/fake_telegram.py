@@ -0,0 +1,244 @@
+# benchmarks/fake_telegram.py - локальный Bot API для прогонов бота без Telegram
+#
+# Запуск: python benchmarks/fake_telegram.py [--port 8081] [--latency 0.05] [--rate-limited 0.01]
+#                                            [--errors 0.01] [--chat-rate 1]
+# Бот направляется на сервер через TELEGRAM_API_URL=http://127.0.0.1:8081.
+# Сервер отвечает на любые методы правдоподобными объектами, считает вызовы
+# по методам и чатам и по заданным долям возвращает 429 (с retry_after) и
+# 500. GET /_stats - счетчики в JSON, POST /_reset - обнулить их. Методы
+# getUpdates отдают обновления, добавленные push_updates().
+import json
+import time
+import random
+import argparse
+import threading
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qsl
+
+# Методы, для которых ошибки не подмешиваются: без них бот не запустится
+SERVICE_METHODS = ('getme', 'getupdates', 'deletewebhook', 'setmycommands')
+
+# Методы, ответ на которые - отправленное сообщение
+MESSAGE_METHODS = ('sendmessage', 'sendphoto', 'senddocument', 'sendvideo', 'sendmediagroup',
+                   'editmessagetext', 'editmessagecaption', 'editmessagereplymarkup',
+                   'forwardmessage', 'copymessage')
+
+BOT_USER = {'id': 1, 'is_bot': True, 'first_name': 'Fake Bot', 'username': 'fake_vogue_bot'}
+
+
+class FakeTelegram:
+    """Bot API в памяти процесса: запись вызовов и подмешивание задержек и ошибок.
+
+    latency и jitter - задержка ответа в секундах (jitter - равномерный
+    разброс сверху). rate_limited и errors - доли ответов 429 и 500.
+    chat_rate - сообщений в секунду в один чат, сверх которых Telegram
+    отвечает 429 (0 - без ограничения).
+    """
+
+    def __init__(self, latency=0, jitter=0, rate_limited=0, errors=0, retry_after=1,
+                 chat_rate=0, seed=1):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limited = rate_limited
+        self.errors = errors
+        self.retry_after = retry_after
+        self.chat_rate = chat_rate
+        self._rnd = random.Random(seed)
+        self._lock = threading.Lock()
+        self._updates = []
+        self._server = None
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.calls = Counter()
+            self.chats = Counter()
+            self.injected = Counter()
+            self._message_id = 0
+            self._chat_sends = {}
+
+    def stats(self):
+        with self._lock:
+            return {
+                'calls': sum(self.calls.values()),
+                'by_method': dict(self.calls.most_common()),
+                'chats': len(self.chats),
+                'max_per_chat': max(self.chats.values(), default=0),
+                'injected': dict(self.injected),
+            }
+
+    def push_updates(self, updates):
+        """Обновления для getUpdates (словари Update без update_id нумеруются по порядку)"""
+        with self._lock:
+            for update in updates:
+                update.setdefault('update_id', len(self._updates) + 1)
+                self._updates.append(update)
+
+    # ========== ОБРАБОТКА ВЫЗОВА ==========
+
+    def call(self, method, params):
+        """(HTTP-статус, ответ Bot API) на вызов метода"""
+        name = method.lower()
+        chat_id = params.get('chat_id')
+        if self.latency or self.jitter:
+            time.sleep(self.latency + self._rnd.random() * self.jitter)
+
+        with self._lock:
+            self.calls[method] += 1
+            if chat_id is not None:
+                self.chats[str(chat_id)] += 1
+            failure = None
+            if name not in SERVICE_METHODS:
+                failure = self._failure(name, chat_id)
+            if failure:
+                self.injected[failure[0]] += 1
+                return failure
+            if name in MESSAGE_METHODS:
+                self._message_id += 1
+                return 200, {'ok': True, 'result': self._message(self._message_id, params)}
+
+        if name == 'getme':
+            return 200, {'ok': True, 'result': BOT_USER}
+        if name == 'getupdates':
+            return 200, {'ok': True, 'result': self._pending_updates(params)}
+        return 200, {'ok': True, 'result': True}
+
+    def _failure(self, name, chat_id):
+        roll = self._rnd.random()
+        if roll < self.errors:
+            return 500, {'ok': False, 'error_code': 500, 'description': 'Internal Server Error'}
+        if roll < self.errors + self.rate_limited or self._chat_flood(name, chat_id):
+            return 429, {'ok': False, 'error_code': 429,
+                         'description': f"Too Many Requests: retry after {self.retry_after}",
+                         'parameters': {'retry_after': self.retry_after}}
+        return None
+
+    def _chat_flood(self, name, chat_id):
+        if not self.chat_rate or chat_id is None or name not in MESSAGE_METHODS:
+            return False
+        now = time.monotonic()
+        sends = [t for t in self._chat_sends.get(chat_id, ()) if now - t < 1]
+        if len(sends) >= self.chat_rate:
+            self._chat_sends[chat_id] = sends
+            return True
+        sends.append(now)
+        self._chat_sends[chat_id] = sends
+        return False
+
+    def _message(self, message_id, params):
+        chat_id = params.get('chat_id')
+        try:
+            chat_id = int(chat_id)
+        except (TypeError, ValueError):
+            pass
+        message = {
+            'message_id': int(params.get('message_id') or message_id),
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'from': BOT_USER,
+        }
+        if 'caption' in params:
+            message['caption'] = params['caption']
+        else:
+            message['text'] = params.get('text', '')
+        return message
+
+    def _pending_updates(self, params):
+        offset = int(params.get('offset') or 0)
+        limit = int(params.get('limit') or 100)
+        with self._lock:
+            updates = [u for u in self._updates if u['update_id'] >= offset][:limit]
+        if not updates:
+            # Длинный опрос: пустой ответ не раньше чем через полсекунды
+            time.sleep(min(float(params.get('timeout') or 0), 0.5))
+        return updates
+
+    # ========== HTTP ==========
+
+    def start(self, host='127.0.0.1', port=0):
+        """Запустить сервер в фоновом потоке. Возвращает адрес для TELEGRAM_API_URL"""
+        self._server = ThreadingHTTPServer((host, port), _handler(self))
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f"http://{host}:{self._server.server_address[1]}"
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def _handler(fake):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Заголовки и тело уходят разными write: без TCP_NODELAY ответ ждет отложенного ACK
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def _params(self):
+            url = urlsplit(self.path)
+            params = dict(parse_qsl(url.query))
+            length = int(self.headers.get('Content-Length') or 0)
+            if length:
+                body = self.rfile.read(length)
+                if self.headers.get('Content-Type', '').startswith('application/json'):
+                    params.update(json.loads(body or b'{}'))
+                elif self.headers.get('Content-Type', '').startswith('application/x-www-form-urlencoded'):
+                    params.update(parse_qsl(body.decode()))
+            return url.path, params
+
+        def _reply(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _dispatch(self):
+            path, params = self._params()
+            if path == '/_stats':
+                return self._reply(200, fake.stats())
+            if path == '/_reset':
+                fake.reset()
+                return self._reply(200, {'ok': True})
+            parts = path.strip('/').split('/')
+            if len(parts) != 2 or not parts[0].startswith('bot'):
+                return self._reply(404, {'ok': False, 'error_code': 404, 'description': 'Not Found'})
+            status, payload = fake.call(parts[1], params)
+            self._reply(status, payload)
+
+        do_GET = do_POST = _dispatch
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Локальный Bot API для прогонов бота')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency', type=float, default=0, help='задержка ответа, с')
+    parser.add_argument('--jitter', type=float, default=0, help='случайная добавка к задержке, с')
+    parser.add_argument('--rate-limited', type=float, default=0, help='доля ответов 429')
+    parser.add_argument('--errors', type=float, default=0, help='доля ответов 500')
+    parser.add_argument('--retry-after', type=int, default=1)
+    parser.add_argument('--chat-rate', type=float, default=0, help='сообщений в секунду в чат до 429')
+    args = parser.parse_args()
+
+    fake = FakeTelegram(args.latency, args.jitter, args.rate_limited, args.errors,
+                        args.retry_after, args.chat_rate)
+    url = fake.start(args.host, args.port)
+    print(f"Bot API: {url} (TELEGRAM_API_URL={url}), счетчики: {url}/_stats")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        fake.stop()
+
+
+if __name__ == '__main__':
+    main()
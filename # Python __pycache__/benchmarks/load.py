@@ -0,0 +1,339 @@
+# benchmarks/load.py - задержки и пропускная способность маршрутов на синтетическом каталоге
+#
+# Запуск: python benchmarks/load.py [--scale 1k|100k|1m] [--mode client|http|all]
+#                                   [--requests 200] [--duration 10] [--concurrency 4]
+#                                   [--out report.json] [--baseline baseline.json] [--json]
+# client - маршруты через тестовый клиент Flask в этом процессе: задержка
+# и число SQL-запросов на запрос без сети и сервера. http - gunicorn
+# (gunicorn.conf.py) и --concurrency процессов-генераторов нагрузки с
+# keep-alive соединениями. База масштаба собирается benchmarks/dataset.py
+# один раз, каждый прогон работает с ее копией: заказы меняют данные.
+# С --baseline отчет сравнивается с сохраненным; рост p95 или падение
+# пропускной способности больше --tolerance - регрессия, код выхода 1.
+import os
+import sys
+import json
+import math
+import time
+import uuid
+import random
+import shutil
+import socket
+import logging
+import argparse
+import tempfile
+import subprocess
+import http.client
+import multiprocessing
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import dataset  # noqa: E402  (benchmarks/dataset.py)
+
+# Маршруты прогона: имя -> (метод, нужен ли вход)
+ROUTES = {
+    'index': ('GET', False),
+    'catalog_page': ('GET', False),
+    'product_detail': ('GET', False),
+    'cart_page': ('GET', True),
+    'api_products': ('GET', False),
+    'api_create_order': ('POST', True),
+}
+
+ORDER_BODY = {'address': 'Москва, Тверская 1', 'payment_method': 'card'}
+
+
+def percentile(values, p):
+    """Перцентиль ближайшего ранга"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def summarize(latencies, elapsed, errors, queries=None):
+    """Сводка по маршруту: перцентили в мс, запросов в секунду, SQL на запрос"""
+    ms = [t * 1000 for t in latencies]
+    report = {
+        'requests': len(ms),
+        'errors': errors,
+        'p50_ms': round(percentile(ms, 50), 2) if ms else None,
+        'p95_ms': round(percentile(ms, 95), 2) if ms else None,
+        'p99_ms': round(percentile(ms, 99), 2) if ms else None,
+        'max_ms': round(max(ms), 2) if ms else None,
+        'rps': round(len(ms) / elapsed, 1) if elapsed else None,
+    }
+    if queries:
+        report['queries_mean'] = round(sum(queries) / len(queries), 2)
+        report['queries_max'] = max(queries)
+    return report
+
+
+class Workload:
+    """Случайные, но воспроизводимые аргументы запросов для масштаба каталога"""
+
+    def __init__(self, sizes, seed, worker=0, workers=1):
+        self.rnd = random.Random(seed * 1000 + worker)
+        self.products = sizes['products']
+        # Покупатели с корзинами делятся между генераторами: у одного
+        # покупателя не бывает двух параллельных заказов
+        self.cart_users = list(range(1 + worker, sizes['carts'] + 1, workers))
+        self.order_users = list(range(sizes['carts'] + 1 + worker, sizes['users'] + 1, workers))
+        self._next_order_user = 0
+
+    def path(self, route):
+        if route == 'catalog_page':
+            pages = max(1, min(self.products // 12, 1000))
+            return f"/catalog?page={self.rnd.randint(1, pages)}"
+        if route == 'product_detail':
+            return f"/product/{self.rnd.randint(1, self.products)}"
+        if route == 'cart_page':
+            return '/cart'
+        if route == 'api_products':
+            return '/api/products'
+        if route == 'api_create_order':
+            return '/api/order/create'
+        return '/'
+
+    def user(self, route):
+        if route == 'cart_page':
+            return self.rnd.choice(self.cart_users)
+        user = self.order_users[self._next_order_user % len(self.order_users)]
+        self._next_order_user += 1
+        return user
+
+    def cart_item(self):
+        return {'product_id': self.rnd.randint(1, self.products), 'quantity': 1, 'size': 'M'}
+
+
+# ========== ТЕСТОВЫЙ КЛИЕНТ ==========
+
+def run_client(app, sizes, seed, requests, max_seconds):
+    from querybudget import count_queries
+
+    client = app.test_client()
+    workload = Workload(sizes, seed)
+    report = {}
+    for route, (method, login) in ROUTES.items():
+        latencies, queries, errors = [], [], 0
+        started = time.perf_counter()
+        while len(latencies) < requests and time.perf_counter() - started < max_seconds:
+            if login:
+                _login(client, workload.user(route))
+            if route == 'api_create_order':
+                # Корзина наполняется вне замера: меряется только оформление
+                client.post('/api/cart/add', json=workload.cart_item(),
+                            headers={'Idempotency-Key': uuid.uuid4().hex})
+            headers = {'Idempotency-Key': uuid.uuid4().hex} if method == 'POST' else None
+            with count_queries() as counter:
+                t0 = time.perf_counter()
+                try:
+                    response = client.open(workload.path(route), method=method,
+                                           json=ORDER_BODY if method == 'POST' else None, headers=headers)
+                    status = response.status_code
+                except Exception:  # ошибка маршрута считается ответом 500, прогон продолжается
+                    status = 500
+                latencies.append(time.perf_counter() - t0)
+            queries.append(counter.count)
+            errors += status >= 400
+        report[route] = summarize(latencies, time.perf_counter() - started, errors, queries)
+    return report
+
+
+def _login(client, user_id):
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+
+
+# ========== HTTP ПОД GUNICORN ==========
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_gunicorn(env, port, workers, timeout=60):
+    env = dict(env, PORT=str(port), WEB_CONCURRENCY=str(workers))
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', f"127.0.0.1:{port}", 'app:app'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn завершился с кодом {process.returncode}")
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            conn.request('GET', '/api/auth/check')
+            conn.getresponse().read()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('gunicorn не ответил за отведенное время')
+
+
+def session_cookies(app, user_ids):
+    """Подписанные cookie сессии Flask-Login для покупателей: вход без Telegram"""
+    serializer = app.session_interface.get_signing_serializer(app)
+    name = app.config['SESSION_COOKIE_NAME']
+    return {uid: f"{name}={serializer.dumps({'_user_id': str(uid), '_fresh': True})}" for uid in user_ids}
+
+
+def _http_worker(args):
+    """Процесс-генератор: запросы маршрута по одному keep-alive соединению до конца срока"""
+    port, route, sizes, seed, worker, workers, duration, cookies = args
+    method, login = ROUTES[route]
+    workload = Workload(sizes, seed, worker, workers)
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    latencies, errors = [], 0
+
+    def send(method, path, body=None, user=None):
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        if user is not None:
+            headers['Cookie'] = cookies[user]
+        if method == 'POST':
+            headers['Idempotency-Key'] = uuid.uuid4().hex
+        conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        return response.status
+
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        user = workload.user(route) if login else None
+        try:
+            if route == 'api_create_order':
+                send('POST', '/api/cart/add', workload.cart_item(), user)
+            t0 = time.perf_counter()
+            status = send(method, workload.path(route), ORDER_BODY if method == 'POST' else None, user)
+            latencies.append(time.perf_counter() - t0)
+            errors += status >= 400
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    return latencies, errors
+
+
+def run_http(app, env, sizes, seed, duration, concurrency, workers):
+    port = _free_port()
+    users = range(1, sizes['users'] + 1)
+    cookies = session_cookies(app, users)
+    server = start_gunicorn(env, port, workers)
+    report = {}
+    try:
+        with multiprocessing.get_context('spawn').Pool(concurrency) as pool:
+            for route in ROUTES:
+                started = time.perf_counter()
+                results = pool.map(_http_worker, [
+                    (port, route, sizes, seed, worker, concurrency, duration, cookies)
+                    for worker in range(concurrency)
+                ])
+                elapsed = time.perf_counter() - started
+                latencies = [t for samples, _ in results for t in samples]
+                report[route] = summarize(latencies, elapsed, sum(errors for _, errors in results))
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    report['_server'] = {'workers': workers, 'concurrency': concurrency, 'duration_s': duration}
+    return report
+
+
+# ========== СРАВНЕНИЕ С БАЗОВЫМ ОТЧЕТОМ ==========
+
+def compare(report, baseline, tolerance):
+    """Регрессии относительно базового отчета: [(режим, маршрут, метрика, было, стало)]"""
+    regressions = []
+    for mode in ('client', 'http'):
+        for route, current in report.get(mode, {}).items():
+            before = baseline.get(mode, {}).get(route)
+            if route.startswith('_') or not before:
+                continue
+            if before.get('p95_ms') and current['p95_ms'] and current['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+                regressions.append((mode, route, 'p95_ms', before['p95_ms'], current['p95_ms']))
+            if before.get('rps') and current['rps'] and current['rps'] < before['rps'] * (1 - tolerance):
+                regressions.append((mode, route, 'rps', before['rps'], current['rps']))
+            if 'queries_max' in before and current.get('queries_max', 0) > before['queries_max']:
+                regressions.append((mode, route, 'queries_max', before['queries_max'], current['queries_max']))
+    return regressions
+
+
+def run(args):
+    sizes = dataset.counts(dataset.scale_size(args.scale))
+    source = dataset.ensure(args.scale, args.seed, args.data)
+
+    workdir = tempfile.mkdtemp(prefix='load_bench_')
+    database = os.path.join(workdir, 'catalog.db')
+    shutil.copyfile(source, database)
+    os.environ.update({
+        'DATABASE_URL': f"sqlite:///{database}",
+        'METRICS_DIR': os.path.join(workdir, 'metrics'),
+        'CACHE_DIR': os.path.join(workdir, 'cache'),
+        # Генератор нагрузки - один адрес: лимиты частоты замерили бы сами себя
+        'RATE_LIMIT_ENABLED': '0',
+    })
+    logging.disable(logging.CRITICAL)
+    from app import app
+
+    report = {'scale': args.scale, 'seed': args.seed, 'dataset': sizes}
+    if args.mode in ('client', 'all'):
+        report['client'] = run_client(app, sizes, args.seed, args.requests, args.max_seconds)
+    if args.mode in ('http', 'all'):
+        report['http'] = run_http(app, dict(os.environ), sizes, args.seed, args.duration,
+                                  args.concurrency, args.workers)
+    shutil.rmtree(workdir, ignore_errors=True)
+    return report
+
+
+def print_report(report):
+    for mode in ('client', 'http'):
+        if mode not in report:
+            continue
+        print(f"\n[{mode}] масштаб {report['scale']}")
+        print(f"{'маршрут':<18}{'запросов':>9}{'ошибок':>8}{'p50 мс':>9}{'p95 мс':>9}{'p99 мс':>9}{'rps':>9}{'SQL':>6}")
+        for route, r in report[mode].items():
+            if route.startswith('_'):
+                continue
+            print(f"{route:<18}{r['requests']:>9}{r['errors']:>8}{r['p50_ms'] or 0:>9.2f}"
+                  f"{r['p95_ms'] or 0:>9.2f}{r['p99_ms'] or 0:>9.2f}{r['rps'] or 0:>9.1f}"
+                  f"{r.get('queries_max', '-'):>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Нагрузочный бенчмарк маршрутов')
+    parser.add_argument('--scale', default='1k', help=f"{', '.join(dataset.SCALES)} или число товаров")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--data', help='готовая база benchmarks/dataset.py')
+    parser.add_argument('--mode', choices=('client', 'http', 'all'), default='client')
+    parser.add_argument('--requests', type=int, default=200, help='запросов на маршрут (client)')
+    parser.add_argument('--max-seconds', type=float, default=30, help='предел времени на маршрут (client)')
+    parser.add_argument('--duration', type=float, default=10, help='секунд нагрузки на маршрут (http)')
+    parser.add_argument('--concurrency', type=int, default=4, help='процессов-генераторов (http)')
+    parser.add_argument('--workers', type=int, default=2, help='воркеров gunicorn (http)')
+    parser.add_argument('--out', help='сохранить отчет в JSON (например, как базовый)')
+    parser.add_argument('--baseline', help='базовый отчет для сравнения')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='допустимое ухудшение, доля')
+    parser.add_argument('--json', action='store_true', help='вывести результат в JSON')
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            report['regressions'] = [dict(zip(('mode', 'route', 'metric', 'baseline', 'current'), r))
+                                     for r in compare(report, json.load(f), args.tolerance)]
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report)
+        for r in report.get('regressions', ()):
+            print(f"РЕГРЕССИЯ [{r['mode']}] {r['route']}: {r['metric']} {r['baseline']} -> {r['current']}")
+    return 1 if report.get('regressions') else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,98 @@
+# benchmarks/product_import.py - скорость flask products import
+#
+# Запуск: python benchmarks/product_import.py [--rows 100000] [--format csv|jsonl] [--json]
+# Генерирует файл каталога, импортирует его в пустую базу и затем повторно
+# (второй прогон - обновление существующих артикулов).
+import os
+import sys
+import csv
+import json
+import time
+import random
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CATEGORIES = ('Платья', 'Верхняя одежда', 'Обувь', 'Сумки', 'Аксессуары', 'Костюмы')
+FIELDS = ('article', 'name', 'description', 'price', 'old_price', 'category', 'brand',
+          'size', 'color', 'stock', 'is_new')
+
+
+def generate(path, rows, fmt, seed=1):
+    rnd = random.Random(seed)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, FIELDS) if fmt == 'csv' else None
+        if writer:
+            writer.writeheader()
+        for i in range(rows):
+            price = rnd.randrange(3000, 300000, 100)
+            row = {
+                'article': f"BENCH{i:07d}",
+                'name': f"Товар {i}",
+                'description': f"Описание товара {i}",
+                'price': price,
+                'old_price': price + 5000 if i % 4 == 0 else '',
+                'category': rnd.choice(CATEGORIES),
+                'brand': f"Бренд {i % 50}",
+                'size': 'XS,S,M,L,XL',
+                'color': 'Черный, Белый',
+                'stock': rnd.randint(0, 50),
+                'is_new': 'да' if i % 10 == 0 else 'нет',
+            }
+            if writer:
+                writer.writerow(row)
+            else:
+                f.write(json.dumps(row, ensure_ascii=False) + '\n')
+
+
+def run_import(env, path):
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'products', 'import', path],
+                            cwd=ROOT, env=env, check=True, capture_output=True, text=True)
+    return time.perf_counter() - started, result.stdout
+
+
+def run(rows, fmt):
+    workdir = tempfile.mkdtemp(prefix='import_bench_')
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'import.db')}",
+               METRICS_DIR=os.path.join(workdir, 'metrics'))
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'db', 'migrate'],
+                   cwd=ROOT, env=env, check=True, capture_output=True)
+    path = os.path.join(workdir, f"catalog.{fmt}")
+    generate(path, rows, fmt)
+
+    insert_seconds, insert_output = run_import(env, path)
+    update_seconds, update_output = run_import(env, path)
+    return {
+        'rows': rows,
+        'format': fmt,
+        'file_mb': round(os.path.getsize(path) / 1024 / 1024, 1),
+        'insert_seconds': round(insert_seconds, 2),
+        'insert_rows_per_second': round(rows / insert_seconds),
+        'update_seconds': round(update_seconds, 2),
+        'update_rows_per_second': round(rows / update_seconds),
+        'output': update_output.strip(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк импорта каталога')
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--format', choices=('csv', 'jsonl'), default='csv')
+    parser.add_argument('--json', action='store_true', help='вывести результат в JSON')
+    args = parser.parse_args()
+
+    report = run(args.rows, args.format)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+    print(f"Строк: {report['rows']} ({report['format']}, {report['file_mb']} МБ)")
+    print(f"Новые товары:   {report['insert_seconds']:8.2f} с  {report['insert_rows_per_second']:>8} строк/с")
+    print(f"Обновление:     {report['update_seconds']:8.2f} с  {report['update_rows_per_second']:>8} строк/с")
+    print(report['output'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+# benchmarks/promotions.py - скорость запуска и отката акции
+#
+# Запуск: python benchmarks/promotions.py [--rows 30000] [--percent 20] [--json]
+# Создает временную базу с --rows товарами одной категории (и столько же
+# товаров других категорий), применяет к категории скидку и откатывает ее.
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run(rows, percent):
+    workdir = tempfile.mkdtemp(prefix='promotions_bench_')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'promotions.db')}"
+    os.environ.setdefault('METRICS_DIR', os.path.join(workdir, 'metrics'))
+    os.environ['CACHE_DIR'] = os.path.join(workdir, 'cache')  # кэш не должен пережить временную базу
+    sys.path.insert(0, ROOT)
+    from app import app, promotion_scheduler
+    from manage import create_schema
+    from models import db, Product, Promotion
+    from promotions import new_promotion
+
+    rnd = random.Random(1)
+    with app.app_context():
+        create_schema()
+        products = []
+        for i in range(rows * 2):
+            price = rnd.randrange(3000, 300000, 100)
+            products.append({
+                'article': f"PROMO{i:07d}", 'name': f"Товар {i}", 'price': price,
+                'old_price': price + 5000 if i % 4 == 0 else None, 'discount': 0,
+                'category': 'Распродажа' if i % 2 == 0 else 'Новинки',
+                'brand': f"Бренд {i % 50}", 'stock': 10, 'is_active': True,
+            })
+        db.session.execute(Product.__table__.insert(), products)
+        db.session.commit()
+
+        promotion = new_promotion('Бенчмарк', percent, 'category', 'Распродажа',
+                                  starts_at=promotion_scheduler.clock())
+        db.session.commit()
+        started = time.perf_counter()
+        applied = promotion_scheduler.apply(promotion)
+        apply_seconds = time.perf_counter() - started
+
+        on_sale = Product.query.filter(Product.category == 'Распродажа', Product.discount > 0).count()
+
+        started = time.perf_counter()
+        restored = promotion_scheduler.revert(db.session.get(Promotion, promotion.id))
+        revert_seconds = time.perf_counter() - started
+
+    return {
+        'rows': rows,
+        'percent': percent,
+        'applied': applied,
+        'on_sale_after_apply': on_sale,
+        'apply_ms': round(apply_seconds * 1000, 1),
+        'restored': restored,
+        'revert_ms': round(revert_seconds * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк акций')
+    parser.add_argument('--rows', type=int, default=30000)
+    parser.add_argument('--percent', type=int, default=20)
+    parser.add_argument('--json', action='store_true', help='вывести результат в JSON')
+    args = parser.parse_args()
+
+    report = run(args.rows, args.percent)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+    print(f"Скидка {report['percent']}% на {report['applied']} товаров: {report['apply_ms']:8.1f} мс")
+    print(f"Откат ({report['restored']} товаров):        {report['revert_ms']:8.1f} мс")
+
+
+if __name__ == '__main__':
+    main()
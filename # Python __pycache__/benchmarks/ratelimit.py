@@ -0,0 +1,103 @@
+# benchmarks/ratelimit.py - накладные расходы ограничителя частоты запросов
+#
+# Запуск: python benchmarks/ratelimit.py [--calls 200000] [--requests 5000] [--json]
+# Меряет взятие токена из общей таблицы (файл в памяти и анонимная память),
+# проверку лимитов маршрута в контексте запроса и разницу во времени
+# GET /api/products через тестовый клиент с ограничителем и без него.
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _per_call_us(func, calls):
+    started = time.perf_counter()
+    for i in range(calls):
+        func(i)
+    return round((time.perf_counter() - started) / calls * 1e6, 2)
+
+
+def run(calls, requests):
+    workdir = tempfile.mkdtemp(prefix='ratelimit_bench_')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'ratelimit.db')}"
+    os.environ.setdefault('METRICS_DIR', os.path.join(workdir, 'metrics'))
+    os.environ['CACHE_DIR'] = os.path.join(workdir, 'cache')
+    # Лимит, который бенчмарк не исчерпает: меряется проверка, а не ответ 429
+    os.environ['RATE_LIMITS'] = 'shop.api_products:ip=1000000/second'
+    sys.path.insert(0, ROOT)
+    from app import app, rate_limiter
+    from manage import create_schema
+    from models import db, Product
+    from ratelimit import BucketTable
+
+    report = {'calls': calls, 'requests': requests}
+
+    shared = BucketTable(os.path.join(workdir, 'buckets.bin'), b'bench')
+    anonymous = BucketTable(None, b'bench')
+    report['take_shared_one_key_us'] = _per_call_us(lambda i: shared.take('ip:1', 1e9, 1e9), calls)
+    report['take_shared_many_keys_us'] = _per_call_us(lambda i: shared.take(f'ip:{i}', 1e9, 1e9), calls)
+    report['take_anonymous_us'] = _per_call_us(lambda i: anonymous.take(f'ip:{i}', 1e9, 1e9), calls)
+
+    with app.app_context():
+        create_schema()
+        db.session.execute(Product.__table__.insert(), [
+            {'article': f"RATE{i:05d}", 'name': f"Товар {i}", 'price': 1000 + i, 'discount': 0,
+             'category': 'Новинки', 'stock': 10, 'is_active': True}
+            for i in range(50)
+        ])
+        db.session.commit()
+
+    limits = rate_limiter.limits_for(app, 'shop.api_products')
+    with app.test_request_context('/api/products'):
+        report['check_us'] = _per_call_us(lambda i: rate_limiter.check('shop.api_products', limits),
+                                          calls)
+
+    client = app.test_client()
+    client.get('/api/products')  # прогрев кэша каталога
+
+    def timed_requests():
+        started = time.perf_counter()
+        for _ in range(requests):
+            client.get('/api/products')
+        return (time.perf_counter() - started) / requests * 1e6
+
+    # Чередование сглаживает дрейф: лучший из трех прогонов в каждом режиме
+    enabled, disabled = [], []
+    for _ in range(3):
+        rate_limiter.enabled = True
+        enabled.append(timed_requests())
+        rate_limiter.enabled = False
+        disabled.append(timed_requests())
+    rate_limiter.enabled = True
+    report['request_with_limiter_us'] = round(min(enabled), 1)
+    report['request_without_limiter_us'] = round(min(disabled), 1)
+    report['request_overhead_us'] = round(min(enabled) - min(disabled), 1)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк ограничителя частоты запросов')
+    parser.add_argument('--calls', type=int, default=200000)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--json', action='store_true', help='вывести результат в JSON')
+    args = parser.parse_args()
+
+    report = run(args.calls, args.requests)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+    print(f"Токен, файл в памяти, один ключ:   {report['take_shared_one_key_us']:8.2f} мкс")
+    print(f"Токен, файл в памяти, разные ключи: {report['take_shared_many_keys_us']:8.2f} мкс")
+    print(f"Токен, анонимная память:           {report['take_anonymous_us']:8.2f} мкс")
+    print(f"Проверка лимитов маршрута:         {report['check_us']:8.2f} мкс")
+    print(f"GET /api/products с лимитом:       {report['request_with_limiter_us']:8.1f} мкс")
+    print(f"GET /api/products без лимита:      {report['request_without_limiter_us']:8.1f} мкс")
+    print(f"Накладные расходы на запрос:       {report['request_overhead_us']:8.1f} мкс")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+# benchmarks/startup.py - время от импорта приложения до первого ответа
+#
+# Запуск: python benchmarks/startup.py [--runs 10] [--json]
+# Каждый прогон - отдельный холодный процесс Python на заранее подготовленной базе.
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Код дочернего процесса: импорт, первый запрос, число SQL-запросов при импорте
+CHILD = r'''
+import json, time
+t0 = time.perf_counter()
+from querybudget import count_queries
+with count_queries() as import_queries:
+    import app as web
+t1 = time.perf_counter()
+client = web.app.test_client()
+with count_queries() as request_queries:
+    response = client.get('/api/products')
+t2 = time.perf_counter()
+print(json.dumps({
+    'import_ms': (t1 - t0) * 1000,
+    'first_request_ms': (t2 - t1) * 1000,
+    'total_ms': (t2 - t0) * 1000,
+    'import_queries': import_queries.count,
+    'first_request_queries': request_queries.count,
+    'status': response.status_code,
+}))
+'''
+
+
+def prepare_database(workdir):
+    """Схема и тестовые товары создаются один раз, до замеров"""
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'startup.db')}",
+               METRICS_DIR=os.path.join(workdir, 'metrics'))
+    for command in ('migrate', 'seed'):
+        subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'db', command],
+                       cwd=ROOT, env=env, check=True, capture_output=True)
+    return env
+
+
+def run(runs):
+    workdir = tempfile.mkdtemp(prefix='startup_bench_')
+    env = prepare_database(workdir)
+    samples = []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, '-c', CHILD], cwd=ROOT, env=env,
+                                check=True, capture_output=True, text=True)
+        samples.append(json.loads(result.stdout.strip().splitlines()[-1]))
+
+    report = {'runs': runs}
+    for field in ('import_ms', 'first_request_ms', 'total_ms'):
+        values = [s[field] for s in samples]
+        report[field] = {
+            'min': round(min(values), 2),
+            'median': round(statistics.median(values), 2),
+            'max': round(max(values), 2),
+        }
+    report['import_queries'] = max(s['import_queries'] for s in samples)
+    report['first_request_queries'] = max(s['first_request_queries'] for s in samples)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк старта веб-приложения')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--json', action='store_true', help='вывести результат в JSON')
+    args = parser.parse_args()
+
+    report = run(args.runs)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+    print(f"Прогонов: {report['runs']}")
+    for field, title in (('import_ms', 'Импорт app'), ('first_request_ms', 'Первый запрос'),
+                         ('total_ms', 'Итого')):
+        stats = report[field]
+        print(f"{title:15} min {stats['min']:8.2f} мс  median {stats['median']:8.2f} мс  "
+              f"max {stats['max']:8.2f} мс")
+    print(f"SQL при импорте: {report['import_queries']}, "
+          f"в первом запросе: {report['first_request_queries']}")
+
+
+if __name__ == '__main__':
+    main()
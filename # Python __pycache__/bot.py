@@ -7,17 +7,54 @@ import time
 import threading
 import random
 import sqlite3
-from config import config, Emoji, Categories
+import io
+import html
+from config import config, Emoji, Categories, ORDER_STATUS_TEXT
 import os
 import requests
+from structured_logging import setup_logging, log_context
+from profiler import ArmedProfiler, ProfilerBusy
 
-# Настройка логирования
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO
-)
+# Журнал пишется фоновым потоком: обработчики только кладут запись в очередь
+setup_logging(config.LOG_LEVEL, config.LOG_FORMAT, config.LOG_DEBUG_SAMPLE, config.LOG_QUEUE_SIZE)
 logger = logging.getLogger('VogueEliteBot')
 
+if config.TELEGRAM_API_URL:
+    telebot.apihelper.API_URL = config.TELEGRAM_API_URL.rstrip('/') + '/bot{0}/{1}'
+
+class LoggedTeleBot(telebot.TeleBot):
+    """TeleBot, у которого записи обработчиков несут update_id и chat_id, а время обработки пишется в журнал"""
+    
+    # Медленнее - предупреждение, быстрее - DEBUG (сэмплируется)
+    slow_ms = 2000
+    
+    # Профилировщик обновлений (/prof); метка обновления - его тип
+    profiler = None
+    
+    def process_new_updates(self, updates):
+        # update_id есть только у Update: переносим его на объекты, которые получат обработчики
+        for update in updates:
+            for obj in (update.message, update.edited_message, update.callback_query):
+                if obj is not None:
+                    obj.update_id = update.update_id
+        super().process_new_updates(updates)
+    
+    def _run_middlewares_and_handler(self, message, handlers, middlewares, update_type):
+        # Выполняется в потоке пула telebot, поэтому контекст ставится здесь
+        chat = getattr(getattr(message, 'message', message), 'chat', None)
+        with log_context(update_id=getattr(message, 'update_id', None), update_type=update_type,
+                         chat_id=chat.id if chat else None):
+            started = time.perf_counter()
+            profiled = self.profiler is not None and self.profiler.begin(update_type)
+            try:
+                return super()._run_middlewares_and_handler(message, handlers, middlewares, update_type)
+            finally:
+                if profiled:
+                    self.profiler.end()
+                duration_ms = round((time.perf_counter() - started) * 1000, 1)
+                logger.log(logging.WARNING if duration_ms >= self.slow_ms else logging.DEBUG,
+                           'Обновление обработано', extra={'duration_ms': duration_ms})
+
 class Database:
     """Класс для работы с базой данных SQLite"""
     def __init__(self, db_path='fashion_store.db'):
@@ -62,6 +99,14 @@ class Database:
             )
         ''')
         
+        # Отправленные события очереди заказов: защита от повтора после перезапуска
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS bot_outbox_sent (
+                event_id INTEGER PRIMARY KEY,
+                sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
         # Добавляем администратора
         cursor.execute('''
             INSERT OR IGNORE INTO bot_users 
@@ -85,7 +130,7 @@ class Database:
             ''', (telegram_id, username, first_name, last_name, language_code, referral_code))
             
             if cursor.rowcount > 0:
-                logger.info(f"Новый пользователь зарегистрирован: {first_name} (@{username})")
+                logger.debug(f"Новый пользователь зарегистрирован: {first_name} (@{username})")
                 return True
             else:
                 # Обновляем последнюю активность
@@ -120,7 +165,7 @@ class Database:
             ))
         
         self.conn.commit()
-        logger.info(f"Кэш товаров обновлен: {len(products)} товаров")
+        logger.debug(f"Кэш товаров обновлен: {len(products)} товаров")
     
     def get_cached_products(self, category=None, limit=10):
         """Получение товаров из кэша"""
@@ -154,32 +199,214 @@ class Database:
         result = cursor.fetchone()
         return dict(result) if result else None
     
+    def is_event_sent(self, event_id):
+        """Было ли событие очереди уже отправлено этим ботом"""
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT 1 FROM bot_outbox_sent WHERE event_id = ?', (event_id,))
+        return cursor.fetchone() is not None
+    
+    def mark_event_sent(self, event_id):
+        """Запомнить отправку до подтверждения веб-приложению"""
+        self.conn.execute('INSERT OR IGNORE INTO bot_outbox_sent (event_id) VALUES (?)', (event_id,))
+        self.conn.commit()
+    
+    def purge_sent_events(self, days=30):
+        """Удаление старых записей об отправке"""
+        self.conn.execute(
+            "DELETE FROM bot_outbox_sent WHERE sent_at < datetime('now', ?)", (f'-{days} days',)
+        )
+        self.conn.commit()
+    
     def close(self):
         """Закрытие соединения с БД"""
         self.conn.close()
 
+class OutboxDispatcher:
+    """Отправка событий заказов из очереди веб-приложения (outbox_events).
+    
+    Забирает пачку через /api/bot/outbox/claim, отправляет сообщения не
+    быстрее OUTBOX_SEND_RATE в секунду (и не чаще раза в секунду в один чат)
+    и подтверждает через /api/bot/outbox/ack. Отправленное событие сначала
+    записывается в bot_outbox_sent: если бот упадет до подтверждения, после
+    перезапуска событие вернется из очереди и будет подтверждено без
+    повторной отправки.
+    """
+    
+    def __init__(self, bot, db, web_app_url, token=None, batch_size=None,
+                 poll_interval=None, send_rate=None, http=None):
+        self.bot = bot
+        self.db = db
+        self.web_app_url = web_app_url
+        self.token = token or config.BOT_API_TOKEN
+        self.batch_size = batch_size or config.OUTBOX_BATCH_SIZE
+        self.poll_interval = poll_interval or config.OUTBOX_POLL_INTERVAL
+        self.send_interval = 1 / (send_rate or config.OUTBOX_SEND_RATE)
+        self.http = http or requests.Session()
+        self.http.headers['Authorization'] = f"Bearer {self.token}"
+        self.pending_sent = []
+        self.pending_failed = []
+        self._last_send = 0
+        self._last_chat_send = {}
+    
+    def run_once(self):
+        """Одна пачка: подтвердить хвост прошлой, забрать и отправить новую. Возвращает размер пачки"""
+        if not self.flush_acks():
+            return 0
+        
+        response = self.http.post(f"{self.web_app_url}/api/bot/outbox/claim",
+                                  json={'limit': self.batch_size}, timeout=10)
+        response.raise_for_status()
+        events = response.json().get('events', [])
+        
+        for index, event in enumerate(events):
+            retry_after = self.deliver(event)
+            if retry_after:
+                # Telegram просит подождать: остаток пачки возвращается в очередь без попытки
+                self.pending_failed += [
+                    {'id': e['id'], 'error': 'flood wait', 'retry_after': retry_after, 'attempted': False}
+                    for e in events[index + 1:]
+                ]
+                time.sleep(retry_after)
+                break
+        
+        self.flush_acks()
+        return len(events)
+    
+    def deliver(self, event):
+        """Отправить одно событие; возвращает паузу, которую просит Telegram (429)"""
+        if self.db.is_event_sent(event['id']):
+            self.pending_sent.append(event['id'])
+            return 0
+        
+        chat_id = event.get('chat_id')
+        if not chat_id:
+            self.pending_failed.append({'id': event['id'], 'error': 'нет chat_id', 'retry': False})
+            return 0
+        
+        self._pace(chat_id)
+        try:
+            self.bot.send_message(chat_id, self.format_event(event), parse_mode='HTML')
+        except telebot.apihelper.ApiTelegramException as e:
+            if e.error_code == 429:
+                retry_after = (e.result_json.get('parameters') or {}).get('retry_after', 5)
+                self.pending_failed.append({'id': event['id'], 'error': e.description,
+                                            'retry_after': retry_after, 'attempted': False})
+                return retry_after
+            # 400/403: чат не найден или бот заблокирован - повтор не поможет
+            self.pending_failed.append({'id': event['id'], 'error': e.description,
+                                        'retry': e.error_code >= 500})
+            return 0
+        except Exception as e:
+            self.pending_failed.append({'id': event['id'], 'error': str(e)})
+            return 0
+        
+        self.db.mark_event_sent(event['id'])
+        self.pending_sent.append(event['id'])
+        return 0
+    
+    def flush_acks(self):
+        """Подтвердить накопленное; False, если веб-приложение недоступно"""
+        if not self.pending_sent and not self.pending_failed:
+            return True
+        try:
+            response = self.http.post(f"{self.web_app_url}/api/bot/outbox/ack", json={
+                'sent': self.pending_sent,
+                'failed': self.pending_failed,
+            }, timeout=10)
+            response.raise_for_status()
+        except Exception as e:
+            logger.error(f"Ошибка подтверждения очереди заказов: {e}")
+            return False
+        self.pending_sent, self.pending_failed = [], []
+        return True
+    
+    def _pace(self, chat_id):
+        """Общий темп отправки и не чаще одного сообщения в секунду в чат"""
+        now = time.monotonic()
+        wait = max(self._last_send + self.send_interval - now,
+                   self._last_chat_send.get(chat_id, 0) + 1 - now)
+        if wait > 0:
+            time.sleep(wait)
+            now = time.monotonic()
+        self._last_send = now
+        self._last_chat_send[chat_id] = now
+        if len(self._last_chat_send) > 10000:
+            self._last_chat_send = {c: t for c, t in self._last_chat_send.items() if now - t < 1}
+    
+    def format_event(self, event):
+        """Текст сообщения покупателю или администратору"""
+        order = event['order']
+        number = html.escape(order['order_number'])
+        
+        if event['recipient'] == 'admin':
+            customer = event['customer']
+            name = html.escape(customer.get('first_name') or '')
+            if customer.get('username'):
+                name += f" (@{html.escape(customer['username'])})"
+            items = '\n'.join(
+                f"• {html.escape(str(item.get('name', '')))} × {item.get('quantity', 1)}"
+                for item in order['items'][:20]
+            )
+            return f"""
+{Emoji.ADMIN} <b>НОВЫЙ ЗАКАЗ {number}</b>
+
+{Emoji.USER} {name}
+{Emoji.MONEY} Сумма: {order['final_amount']:,.0f} ₽
+{Emoji.DELIVERY} {html.escape(order.get('delivery_address') or 'адрес не указан')}
+
+{items}
+"""
+        
+        if event['kind'] == 'order_created':
+            return f"""
+{Emoji.CHECK} <b>ЗАКАЗ {number} ОФОРМЛЕН</b>
+
+{Emoji.MONEY} Сумма к оплате: {order['final_amount']:,.0f} ₽
+{Emoji.ORDER} Товаров: {sum(item.get('quantity', 1) for item in order['items'])}
+
+{Emoji.INFO} Мы свяжемся с вами для подтверждения заказа.
+"""
+        
+        status = ORDER_STATUS_TEXT.get(event['status'], event['status'])
+        icon = Emoji.CANCEL if event['status'] == 'cancelled' else Emoji.DELIVERY
+        return f"{icon} Заказ <b>{number}</b> {html.escape(status)}"
+    
+    def start(self):
+        """Фоновый поток: пачки подряд, пока очередь не пуста, затем пауза"""
+        def loop():
+            while True:
+                try:
+                    if self.run_once() >= self.batch_size:
+                        continue
+                except Exception as e:
+                    logger.error(f"Ошибка отправки очереди заказов: {e}")
+                time.sleep(self.poll_interval)
+        
+        thread = threading.Thread(target=loop, daemon=True)
+        thread.start()
+        return thread
+
 class VogueEliteBot:
     """Основной класс Telegram бота"""
     
-    def __init__(self):
-        self.bot = telebot.TeleBot(config.BOT_TOKEN)
-        self.db = Database()
+    def __init__(self, db=None, background_tasks=True):
+        self.bot = LoggedTeleBot(config.BOT_TOKEN)
+        self.bot.profiler = ArmedProfiler(config.PROFILER_INTERVAL, config.PROFILER_SWITCH_INTERVAL)
+        self.bot.profiler.max_seconds = config.PROFILER_MAX_SECONDS
+        self.db = db or Database()
         self.web_app_url = config.WEB_APP_URL
         self.user_states = {}  # Для многошаговых операций
         
-        print("=" * 70)
-        print("✨ VOGUE ÉLITE TELEGRAM BOT")
-        print("=" * 70)
-        print("🤖 Бот запущен")
-        print("🌐 Web App:", self.web_app_url)
-        print("🛡️ Admin ID:", config.ADMIN_IDS[0])
-        print("🗄️ База данных: fashion_store.db")
-        print("=" * 70)
-        
         self.setup_handlers()
-        self.start_background_tasks()
-        
-        logger.info("Бот Vogue Élite инициализирован")
+        # Без фоновых задач бот не ходит в веб-приложение сам (нагрузочный прогон)
+        if background_tasks:
+            self.start_background_tasks()
+        
+        logger.info("Бот Vogue Élite инициализирован", extra={
+            'web_app_url': self.web_app_url,
+            'admin_id': config.ADMIN_IDS[0],
+            'database': self.db.db_path,
+        })
     
     def start_background_tasks(self):
         """Запуск фоновых задач"""
@@ -217,6 +444,11 @@ class VogueEliteBot:
         
         thread = threading.Thread(target=clean_states, daemon=True)
         thread.start()
+        
+        # Сообщения о заказах из очереди веб-приложения
+        self.db.purge_sent_events()
+        self.outbox = OutboxDispatcher(self.bot, self.db, self.web_app_url)
+        self.outbox.start()
     
     def setup_handlers(self):
         """Настройка обработчиков команд"""
@@ -341,6 +573,13 @@ class VogueEliteBot:
                 return
             self.start_broadcast(message)
         
+        @self.bot.message_handler(commands=['prof'])
+        def handle_prof(message):
+            """Профилирование бота для админа"""
+            if message.chat.id not in config.ADMIN_IDS:
+                return
+            self.start_profiling(message)
+        
         # Обработка текстовых сообщений
         @self.bot.message_handler(func=lambda message: True)
         def handle_text(message):
@@ -580,6 +819,13 @@ class VogueEliteBot:
             web_app=types.WebAppInfo(url=f"{self.web_app_url}/product/{product_id}")
         ))
         
+        # Похожие товары (рекомендации считаются в веб-приложении заранее)
+        for similar in self.get_similar_products(product_id):
+            markup.add(types.InlineKeyboardButton(
+                f"{Emoji.STAR} {similar['name']} - {similar['price']:,.0f} ₽",
+                callback_data=f"product_{similar['id']}"
+            ))
+        
         self.bot.send_message(
             call.message.chat.id,
             f"{Emoji.INFO} <b>ПОДРОБНАЯ ИНФОРМАЦИЯ О ТОВАРЕ</b>\n\n"
@@ -589,6 +835,19 @@ class VogueEliteBot:
             parse_mode='HTML'
         )
     
+    def get_similar_products(self, product_id, limit=3):
+        """Похожие товары из веб-приложения"""
+        try:
+            response = requests.get(
+                f"{self.web_app_url}/api/products/{product_id}/similar",
+                params={'limit': limit}, timeout=5
+            )
+            if response.status_code == 200:
+                return response.json()
+        except Exception as e:
+            logger.error(f"Ошибка загрузки похожих товаров: {e}")
+        return []
+    
     def show_cart(self, message):
         """Показать корзину"""
         web_app_button = types.WebAppInfo(url=f"{self.web_app_url}/cart")
@@ -817,6 +1076,7 @@ Email: {config.SHOP_EMAIL}
 {Emoji.KEYBOARD} <b>Быстрые команды:</b>
 <code>/stats</code> - Статистика магазина
 <code>/broadcast</code> - Рассылка сообщений
+<code>/prof 30</code> - Профиль бота за 30 секунд
 <code>/admin</code> - Эта панель
 
 👇 <b>Управление:</b>
@@ -877,6 +1137,52 @@ Email: {config.SHOP_EMAIL}
             parse_mode='HTML'
         )
     
+    def start_profiling(self, message):
+        """Запустить профилировщик: /prof 30 [all] - по времени, /prof message 20 - N обновлений типа"""
+        args = (message.text or '').split()[1:]
+        seconds, target, count = None, None, None
+        all_threads = 'all' in args
+        args = [a for a in args if a != 'all']
+        try:
+            if len(args) == 2:
+                target, count = args[0], int(args[1])
+            else:
+                seconds = float(args[0]) if args else 30
+            self.bot.profiler.arm(seconds, target, count, all_threads,
+                                  on_done=lambda profile: self.send_profile(message.chat.id, profile))
+        except (ValueError, ProfilerBusy) as e:
+            self.bot.send_message(
+                message.chat.id,
+                f"{Emoji.CANCEL} {html.escape(str(e))}\n\n"
+                f"<code>/prof 30</code> - обновления за 30 секунд (<code>all</code> - все потоки)\n"
+                f"<code>/prof message 20</code> - 20 следующих обновлений типа",
+                parse_mode='HTML'
+            )
+            return
+        
+        scope = f"{count} обновлений {target}" if count else f"{seconds:g} с"
+        self.bot.send_message(
+            message.chat.id,
+            f"{Emoji.STATS} Профилирование запущено: {html.escape(scope)}. Результат придет файлом.",
+            parse_mode='HTML'
+        )
+    
+    def send_profile(self, chat_id, profile):
+        """Отправить профиль админу файлом collapsed (flamegraph.pl, speedscope)"""
+        top = '\n'.join(f"{share:.0%} {html.escape(frame)}" for frame, share in profile.top(5))
+        document = io.BytesIO(profile.collapsed().encode('utf-8'))
+        document.name = f"bot-{time.strftime('%Y%m%d-%H%M%S')}.collapsed"
+        try:
+            self.bot.send_document(
+                chat_id,
+                document,
+                caption=f"{Emoji.STATS} <b>Профиль бота</b>: {profile.samples} стеков за "
+                        f"{profile.seconds:.1f} с, обновлений {profile.meta['profiled']}\n\n{top}",
+                parse_mode='HTML'
+            )
+        except Exception as e:
+            logger.error(f"Не удалось отправить профиль: {e}")
+    
     def process_broadcast_message(self, message):
         """Обработать сообщение для рассылки"""
         if message.chat.id not in self.user_states:
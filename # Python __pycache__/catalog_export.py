@@ -0,0 +1,211 @@
+# catalog_export.py - потоковая выгрузка каталога (CSV, JSON Lines, YML для маркетплейсов)
+import io
+import os
+import csv
+import json
+import shutil
+import click
+from datetime import datetime
+from xml.sax.saxutils import escape, quoteattr
+from flask import current_app
+from sqlalchemy import select, func
+from config import config
+from catalog_import import products_cli
+from models import db, Product
+
+FEED_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+    'yml': 'application/xml; charset=utf-8',
+}
+
+EXPORT_COLUMNS = ('id', 'article', 'name', 'description', 'price', 'old_price', 'discount',
+                  'category', 'subcategory', 'brand', 'size', 'color', 'material', 'season',
+                  'country', 'image_url', 'stock', 'is_new', 'is_hit', 'is_exclusive', 'updated_at')
+
+# Строк, которые копятся в буфере перед отдачей клиенту
+CHUNK_ROWS = 500
+YIELD_PER = 1000
+
+
+def catalog_version():
+    """Версия каталога: время последнего изменения и число активных товаров"""
+    updated, count = db.session.execute(
+        select(func.max(Product.updated_at), func.count(Product.id))
+        .where(Product.is_active == True)
+    ).one()
+    stamp = updated.strftime('%Y%m%d%H%M%S%f') if updated else '0'
+    return f"{stamp}-{count}"
+
+
+def iter_products():
+    """Активные товары по одному, курсором порциями по YIELD_PER строк"""
+    columns = [Product.__table__.c[name] for name in EXPORT_COLUMNS]
+    result = db.session.execute(
+        select(*columns).where(Product.is_active == True).order_by(Product.id)
+        .execution_options(stream_results=True, yield_per=YIELD_PER)
+    )
+    for row in result:
+        yield row._mapping
+
+
+def _chunked(lines):
+    buffer = []
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) >= CHUNK_ROWS:
+            yield ''.join(buffer)
+            buffer.clear()
+    if buffer:
+        yield ''.join(buffer)
+
+
+def _chunked_rows(products, size):
+    chunk = []
+    for row in products:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _csv_value(value):
+    if isinstance(value, bool):
+        return int(value)
+    return '' if value is None else value
+
+
+def generate_csv(products):
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(EXPORT_COLUMNS)
+    yield out.getvalue()
+    for chunk in _chunked_rows(products, CHUNK_ROWS):
+        out.seek(0)
+        out.truncate()
+        writer.writerows([_csv_value(row[c]) for c in EXPORT_COLUMNS] for row in chunk)
+        yield out.getvalue()
+
+
+def generate_jsonl(products):
+    return _chunked(
+        json.dumps(dict(row), ensure_ascii=False, default=str) + '\n' for row in products
+    )
+
+
+def _tag(name, value):
+    return f"<{name}>{escape(str(value))}</{name}>" if value not in (None, '') else ''
+
+
+def generate_yml(products):
+    """Фид в формате Яндекс.Маркета (YML)"""
+    categories = db.session.scalars(
+        select(Product.category).where(Product.is_active == True)
+        .distinct().order_by(Product.category)
+    ).all()
+    category_ids = {name: i for i, name in enumerate(categories, start=1)}
+    base_url = config.WEB_APP_URL.rstrip('/')
+
+    yield (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<yml_catalog date="{datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S+00:00")}">\n<shop>'
+        f'{_tag("name", config.SHOP_NAME)}{_tag("company", config.SHOP_NAME)}{_tag("url", base_url)}'
+        '<currencies><currency id="RUR" rate="1"/></currencies>\n<categories>'
+        + ''.join(f'<category id="{i}">{escape(name)}</category>' for name, i in category_ids.items())
+        + '</categories>\n<offers>\n'
+    )
+    yield from _chunked(_yml_offer(row, base_url, category_ids) for row in products)
+    yield '</offers>\n</shop>\n</yml_catalog>\n'
+
+
+def _yml_offer(row, base_url, category_ids):
+    old_price = row['old_price'] if row['old_price'] and row['old_price'] > row['price'] else None
+    available = 'true' if row['stock'] else 'false'
+    return (
+        f'<offer id={quoteattr(row["article"])} available="{available}">'
+        + _tag('url', f"{base_url}/product/{row['id']}")
+        + _tag('price', row['price'])
+        + _tag('oldprice', old_price)
+        + '<currencyId>RUR</currencyId>'
+        + _tag('categoryId', category_ids.get(row['category']))
+        + _tag('picture', row['image_url'])
+        + _tag('name', row['name'])
+        + _tag('vendor', row['brand'])
+        + _tag('vendorCode', row['article'])
+        + _tag('description', row['description'])
+        + _tag('country_of_origin', row['country'])
+        + '</offer>\n'
+    )
+
+
+GENERATORS = {'csv': generate_csv, 'jsonl': generate_jsonl, 'yml': generate_yml}
+
+
+class FeedCache:
+    """Готовые фиды на диске: имя файла содержит версию каталога"""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path(self, fmt, version):
+        return os.path.join(self.directory, f"catalog-{version}.{fmt}")
+
+    def lookup(self, fmt, version):
+        path = self.path(fmt, version)
+        return path if os.path.exists(path) else None
+
+    def generate(self, fmt, version):
+        """Отдавать фид по частям и одновременно писать его в кэш.
+
+        Файл появляется под итоговым именем только после полной выгрузки,
+        поэтому оборванная загрузка не оставляет обрезанный фид.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(fmt, version)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+                for chunk in GENERATORS[fmt](iter_products()):
+                    f.write(chunk)
+                    yield chunk
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self._prune(fmt, keep=path)
+
+    def _prune(self, fmt, keep):
+        # Устаревшие версии того же формата больше не нужны
+        suffix = f".{fmt}"
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.startswith('catalog-') and name.endswith(suffix) and path != keep:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+def feed_cache():
+    return FeedCache(current_app.config['FEED_CACHE_DIR'])
+
+
+@products_cli.command('export')
+@click.argument('fmt', type=click.Choice(sorted(FEED_FORMATS)))
+@click.option('-o', '--output', type=click.Path(dir_okay=False),
+              help='Файл для выгрузки (по умолчанию - только в кэш фидов).')
+def export_command(fmt, output):
+    """Выгрузить активные товары в CSV, JSON Lines или YML."""
+    cache = feed_cache()
+    version = catalog_version()
+    path = cache.lookup(fmt, version)
+    if path is None:
+        for _ in cache.generate(fmt, version):
+            pass
+        path = cache.path(fmt, version)
+    if output:
+        shutil.copyfile(path, output)
+        path = output
+    click.echo(f"Фид {fmt}: {path} ({os.path.getsize(path) // 1024} КБ)")
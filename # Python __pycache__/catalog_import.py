@@ -0,0 +1,212 @@
+# catalog_import.py - потоковый импорт каталога товаров из CSV / JSON Lines
+import csv
+import json
+import time
+import click
+from datetime import datetime
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import text
+from sqlalchemy.dialects import sqlite, postgresql
+from models import db, Product
+from shared_cache import CATALOG
+
+products_cli = AppGroup('products', help='Каталог товаров.')
+
+REQUIRED_FIELDS = ('article', 'name', 'price', 'category')
+TEXT_FIELDS = ('name', 'description', 'detailed_description', 'category', 'subcategory',
+               'size', 'color', 'material', 'brand', 'season', 'country', 'image_url',
+               'images', 'dimensions', 'care_instructions')
+FLOAT_FIELDS = ('price', 'old_price', 'weight')
+INT_FIELDS = ('discount', 'stock')
+BOOL_FIELDS = ('is_new', 'is_hit', 'is_exclusive', 'is_limited', 'is_active')
+
+_TRUE = {'1', 'true', 'yes', 'да', 'y', 't'}
+_FALSE = {'0', 'false', 'no', 'нет', 'n', 'f', ''}
+
+
+class RowError(ValueError):
+    """Строка файла не прошла проверку"""
+
+
+def read_rows(path, fmt=None, delimiter=','):
+    """Построчно читать файл, не загружая его в память целиком"""
+    fmt = fmt or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        if fmt == 'csv':
+            for line_no, row in enumerate(csv.DictReader(f, delimiter=delimiter), start=2):
+                yield line_no, row
+        else:
+            for line_no, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    yield line_no, RowError(f'некорректный JSON: {e}')
+                    continue
+                yield line_no, row
+
+
+def _blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def validate_row(row):
+    """Привести строку файла к значениям колонок products"""
+    if isinstance(row, Exception):
+        raise row
+    if not isinstance(row, dict):
+        raise RowError('строка должна быть объектом')
+    for field in REQUIRED_FIELDS:
+        if _blank(row.get(field)):
+            raise RowError(f'не заполнено поле {field}')
+
+    values = {'article': str(row['article']).strip()}
+    if len(values['article']) > 50:
+        raise RowError('артикул длиннее 50 символов')
+    for field in TEXT_FIELDS:
+        if field in row and not _blank(row[field]):
+            values[field] = str(row[field]).strip()
+    for field in FLOAT_FIELDS:
+        if field in row and not _blank(row[field]):
+            try:
+                values[field] = float(str(row[field]).replace(',', '.').replace(' ', ''))
+            except ValueError:
+                raise RowError(f'{field}: ожидается число')
+    for field in INT_FIELDS:
+        if field in row and not _blank(row[field]):
+            try:
+                values[field] = int(row[field])
+            except (TypeError, ValueError):
+                raise RowError(f'{field}: ожидается целое число')
+    for field in BOOL_FIELDS:
+        if field in row:
+            value = row[field]
+            if isinstance(value, bool):
+                values[field] = value
+            elif str(value).strip().lower() in _TRUE:
+                values[field] = True
+            elif str(value).strip().lower() in _FALSE:
+                values[field] = False
+            else:
+                raise RowError(f'{field}: ожидается да/нет')
+
+    if values['price'] <= 0:
+        raise RowError('price должна быть больше нуля')
+    if values.get('stock', 0) < 0:
+        raise RowError('stock не может быть отрицательным')
+    return values
+
+
+def _upsert_statement(columns):
+    """INSERT ... ON CONFLICT (article) DO UPDATE для набора колонок"""
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        stmt = sqlite.insert(Product.__table__)
+    elif dialect == 'postgresql':
+        stmt = postgresql.insert(Product.__table__)
+    else:
+        raise click.ClickException(f'Импорт не поддерживает СУБД {dialect}')
+    updated = {c: stmt.excluded[c] for c in columns if c not in ('article', 'created_at')}
+    return stmt.on_conflict_do_update(index_elements=['article'], set_=updated)
+
+
+class ImportReport:
+    def __init__(self):
+        self.read = 0
+        self.upserted = 0
+        self.rejected = []
+        self.started = time.perf_counter()
+
+    @property
+    def seconds(self):
+        return time.perf_counter() - self.started
+
+
+def import_products(rows, batch_size=2000, commit_every=10, reject_limit=1000):
+    """Upsert товаров по артикулу пачками executemany.
+
+    rows - итератор пар (номер строки, словарь). Каждые batch_size строк
+    уходят одним executemany, транзакция фиксируется раз в commit_every пачек,
+    так что память и размер транзакции ограничены при любом объеме файла.
+    """
+    report = ImportReport()
+    statements = {}
+    batch = {}
+    pending_batches = 0
+
+    def flush():
+        nonlocal pending_batches
+        # Строки с одинаковым набором колонок уходят одним executemany
+        groups = {}
+        for values in batch.values():
+            groups.setdefault(tuple(sorted(values)), []).append(values)
+        for columns, group in groups.items():
+            stmt = statements.get(columns)
+            if stmt is None:
+                stmt = statements[columns] = _upsert_statement(columns)
+            db.session.execute(stmt, group)
+        report.upserted += len(batch)
+        batch.clear()
+        pending_batches += 1
+        if pending_batches >= commit_every:
+            db.session.commit()
+            pending_batches = 0
+
+    now = datetime.utcnow()
+    for line_no, row in rows:
+        report.read += 1
+        try:
+            values = validate_row(row)
+        except RowError as e:
+            if len(report.rejected) < reject_limit:
+                report.rejected.append((line_no, str(e)))
+            else:
+                report.rejected.append((line_no, None))
+            continue
+        values['created_at'] = values['updated_at'] = now
+        # Повтор артикула в пачке: побеждает последняя строка
+        batch[values['article']] = values
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    db.session.commit()
+    return report
+
+
+def finish_import():
+    """Однократные действия после загрузки: статистика планировщика и сброс кэшей"""
+    db.session.execute(text('ANALYZE products'))
+    db.session.commit()
+    cache = current_app.extensions.get('template_cache')
+    if cache is not None:
+        cache.invalidate()
+    shared = current_app.extensions.get('shared_cache')
+    if shared is not None:
+        shared.invalidate(CATALOG)
+
+
+@products_cli.command('import')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']),
+              help='Формат файла (по умолчанию по расширению).')
+@click.option('--delimiter', default=',', show_default=True, help='Разделитель CSV.')
+@click.option('--batch-size', default=2000, show_default=True, help='Строк в одном executemany.')
+@click.option('--commit-every', default=10, show_default=True, help='Пачек в одной транзакции.')
+def import_command(path, fmt, delimiter, batch_size, commit_every):
+    """Загрузить или обновить товары из CSV / JSON Lines (ключ - article)."""
+    report = import_products(read_rows(path, fmt, delimiter),
+                             batch_size=batch_size, commit_every=commit_every)
+    finish_import()
+
+    rate = report.read / report.seconds if report.seconds else 0
+    click.echo(f"Прочитано строк: {report.read}, загружено: {report.upserted}, "
+               f"отклонено: {len(report.rejected)}")
+    click.echo(f"Время: {report.seconds:.2f} с ({rate:,.0f} строк/с)".replace(',', ' '))
+    shown = [r for r in report.rejected if r[1] is not None][:20]
+    for line_no, reason in shown:
+        click.echo(f"  строка {line_no}: {reason}", err=True)
+    if len(report.rejected) > len(shown):
+        click.echo(f"  ... и еще {len(report.rejected) - len(shown)}", err=True)
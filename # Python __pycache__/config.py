@@ -1,5 +1,7 @@
 # config.py - ИСПРАВЛЕННАЯ ВЕРСИЯ
 import os
+import hashlib
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -8,11 +10,110 @@ class Config:
     # Telegram
     BOT_TOKEN = os.getenv('BOT_TOKEN', '8445063044:AAGwsp4PGsSInBDYfAwVWeOq6FNEgZHqImc')
     ADMIN_IDS = [int(os.getenv('ADMIN_ID', '1217487530'))]
+    # Адрес Bot API: пусто - api.telegram.org; свой сервер или benchmarks/fake_telegram.py
+    TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL', '')
     
     # Flask
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key')
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///fashion_store.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Рабочие файлы (кэши с pickle и байткодом) - не в /tmp: там их может подложить другой пользователь
+    INSTANCE_DIR = os.getenv('INSTANCE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance'))
+    
+    # Метрики производительности (/metrics)
+    METRICS_DIR = os.getenv('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'vogue_elite_metrics'))
+    METRICS_FLUSH_INTERVAL = int(os.getenv('METRICS_FLUSH_INTERVAL', '5'))
+    # Без токена /metrics открыт только в режиме отладки, на сервере отвечает 404
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+    
+    # Журнал: JSON (или text) через очередь в фоновый поток. LOG_DEBUG_SAMPLE - доля
+    # DEBUG-записей каждого места вызова, LOG_QUEUE_SIZE - записей в очереди до отбрасывания
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')
+    LOG_DEBUG_SAMPLE = float(os.getenv('LOG_DEBUG_SAMPLE', '0.01'))
+    LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+    LOG_SLOW_REQUEST_MS = int(os.getenv('LOG_SLOW_REQUEST_MS', '1000'))
+    
+    # Профилировщик по запросу админа: шаг сэмплирования (с), интервал переключения
+    # потоков на время профилирования (0 - не менять), предел длительности и
+    # сколько последних профилей хранить в PROFILER_DIR (общем для воркеров)
+    PROFILER_DIR = os.getenv('PROFILER_DIR', os.path.join(tempfile.gettempdir(), 'vogue_elite_profiles'))
+    PROFILER_INTERVAL = float(os.getenv('PROFILER_INTERVAL', '0.01'))
+    PROFILER_SWITCH_INTERVAL = float(os.getenv('PROFILER_SWITCH_INTERVAL', '0.0001'))
+    PROFILER_MAX_SECONDS = int(os.getenv('PROFILER_MAX_SECONDS', '300'))
+    PROFILER_KEEP = int(os.getenv('PROFILER_KEEP', '20'))
+    
+    # Собранная статика (flask assets build); по умолчанию static/dist
+    ASSETS_DIST_DIR = os.getenv('ASSETS_DIST_DIR')
+    
+    # Кэш шаблонов: байткод на диске и отрендеренные фрагменты в памяти
+    TEMPLATE_BYTECODE_DIR = os.getenv('TEMPLATE_BYTECODE_DIR', os.path.join(INSTANCE_DIR, 'jinja'))
+    FRAGMENT_CACHE_TTL = int(os.getenv('FRAGMENT_CACHE_TTL', '300'))
+    
+    # Общий кэш воркеров: LRU в памяти процесса и SQLite (WAL) + файл версий в CACHE_DIR.
+    # CACHE_DIR должен быть общим для воркеров и команд flask на этой машине; не в /tmp:
+    # в кэше pickle, каталог создается с правами 0700 (shared_cache.private_directory)
+    CACHE_DIR = os.getenv('CACHE_DIR', os.path.join(INSTANCE_DIR, 'cache'))
+    CACHE_SHARED = os.getenv('CACHE_SHARED', '1') != '0'
+    CACHE_DEFAULT_TTL = int(os.getenv('CACHE_DEFAULT_TTL', '300'))
+    CACHE_LOCAL_MAX_ENTRIES = int(os.getenv('CACHE_LOCAL_MAX_ENTRIES', '10000'))
+    CACHE_SHARED_MAX_ENTRIES = int(os.getenv('CACHE_SHARED_MAX_ENTRIES', '50000'))
+    
+    # Резерв товара под неоплаченный заказ и его фоновое снятие
+    RESERVATION_TTL_MINUTES = int(os.getenv('RESERVATION_TTL_MINUTES', '30'))
+    RESERVATION_SWEEP_INTERVAL = int(os.getenv('RESERVATION_SWEEP_INTERVAL', '60'))
+    RESERVATION_SWEEP_BATCH = int(os.getenv('RESERVATION_SWEEP_BATCH', '500'))
+    
+    # Акции: как часто проверять расписание запуска и окончания (секунды)
+    PROMOTION_CHECK_INTERVAL = int(os.getenv('PROMOTION_CHECK_INTERVAL', '60'))
+    
+    # Промокоды: как часто воркер перечитывает таблицу правил (секунды)
+    PROMO_CODES_REFRESH = int(os.getenv('PROMO_CODES_REFRESH', '60'))
+    
+    # Избранное и сравнение: сколько товаров хранится (старые вытесняются)
+    WISHLIST_MAX_ITEMS = int(os.getenv('WISHLIST_MAX_ITEMS', '500'))
+    COMPARE_MAX_ITEMS = int(os.getenv('COMPARE_MAX_ITEMS', '8'))
+    
+    # Уведомления по SSE: опрос таблицы одним потоком на воркер, пинг и срок жизни соединения
+    NOTIFICATIONS_POLL_INTERVAL = float(os.getenv('NOTIFICATIONS_POLL_INTERVAL', '1'))
+    NOTIFICATIONS_HEARTBEAT = int(os.getenv('NOTIFICATIONS_HEARTBEAT', '25'))
+    NOTIFICATIONS_STREAM_TIMEOUT = int(os.getenv('NOTIFICATIONS_STREAM_TIMEOUT', '600'))
+    # Открытых потоков на воркер; должно быть меньше GUNICORN_THREADS
+    NOTIFICATIONS_MAX_STREAMS = int(os.getenv('NOTIFICATIONS_MAX_STREAMS', '12'))
+    
+    # Очередь сообщений бота: токен для /api/bot/outbox/* (по умолчанию выводится из BOT_TOKEN),
+    # срок закрепления выданной пачки, попытки доставки и темп отправки в Telegram
+    BOT_API_TOKEN = os.getenv('BOT_API_TOKEN') or hashlib.sha256(f"outbox:{BOT_TOKEN}".encode()).hexdigest()
+    OUTBOX_CLAIM_SECONDS = int(os.getenv('OUTBOX_CLAIM_SECONDS', '120'))
+    OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', '8'))
+    OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', '50'))
+    OUTBOX_POLL_INTERVAL = float(os.getenv('OUTBOX_POLL_INTERVAL', '3'))
+    OUTBOX_SEND_RATE = float(os.getenv('OUTBOX_SEND_RATE', '20'))
+    
+    # Idempotency-Key: сколько хранится ответ (секунды) и когда брошенный ключ можно занять снова
+    IDEMPOTENCY_TTL = int(os.getenv('IDEMPOTENCY_TTL', '86400'))
+    IDEMPOTENCY_LOCK_SECONDS = int(os.getenv('IDEMPOTENCY_LOCK_SECONDS', '60'))
+    IDEMPOTENCY_PURGE_INTERVAL = int(os.getenv('IDEMPOTENCY_PURGE_INTERVAL', '600'))
+    
+    # Лимиты частоты запросов. RATE_LIMIT_PROXY_HOPS - число прокси перед приложением
+    # (на Render - 1, там он и по умолчанию; иначе все клиенты делили бы IP прокси),
+    # RATE_LIMITS переопределяет лимиты маршрутов:
+    # 'shop.api_products:ip=60/minute;shop.api_create_order:ip=20/minute,user=5/minute'
+    RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', '1') != '0'
+    RATE_LIMIT_PROXY_HOPS = int(os.getenv('RATE_LIMIT_PROXY_HOPS', '1' if os.getenv('RENDER') else '0'))
+    RATE_LIMITS = os.getenv('RATE_LIMITS', '')
+    
+    # Фиды каталога (/feeds/catalog.csv|jsonl|yml); токен необязателен
+    FEED_CACHE_DIR = os.getenv('FEED_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'vogue_elite_feeds'))
+    FEED_TOKEN = os.getenv('FEED_TOKEN')
+    
+    # Кэш пользователей для current_user (секунды жизни снимка в воркере)
+    USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', '30'))
+    USER_CACHE_MAX_ENTRIES = int(os.getenv('USER_CACHE_MAX_ENTRIES', '10000'))
+    
+    # Вход через Telegram WebApp: срок действия initData и размер кэша проверенных подписей
+    TELEGRAM_AUTH_MAX_AGE = int(os.getenv('TELEGRAM_AUTH_MAX_AGE', '86400'))
+    TELEGRAM_AUTH_CACHE_SIZE = int(os.getenv('TELEGRAM_AUTH_CACHE_SIZE', '10000'))
     
     # Shop
     SHOP_NAME = "VOGUE ÉLITE"
@@ -108,4 +209,30 @@ class Categories:
     BAGS = "Сумки"
     JEWELRY = "Украшения"
 
+
+# Образцы цветов для выбора варианта товара (ключ - название в нижнем регистре)
+COLOR_HEX = {
+    'черный': '#000000',
+    'белый': '#ffffff',
+    'красный': '#c0392b',
+    'бежевый': '#d8c3a5',
+    'синий': '#1f3a93',
+    'зеленый': '#2e7d32',
+    'серый': '#8e8e8e',
+    'коричневый': '#6d4c41',
+    'розовый': '#f4a6c1',
+    'золотой': '#d4af37',
+    'серебряный': '#c0c0c0',
+}
+DEFAULT_COLOR_HEX = '#cccccc'
+
+# Статусы заказа в тексте уведомлений (общие для сайта и бота)
+ORDER_STATUS_TEXT = {
+    'new': 'принят',
+    'processing': 'обрабатывается',
+    'shipped': 'отправлен',
+    'delivered': 'доставлен',
+    'cancelled': 'отменен',
+}
+
 config = Config()
\ No newline at end of file
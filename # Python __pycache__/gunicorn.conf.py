@@ -0,0 +1,35 @@
+# gunicorn.conf.py - запуск веб-приложения (web: gunicorn -c gunicorn.conf.py app:app)
+import os
+import shutil
+import multiprocessing
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+# Потоки воркера (gthread): поток SSE-уведомлений держит один поток на время соединения
+threads = int(os.getenv('GUNICORN_THREADS', '16'))
+
+# Приложение импортируется один раз в мастере, воркеры получают его через fork
+preload_app = True
+
+
+def on_starting(server):
+    """Очистка метрик воркеров прошлого запуска"""
+    from config import config
+    shutil.rmtree(config.METRICS_DIR, ignore_errors=True)
+    os.makedirs(config.METRICS_DIR, exist_ok=True)
+
+
+def when_ready(server):
+    """Компиляция шаблонов и заморозка GC в мастере до запуска воркеров"""
+    import app as web
+    web.warm_up(web.app)
+
+
+def post_fork(server, worker):
+    """Соединения с БД не должны переходить в воркер из мастера"""
+    import app as web
+    with web.app.app_context():
+        web.db.engine.dispose(close=False)
+    # Потоки есть в каждом воркере, работу выполняет владелец аренды
+    web.reservation_sweeper.start(web.app)
+    web.promotion_scheduler.start(web.app)
@@ -0,0 +1,168 @@
+# idempotency.py - заголовок Idempotency-Key для оформления заказа и изменений корзины
+import time
+import hashlib
+import functools
+from datetime import datetime, timedelta
+from flask import request, jsonify, make_response, Response
+from flask_login import current_user
+from sqlalchemy import update, delete, or_
+from sqlalchemy.exc import IntegrityError
+from models import db, IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 100
+
+
+def fingerprint(endpoint, body):
+    """Отпечаток запроса: тот же ключ с другим телом - ошибка клиента"""
+    return hashlib.sha256(endpoint.encode() + b'\0' + body).hexdigest()
+
+
+def _error(message, status, retry_after=None):
+    response = jsonify({'success': False, 'message': message})
+    response.status_code = status
+    if retry_after:
+        response.headers['Retry-After'] = str(retry_after)
+    return response
+
+
+class IdempotencyStore:
+    """Повтор запроса с тем же Idempotency-Key получает сохраненный ответ.
+
+    Ключ пользователя занимается отдельной короткой транзакцией до
+    транзакции маршрута (INSERT по первичному ключу), поэтому из двух
+    одновременных запросов выполняется только один, второй получает 409.
+    Ответы с кодом ниже 500 сохраняются на IDEMPOTENCY_TTL секунд; после
+    ошибки сервера ключ освобождается и запрос можно повторить. Повтор
+    читает одну строку и не трогает товары и заказы. Запросы без
+    заголовка выполняются как раньше.
+    """
+
+    def __init__(self, app=None, clock=datetime.utcnow):
+        self.clock = clock
+        self.ttl = timedelta(seconds=86400)
+        self.lock_timeout = timedelta(seconds=60)
+        self.purge_interval = 600
+        self._next_purge = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = timedelta(seconds=app.config.get('IDEMPOTENCY_TTL', 86400))
+        self.lock_timeout = timedelta(seconds=app.config.get('IDEMPOTENCY_LOCK_SECONDS', 60))
+        self.purge_interval = app.config.get('IDEMPOTENCY_PURGE_INTERVAL', 600)
+        self._next_purge = time.monotonic() + self.purge_interval
+        app.extensions['idempotency'] = self
+
+    def idempotent(self, view):
+        """Декоратор маршрута (под login_required)"""
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            key = request.headers.get(HEADER)
+            if key is None:
+                return view(*args, **kwargs)
+            if not key or len(key) > MAX_KEY_LENGTH or not key.isprintable():
+                return _error(f'Некорректный {HEADER}', 400)
+
+            user_id = current_user.id
+            digest = fingerprint(request.endpoint, request.get_data())
+            row = self.claim(user_id, key, request.endpoint, digest)
+            if row is not None:
+                return self.replay(row, digest)
+
+            try:
+                response = view(*args, **kwargs)
+                response = make_response(response)
+            except Exception:
+                db.session.rollback()
+                self.release(user_id, key)
+                raise
+            if response.status_code >= 500:
+                self.release(user_id, key)
+            else:
+                self.store(user_id, key, response)
+            return response
+        return wrapper
+
+    # ========== ХРАНИЛИЩЕ ==========
+
+    def claim(self, user_id, key, endpoint, digest):
+        """Занять ключ. None - ключ наш, иначе существующая строка для ответа"""
+        now = self.clock()
+        self._maybe_purge(now)
+        values = dict(endpoint=endpoint, fingerprint=digest, state='processing',
+                      status_code=None, content_type=None, response_body=None,
+                      locked_until=now + self.lock_timeout, created_at=now,
+                      expires_at=now + self.ttl)
+
+        # Новый ключ - один INSERT; занятый - ошибка первичного ключа и чтение строки.
+        # Вторая попытка - если строку между ними удалил release() другого запроса
+        for _ in range(2):
+            try:
+                db.session.execute(IdempotencyKey.__table__.insert().values(user_id=user_id, key=key, **values))
+                db.session.commit()
+                return None
+            except IntegrityError:
+                db.session.rollback()
+            row = db.session.get(IdempotencyKey, (user_id, key))
+            if row is not None:
+                break
+        else:
+            raise RuntimeError(f'Не удалось занять {HEADER}')
+
+        # Просроченный ключ или ключ, брошенный упавшим воркером, занимается заново
+        stale = or_(IdempotencyKey.expires_at < now,
+                    (IdempotencyKey.state == 'processing') & (IdempotencyKey.locked_until < now))
+        if row.expires_at < now or (row.state == 'processing' and row.locked_until < now):
+            taken = db.session.execute(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key, stale)
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.session.commit()
+            if taken:
+                return None
+            db.session.refresh(row)
+        return row
+
+    def replay(self, row, digest):
+        """Ответ на повтор: сохраненный ответ, 409 пока первый запрос идет, 422 при другом теле"""
+        if row.fingerprint != digest:
+            return _error(f'{HEADER} уже использован с другим запросом', 422)
+        if row.state != 'done':
+            return _error('Запрос с этим ключом еще выполняется', 409, retry_after=1)
+        response = Response(row.response_body, status=row.status_code, content_type=row.content_type)
+        response.headers['Idempotent-Replayed'] = 'true'
+        return response
+
+    def store(self, user_id, key, response):
+        db.session.rollback()  # незафиксированные изменения маршрута не попадают в эту транзакцию
+        db.session.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+            .values(state='done', status_code=response.status_code,
+                    content_type=response.content_type, response_body=response.get_data(),
+                    locked_until=None)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+
+    def release(self, user_id, key):
+        db.session.execute(
+            delete(IdempotencyKey)
+            .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+
+    def _maybe_purge(self, now):
+        """Удаление просроченных ключей не чаще раза в IDEMPOTENCY_PURGE_INTERVAL на воркер"""
+        if time.monotonic() < self._next_purge:
+            return
+        self._next_purge = time.monotonic() + self.purge_interval
+        db.session.execute(
+            delete(IdempotencyKey).where(IdempotencyKey.expires_at < now)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
@@ -0,0 +1,107 @@
+# identity.py - кэш пользователей для Flask-Login (load_user без запроса к БД)
+import time
+import threading
+from collections import OrderedDict
+from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models import db, User
+from shared_cache import LocalVersions
+
+# Поля, которые копируются в снимок пользователя
+SNAPSHOT_FIELDS = tuple(c.name for c in User.__table__.columns)
+
+
+class UserSnapshot(UserMixin):
+    """Неизменяемая копия строки users для current_user.
+
+    Только для чтения: изменения пользователя делаются через свежую строку
+    (db.session.get(User, id) или UPDATE ... SET x = x + ...), после commit
+    снимок сбрасывается.
+    """
+    __slots__ = SNAPSHOT_FIELDS
+
+    def __init__(self, user):
+        for field in SNAPSHOT_FIELDS:
+            object.__setattr__(self, field, getattr(user, field))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"UserSnapshot только для чтения: {name}")
+
+    def __repr__(self):
+        return f"<UserSnapshot {self.id}>"
+
+
+class UserIdentityCache:
+    """Снимки пользователей в памяти воркера с коротким TTL.
+
+    Снимок помнит версию пользователя в общей таблице версий (SharedCache):
+    запись в users через ORM увеличивает ее после commit, и снимок
+    перестает читаться во всех воркерах. Массовые UPDATE нужно сбрасывать
+    явно через invalidate(). USER_CACHE_TTL ограничивает жизнь снимка,
+    если версию никто не увеличил (правка БД в обход приложения).
+    """
+
+    def __init__(self, app=None):
+        self.ttl = 30
+        self.max_entries = 10000
+        self.versions = LocalVersions()
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app, cache=None):
+        if cache is not None:
+            self.versions = cache.versions
+        self.ttl = app.config.get('USER_CACHE_TTL', 30)
+        self.max_entries = app.config.get('USER_CACHE_MAX_ENTRIES', 10000)
+        app.extensions['identity_cache'] = self
+        if not event.contains(Session, 'after_flush', self._after_flush):
+            event.listen(Session, 'after_flush', self._after_flush)
+            event.listen(Session, 'after_commit', self._after_commit)
+            event.listen(Session, 'after_rollback', self._after_rollback)
+
+    def get(self, user_id):
+        """Снимок пользователя или None, если его нет в БД"""
+        now = time.monotonic()
+        version = (self.versions.get('users'), self.versions.get(f'user:{user_id}'))
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > now and entry[1] == version:
+                self._entries.move_to_end(user_id)
+                return entry[2]
+
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        snapshot = UserSnapshot(user)
+        with self._lock:
+            self._entries[user_id] = (now + self.ttl, version, snapshot)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return snapshot
+
+    def invalidate(self, user_id=None):
+        """Сбросить снимок пользователя (или все снимки) во всех воркерах"""
+        self.versions.bump('users' if user_id is None else f'user:{user_id}')
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+
+    # Изменения users через ORM сбрасывают снимки после успешного commit
+    def _after_flush(self, session, flush_context):
+        changed = {obj.id for obj in (*session.new, *session.dirty, *session.deleted)
+                   if isinstance(obj, User)}
+        if changed:
+            session.info.setdefault('_stale_users', set()).update(changed)
+
+    def _after_commit(self, session):
+        for user_id in session.info.pop('_stale_users', ()):
+            self.invalidate(user_id)
+
+    def _after_rollback(self, session):
+        session.info.pop('_stale_users', None)
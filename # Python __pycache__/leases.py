@@ -0,0 +1,25 @@
+# leases.py - аренда фоновых задач: задачу выполняет один воркер из всех
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from models import db, JobLease
+
+
+def acquire_lease(name, owner, now, until):
+    """Взять или продлить аренду name до until. True, если она у owner"""
+    result = db.session.execute(
+        update(JobLease)
+        .where(JobLease.name == name,
+               (JobLease.owner == owner) | (JobLease.expires_at < now))
+        .values(owner=owner, expires_at=until)
+    )
+    if result.rowcount:
+        db.session.commit()
+        return True
+    db.session.add(JobLease(name=name, owner=owner, expires_at=until))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Аренда есть и принадлежит другому живому воркеру
+        db.session.rollback()
+        return False
+    return True
@@ -0,0 +1,69 @@
+# manage.py - команды flask для схемы БД и начальных данных
+import logging
+import click
+from flask.cli import AppGroup
+from sqlalchemy.exc import IntegrityError
+from config import Categories
+from models import db, Product
+
+logger = logging.getLogger('VogueEliteWeb')
+
+db_cli = AppGroup('db', help='Схема базы данных и начальные данные.')
+
+
+def create_schema():
+    """Создать недостающие таблицы и индексы (повторный запуск безопасен)"""
+    db.create_all()
+    # create_all не добавляет новые индексы к уже существующим таблицам
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
+
+
+def seed_products():
+    """Тестовые товары для пустой витрины. Возвращает число добавленных"""
+    articles = [f"VOGUE{str(i).zfill(3)}" for i in range(1, 6)]
+    existing = {a for (a,) in db.session.query(Product.article)
+                .filter(Product.article.in_(articles))}
+    test_products = [
+        Product(
+            article=f"VOGUE{str(i).zfill(3)}",
+            name=f"Эксклюзивное платье {i}",
+            description=f"Роскошное платье премиум-класса {i}",
+            price=25000 + i*5000,
+            category=Categories.DRESSES,
+            size="XS,S,M,L,XL",
+            color="Черный, Белый, Красный",
+            material="Шелк, Кружево",
+            brand="VOGUE ÉLITE",
+            image_url="https://images.unsplash.com/photo-1595777457583-95e059d581b8?w=800&h=1200&fit=crop&q=80",
+            is_new=True if i < 3 else False,
+            is_exclusive=True,
+            stock=10
+        ) for i in range(1, 6) if f"VOGUE{str(i).zfill(3)}" not in existing
+    ]
+    if not test_products:
+        return 0
+    db.session.add_all(test_products)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Параллельный seed уже добавил те же артикулы
+        db.session.rollback()
+        return 0
+    logger.info("Созданы тестовые товары")
+    return len(test_products)
+
+
+@db_cli.command('migrate')
+def migrate_command():
+    """Создать недостающие таблицы и индексы."""
+    create_schema()
+    click.echo('Схема базы данных актуальна')
+
+
+@db_cli.command('seed')
+def seed_command():
+    """Добавить тестовые товары, если их еще нет."""
+    added = seed_products()
+    click.echo(f'Добавлено товаров: {added}')
@@ -0,0 +1,285 @@
+# metrics.py - метрики производительности веб-приложения (формат Prometheus)
+import os
+import hmac
+import json
+import time
+import atexit
+import threading
+from flask import g, request, has_request_context, current_app, Response, abort
+from flask import before_render_template, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Границы корзин гистограмм
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+
+
+def _observe(buckets, counts, value):
+    """Добавить наблюдение в гистограмму (счетчики по корзинам, не кумулятивные)"""
+    for i, bound in enumerate(buckets):
+        if value <= bound:
+            counts[i] += 1
+            return
+    counts[-1] += 1  # +Inf
+
+
+def _new_series():
+    return {
+        'count': 0,
+        'latency_buckets': [0] * (len(LATENCY_BUCKETS) + 1),
+        'latency_sum': 0.0,
+        'sql_buckets': [0] * (len(SQL_QUERY_BUCKETS) + 1),
+        'sql_queries': 0,
+        'sql_seconds': 0.0,
+        'template_seconds': 0.0,
+        'response_bytes': 0,
+    }
+
+
+class RequestMetrics:
+    """Сбор метрик по маршрутам: латентность, SQL, рендер шаблонов, размер ответа.
+
+    Каждый воркер gunicorn копит метрики в памяти и раз в METRICS_FLUSH_INTERVAL
+    секунд сбрасывает их в свой файл в METRICS_DIR. Эндпоинт /metrics суммирует файлы всех
+    воркеров, поэтому ответ не зависит от того, какой воркер его обработал.
+    """
+
+    def __init__(self, app=None):
+        self.directory = None
+        self.flush_interval = 5
+        self.token = None
+        self._lock = threading.Lock()
+        self._pid = None
+        self._started = 0
+        self._series = {}
+        self._statuses = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.directory = app.config['METRICS_DIR']
+        self.flush_interval = app.config.get('METRICS_FLUSH_INTERVAL', 5)
+        self.token = app.config.get('METRICS_TOKEN')
+        os.makedirs(self.directory, exist_ok=True)
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        before_render_template.connect(self._before_render, app)
+        template_rendered.connect(self._after_render, app)
+        _install_sql_listeners()
+
+        app.add_url_rule('/metrics', 'metrics', self.metrics_view)
+        atexit.register(self.flush)
+
+    # ========== СБОР ==========
+
+    def _before_request(self):
+        g._metrics = {
+            'start': time.perf_counter(),
+            'sql_queries': 0,
+            'sql_seconds': 0.0,
+            'template_seconds': 0.0,
+            'render_stack': [],
+            'status': 500,
+            'response_bytes': 0,
+        }
+
+    def _after_request(self, response):
+        state = g.get('_metrics')
+        if state is not None:
+            state['status'] = response.status_code
+            state['response_bytes'] = response.content_length or 0
+        return response
+
+    def _teardown_request(self, exc):
+        state = g.pop('_metrics', None)
+        if state is None:
+            return
+        duration = time.perf_counter() - state['start']
+        endpoint = request.endpoint or 'unmatched'
+        self.record(endpoint, request.method, state['status'], duration, state)
+
+    def _before_render(self, sender, template, context, **extra):
+        state = g.get('_metrics')
+        if state is not None:
+            state['render_stack'].append(time.perf_counter())
+
+    def _after_render(self, sender, template, context, **extra):
+        state = g.get('_metrics')
+        if state is not None and state['render_stack']:
+            state['template_seconds'] += time.perf_counter() - state['render_stack'].pop()
+
+    def record(self, endpoint, method, status, duration, state):
+        """Учесть завершенный запрос"""
+        with self._lock:
+            self._check_fork()
+            series = self._series.get((endpoint, method))
+            if series is None:
+                series = self._series[(endpoint, method)] = _new_series()
+            series['count'] += 1
+            _observe(LATENCY_BUCKETS, series['latency_buckets'], duration)
+            series['latency_sum'] += duration
+            _observe(SQL_QUERY_BUCKETS, series['sql_buckets'], state['sql_queries'])
+            series['sql_queries'] += state['sql_queries']
+            series['sql_seconds'] += state['sql_seconds']
+            series['template_seconds'] += state['template_seconds']
+            series['response_bytes'] += state['response_bytes']
+
+            key = (endpoint, method, str(status))
+            self._statuses[key] = self._statuses.get(key, 0) + 1
+
+    def _check_fork(self):
+        # После fork (preload_app) воркер не должен сбрасывать данные мастера как свои
+        pid = os.getpid()
+        if pid != self._pid:
+            self._pid = pid
+            self._started = int(time.time() * 1000)
+            self._series = {}
+            self._statuses = {}
+            # Фоновый сброс стартует уже в воркере: потоки не переживают fork
+            threading.Thread(target=self._flush_loop, daemon=True).start()
+
+    # ========== ХРАНЕНИЕ ==========
+
+    def _worker_path(self):
+        return os.path.join(self.directory, f"worker-{self._pid}-{self._started}.json")
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        """Сбросить метрики текущего воркера на диск"""
+        with self._lock:
+            if self._pid == os.getpid():
+                self._flush_locked()
+
+    def _flush_locked(self):
+        payload = {
+            'series': [[k[0], k[1], v] for k, v in self._series.items()],
+            'statuses': [[k[0], k[1], k[2], v] for k, v in self._statuses.items()],
+        }
+        path = self._worker_path()
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(payload, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+    def collect(self):
+        """Объединить метрики всех воркеров (включая завершившиеся)"""
+        self.flush()
+        series = {}
+        statuses = {}
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            names = []
+        for name in names:
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    payload = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for endpoint, method, data in payload.get('series', []):
+                total = series.setdefault((endpoint, method), _new_series())
+                for field, value in data.items():
+                    if isinstance(value, list):
+                        total[field] = [a + b for a, b in zip(total[field], value)]
+                    else:
+                        total[field] += value
+            for endpoint, method, status, count in payload.get('statuses', []):
+                key = (endpoint, method, status)
+                statuses[key] = statuses.get(key, 0) + count
+        return series, statuses
+
+    # ========== ЭКСПОРТ ==========
+
+    def render(self):
+        """Текстовый формат экспозиции Prometheus"""
+        series, statuses = self.collect()
+        lines = []
+
+        def labels(endpoint, method, **extra):
+            pairs = [('endpoint', endpoint), ('method', method)] + list(extra.items())
+            return ','.join(f'{k}="{v}"' for k, v in pairs)
+
+        def histogram(name, help_text, buckets, counts_field, sum_field):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for (endpoint, method), data in sorted(series.items()):
+                cumulative = 0
+                for bound, count in zip(buckets, data[counts_field]):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{{{labels(endpoint, method, le=bound)}}} {cumulative}")
+                lines.append(f"{name}_bucket{{{labels(endpoint, method, le='+Inf')}}} {data['count']}")
+                lines.append(f"{name}_sum{{{labels(endpoint, method)}}} {data[sum_field]}")
+                lines.append(f"{name}_count{{{labels(endpoint, method)}}} {data['count']}")
+
+        def counter(name, help_text, field):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for (endpoint, method), data in sorted(series.items()):
+                lines.append(f"{name}{{{labels(endpoint, method)}}} {data[field]}")
+
+        lines.append("# HELP http_requests_total Количество запросов по маршруту и статусу")
+        lines.append("# TYPE http_requests_total counter")
+        for (endpoint, method, status), count in sorted(statuses.items()):
+            lines.append(f"http_requests_total{{{labels(endpoint, method, status=status)}}} {count}")
+
+        histogram('http_request_duration_seconds', 'Время обработки запроса',
+                  LATENCY_BUCKETS, 'latency_buckets', 'latency_sum')
+        histogram('http_request_sql_queries', 'Количество SQL-запросов на HTTP-запрос',
+                  SQL_QUERY_BUCKETS, 'sql_buckets', 'sql_queries')
+        counter('http_request_sql_seconds_total', 'Суммарное время SQL', 'sql_seconds')
+        counter('http_request_template_seconds_total', 'Суммарное время рендера шаблонов', 'template_seconds')
+        counter('http_response_size_bytes_total', 'Суммарный размер ответов', 'response_bytes')
+        return '\n'.join(lines) + '\n'
+
+    def metrics_view(self):
+        if not self.token:
+            # Без токена метрики (маршруты, нагрузка) не раскрываем никому, кроме отладки
+            if not (current_app.debug or current_app.testing):
+                abort(404)
+        elif not hmac.compare_digest(request.headers.get('Authorization', ''), f"Bearer {self.token}"):
+            abort(401)
+        return Response(self.render(), mimetype='text/plain; version=0.0.4')
+
+
+# ========== SQL ==========
+
+_sql_listeners_installed = False
+
+
+def _install_sql_listeners():
+    """Подписка на события курсора всех движков SQLAlchemy (один раз на процесс)"""
+    global _sql_listeners_installed
+    if _sql_listeners_installed:
+        return
+    event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    _sql_listeners_installed = True
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('_metrics_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('_metrics_query_start')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    if not has_request_context():
+        return
+    state = g.get('_metrics')
+    if state is not None:
+        state['sql_queries'] += 1
+        state['sql_seconds'] += elapsed
@@ -0,0 +1,293 @@
+# models.py - модели базы данных
+from flask_sqlalchemy import SQLAlchemy
+from flask_login import UserMixin
+from datetime import datetime
+
+db = SQLAlchemy()
+
+# Модели базы данных
+class User(db.Model, UserMixin):
+    __tablename__ = 'users'
+    id = db.Column(db.Integer, primary_key=True)
+    telegram_id = db.Column(db.Integer, unique=True)
+    username = db.Column(db.String(100))
+    first_name = db.Column(db.String(100), nullable=False)
+    last_name = db.Column(db.String(100))
+    phone = db.Column(db.String(20))
+    email = db.Column(db.String(100))
+    is_admin = db.Column(db.Boolean, default=False)
+    is_vip = db.Column(db.Boolean, default=False)
+    total_orders = db.Column(db.Integer, default=0)
+    total_spent = db.Column(db.Float, default=0.0)
+    referral_code = db.Column(db.String(50), unique=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_activity = db.Column(db.DateTime, default=datetime.utcnow)
+
+class Product(db.Model):
+    __tablename__ = 'products'
+    id = db.Column(db.Integer, primary_key=True)
+    article = db.Column(db.String(50), unique=True, nullable=False)
+    name = db.Column(db.String(200), nullable=False)
+    description = db.Column(db.Text)
+    detailed_description = db.Column(db.Text)
+    price = db.Column(db.Float, nullable=False)
+    old_price = db.Column(db.Float)
+    discount = db.Column(db.Integer, default=0)
+    category = db.Column(db.String(100), nullable=False)
+    subcategory = db.Column(db.String(100))
+    size = db.Column(db.String(100))
+    color = db.Column(db.String(100))
+    material = db.Column(db.String(200))
+    brand = db.Column(db.String(100))
+    season = db.Column(db.String(50))
+    country = db.Column(db.String(50))
+    image_url = db.Column(db.String(500))
+    images = db.Column(db.Text)  # JSON строки с изображениями
+    is_new = db.Column(db.Boolean, default=False)
+    is_hit = db.Column(db.Boolean, default=False)
+    is_exclusive = db.Column(db.Boolean, default=False)
+    is_limited = db.Column(db.Boolean, default=False)
+    is_active = db.Column(db.Boolean, default=True)
+    stock = db.Column(db.Integer, default=0)
+    reserved = db.Column(db.Integer, default=0)
+    weight = db.Column(db.Float)
+    dimensions = db.Column(db.String(100))
+    care_instructions = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class Order(db.Model):
+    __tablename__ = 'orders'
+    id = db.Column(db.Integer, primary_key=True)
+    order_number = db.Column(db.String(50), unique=True, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    status = db.Column(db.String(50), default='new')
+    total_amount = db.Column(db.Float, nullable=False)
+    discount_amount = db.Column(db.Float, default=0.0)
+    delivery_cost = db.Column(db.Float, default=0.0)
+    final_amount = db.Column(db.Float, nullable=False)
+    delivery_address = db.Column(db.Text)
+    delivery_type = db.Column(db.String(50), default='courier')
+    payment_method = db.Column(db.String(50))
+    payment_status = db.Column(db.String(50), default='pending')
+    promo_code = db.Column(db.String(50))
+    customer_notes = db.Column(db.Text)
+    admin_notes = db.Column(db.Text)
+    items_json = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    user = db.relationship('User', backref=db.backref('orders', lazy=True))
+    
+    __table_args__ = (
+        # Постраничные списки заказов: ORDER BY created_at DESC, id DESC после фильтра
+        db.Index('ix_orders_user_created', 'user_id', 'created_at', 'id'),
+        db.Index('ix_orders_created', 'created_at', 'id'),
+        db.Index('ix_orders_status_created', 'status', 'created_at', 'id'),
+        db.Index('ix_orders_payment_created', 'payment_status', 'created_at', 'id'),
+    )
+
+class Cart(db.Model):
+    __tablename__ = 'cart'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
+    quantity = db.Column(db.Integer, default=1)
+    selected_size = db.Column(db.String(50))
+    selected_color = db.Column(db.String(50))
+    price_at_addition = db.Column(db.Float)
+    added_at = db.Column(db.DateTime, default=datetime.utcnow)
+    user = db.relationship('User', backref=db.backref('cart_items', lazy=True))
+    product = db.relationship('Product', backref=db.backref('cart_entries', lazy=True))
+
+class OrderItem(db.Model):
+    """Позиция заказа (нормализованная копия items_json для аналитики в SQL)"""
+    __tablename__ = 'order_items'
+    id = db.Column(db.Integer, primary_key=True)
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False, index=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'))
+    article = db.Column(db.String(50))
+    name = db.Column(db.String(200))
+    category = db.Column(db.String(100))
+    price = db.Column(db.Float, nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    size = db.Column(db.String(50))
+    color = db.Column(db.String(50))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)  # время заказа
+    order = db.relationship('Order', backref=db.backref('items', lazy=True))
+    
+    __table_args__ = (
+        db.Index('ix_order_items_created_at', 'created_at'),
+        db.Index('ix_order_items_product_created', 'product_id', 'created_at'),
+        db.Index('ix_order_items_category_created', 'category', 'created_at'),
+    )
+
+class StockReservation(db.Model):
+    """Резерв товара под неоплаченный заказ. Строка живет, пока резерв не снят"""
+    __tablename__ = 'stock_reservations'
+    id = db.Column(db.Integer, primary_key=True)
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False, index=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    order = db.relationship('Order', backref=db.backref('reservations', lazy=True))
+    
+    __table_args__ = (
+        # Уборщик читает только просроченные строки в порядке истечения
+        db.Index('ix_stock_reservations_expires_at', 'expires_at', 'id'),
+    )
+
+class JobLease(db.Model):
+    """Аренда фоновой задачи: в каждый момент ее выполняет один воркер"""
+    __tablename__ = 'job_leases'
+    name = db.Column(db.String(100), primary_key=True)
+    owner = db.Column(db.String(100), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+class ProductRecommendation(db.Model):
+    """Похожие товары, заранее посчитанные flask recommendations build"""
+    __tablename__ = 'product_recommendations'
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), primary_key=True)
+    rank = db.Column(db.Integer, primary_key=True)  # 0 - самый похожий
+    similar_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
+    score = db.Column(db.Float, nullable=False)
+
+class Promotion(db.Model):
+    """Правило акции: скидка в процентах на товары категории, бренда, сезона или списка артикулов"""
+    __tablename__ = 'promotions'
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(200), nullable=False)
+    discount_percent = db.Column(db.Integer, nullable=False)
+    target_type = db.Column(db.String(20), nullable=False)  # category, brand, season, articles
+    target_value = db.Column(db.Text, nullable=False)  # артикулы - по одному в строке
+    starts_at = db.Column(db.DateTime, nullable=False)
+    ends_at = db.Column(db.DateTime)
+    status = db.Column(db.String(20), default='scheduled')  # scheduled, active, finished, cancelled
+    affected_count = db.Column(db.Integer, default=0)
+    applied_at = db.Column(db.DateTime)
+    reverted_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_promotions_status_starts', 'status', 'starts_at'),
+    )
+
+class PromotionItem(db.Model):
+    """Цены товара до акции; строка живет, пока акция действует.
+    
+    product_id - первичный ключ: товар участвует не больше чем в одной акции.
+    """
+    __tablename__ = 'promotion_items'
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), primary_key=True)
+    promotion_id = db.Column(db.Integer, db.ForeignKey('promotions.id'), nullable=False, index=True)
+    price = db.Column(db.Float, nullable=False)
+    old_price = db.Column(db.Float)
+    discount = db.Column(db.Integer)
+    promo_price = db.Column(db.Float, nullable=False)  # цена, выставленная акцией
+
+class PromoCode(db.Model):
+    """Промокод и его правила; проверка идет по скомпилированной таблице в памяти (promo_codes.py)"""
+    __tablename__ = 'promo_codes'
+    id = db.Column(db.Integer, primary_key=True)
+    code = db.Column(db.String(50), unique=True, nullable=False)  # в верхнем регистре
+    discount_type = db.Column(db.String(10), nullable=False)  # percent, fixed
+    value = db.Column(db.Float, nullable=False)
+    min_amount = db.Column(db.Float, default=0)
+    categories = db.Column(db.Text)  # по одной категории в строке; пусто - все товары
+    max_uses = db.Column(db.Integer)  # пусто - без ограничения
+    per_user_limit = db.Column(db.Integer)
+    used_count = db.Column(db.Integer, default=0, nullable=False)
+    starts_at = db.Column(db.DateTime)
+    expires_at = db.Column(db.DateTime)
+    is_active = db.Column(db.Boolean, default=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class PromoRedemption(db.Model):
+    """Использование промокода в заказе"""
+    __tablename__ = 'promo_redemptions'
+    id = db.Column(db.Integer, primary_key=True)
+    promo_id = db.Column(db.Integer, db.ForeignKey('promo_codes.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    order = db.relationship('Order')
+    
+    __table_args__ = (
+        db.Index('ix_promo_redemptions_promo_user', 'promo_id', 'user_id'),
+    )
+
+class ProductList(db.Model):
+    """Избранное или сравнение пользователя: id товаров через запятую, новые в конце"""
+    __tablename__ = 'product_lists'
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    kind = db.Column(db.String(20), primary_key=True)  # wishlist, compare
+    product_ids = db.Column(db.Text, nullable=False, default='')
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class WishlistCount(db.Model):
+    """Сколько пользователей держат товар в избранном (меняется вместе со списками)"""
+    __tablename__ = 'wishlist_counts'
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        db.Index('ix_wishlist_counts_count', 'count'),
+    )
+
+class Notification(db.Model):
+    """Уведомление покупателя; id - курсор ленты SSE (/api/notifications/stream)"""
+    __tablename__ = 'notifications'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    kind = db.Column(db.String(30), nullable=False, default='order_status')
+    title = db.Column(db.String(200), nullable=False)
+    message = db.Column(db.Text)
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'))
+    is_read = db.Column(db.Boolean, nullable=False, default=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    order = db.relationship('Order')
+    
+    __table_args__ = (
+        db.Index('ix_notifications_user_unread', 'user_id', 'is_read', 'id'),
+    )
+
+class OutboxEvent(db.Model):
+    """Сообщение для Telegram-бота, записанное в одной транзакции с заказом"""
+    __tablename__ = 'outbox_events'
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(30), nullable=False)  # order_created, order_status
+    recipient = db.Column(db.String(20), nullable=False)  # customer, admin
+    chat_id = db.Column(db.BigInteger)  # для admin; чат покупателя берется из users при выдаче
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False)
+    status = db.Column(db.String(50))
+    state = db.Column(db.String(10), nullable=False, default='pending')  # pending, sent, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    available_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    claimed_until = db.Column(db.DateTime)
+    sent_at = db.Column(db.DateTime)
+    last_error = db.Column(db.String(300))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    order = db.relationship('Order')
+    
+    __table_args__ = (
+        db.Index('ix_outbox_events_pending', 'state', 'available_at', 'id'),
+    )
+
+class IdempotencyKey(db.Model):
+    """Idempotency-Key запроса пользователя: отпечаток тела и сохраненный ответ"""
+    __tablename__ = 'idempotency_keys'
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    key = db.Column(db.String(100), primary_key=True)
+    endpoint = db.Column(db.String(100), nullable=False)
+    fingerprint = db.Column(db.String(64), nullable=False)
+    state = db.Column(db.String(10), nullable=False, default='processing')  # processing, done
+    status_code = db.Column(db.Integer)
+    content_type = db.Column(db.String(100))
+    response_body = db.Column(db.LargeBinary)
+    locked_until = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    
+    __table_args__ = (
+        db.Index('ix_idempotency_keys_expires', 'expires_at'),
+    )
@@ -0,0 +1,225 @@
+# notifications.py - уведомления покупателей: запись при смене статуса заказа и доставка по SSE
+import json
+import time
+import queue
+import logging
+import threading
+from datetime import datetime
+from sqlalchemy import event, select, update, func, inspect
+from sqlalchemy.orm import Session
+from models import db, Order, Notification
+from config import ORDER_STATUS_TEXT
+
+logger = logging.getLogger('VogueEliteWeb')
+
+ORDER_STATUS_MESSAGES = {
+    'new': 'Мы свяжемся с вами для подтверждения заказа.',
+    'shipped': 'Курьер свяжется с вами перед доставкой.',
+    'cancelled': 'Если заказ не был оплачен вовремя, оформите его заново.',
+}
+
+# Колонки, которые уходят клиенту
+FEED_COLUMNS = (Notification.id, Notification.user_id, Notification.kind, Notification.title,
+                Notification.message, Notification.order_id, Notification.created_at)
+
+UNREAD_LIMIT = 50
+
+
+def order_status_notification(user_id, order_number, status, now=None):
+    """Поля уведомления о новом статусе заказа (без order_id)"""
+    return {
+        'user_id': user_id,
+        'kind': 'order_status',
+        'title': f"Заказ {order_number} {ORDER_STATUS_TEXT.get(status, status)}",
+        'message': ORDER_STATUS_MESSAGES.get(status),
+        'is_read': False,
+        'created_at': now or datetime.utcnow(),
+    }
+
+
+def serialize(row):
+    return {
+        'id': row.id,
+        'kind': row.kind,
+        'title': row.title,
+        'message': row.message,
+        'order_id': row.order_id,
+        'created_at': row.created_at.isoformat() if row.created_at else None,
+    }
+
+
+def unread(user_id, after_id=0, limit=UNREAD_LIMIT):
+    rows = db.session.execute(
+        select(*FEED_COLUMNS)
+        .where(Notification.user_id == user_id, Notification.is_read == False,
+               Notification.id > after_id)
+        .order_by(Notification.id).limit(limit)
+    ).all()
+    return [serialize(row) for row in rows]
+
+
+def mark_read(user_id, ids=None):
+    """Отметить прочитанными указанные (или все) уведомления пользователя"""
+    query = update(Notification).where(Notification.user_id == user_id, Notification.is_read == False)
+    if ids is not None:
+        query = query.where(Notification.id.in_(ids))
+    count = db.session.execute(query.values(is_read=True)).rowcount
+    db.session.commit()
+    return count
+
+
+def _sse(item):
+    return f"id: {item['id']}\nevent: notification\ndata: {json.dumps(item, ensure_ascii=False)}\n\n"
+
+
+class _Subscription(queue.SimpleQueue):
+    def __init__(self, user_id):
+        super().__init__()
+        self.user_id = user_id
+
+
+class NotificationHub:
+    """Доставка уведомлений в открытые SSE-соединения воркера.
+
+    Соединения подписываются в памяти процесса. Один поток на воркер читает
+    новые строки notifications по общему курсору (id больше последнего
+    прочитанного) и раскладывает их подписчикам, поэтому число запросов к БД
+    не зависит от числа вкладок. Без подписчиков поток спит и БД не читает;
+    ожидающее соединение стоит только открытого сокета и пинга раз в
+    NOTIFICATIONS_HEARTBEAT секунд. Уведомления из других воркеров и из бота
+    приходят через ту же таблицу.
+    """
+
+    def __init__(self, app=None):
+        self.poll_interval = 1.0
+        self.heartbeat = 25
+        self.stream_timeout = 600
+        self.max_streams = 12
+        self._subscribers = {}
+        self._count = 0
+        self._cursor = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.poll_interval = app.config.get('NOTIFICATIONS_POLL_INTERVAL', 1.0)
+        self.heartbeat = app.config.get('NOTIFICATIONS_HEARTBEAT', 25)
+        self.stream_timeout = app.config.get('NOTIFICATIONS_STREAM_TIMEOUT', 600)
+        self.max_streams = app.config.get('NOTIFICATIONS_MAX_STREAMS', 12)
+        app.extensions['notifications'] = self
+        if not event.contains(Session, 'before_flush', self._before_flush):
+            event.listen(Session, 'before_flush', self._before_flush)
+
+    # ========== ПОДПИСКИ ==========
+
+    def subscribe(self, app, user_id):
+        """Подписка соединения или None, если воркер уже держит max_streams потоков"""
+        if self._cursor is None:
+            # Курсор ставится до чтения непрочитанных: строка, добавленная
+            # между этими запросами, придет из опроса, а не потеряется
+            cursor = db.session.scalar(select(func.max(Notification.id))) or 0
+            with self._lock:
+                if self._cursor is None:
+                    self._cursor = cursor
+        with self._lock:
+            if self._count >= self.max_streams:
+                return None
+            subscription = _Subscription(user_id)
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+            self._count += 1
+            self._wakeup.set()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, args=(app,), daemon=True)
+                self._thread.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers and subscription in subscribers:
+                subscribers.discard(subscription)
+                self._count -= 1
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def publish(self, items):
+        """Разложить уведомления подписчикам этого воркера"""
+        with self._lock:
+            for item in items:
+                for subscription in self._subscribers.get(item['user_id'], ()):
+                    subscription.put(item)
+
+    # ========== ОПРОС ТАБЛИЦЫ ==========
+
+    def poll_once(self):
+        """Прочитать новые строки после курсора и раздать их. Возвращает число строк"""
+        rows = db.session.execute(
+            select(*FEED_COLUMNS).where(Notification.id > self._cursor)
+            .order_by(Notification.id).limit(1000)
+        ).all()
+        db.session.rollback()  # транзакция чтения не держится до следующего опроса
+        # Строка, зафиксированная позже строки с большим id (возможно в PostgreSQL),
+        # дойдет до клиента из непрочитанных при следующем подключении
+        if not rows:
+            return 0
+        self._cursor = rows[-1].id
+        self.publish([dict(serialize(row), user_id=row.user_id) for row in rows])
+        return len(rows)
+
+    def _loop(self, app):
+        while True:
+            with self._lock:
+                if not self._count:
+                    self._wakeup.clear()
+            self._wakeup.wait()
+            time.sleep(self.poll_interval)
+            with app.app_context():
+                try:
+                    self.poll_once()
+                except Exception:
+                    db.session.rollback()
+                    logger.exception("Ошибка при чтении уведомлений")
+
+    # ========== ПОТОК SSE ==========
+
+    def stream(self, subscription, backlog):
+        """Генератор ответа text/event-stream. Работает без контекста приложения и БД"""
+        last_id = 0
+        try:
+            # Клиент переподключается сам; Last-Event-ID вернет его на место
+            yield 'retry: 5000\n\n'
+            for item in backlog:
+                last_id = item['id']
+                yield _sse(item)
+            deadline = time.monotonic() + self.stream_timeout
+            while time.monotonic() < deadline:
+                try:
+                    item = subscription.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    yield ': ping\n\n'
+                    continue
+                if item['id'] > last_id:
+                    last_id = item['id']
+                    item = dict(item)
+                    item.pop('user_id', None)
+                    yield _sse(item)
+        finally:
+            self.unsubscribe(subscription)
+
+    # ========== СМЕНА СТАТУСА ЗАКАЗА ==========
+
+    # Новый заказ или смена status через ORM записывают уведомление в той же транзакции
+    def _before_flush(self, session, flush_context, instances):
+        for obj in list(session.new):
+            if isinstance(obj, Order):
+                self._add_status_notification(session, obj, obj.status or 'new')
+        for obj in list(session.dirty):
+            if isinstance(obj, Order) and inspect(obj).attrs.status.history.added:
+                self._add_status_notification(session, obj, obj.status)
+
+    def _add_status_notification(self, session, order, status):
+        session.add(Notification(order=order, **order_status_notification(
+            order.user_id, order.order_number, status)))
@@ -0,0 +1,127 @@
+# order_history.py - постраничные списки заказов (keyset) и фильтры админки
+import json
+import base64
+from datetime import datetime, timedelta
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import load_only
+from models import Order, OrderItem
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Колонки списка заказов; items_json и заметки читаются только при раскрытии заказа
+LIST_COLUMNS = (Order.id, Order.order_number, Order.user_id, Order.status, Order.total_amount,
+                Order.discount_amount, Order.delivery_cost, Order.final_amount,
+                Order.payment_status, Order.created_at)
+
+
+class CursorError(ValueError):
+    """Некорректный курсор или фильтр"""
+
+
+def encode_cursor(order):
+    raw = f"{order.created_at.isoformat()}|{order.id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, order_id = raw.split('|')
+        return datetime.fromisoformat(created_at), int(order_id)
+    except (ValueError, UnicodeDecodeError):
+        raise CursorError('Некорректный курсор')
+
+
+def paginate(query, cursor=None, limit=PAGE_SIZE):
+    """Страница заказов после курсора: (заказы, курсор следующей страницы или None).
+
+    Условие (created_at, id) < курсора и сортировка по тем же колонкам
+    идут по индексу, поэтому любая страница стоит одинаково.
+    """
+    limit = max(1, min(limit or PAGE_SIZE, MAX_PAGE_SIZE))
+    if cursor:
+        created_at, order_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            Order.created_at < created_at,
+            and_(Order.created_at == created_at, Order.id < order_id)
+        ))
+    orders = query.options(load_only(*LIST_COLUMNS))\
+        .order_by(Order.created_at.desc(), Order.id.desc())\
+        .limit(limit + 1).all()
+    next_cursor = encode_cursor(orders[limit - 1]) if len(orders) > limit else None
+    return orders[:limit], next_cursor
+
+
+def _parse_date(value, name):
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise CursorError(f'{name}: ожидается дата ГГГГ-ММ-ДД')
+
+
+def _parse_amount(value, name):
+    try:
+        return float(value)
+    except ValueError:
+        raise CursorError(f'{name}: ожидается число')
+
+
+def apply_admin_filters(query, args):
+    """Фильтры браузера заказов из параметров запроса"""
+    if args.get('status'):
+        query = query.filter(Order.status == args['status'])
+    if args.get('payment_status'):
+        query = query.filter(Order.payment_status == args['payment_status'])
+    if args.get('date_from'):
+        query = query.filter(Order.created_at >= _parse_date(args['date_from'], 'date_from'))
+    if args.get('date_to'):
+        # date_to включительно: все заказы этого дня
+        date_to = _parse_date(args['date_to'], 'date_to')
+        if len(args['date_to']) <= 10:
+            date_to += timedelta(days=1)
+        query = query.filter(Order.created_at < date_to)
+    if args.get('amount_min'):
+        query = query.filter(Order.final_amount >= _parse_amount(args['amount_min'], 'amount_min'))
+    if args.get('amount_max'):
+        query = query.filter(Order.final_amount <= _parse_amount(args['amount_max'], 'amount_max'))
+    if args.get('number'):
+        # Диапазон вместо LIKE: префикс ищется по уникальному индексу order_number
+        prefix = args['number'].strip().upper()
+        query = query.filter(Order.order_number >= prefix,
+                             Order.order_number < prefix + '\uffff')
+    return query
+
+
+def order_summary(order):
+    return {
+        'id': order.id,
+        'order_number': order.order_number,
+        'user_id': order.user_id,
+        'status': order.status,
+        'payment_status': order.payment_status,
+        'total_amount': order.total_amount,
+        'discount_amount': order.discount_amount,
+        'delivery_cost': order.delivery_cost,
+        'final_amount': order.final_amount,
+        'created_at': order.created_at.isoformat() if order.created_at else None,
+    }
+
+
+def order_items(order):
+    """Позиции заказа: из order_items, для старых заказов - из items_json"""
+    items = OrderItem.query.filter_by(order_id=order.id).order_by(OrderItem.id).all()
+    if items:
+        return [{
+            'product_id': item.product_id,
+            'article': item.article,
+            'name': item.name,
+            'price': item.price,
+            'quantity': item.quantity,
+            'size': item.size,
+            'color': item.color,
+        } for item in items]
+    try:
+        return json.loads(order.items_json or '[]')
+    except ValueError:
+        return []
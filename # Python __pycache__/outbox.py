@@ -0,0 +1,217 @@
+# outbox.py - события заказов для Telegram-бота (transactional outbox)
+import hmac
+import json
+import click
+from datetime import datetime, timedelta
+from flask import request, abort
+from flask.cli import AppGroup
+from sqlalchemy import event, select, update, delete, func, or_, inspect
+from sqlalchemy.orm import Session
+from models import db, Order, User, OutboxEvent
+
+outbox_cli = AppGroup('outbox', help='Очередь сообщений Telegram-бота.')
+
+ORDER_CREATED = 'order_created'
+ORDER_STATUS = 'order_status'
+
+
+def order_event_rows(status, admin_ids=(), created=False, now=None):
+    """Строки очереди по заказу (без order_id): покупателю и, для нового заказа, администраторам"""
+    now = now or datetime.utcnow()
+    kind = ORDER_CREATED if created else ORDER_STATUS
+    rows = [{'kind': kind, 'recipient': 'customer', 'chat_id': None}]
+    if created:
+        rows += [{'kind': kind, 'recipient': 'admin', 'chat_id': chat_id} for chat_id in admin_ids]
+    for row in rows:
+        row.update(status=status, state='pending', attempts=0,
+                   available_at=now, created_at=now)
+    return rows
+
+
+class OrderOutbox:
+    """Запись событий заказов в outbox_events и выдача их боту.
+
+    События пишутся при flush заказа, поэтому фиксируются или откатываются
+    вместе с ним; оформление заказа не ждет Telegram. Бот
+    забирает события пачками через /api/bot/outbox/claim: выданная строка
+    закреплена за ним на OUTBOX_CLAIM_SECONDS и после падения бота выдается
+    снова. Отправленные бот подтверждает через /api/bot/outbox/ack.
+    """
+
+    def __init__(self, app=None):
+        self.admin_ids = ()
+        self.token = None
+        self.claim_seconds = 120
+        self.max_attempts = 8
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.admin_ids = tuple(app.config.get('ADMIN_IDS', ()))
+        self.token = app.config.get('BOT_API_TOKEN')
+        self.claim_seconds = app.config.get('OUTBOX_CLAIM_SECONDS', 120)
+        self.max_attempts = app.config.get('OUTBOX_MAX_ATTEMPTS', 8)
+        app.extensions['outbox'] = self
+        if not event.contains(Session, 'after_flush', self._after_flush):
+            event.listen(Session, 'after_flush', self._after_flush)
+
+    def check_token(self):
+        """401, если запрос пришел не от бота"""
+        expected = f"Bearer {self.token}"
+        if not self.token or not hmac.compare_digest(request.headers.get('Authorization', ''), expected):
+            abort(401)
+
+    # ========== ВЫДАЧА БОТУ ==========
+
+    def claim(self, limit=50, now=None):
+        """Закрепить за ботом до limit готовых событий и вернуть их с данными заказа"""
+        now = now or datetime.utcnow()
+        due = (OutboxEvent.state == 'pending', OutboxEvent.available_at <= now,
+               or_(OutboxEvent.claimed_until.is_(None), OutboxEvent.claimed_until < now))
+        ids = db.session.scalars(
+            select(OutboxEvent.id).where(*due).order_by(OutboxEvent.id).limit(limit)
+        ).all()
+        if not ids:
+            db.session.rollback()
+            return []
+        # Повтор условия в UPDATE: событие, выданное параллельному запросу, не уйдет дважды
+        claimed = db.session.scalars(
+            update(OutboxEvent)
+            .where(OutboxEvent.id.in_(ids), *due)
+            .values(claimed_until=now + timedelta(seconds=self.claim_seconds),
+                    attempts=OutboxEvent.attempts + 1)
+            .returning(OutboxEvent.id)
+            .execution_options(synchronize_session=False)
+        ).all()
+        rows = db.session.execute(
+            select(OutboxEvent.id, OutboxEvent.kind, OutboxEvent.recipient, OutboxEvent.chat_id,
+                   OutboxEvent.status, OutboxEvent.attempts, Order, User.telegram_id,
+                   User.first_name, User.username)
+            .join(Order, Order.id == OutboxEvent.order_id)
+            .join(User, User.id == Order.user_id)
+            .where(OutboxEvent.id.in_(claimed))
+            .order_by(OutboxEvent.id)
+        ).all()
+        db.session.commit()
+        return [self._payload(row) for row in rows]
+
+    def _payload(self, row):
+        order = row.Order
+        try:
+            items = json.loads(order.items_json or '[]')
+        except ValueError:
+            items = []
+        return {
+            'id': row.id,
+            'kind': row.kind,
+            'recipient': row.recipient,
+            'chat_id': row.chat_id if row.recipient == 'admin' else row.telegram_id,
+            'status': row.status,
+            'attempts': row.attempts,
+            'order': {
+                'id': order.id,
+                'order_number': order.order_number,
+                'total_amount': order.total_amount,
+                'discount_amount': order.discount_amount,
+                'delivery_cost': order.delivery_cost,
+                'final_amount': order.final_amount,
+                'delivery_address': order.delivery_address,
+                'payment_method': order.payment_method,
+                'promo_code': order.promo_code,
+                'items': items,
+                'created_at': order.created_at.isoformat() if order.created_at else None,
+            },
+            'customer': {
+                'telegram_id': row.telegram_id,
+                'first_name': row.first_name,
+                'username': row.username,
+            },
+        }
+
+    def ack(self, sent=(), failed=(), now=None):
+        """Отметить отправленные и неудачные события.
+
+        failed - словари {id, error, retry, retry_after, attempted}: retry=False
+        (бот заблокирован, чат не найден) закрывает событие сразу, иначе оно
+        вернется через retry_after секунд или по нарастающей паузе, пока
+        не кончатся OUTBOX_MAX_ATTEMPTS попыток. attempted=False (бот не
+        отправлял из-за ограничения Telegram) попытку не засчитывает.
+        """
+        now = now or datetime.utcnow()
+        done = 0
+        if sent:
+            done = db.session.execute(
+                update(OutboxEvent)
+                .where(OutboxEvent.id.in_(sent), OutboxEvent.state == 'pending')
+                .values(state='sent', sent_at=now, claimed_until=None, last_error=None)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+        for item in failed:
+            outbox_event = db.session.get(OutboxEvent, item['id'])
+            if outbox_event is None or outbox_event.state != 'pending':
+                continue
+            outbox_event.last_error = str(item.get('error') or '')[:300]
+            outbox_event.claimed_until = None
+            if item.get('attempted') is False:
+                outbox_event.attempts = max(outbox_event.attempts - 1, 0)
+            if not item.get('retry', True) or outbox_event.attempts >= self.max_attempts:
+                outbox_event.state = 'failed'
+            else:
+                delay = item.get('retry_after') or min(30 * 2 ** max(outbox_event.attempts - 1, 0), 3600)
+                outbox_event.available_at = now + timedelta(seconds=delay)
+        db.session.commit()
+        return done
+
+    # ========== ЗАПИСЬ СОБЫТИЙ ==========
+
+    # Новый заказ и смена status через ORM пишут события в той же транзакции,
+    # одним INSERT на flush (id заказов уже известны)
+    def _after_flush(self, session, flush_context):
+        rows = []
+        for obj in session.new:
+            if isinstance(obj, Order):
+                rows += [dict(row, order_id=obj.id)
+                         for row in order_event_rows(obj.status or 'new', self.admin_ids, created=True)]
+        for obj in session.dirty:
+            if isinstance(obj, Order) and inspect(obj).attrs.status.history.added:
+                rows += [dict(row, order_id=obj.id) for row in order_event_rows(obj.status)]
+        if rows:
+            session.connection().execute(OutboxEvent.__table__.insert(), rows)
+
+
+@outbox_cli.command('status')
+def status_command():
+    """Сколько событий ждет отправки, отправлено и не доставлено."""
+    counts = dict(db.session.execute(
+        select(OutboxEvent.state, func.count()).group_by(OutboxEvent.state)
+    ).all())
+    oldest = db.session.scalar(
+        select(func.min(OutboxEvent.created_at)).where(OutboxEvent.state == 'pending')
+    )
+    click.echo(f"Ожидают: {counts.get('pending', 0)}, отправлено: {counts.get('sent', 0)}, "
+               f"не доставлено: {counts.get('failed', 0)}")
+    if oldest:
+        click.echo(f"Самое старое ожидающее: {oldest:%Y-%m-%d %H:%M:%S} UTC")
+
+
+@outbox_cli.command('retry')
+def retry_command():
+    """Вернуть в очередь недоставленные события."""
+    count = db.session.execute(
+        update(OutboxEvent).where(OutboxEvent.state == 'failed')
+        .values(state='pending', attempts=0, available_at=datetime.utcnow(), claimed_until=None)
+    ).rowcount
+    db.session.commit()
+    click.echo(f"Возвращено в очередь: {count}")
+
+
+@outbox_cli.command('purge')
+@click.option('--days', type=int, default=30, show_default=True, help='Хранить отправленные столько дней.')
+def purge_command(days):
+    """Удалить старые отправленные события."""
+    count = db.session.execute(
+        delete(OutboxEvent).where(OutboxEvent.state == 'sent',
+                                  OutboxEvent.sent_at < datetime.utcnow() - timedelta(days=days))
+    ).rowcount
+    db.session.commit()
+    click.echo(f"Удалено событий: {count}")
@@ -0,0 +1,167 @@
+# product_lists.py - избранное и сравнение на сервере (компактные списки id)
+from flask import current_app
+from sqlalchemy import select, update
+from sqlalchemy.dialects import sqlite, postgresql
+from sqlalchemy.orm import load_only
+from models import db, Product, ProductList, WishlistCount
+
+# Колонки карточки товара в ответах списков
+CARD_COLUMNS = (Product.id, Product.article, Product.name, Product.price, Product.old_price,
+                Product.discount, Product.category, Product.brand, Product.image_url, Product.stock)
+
+# Сколько раз пересчитать список, если его одновременно изменил другой запрос
+WRITE_ATTEMPTS = 5
+
+
+class ListError(ValueError):
+    """Некорректный запрос к списку"""
+
+
+class ListConflict(ListError):
+    """Список все время меняют параллельные запросы"""
+
+
+def decode_ids(text):
+    return [int(x) for x in text.split(',')] if text else []
+
+
+def encode_ids(ids):
+    return ','.join(map(str, ids))
+
+
+def _parse_ids(values, name):
+    if values is None:
+        return []
+    if not isinstance(values, list):
+        values = [values]
+    try:
+        return list(dict.fromkeys(int(v) for v in values))
+    except (TypeError, ValueError):
+        raise ListError(f'{name}: ожидается список id товаров')
+
+
+def max_items(kind):
+    key = 'WISHLIST_MAX_ITEMS' if kind == 'wishlist' else 'COMPARE_MAX_ITEMS'
+    return current_app.config.get(key, 500 if kind == 'wishlist' else 8)
+
+
+def _insert(table):
+    """INSERT с поддержкой ON CONFLICT для СУБД приложения"""
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        return sqlite.insert(table)
+    if dialect == 'postgresql':
+        return postgresql.insert(table)
+    raise NotImplementedError(f'Списки товаров не поддерживают СУБД {dialect}')
+
+
+def get_ids(user_id, kind):
+    row = db.session.get(ProductList, (user_id, kind))
+    return decode_ids(row.product_ids) if row else []
+
+
+def update_list(user_id, kind, add=None, remove=None):
+    """Добавить и убрать товары одним запросом клиента. Возвращает новый список id.
+
+    Клиент копит нажатия и присылает их пачкой, поэтому сердечко не стоит
+    отдельного запроса. Список записывается с условием, что он не изменился
+    с момента чтения (первая запись - INSERT ... ON CONFLICT DO NOTHING);
+    если его успела изменить другая вкладка, изменения применяются к новому
+    списку. Счетчик избранного меняется на разницу старого и нового списка.
+    """
+    add, remove = _parse_ids(add, 'add'), set(_parse_ids(remove, 'remove'))
+    if add:
+        # В список попадают только существующие активные товары
+        active = set(db.session.scalars(
+            select(Product.id).where(Product.id.in_(add), Product.is_active == True)
+        ))
+        add = [pid for pid in add if pid in active]
+
+    lists = ProductList.__table__
+    for _ in range(WRITE_ATTEMPTS):
+        stored = db.session.scalar(
+            select(ProductList.product_ids)
+            .where(ProductList.user_id == user_id, ProductList.kind == kind)
+        )
+        old = decode_ids(stored) if stored else []
+        present = set(old)
+        ids = [pid for pid in old if pid not in remove] + [pid for pid in add if pid not in present]
+        # Переполненный список вытесняет самые старые товары
+        ids = ids[-max_items(kind):]
+        if ids == old:
+            db.session.rollback()
+            return ids
+
+        if stored is None:
+            written = db.session.execute(
+                _insert(lists).values(user_id=user_id, kind=kind, product_ids=encode_ids(ids))
+                .on_conflict_do_nothing(index_elements=['user_id', 'kind'])
+            ).rowcount
+        else:
+            written = db.session.execute(
+                update(ProductList)
+                .where(ProductList.user_id == user_id, ProductList.kind == kind,
+                       ProductList.product_ids == stored)
+                .values(product_ids=encode_ids(ids))
+                .execution_options(synchronize_session=False)
+            ).rowcount
+        if written:
+            if kind == 'wishlist':
+                _apply_counts(set(ids) - present, present - set(ids))
+            db.session.commit()
+            return ids
+        db.session.rollback()
+    raise ListConflict('Список одновременно меняется в другой вкладке, повторите')
+
+
+def _apply_counts(added, removed):
+    """Изменить счетчики избранного: строка создается при первом добавлении товара"""
+    deltas = [{'product_id': pid, 'count': 1} for pid in added] + \
+             [{'product_id': pid, 'count': -1} for pid in removed]
+    if not deltas:
+        return
+    counts = WishlistCount.__table__
+    stmt = _insert(counts)
+    db.session.execute(
+        stmt.on_conflict_do_update(index_elements=['product_id'],
+                                   set_={'count': counts.c.count + stmt.excluded['count']}),
+        deltas
+    )
+
+
+def product_cards(ids):
+    """Карточки товаров в порядке ids - одним запросом"""
+    if not ids:
+        return []
+    products = Product.query.options(load_only(*CARD_COLUMNS))\
+        .filter(Product.id.in_(ids), Product.is_active == True).all()
+    by_id = {p.id: p for p in products}
+    return [card(by_id[pid]) for pid in ids if pid in by_id]
+
+
+def card(p):
+    return {
+        'id': p.id,
+        'article': p.article,
+        'name': p.name,
+        'price': p.price,
+        'old_price': p.old_price,
+        'discount': p.discount,
+        'category': p.category,
+        'brand': p.brand,
+        'image_url': p.image_url,
+        'stock': p.stock
+    }
+
+
+def most_wishlisted(limit=20):
+    """Товары, которые чаще всего добавляют в избранное: [(товар, число)]"""
+    return db.session.execute(
+        select(Product, WishlistCount.count)
+        .join(WishlistCount, WishlistCount.product_id == Product.id)
+        .where(WishlistCount.count > 0, Product.is_active == True)
+        .order_by(WishlistCount.count.desc(), Product.id)
+        .options(load_only(*CARD_COLUMNS))
+        .limit(limit)
+    ).all()
+
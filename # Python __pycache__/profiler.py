@@ -0,0 +1,320 @@
+# profiler.py - сэмплирующий профилировщик по запросу: стеки потоков в формате collapsed (flamegraph)
+import os
+import re
+import sys
+import json
+import time
+import threading
+from collections import Counter
+from flask import g, request
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Имя профиля: попадает в путь файла, поэтому только безопасные символы
+PROFILE_ID = re.compile(r'^[A-Za-z0-9_.-]{1,80}$')
+
+
+class ProfilerBusy(RuntimeError):
+    """Профилировщик уже запущен в этом процессе"""
+
+
+def _short_path(filename):
+    if filename.startswith(ROOT):
+        return os.path.relpath(filename, ROOT)
+    parts = filename.replace('\\', '/').split('/')
+    return '/'.join(parts[-2:])
+
+
+class Profile:
+    """Результат: счетчики стеков (корень слева, через ';') и сведения о прогоне"""
+
+    def __init__(self, stacks, samples, seconds, meta=None):
+        self.stacks = stacks
+        self.samples = samples
+        self.seconds = seconds
+        self.meta = dict(meta or {}, samples=samples, seconds=round(seconds, 2))
+
+    def collapsed(self):
+        """Текст для flamegraph.pl / speedscope: 'кадр;кадр;кадр число' в строке"""
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top(self, limit=10):
+        """Функции, на которых чаще всего стоял поток (собственное время): [(кадр, доля)]"""
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        total = sum(leaves.values()) or 1
+        return [(frame, round(count / total, 3)) for frame, count in leaves.most_common(limit)]
+
+
+class SamplingProfiler:
+    """Поток, который раз в interval секунд снимает стеки потоков процесса.
+
+    Пока профилировщик не запущен, потока нет и код приложения ничем не
+    платит. threads - функция ident -> метка корня стека или None (поток
+    пропускается); без нее снимаются все потоки с меткой по имени потока.
+    По окончании вызывается on_done(Profile) в потоке профилировщика.
+
+    Поток профилировщика получает GIL, когда его отпускает другой поток, -
+    обычно на вводе-выводе, и без мер стеки смещаются к таким местам. Пока
+    идет сэмплирование, интервал переключения потоков (sys.setswitchinterval)
+    уменьшается до switch_interval, после - восстанавливается.
+    """
+
+    def __init__(self, interval=0.01, switch_interval=0.0001, max_depth=128):
+        self.interval = interval
+        self.switch_interval = switch_interval
+        self.max_depth = max_depth
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self, seconds, threads=None, on_done=None, meta=None):
+        with self._lock:
+            if self._thread is not None:
+                raise ProfilerBusy('Профилировщик уже запущен')
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, args=(seconds, threads, on_done, meta),
+                                            name='sampling-profiler', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Закончить раньше срока (результат передается в on_done как обычно)"""
+        self._stop.set()
+
+    def _run(self, seconds, threads, on_done, meta):
+        me = threading.get_ident()
+        names = {}
+        thread_names = {}
+        stacks = Counter()
+        samples = 0
+        started = time.monotonic()
+        deadline = started + seconds
+        previous = sys.getswitchinterval()
+        if self.switch_interval:
+            sys.setswitchinterval(min(previous, self.switch_interval))
+        try:
+            while not self._stop.wait(self.interval) and time.monotonic() < deadline:
+                for ident, frame in sys._current_frames().items():
+                    if ident == me:
+                        continue
+                    if threads is not None:
+                        label = threads(ident)
+                        if label is None:
+                            continue
+                    else:
+                        label = thread_names.get(ident)
+                        if label is None:
+                            thread_names.update((t.ident, t.name) for t in threading.enumerate())
+                            label = thread_names.get(ident, str(ident))
+                    stacks[self._collapse(frame, label, names)] += 1
+                    samples += 1
+        finally:
+            sys.setswitchinterval(previous)
+            profile = Profile(stacks, samples, time.monotonic() - started, meta)
+            with self._lock:
+                self._thread = None
+            if on_done is not None:
+                on_done(profile)
+
+    def _collapse(self, frame, label, names):
+        parts = []
+        while frame is not None and len(parts) < self.max_depth:
+            code = frame.f_code
+            name = names.get(code)
+            if name is None:
+                name = names[code] = (f"{code.co_name} ({_short_path(code.co_filename)}:"
+                                      f"{code.co_firstlineno})").replace(';', ':')
+            parts.append(name)
+            frame = frame.f_back
+        parts.append(label.replace(';', ':'))
+        parts.reverse()
+        return ';'.join(parts)
+
+
+class ArmedProfiler:
+    """Профилирование единиц работы (запросов, обновлений бота) по команде админа.
+
+    arm() запускает сэмплирование на seconds секунд или до завершения count
+    следующих единиц с меткой target. Код обработки оборачивает каждую единицу
+    в begin(label)/end(): снимаются только потоки, которые в это время заняты
+    отмеченной работой (метка - корень стека), либо все потоки (all_threads).
+    Пока профилирование не запущено, begin() проверяет одно поле.
+    """
+
+    def __init__(self, interval=0.01, switch_interval=0.0001):
+        self.sampler = SamplingProfiler(interval, switch_interval)
+        self.max_seconds = 300
+        self._armed = None
+        self._active = {}
+        self._lock = threading.Lock()
+
+    @property
+    def armed(self):
+        return self._armed is not None
+
+    def arm(self, seconds=None, target=None, count=None, all_threads=False, on_done=None, meta=None):
+        """Запустить профилирование; ValueError при неверных параметрах, ProfilerBusy - если уже идет"""
+        if count is not None:
+            count = int(count)
+            if not 1 <= count <= 10000:
+                raise ValueError('Число единиц работы: от 1 до 10000')
+            if all_threads:
+                raise ValueError('Все потоки профилируются только по времени')
+        elif seconds is None:
+            raise ValueError('Укажите длительность или число единиц работы')
+        seconds = float(seconds if seconds is not None else self.max_seconds)
+        if not 0 < seconds <= self.max_seconds:
+            raise ValueError(f'Длительность: от 0 до {self.max_seconds} с')
+
+        with self._lock:
+            if self._armed is not None:
+                raise ProfilerBusy('Профилировщик уже запущен в этом процессе')
+            self._armed = {'target': target, 'remaining': count, 'started': 0, 'finished': 0}
+            self._active.clear()
+        meta = dict(meta or {}, pid=os.getpid(), target=target, count=count,
+                    all_threads=bool(all_threads), limit_seconds=seconds)
+
+        def done(profile):
+            armed, self._armed = self._armed, None
+            self._active.clear()
+            profile.meta['profiled'] = armed['finished'] if armed else 0
+            if on_done is not None:
+                on_done(profile)
+
+        try:
+            self.sampler.start(seconds, threads=None if all_threads else self._active.get,
+                               on_done=done, meta=meta)
+        except ProfilerBusy:
+            self._armed = None
+            raise
+        return meta
+
+    def begin(self, label):
+        """Начало единицы работы в текущем потоке; True - ее нужно завершить end()"""
+        armed = self._armed
+        if armed is None:
+            return False
+        if armed['target'] is not None and label != armed['target']:
+            return False
+        with self._lock:
+            if armed['remaining'] is not None:
+                if armed['started'] >= armed['remaining']:
+                    return False
+                armed['started'] += 1
+        self._active[threading.get_ident()] = label
+        return True
+
+    def end(self):
+        self._active.pop(threading.get_ident(), None)
+        armed = self._armed
+        if armed is None:
+            return
+        with self._lock:
+            armed['finished'] += 1
+            done = armed['remaining'] is not None and armed['finished'] >= armed['remaining']
+        if done:
+            self.sampler.stop()
+
+    def state(self):
+        armed = self._armed
+        return dict(armed, active=len(self._active)) if armed else None
+
+
+class RouteProfiler(ArmedProfiler):
+    """Профилирование воркера веб-приложения: запросы за N секунд или N следующих запросов маршрута.
+
+    Метка запроса - эндпоинт. Результаты пишутся в PROFILER_DIR, поэтому
+    скачать их можно через любой воркер.
+    """
+
+    def __init__(self, app=None):
+        super().__init__()
+        self.directory = None
+        self.keep = 20
+        self.endpoints = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.directory = app.config['PROFILER_DIR']
+        self.sampler.interval = app.config.get('PROFILER_INTERVAL', 0.01)
+        self.sampler.switch_interval = app.config.get('PROFILER_SWITCH_INTERVAL', 0.0001)
+        self.max_seconds = app.config.get('PROFILER_MAX_SECONDS', 300)
+        self.keep = app.config.get('PROFILER_KEEP', 20)
+        self.endpoints = app.view_functions
+        app.extensions['profiler'] = self
+        app.before_request(self._before_request)
+        app.teardown_request(self._teardown_request)
+
+    def arm_requests(self, seconds=None, endpoint=None, requests=None, all_threads=False):
+        """Запустить профилирование воркера; возвращает сведения о профиле (id для скачивания)"""
+        if endpoint is not None and endpoint not in self.endpoints:
+            raise ValueError(f'Неизвестный эндпоинт {endpoint}')
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{int(time.time() * 1000) % 1000:03d}"
+        return self.arm(seconds, endpoint, requests, all_threads, on_done=self._save,
+                        meta={'id': profile_id, 'started_at': time.strftime('%Y-%m-%dT%H:%M:%S')})
+
+    def _before_request(self):
+        if self._armed is not None and self.begin(request.endpoint or request.path):
+            g._profiled = True
+
+    def _teardown_request(self, exc):
+        if self._active and g.pop('_profiled', False):
+            self.end()
+
+    # ========== РЕЗУЛЬТАТЫ ==========
+
+    def _save(self, profile):
+        profile.meta['top'] = profile.top()
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            base = os.path.join(self.directory, profile.meta['id'])
+            with open(base + '.collapsed', 'w', encoding='utf-8') as f:
+                f.write(profile.collapsed())
+            with open(base + '.json', 'w', encoding='utf-8') as f:
+                json.dump(profile.meta, f, ensure_ascii=False)
+            self._prune()
+        except OSError:
+            pass
+
+    def _prune(self):
+        metas = sorted(f for f in os.listdir(self.directory) if f.endswith('.json'))
+        for name in metas[:-self.keep]:
+            for ext in ('.json', '.collapsed'):
+                try:
+                    os.remove(os.path.join(self.directory, name[:-5] + ext))
+                except FileNotFoundError:
+                    pass
+
+    def profiles(self):
+        """Сохраненные профили всех воркеров, новые первыми"""
+        if not self.directory or not os.path.isdir(self.directory):
+            return []
+        result = []
+        for name in sorted(os.listdir(self.directory), reverse=True):
+            if name.endswith('.json'):
+                try:
+                    with open(os.path.join(self.directory, name), encoding='utf-8') as f:
+                        result.append(json.load(f))
+                except (OSError, ValueError):
+                    continue
+        return result
+
+    def status(self):
+        return {
+            'pid': os.getpid(),
+            'armed': self.state(),
+            'profiles': self.profiles(),
+        }
+
+    def path(self, profile_id):
+        """Файл collapsed профиля или None"""
+        if not PROFILE_ID.match(profile_id):
+            return None
+        path = os.path.join(self.directory, profile_id + '.collapsed')
+        return path if os.path.exists(path) else None
@@ -0,0 +1,223 @@
+# promo_codes.py - промокоды: правила в БД, проверка по таблице в памяти воркера
+import time
+import threading
+import click
+from collections import namedtuple
+from datetime import datetime
+from flask.cli import AppGroup
+from sqlalchemy import event, update, or_
+from sqlalchemy.orm import Session
+from models import db, PromoCode, PromoRedemption
+from shared_cache import LocalVersions
+
+promo_cli = AppGroup('promo', help='Промокоды.')
+
+# Правило промокода в виде, готовом к проверке без обращения к БД
+CompiledPromo = namedtuple('CompiledPromo', (
+    'id', 'code', 'discount_type', 'value', 'min_amount', 'categories',
+    'per_user_limit', 'starts_at', 'expires_at'
+))
+
+
+class PromoError(ValueError):
+    """Промокод не подходит к заказу"""
+
+
+def normalize(code):
+    return (code or '').strip().upper()
+
+
+def compile_promo(row):
+    categories = frozenset(c.strip() for c in (row.categories or '').splitlines() if c.strip())
+    return CompiledPromo(
+        id=row.id,
+        code=row.code,
+        discount_type=row.discount_type,
+        value=row.value,
+        min_amount=row.min_amount or 0,
+        categories=categories or None,
+        per_user_limit=row.per_user_limit,
+        starts_at=row.starts_at,
+        expires_at=row.expires_at,
+    )
+
+
+def discount_for(promo, items, total):
+    """Скидка по промокоду. items - пары (категория, сумма позиции)"""
+    if total < promo.min_amount:
+        raise PromoError(f'Промокод действует при заказе от {promo.min_amount:g} ₽')
+    if promo.categories is None:
+        eligible = total
+    else:
+        eligible = sum(amount for category, amount in items if category in promo.categories)
+        if not eligible:
+            raise PromoError('Промокод не действует на товары в корзине')
+    if promo.discount_type == 'percent':
+        return round(eligible * promo.value / 100, 2)
+    return round(min(promo.value, eligible), 2)
+
+
+class PromoCodeTable:
+    """Действующие промокоды в словаре code -> CompiledPromo.
+
+    Проверка кода на странице корзины и при оформлении - поиск в словаре.
+    Таблица перечитывается одним запросом после изменения промокодов через
+    ORM (в любом воркере или команде flask promo - по версии в общей
+    таблице версий) и не реже чем раз в PROMO_CODES_REFRESH секунд.
+    Лимиты использований проверяются только в redeem(): счетчики меняются
+    в БД атомарно, в памяти их нет.
+    """
+
+    def __init__(self, app=None, clock=datetime.utcnow):
+        self.clock = clock
+        self.refresh_interval = 60
+        self.versions = LocalVersions()
+        self._codes = {}
+        self._expires = 0
+        self._version = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app, cache=None):
+        if cache is not None:
+            self.versions = cache.versions
+        self.refresh_interval = app.config.get('PROMO_CODES_REFRESH', 60)
+        app.extensions['promo_codes'] = self
+        if not event.contains(Session, 'after_flush', self._after_flush):
+            event.listen(Session, 'after_flush', self._after_flush)
+            event.listen(Session, 'after_commit', self._after_commit)
+            event.listen(Session, 'after_rollback', self._after_rollback)
+
+    def _table(self):
+        version = self.versions.get('promo_codes')
+        if time.monotonic() < self._expires and version == self._version:
+            return self._codes
+        with self._lock:
+            if time.monotonic() >= self._expires or version != self._version:
+                now = self.clock()
+                rows = PromoCode.query.filter(
+                    PromoCode.is_active == True,
+                    or_(PromoCode.expires_at.is_(None), PromoCode.expires_at > now),
+                    or_(PromoCode.max_uses.is_(None), PromoCode.used_count < PromoCode.max_uses)
+                ).all()
+                # Словарь заменяется целиком: читатели без блокировки видят старый или новый
+                self._codes = {row.code: compile_promo(row) for row in rows}
+                self._expires = time.monotonic() + self.refresh_interval
+                self._version = version
+        return self._codes
+
+    def invalidate(self):
+        """Перечитать промокоды при следующей проверке во всех воркерах"""
+        self.versions.bump('promo_codes')
+        self._expires = 0
+
+    def lookup(self, code):
+        return self._table().get(normalize(code))
+
+    def validate(self, code, items, total, now=None):
+        """Промокод и скидка для корзины или PromoError"""
+        promo = self.lookup(code)
+        if promo is None:
+            raise PromoError('Неверный или недействующий промокод')
+        now = now or self.clock()
+        if promo.starts_at and now < promo.starts_at:
+            raise PromoError('Промокод еще не действует')
+        if promo.expires_at and now >= promo.expires_at:
+            raise PromoError('Срок действия промокода истек')
+        return promo, discount_for(promo, items, total)
+
+    def redeem(self, promo, user_id, order):
+        """Записать использование в транзакции заказа; PromoError, если лимит исчерпан.
+
+        UPDATE счетчика с условием - атомарная проверка общего лимита. Он же
+        блокирует строку промокода до commit, поэтому параллельные заказы
+        с этим кодом считают использования пользователя по очереди.
+        """
+        claimed = db.session.execute(
+            update(PromoCode)
+            .where(PromoCode.id == promo.id, PromoCode.is_active == True,
+                   or_(PromoCode.max_uses.is_(None), PromoCode.used_count < PromoCode.max_uses))
+            .values(used_count=PromoCode.used_count + 1)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not claimed:
+            self.invalidate()
+            raise PromoError('Промокод больше не действует')
+        if promo.per_user_limit:
+            used = PromoRedemption.query.filter_by(promo_id=promo.id, user_id=user_id).count()
+            if used >= promo.per_user_limit:
+                raise PromoError('Вы уже использовали этот промокод')
+        db.session.add(PromoRedemption(promo_id=promo.id, user_id=user_id, order=order))
+
+    # Изменение промокодов через ORM перечитывает таблицу после commit
+    def _after_flush(self, session, flush_context):
+        for obj in (*session.new, *session.dirty, *session.deleted):
+            if isinstance(obj, PromoCode):
+                session.info['_promo_codes_stale'] = True
+                return
+
+    def _after_commit(self, session):
+        if session.info.pop('_promo_codes_stale', False):
+            self.invalidate()
+
+    def _after_rollback(self, session):
+        session.info.pop('_promo_codes_stale', None)
+
+
+DATETIME = click.DateTime(['%Y-%m-%d', '%Y-%m-%d %H:%M'])
+
+
+@promo_cli.command('create')
+@click.argument('code')
+@click.option('--percent', type=click.FloatRange(0, 100, min_open=True), help='Скидка в процентах.')
+@click.option('--fixed', type=click.FloatRange(0, min_open=True), help='Скидка в рублях.')
+@click.option('--min-amount', type=float, default=0, help='Минимальная сумма корзины.')
+@click.option('--category', 'categories', multiple=True, help='Только на товары категории (можно несколько).')
+@click.option('--max-uses', type=int, help='Всего использований.')
+@click.option('--per-user', type=int, help='Использований на одного покупателя.')
+@click.option('--start', type=DATETIME, help='Начало действия (UTC).')
+@click.option('--expires', type=DATETIME, help='Окончание действия (UTC).')
+def create_command(code, percent, fixed, min_amount, categories, max_uses, per_user, start, expires):
+    """Создать промокод."""
+    if (percent is None) == (fixed is None):
+        raise click.UsageError('Укажите ровно одно из --percent, --fixed')
+    code = normalize(code)
+    if PromoCode.query.filter_by(code=code).first():
+        raise click.ClickException(f'Промокод {code} уже есть')
+    db.session.add(PromoCode(
+        code=code,
+        discount_type='percent' if percent is not None else 'fixed',
+        value=percent if percent is not None else fixed,
+        min_amount=min_amount,
+        categories='\n'.join(categories) or None,
+        max_uses=max_uses,
+        per_user_limit=per_user,
+        starts_at=start,
+        expires_at=expires,
+    ))
+    db.session.commit()
+    click.echo(f'Промокод {code} создан')
+
+
+@promo_cli.command('list')
+def list_command():
+    """Промокоды и число использований."""
+    for p in PromoCode.query.order_by(PromoCode.code):
+        value = f"{p.value:g}%" if p.discount_type == 'percent' else f"{p.value:g} ₽"
+        limit = f"{p.used_count}/{p.max_uses}" if p.max_uses else str(p.used_count)
+        state = 'активен' if p.is_active else 'выключен'
+        expires = f" до {p.expires_at:%Y-%m-%d}" if p.expires_at else ''
+        click.echo(f"{p.code:<16} -{value:<8} использований: {limit:<10} {state}{expires}")
+
+
+@promo_cli.command('disable')
+@click.argument('code')
+def disable_command(code):
+    """Выключить промокод."""
+    promo = PromoCode.query.filter_by(code=normalize(code)).first()
+    if promo is None:
+        raise click.ClickException(f'Промокод {normalize(code)} не найден')
+    promo.is_active = False
+    db.session.commit()
+    click.echo(f'Промокод {promo.code} выключен')
@@ -0,0 +1,345 @@
+# promotions.py - акции: массовая смена цен по правилам с запуском и откатом по расписанию
+import os
+import re
+import socket
+import logging
+import time
+import threading
+import click
+from datetime import datetime, timedelta
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import select, update, insert, delete, exists, case, func, literal
+from models import db, Product, Promotion, PromotionItem
+from leases import acquire_lease
+
+logger = logging.getLogger('VogueEliteWeb')
+
+promotions_cli = AppGroup('promotions', help='Акции: скидки на группы товаров по расписанию.')
+
+LEASE_NAME = 'promotion-scheduler'
+
+# Поле товара, по которому правило выбирает товары
+TARGETS = {
+    'category': Product.category,
+    'brand': Product.brand,
+    'season': Product.season,
+    'articles': Product.article,
+}
+# Артикулов в одном INSERT ... SELECT (лимит параметров запроса SQLite)
+ARTICLE_CHUNK = 5000
+
+_products = Product.__table__
+_items = PromotionItem.__table__
+
+
+class PromotionError(ValueError):
+    """Правило акции заполнено неверно"""
+
+
+def parse_articles(text):
+    """Артикулы через пробел, запятую или с новой строки, без повторов"""
+    return list(dict.fromkeys(a for a in re.split(r'[\s,;]+', text or '') if a))
+
+
+def new_promotion(name, percent, target_type, target_value, starts_at, ends_at=None):
+    """Проверить и добавить в сессию новое правило (без commit)"""
+    if target_type not in TARGETS:
+        raise PromotionError(f'Неизвестная цель акции: {target_type}')
+    if not 1 <= percent <= 95:
+        raise PromotionError('Скидка должна быть от 1 до 95%')
+    if target_type == 'articles':
+        target_value = '\n'.join(parse_articles(target_value))
+    else:
+        target_value = (target_value or '').strip()
+    if not target_value:
+        raise PromotionError('Не указано, к каким товарам применить акцию')
+    if ends_at is not None and ends_at <= starts_at:
+        raise PromotionError('Акция должна заканчиваться позже, чем начинается')
+    promotion = Promotion(name=name, discount_percent=percent, target_type=target_type,
+                          target_value=target_value, starts_at=starts_at, ends_at=ends_at,
+                          status='scheduled')
+    db.session.add(promotion)
+    return promotion
+
+
+def _target_filters(promotion):
+    """Условия выбора товаров; список артикулов делится на порции"""
+    column = _products.c[TARGETS[promotion.target_type].key]
+    if promotion.target_type != 'articles':
+        return [column == promotion.target_value]
+    articles = parse_articles(promotion.target_value)
+    return [column.in_(articles[i:i + ARTICLE_CHUNK]) for i in range(0, len(articles), ARTICLE_CHUNK)]
+
+
+class PromotionScheduler:
+    """Запуск и откат акций.
+
+    Применение правила - один INSERT ... SELECT (снимок цен в promotion_items)
+    и один UPDATE products в одной транзакции, без чтения товаров в Python.
+    Откат восстанавливает цены из снимка тоже одним UPDATE. Цена акции
+    пишется в price (ее списывает оформление заказа), зачеркнутая - в
+    old_price, discount обнуляется: витрина и корзина применяют discount
+    к price, и скидка акции посчиталась бы дважды. После каждого
+    правила кэш фрагментов сбрасывается ровно один раз (on_change).
+    Фоновый поток есть в каждом воркере, расписание выполняет владелец аренды.
+    """
+
+    def __init__(self, app=None, clock=datetime.utcnow):
+        self.clock = clock
+        self.interval = 60
+        self.on_change = None
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._thread = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app, on_change=None):
+        self.interval = app.config.get('PROMOTION_CHECK_INTERVAL', 60)
+        self.on_change = on_change
+        app.extensions['promotions'] = self
+
+    def _changed(self):
+        if self.on_change:
+            self.on_change()
+
+    # ========== ПРИМЕНЕНИЕ И ОТКАТ ==========
+
+    def apply(self, promotion, now=None):
+        """Применить правило. Возвращает число товаров или None, если оно уже не ждет запуска"""
+        now = now or self.clock()
+        # Смена статуса - в той же транзакции: правило применяется один раз,
+        # даже если его одновременно запустили воркер и команда flask
+        claimed = db.session.execute(
+            update(Promotion)
+            .where(Promotion.id == promotion.id, Promotion.status == 'scheduled')
+            .values(status='active', applied_at=now)
+        ).rowcount
+        if not claimed:
+            db.session.rollback()
+            return None
+
+        promo_price = func.round(_products.c.price * ((100 - promotion.discount_percent) / 100))
+        count = 0
+        for condition in _target_filters(promotion):
+            # Товар из другой действующей акции не берется: его снимок уже в promotion_items
+            snapshot = select(
+                literal(promotion.id), _products.c.id, _products.c.price,
+                _products.c.old_price, _products.c.discount, promo_price
+            ).where(condition, _products.c.is_active == True,
+                    ~exists().where(_items.c.product_id == _products.c.id))
+            count += db.session.execute(
+                insert(_items).from_select(
+                    ['promotion_id', 'product_id', 'price', 'old_price', 'discount', 'promo_price'],
+                    snapshot
+                )
+            ).rowcount
+
+        # Зачеркнутая цена сохраняется, если товар уже был со скидкой
+        crossed = case((_products.c.old_price > _products.c.price, _products.c.old_price),
+                       else_=_products.c.price)
+        db.session.execute(
+            update(_products)
+            .where(_products.c.id.in_(
+                select(_items.c.product_id).where(_items.c.promotion_id == promotion.id)
+            ))
+            .values(price=promo_price, old_price=crossed, discount=0, updated_at=now)
+        )
+        promotion.affected_count = count
+        db.session.commit()
+
+        logger.info(f"Акция #{promotion.id} «{promotion.name}»: скидка {promotion.discount_percent}% на {count} товаров")
+        self._changed()
+        return count
+
+    def revert(self, promotion, now=None):
+        """Вернуть цены до акции. Возвращает число товаров или None, если акция не действует.
+
+        Товар, цену которого после запуска изменили вручную или импортом,
+        не трогается: новая цена важнее снимка.
+        """
+        now = now or self.clock()
+        claimed = db.session.execute(
+            update(Promotion)
+            .where(Promotion.id == promotion.id, Promotion.status == 'active')
+            .values(status='finished', reverted_at=now)
+        ).rowcount
+        if not claimed:
+            db.session.rollback()
+            return None
+
+        def snapshot(column):
+            return select(column).where(_items.c.product_id == _products.c.id).scalar_subquery()
+
+        restored = db.session.execute(
+            update(_products)
+            .where(exists().where(_items.c.product_id == _products.c.id,
+                                  _items.c.promotion_id == promotion.id,
+                                  _items.c.promo_price == _products.c.price))
+            .values(price=snapshot(_items.c.price), old_price=snapshot(_items.c.old_price),
+                    discount=snapshot(_items.c.discount), updated_at=now)
+        ).rowcount
+        db.session.execute(delete(_items).where(_items.c.promotion_id == promotion.id))
+        db.session.commit()
+
+        logger.info(f"Акция #{promotion.id} «{promotion.name}» завершена, цены возвращены у {restored} товаров")
+        self._changed()
+        return restored
+
+    def cancel(self, promotion):
+        """Отменить еще не начавшуюся акцию. True, если она ждала запуска"""
+        cancelled = db.session.execute(
+            update(Promotion)
+            .where(Promotion.id == promotion.id, Promotion.status == 'scheduled')
+            .values(status='cancelled')
+        ).rowcount
+        db.session.commit()
+        return bool(cancelled)
+
+    # ========== РАСПИСАНИЕ ==========
+
+    def run_due(self, now=None):
+        """Завершить истекшие и запустить наступившие акции. Возвращает (запущено, завершено)"""
+        now = now or self.clock()
+        # Сначала откат: товар из закончившейся акции может попасть в новую
+        ending = Promotion.query.filter(Promotion.status == 'active', Promotion.ends_at <= now)\
+            .order_by(Promotion.ends_at, Promotion.id).all()
+        finished = sum(1 for promotion in ending if self.revert(promotion, now) is not None)
+
+        # Правило, срок которого прошел до запуска, уже не применяется
+        db.session.execute(
+            update(Promotion)
+            .where(Promotion.status == 'scheduled', Promotion.ends_at <= now)
+            .values(status='finished')
+        )
+        db.session.commit()
+
+        starting = Promotion.query.filter(Promotion.status == 'scheduled', Promotion.starts_at <= now)\
+            .order_by(Promotion.starts_at, Promotion.id).all()
+        started = sum(1 for promotion in starting if self.apply(promotion, now) is not None)
+        return started, finished
+
+    def run_once(self, now=None):
+        """Расписание под арендой; None, если аренда у другого процесса"""
+        now = now or self.clock()
+        if not acquire_lease(LEASE_NAME, self.owner, now, now + timedelta(seconds=self.interval * 3)):
+            return None
+        return self.run_due(now)
+
+    # ========== ФОНОВЫЙ ПОТОК ==========
+
+    def start(self, app):
+        """Запустить проверку расписания в текущем процессе (после fork)"""
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._thread = threading.Thread(target=self._loop, args=(app,), daemon=True)
+        self._thread.start()
+
+    def _loop(self, app):
+        while True:
+            time.sleep(self.interval)
+            with app.app_context():
+                try:
+                    self.run_once()
+                except Exception:
+                    db.session.rollback()
+                    logger.exception("Ошибка при запуске или завершении акций")
+
+
+def _get_promotion(promotion_id):
+    promotion = db.session.get(Promotion, promotion_id)
+    if promotion is None:
+        raise click.ClickException(f'Акция #{promotion_id} не найдена')
+    return promotion
+
+
+DATETIME = click.DateTime(['%Y-%m-%d', '%Y-%m-%d %H:%M', '%Y-%m-%dT%H:%M'])
+
+
+@promotions_cli.command('create')
+@click.argument('name')
+@click.option('--percent', type=int, required=True, help='Скидка в процентах.')
+@click.option('--category', help='Все товары категории.')
+@click.option('--brand', help='Все товары бренда.')
+@click.option('--season', help='Все товары сезона.')
+@click.option('--articles', type=click.File('r', encoding='utf-8'),
+              help='Файл со списком артикулов ("-" - из stdin).')
+@click.option('--start', type=DATETIME, help='Начало (UTC), по умолчанию - сразу.')
+@click.option('--end', type=DATETIME, help='Окончание (UTC), после него цены вернутся.')
+def create_command(name, percent, category, brand, season, articles, start, end):
+    """Создать акцию; если она уже началась - применить сразу."""
+    targets = {'category': category, 'brand': brand, 'season': season,
+               'articles': articles.read() if articles else None}
+    chosen = [(kind, value) for kind, value in targets.items() if value]
+    if len(chosen) != 1:
+        raise click.UsageError('Укажите ровно одно из --category, --brand, --season, --articles')
+
+    scheduler = current_app.extensions['promotions']
+    now = scheduler.clock()
+    try:
+        promotion = new_promotion(name, percent, *chosen[0], starts_at=start or now, ends_at=end)
+    except PromotionError as e:
+        raise click.ClickException(str(e))
+    db.session.commit()
+
+    if promotion.starts_at > now:
+        click.echo(f'Акция #{promotion.id} запланирована на {promotion.starts_at:%Y-%m-%d %H:%M}')
+        return
+    started = time.perf_counter()
+    count = scheduler.apply(promotion, now)
+    click.echo(f'Акция #{promotion.id}: скидка {percent}% на {count} товаров '
+               f'за {(time.perf_counter() - started) * 1000:.0f} мс')
+
+
+@promotions_cli.command('list')
+@click.option('--all', 'show_all', is_flag=True, help='Вместе с завершенными и отмененными.')
+def list_command(show_all):
+    """Акции и их состояние."""
+    query = Promotion.query
+    if not show_all:
+        query = query.filter(Promotion.status.in_(('scheduled', 'active')))
+    for p in query.order_by(Promotion.starts_at, Promotion.id):
+        target = f"{len(p.target_value.splitlines())} артикулов" if p.target_type == 'articles' \
+            else f"{p.target_type}={p.target_value}"
+        period = f"{p.starts_at:%Y-%m-%d %H:%M} - {p.ends_at:%Y-%m-%d %H:%M}" if p.ends_at \
+            else f"с {p.starts_at:%Y-%m-%d %H:%M}"
+        click.echo(f"#{p.id:<5} {p.status:<10} -{p.discount_percent}%  {target}  {period}  "
+                   f"товаров: {p.affected_count or 0}  {p.name}")
+
+
+@promotions_cli.command('apply')
+@click.argument('promotion_id', type=int)
+def apply_command(promotion_id):
+    """Запустить запланированную акцию сейчас."""
+    scheduler = current_app.extensions['promotions']
+    promotion = _get_promotion(promotion_id)
+    started = time.perf_counter()
+    count = scheduler.apply(promotion)
+    if count is None:
+        raise click.ClickException(f'Акция #{promotion_id} не ждет запуска ({promotion.status})')
+    click.echo(f'Скидка {promotion.discount_percent}% применена к {count} товарам '
+               f'за {(time.perf_counter() - started) * 1000:.0f} мс')
+
+
+@promotions_cli.command('revert')
+@click.argument('promotion_id', type=int)
+def revert_command(promotion_id):
+    """Завершить акцию сейчас и вернуть цены (запланированная - отменяется)."""
+    scheduler = current_app.extensions['promotions']
+    promotion = _get_promotion(promotion_id)
+    if promotion.status == 'scheduled' and scheduler.cancel(promotion):
+        click.echo(f'Акция #{promotion_id} отменена')
+        return
+    restored = scheduler.revert(promotion)
+    if restored is None:
+        raise click.ClickException(f'Акция #{promotion_id} не действует ({promotion.status})')
+    click.echo(f'Цены возвращены у {restored} товаров')
+
+
+@promotions_cli.command('run')
+def run_command():
+    """Запустить и завершить акции по расписанию (под той же арендой, что и воркеры)."""
+    result = current_app.extensions['promotions'].run_once()
+    if result is None:
+        click.echo('Расписание сейчас обрабатывает другой процесс')
+    else:
+        click.echo(f'Запущено акций: {result[0]}, завершено: {result[1]}')
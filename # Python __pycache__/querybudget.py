@@ -0,0 +1,304 @@
+# querybudget.py - контроль количества SQL-запросов (бюджеты маршрутов и поиск N+1)
+import os
+import sys
+import logging
+import functools
+import tempfile
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import current_app, g, request, got_request_exception
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger('VogueEliteWeb.queries')
+
+# Активные счетчики текущего потока/контекста
+_active_counters = ContextVar('query_budget_counters', default=())
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Маршрут выполнил больше SQL-запросов, чем разрешено бюджетом"""
+
+    def __init__(self, label, budget, statements):
+        self.label = label
+        self.budget = budget
+        self.statements = statements
+        listing = '\n'.join(f"  {i + 1}. {s}" for i, (s, _) in enumerate(statements))
+        super().__init__(
+            f"{label}: {len(statements)} SQL-запросов при бюджете {budget}\n{listing}"
+        )
+
+
+class QueryCounter:
+    """Список SQL-запросов, выполненных внутри блока"""
+
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def repeated(self, threshold=3):
+        """Одинаковые запросы с разными параметрами (типичный признак N+1)"""
+        groups = {}
+        for statement, parameters in self.statements:
+            groups.setdefault(statement, set()).add(repr(parameters))
+        return {s: len(p) for s, p in groups.items() if len(p) >= threshold}
+
+
+@contextmanager
+def count_queries():
+    """Подсчитать SQL-запросы внутри блока"""
+    _install_listener()
+    counter = QueryCounter()
+    token = _active_counters.set(_active_counters.get() + (counter,))
+    try:
+        yield counter
+    finally:
+        _active_counters.reset(token)
+
+
+@contextmanager
+def assert_max_queries(max_queries, label='block'):
+    """Упасть с QueryBudgetExceeded, если блок выполнил больше max_queries запросов"""
+    with count_queries() as counter:
+        yield counter
+    if counter.count > max_queries:
+        raise QueryBudgetExceeded(label, max_queries, counter.statements)
+
+
+def query_budget(max_queries):
+    """Декоратор маршрута: максимальное число SQL-запросов на один вызов.
+
+    Бюджет сохраняется у view-функции и проверяется командой check_route_budgets.
+    При QUERY_BUDGET_ENFORCE превышение бросает исключение, в DEBUG пишет
+    предупреждение в лог, в остальных случаях декоратор ничего не делает.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            enforce = current_app.config.get('QUERY_BUDGET_ENFORCE')
+            if not enforce and not current_app.debug:
+                return view(*args, **kwargs)
+
+            with count_queries() as counter:
+                result = view(*args, **kwargs)
+            if counter.count > max_queries:
+                error = QueryBudgetExceeded(request.endpoint, max_queries, counter.statements)
+                if enforce:
+                    raise error
+                logger.warning(str(error))
+            return result
+
+        wrapper._query_budget = max_queries
+        return wrapper
+    return decorator
+
+
+class QueryGuard:
+    """Dev-режим: предупреждение о повторяющихся запросах внутри одного HTTP-запроса"""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if not app.config.get('QUERY_NPLUSONE_WARN', app.debug):
+            return
+        self.threshold = app.config.get('QUERY_NPLUSONE_THRESHOLD', 3)
+        app.before_request(self._before_request)
+        app.teardown_request(self._teardown_request)
+
+    def _before_request(self):
+        _install_listener()
+        counter = QueryCounter()
+        g._query_guard = (counter, _active_counters.set(_active_counters.get() + (counter,)))
+
+    def _teardown_request(self, exc):
+        state = g.pop('_query_guard', None)
+        if state is None:
+            return
+        counter, token = state
+        try:
+            _active_counters.reset(token)
+        except ValueError:
+            pass
+        for statement, times in counter.repeated(self.threshold).items():
+            logger.warning(
+                f"Возможный N+1 в {request.endpoint}: запрос выполнен {times} раз "
+                f"с разными параметрами: {statement}"
+            )
+
+
+# ========== SQL ==========
+
+_listener_installed = False
+
+
+def _install_listener():
+    global _listener_installed
+    if not _listener_installed:
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        _listener_installed = True
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    for counter in _active_counters.get():
+        counter.statements.append((statement, parameters))
+
+
+# ========== ПРОВЕРКА БЮДЖЕТОВ ВСЕХ МАРШРУТОВ ==========
+
+# Значения аргументов URL для прогона маршрутов
+SAMPLE_URL_ARGS = {
+    'product_id': 1,
+    'fmt': 'csv',
+    'kind': 'wishlist',
+}
+
+# Тела POST-запросов по эндпоинтам
+SAMPLE_JSON = {
+    'shop.api_add_to_cart': {'product_id': 1, 'quantity': 1, 'size': 'M', 'color': 'Черный'},
+    'shop.api_cart_promo': {'code': 'BUDGET10'},
+    'shop.api_cart_sync': {'items': [{'item_id': 1, 'quantity': 2}]},
+    'shop.api_product_list': {'add': [1]},
+    'shop.api_notifications_read': {'ids': [1]},
+    'shop.api_bot_outbox_claim': {'limit': 50},
+    'shop.api_bot_outbox_ack': {'sent': [1], 'failed': [{'id': 2, 'error': 'timeout'}]},
+    'shop.api_admin_order_status': {'status': 'processing'},
+    'shop.api_admin_profiler': {'seconds': 0.1},
+    'shop.api_create_order': {'address': 'Москва, Тверская 1', 'payment_method': 'card',
+                              'promo_code': 'BUDGET10'},
+}
+
+# Служебные эндпоинты без бюджета
+EXEMPT_ENDPOINTS = ('static', 'assets', 'metrics')
+
+# Порядок прогона: заказ оформляется после добавления товара в корзину, выход - последним
+RUN_LAST = ('shop.api_create_order', 'shop.logout')
+
+
+def seed_budget_fixtures():
+    """Данные для прогона: администратор с товаром в корзине, одним заказом и промокодом"""
+    from models import db, User, Product, Order, Cart, PromoCode
+    user = User(telegram_id=1, first_name='Budget', is_admin=True,
+                referral_code='BUDGET001')
+    db.session.add(user)
+    db.session.flush()
+    product = db.session.get(Product, 1)
+    db.session.add(Cart(user_id=user.id, product_id=product.id, quantity=1,
+                    price_at_addition=product.price))
+    db.session.add(Order(order_number='ORDBUDGET0001', user_id=user.id,
+                     total_amount=product.price, final_amount=product.price,
+                     items_json='[]'))
+    # Промокод с лимитами: заказ проходит самый дорогой путь погашения
+    db.session.add(PromoCode(code='BUDGET10', discount_type='percent', value=10,
+                             max_uses=100, per_user_limit=5))
+    db.session.commit()
+    return user.id
+
+
+def check_route_budgets(app, out=sys.stdout):
+    """Прогнать каждый маршрут приложения и сравнить число запросов с бюджетом.
+
+    Возвращает список нарушений; маршрут без бюджета, исключение или ответ
+    5xx тоже считаются нарушением: упавший маршрут не выполнил свои запросы.
+    """
+    with app.app_context():
+        user_id = seed_budget_fixtures()
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+
+    rules = [r for r in app.url_map.iter_rules() if r.endpoint not in EXEMPT_ENDPOINTS]
+    rules.sort(key=lambda r: (r.endpoint in RUN_LAST, RUN_LAST.index(r.endpoint)
+                              if r.endpoint in RUN_LAST else 0, r.rule))
+
+    # Токен бота для /api/bot/*; остальным маршрутам заголовок не мешает
+    headers = {'Authorization': f"Bearer {app.config['BOT_API_TOKEN']}"}
+    
+    # Исключения, которые приложение превратило в ответ 500
+    errors = []
+
+    def record_error(sender, exception, **extra):
+        errors.append(exception)
+
+    got_request_exception.connect(record_error, app)
+    try:
+        return _run_rules(app, client, rules, headers, errors, out)
+    finally:
+        got_request_exception.disconnect(record_error, app)
+
+
+def _run_rules(app, client, rules, headers, errors, out):
+    failures = []
+    for rule in rules:
+        view = app.view_functions[rule.endpoint]
+        budget = getattr(view, '_query_budget', None)
+        method = 'POST' if 'POST' in rule.methods else 'GET'
+        url = rule.build({arg: SAMPLE_URL_ARGS.get(arg, 1) for arg in rule.arguments},
+                         append_unknown=False)[1]
+
+        # Клиенты присылают Idempotency-Key: бюджет включает его проверку
+        headers['Idempotency-Key'] = f"budget-{rule.endpoint}"
+        del errors[:]
+        with count_queries() as counter:
+            try:
+                response = client.open(url, method=method, json=SAMPLE_JSON.get(rule.endpoint),
+                                       headers=headers)
+                status = response.status_code
+                # Потоковый ответ держит контекст запроса до close(); незакрытый
+                # закрылся бы сборщиком мусора посреди следующего запроса
+                response.close()
+            except Exception as e:
+                errors.append(e)
+                status = 500
+        failed = status >= 500
+        if errors:
+            status = f"{status} {type(errors[-1]).__name__}"
+
+        if failed:
+            verdict = 'ОШИБКА'
+            failures.append((rule.endpoint, budget, counter.count))
+        elif budget is None:
+            verdict = 'НЕТ БЮДЖЕТА'
+            failures.append((rule.endpoint, None, counter.count))
+        elif counter.count > budget:
+            verdict = 'ПРЕВЫШЕН'
+            failures.append((rule.endpoint, budget, counter.count))
+        else:
+            verdict = 'ok'
+        out.write(f"{method:4} {rule.rule:40} {counter.count:3}/{budget if budget is not None else '-':<3} "
+                  f"[{status}] {verdict}\n")
+        for statement, times in counter.repeated().items():
+            out.write(f"     повтор x{times}: {statement}\n")
+    return failures
+
+
+def main():
+    """Запуск проверки на временной базе: python querybudget.py"""
+    workdir = tempfile.mkdtemp(prefix='query_budget_')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'budget.db')}"
+    os.environ.setdefault('METRICS_DIR', os.path.join(workdir, 'metrics'))
+    os.environ['CACHE_DIR'] = os.path.join(workdir, 'cache')  # кэш не должен пережить временную базу
+    logging.disable(logging.CRITICAL)
+
+    from app import app
+    from manage import create_schema, seed_products
+    with app.app_context():
+        create_schema()
+        seed_products()
+
+    failures = check_route_budgets(app)
+    if failures:
+        sys.stdout.write(f"\nНарушено бюджетов: {len(failures)}\n")
+        return 1
+    sys.stdout.write("\nВсе маршруты укладываются в бюджет\n")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,194 @@
+# ratelimit.py - ограничение частоты запросов: корзины токенов по IP и пользователю, общие для воркеров
+import os
+import math
+import mmap
+import time
+import fcntl
+import struct
+import hashlib
+import threading
+from flask import request, jsonify, current_app
+from flask_login import current_user
+from shared_cache import private_directory
+
+# Ячейка: хеш ключа, токены, время последнего пополнения (time.monotonic - общие для процессов)
+SLOT = struct.Struct('<Qdd')
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600}
+
+
+def parse_rate(rate):
+    """'60/minute' -> (токенов в секунду, емкость). Емкость - N, то есть всплеск до N запросов"""
+    count, _, period = rate.partition('/')
+    count = float(count)
+    seconds = PERIODS.get(period.strip())
+    if count <= 0 or seconds is None:
+        raise ValueError(f"Некорректный лимит {rate!r}: ожидается 'N/second|minute|hour'")
+    return count / seconds, count
+
+
+def rate_limit(ip=None, user=None):
+    """Декоратор маршрута: лимиты на IP и на пользователя, например ip='120/minute'.
+
+    Лимиты сохраняются у view-функции и применяются RateLimiter до вызова
+    маршрута; RATE_LIMITS в конфиге переопределяет их по имени эндпоинта.
+    """
+    def decorator(view):
+        view._rate_limits = {'ip': ip, 'user': user}
+        return view
+    return decorator
+
+
+class BucketTable:
+    """Корзины токенов в файле, отображенном в память (общем для воркеров машины).
+
+    Ключ раскладывается хешем по SLOTS ячейкам. Ячейку, занятую другим
+    ключом, новый ключ забирает, только если чужая корзина уже полная
+    (клиент давно не приходил); иначе оба ключа делят одну корзину - лимит
+    получается строже, но не обходится. Изменение ячейки - под lockf на ее
+    байты (между процессами) и Lock (между потоками).
+    """
+    SLOTS = 65536
+
+    def __init__(self, path=None, salt=b''):
+        size = self.SLOTS * SLOT.size
+        self._lock = threading.Lock()
+        self._salt = hashlib.blake2b(salt, digest_size=16).digest()
+        if path is None:
+            # Без файла таблица общая только для потомков процесса, создавшего ее до fork
+            self._fd = None
+            self._map = mmap.mmap(-1, size)
+            return
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self._fd).st_size < size:
+            os.ftruncate(self._fd, size)
+        self._map = mmap.mmap(self._fd, size)
+
+    def _hash(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=8, key=self._salt).digest()
+        return int.from_bytes(digest, 'little') or 1
+
+    def take(self, key, rate, capacity, now=None, consume=True):
+        """Взять токен. 0 - разрешено, иначе сколько секунд ждать следующего токена.
+
+        consume=False только проверяет корзину: токен не тратится, ячейка не меняется.
+        """
+        key_hash = self._hash(key)
+        offset = key_hash % self.SLOTS * SLOT.size
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self._fd is not None:
+                fcntl.lockf(self._fd, fcntl.LOCK_EX, SLOT.size, offset)
+            try:
+                owner, tokens, updated = SLOT.unpack_from(self._map, offset)
+                elapsed = now - updated
+                if elapsed < 0:  # часы сброшены перезагрузкой
+                    elapsed = capacity / rate
+                tokens = min(capacity, tokens + elapsed * rate)
+                if owner != key_hash and (owner == 0 or tokens >= capacity):
+                    owner, tokens = key_hash, capacity
+                if tokens >= 1:
+                    if consume:
+                        SLOT.pack_into(self._map, offset, owner, tokens - 1, now)
+                    return 0
+                if consume:
+                    SLOT.pack_into(self._map, offset, owner, tokens, now)
+                return (1 - tokens) / rate
+            finally:
+                if self._fd is not None:
+                    fcntl.lockf(self._fd, fcntl.LOCK_UN, SLOT.size, offset)
+
+
+class RateLimiter:
+    """Проверка лимитов маршрута в before_request, 429 с Retry-After при превышении.
+
+    Лимит на пользователя действует для вошедших, лимит на IP - для всех.
+    Адрес клиента за прокси берется из X-Forwarded-For с учетом
+    RATE_LIMIT_PROXY_HOPS (число доверенных прокси перед приложением).
+    """
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.proxy_hops = 0
+        self.table = None
+        self.overrides = {}
+        self._limits = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('RATE_LIMIT_ENABLED', True)
+        self.proxy_hops = app.config.get('RATE_LIMIT_PROXY_HOPS', 0)
+        self.overrides = self.parse_overrides(app.config.get('RATE_LIMITS', ''))
+        salt = app.config['SECRET_KEY'].encode()
+        if app.config.get('CACHE_SHARED', True):
+            directory = private_directory(app.config['CACHE_DIR'])
+            self.table = BucketTable(os.path.join(directory, 'ratelimit.bin'), salt)
+        else:
+            self.table = BucketTable(None, salt)
+        app.extensions['rate_limiter'] = self
+        app.before_request(self._before_request)
+
+    @staticmethod
+    def parse_overrides(text):
+        """'shop.api_products:ip=30/minute,user=20/minute;...' -> {endpoint: {'ip':..., 'user':...}}"""
+        overrides = {}
+        for item in filter(None, (part.strip() for part in text.split(';'))):
+            endpoint, _, limits = item.partition(':')
+            overrides[endpoint.strip()] = {
+                kind.strip(): rate.strip() or None
+                for kind, _, rate in (pair.partition('=') for pair in limits.split(','))
+            }
+        return overrides
+
+    def limits_for(self, app, endpoint):
+        """Разобранные лимиты эндпоинта: [(вид, скорость, емкость)], кэшируются"""
+        limits = self._limits.get(endpoint)
+        if limits is None:
+            view = app.view_functions.get(endpoint)
+            spec = dict(getattr(view, '_rate_limits', None) or {})
+            spec.update(self.overrides.get(endpoint, {}))
+            limits = [(kind, *parse_rate(rate)) for kind, rate in spec.items() if rate]
+            self._limits[endpoint] = limits
+        return limits
+
+    def client_ip(self):
+        if self.proxy_hops:
+            forwarded = [a.strip() for a in request.headers.get('X-Forwarded-For', '').split(',') if a.strip()]
+            if len(forwarded) >= self.proxy_hops:
+                return forwarded[-self.proxy_hops]
+        return request.remote_addr or '-'
+
+    def check(self, endpoint, limits):
+        """Секунды до повтора или 0, если запрос укладывается во все лимиты.
+
+        Сначала все корзины только проверяются, токены берутся, лишь если
+        разрешают все: отказ по лимиту пользователя не тратит лимит IP.
+        """
+        buckets = []
+        for kind, rate, capacity in limits:
+            if kind == 'user':
+                if not current_user.is_authenticated:
+                    continue
+                key = f"u:{current_user.id}:{endpoint}"
+            else:
+                key = f"ip:{self.client_ip()}:{endpoint}"
+            buckets.append((key, rate, capacity))
+        wait = max((self.table.take(*bucket, consume=False) for bucket in buckets), default=0)
+        if wait:
+            return wait
+        return max((self.table.take(*bucket) for bucket in buckets), default=0)
+
+    def _before_request(self):
+        if not self.enabled or request.endpoint is None:
+            return None
+        limits = self.limits_for(current_app, request.endpoint)
+        if not limits:
+            return None
+        wait = self.check(request.endpoint, limits)
+        if not wait:
+            return None
+        response = jsonify({'success': False, 'message': 'Слишком много запросов, повторите позже'})
+        response.status_code = 429
+        response.headers['Retry-After'] = str(max(1, math.ceil(wait)))
+        return response
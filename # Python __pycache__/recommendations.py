@@ -0,0 +1,44 @@
+# recommendations.py - похожие товары: чтение готовых рекомендаций и команда пересчета
+import time
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from models import db, Product, ProductRecommendation
+from shared_cache import CATALOG
+
+recommendations_cli = AppGroup('recommendations', help='Рекомендации похожих товаров.')
+
+
+def similar_products(product, limit=4):
+    """Похожие товары по таблице product_recommendations (один запрос по ключу).
+
+    Пока рекомендации не посчитаны, берутся товары той же категории.
+    """
+    similar = Product.query\
+        .join(ProductRecommendation, ProductRecommendation.similar_id == Product.id)\
+        .filter(ProductRecommendation.product_id == product.id, Product.is_active == True)\
+        .order_by(ProductRecommendation.rank)\
+        .limit(limit).all()
+    if similar:
+        return similar
+    return Product.query.filter(
+        Product.category == product.category,
+        Product.id != product.id,
+        Product.is_active == True
+    ).limit(limit).all()
+
+
+@recommendations_cli.command('build')
+@click.option('--top-k', default=8, show_default=True, help='Соседей на товар.')
+def build_command(top_k):
+    """Пересчитать похожие товары по признакам и совместным покупкам."""
+    # NumPy нужен только здесь, веб-воркеры его не загружают
+    from recommendations_build import build_recommendations
+    started = time.perf_counter()
+    products, rows = build_recommendations(top_k=top_k)
+    # Таблица заменена без ORM: похожие товары в кэше воркеров сбрасываются явно
+    shared = current_app.extensions.get('shared_cache')
+    if shared is not None:
+        shared.invalidate(CATALOG)
+    click.echo(f"Товаров: {products}, рекомендаций: {rows} "
+               f"за {time.perf_counter() - started:.1f} с")
@@ -0,0 +1,211 @@
+# recommendations_build.py - расчет похожих товаров (NumPy), запускается из flask recommendations build
+import json
+from collections import Counter
+import numpy as np
+from sqlalchemy import select, delete
+from models import db, Product, Order, ProductRecommendation
+
+# Баллы за совпадение признаков (сумма = 100, сходство = баллы / 100)
+POINTS = {
+    'category': 30,
+    'brand': 25,
+    'price': 20,      # та же ценовая полоса; соседняя - половина
+    'material': 15,
+    'color': 10,
+}
+# Ширина ценовой полосы: цены различаются не больше чем в PRICE_BAND раз
+PRICE_BAND = 1.25
+# Вклад совместных покупок: COPURCHASE_WEIGHT * ln(1 + число заказов с обоими товарами)
+COPURCHASE_WEIGHT = 0.3
+# Заказы с большим числом позиций почти не говорят о сходстве и дают квадратичный рост пар
+MAX_ORDER_ITEMS = 30
+# Профилей в одном блоке матрицы баллов (память: ROW_BLOCK * число профилей * 2 байта)
+ROW_BLOCK = 1024
+INSERT_BATCH = 10000
+
+MATCHED = ('brand', 'material', 'color')
+
+
+def _codes(values):
+    """Строковые значения -> целые коды; пустые значения получают -1"""
+    keys = [v.split(',')[0].strip().lower() if v else '' for v in values]
+    uniques, codes = np.unique(np.array(keys, dtype=object), return_inverse=True)
+    codes = codes.astype(np.int32)
+    if len(uniques) and uniques[0] == '':
+        codes -= 1  # '' сортируется первым
+    return codes
+
+
+class Features:
+    """Признаки товаров в виде массивов, индекс - позиция товара в ids"""
+
+    def __init__(self, rows):
+        self.ids = np.array([r.id for r in rows], dtype=np.int64)
+        self.category = _codes([r.category for r in rows])
+        self.codes = {
+            'brand': _codes([r.brand for r in rows]),
+            'material': _codes([r.material for r in rows]),
+            'color': _codes([r.color for r in rows]),
+        }
+        prices = np.array([r.price or 1 for r in rows], dtype=np.float64)
+        self.band = np.floor(np.log(np.maximum(prices, 1)) / np.log(PRICE_BAND)).astype(np.int16)
+
+    def _candidates(self, index):
+        # Пустое значение у кандидата не должно совпасть с пустым у товара
+        return {name: np.where(codes[index] < 0, -2, codes[index]) for name, codes in self.codes.items()}
+
+    def points(self, a, b):
+        """Баллы сходства для пар (a[i], b[i])"""
+        candidates = self._candidates(b)
+        total = (self.category[a] == self.category[b]) * np.int16(POINTS['category'])
+        for name in MATCHED:
+            total += (self.codes[name][a] == candidates[name]) * np.int16(POINTS[name])
+        distance = np.abs(self.band[a] - self.band[b])
+        total += np.clip(2 - distance, 0, 2) * np.int16(POINTS['price'] // 2)
+        return total
+
+    def score(self, a, b):
+        return self.points(a, b).astype(np.float32) / 100
+
+
+def _profile_points(profiles, rows):
+    """Баллы между профилями rows и всеми профилями категории (без учета категории)"""
+    block = np.full((len(rows), len(profiles)), POINTS['category'], dtype=np.int16)
+    for column, name in enumerate(MATCHED):
+        values = profiles[:, column]
+        # Пустое значение не совпадает ни с чем, в том числе с пустым
+        candidates = np.where(values < 0, -2, values)
+        block += (values[rows][:, None] == candidates) * np.int16(POINTS[name])
+    band = profiles[:, len(MATCHED)]
+    distance = np.abs(band[rows][:, None] - band)
+    block += (np.clip(2 - distance, 0, 2) * (POINTS['price'] // 2)).astype(np.int16)
+    return block
+
+
+def attribute_neighbors(features, top_k):
+    """Лучшие top_k соседей каждого товара внутри его категории.
+
+    Товары с одинаковыми признаками (профиль: бренд, материал, цвет, ценовая
+    полоса) имеют одинаковых соседей, поэтому матрица баллов считается между
+    профилями, блоками по ROW_BLOCK строк, а затем раскрывается в товары.
+    """
+    sources, targets, scores = [], [], []
+    order = np.argsort(features.category, kind='stable')
+    bounds = np.flatnonzero(np.diff(features.category[order])) + 1
+    for members in np.split(order, bounds):
+        if len(members) < 2:
+            continue
+        k = min(top_k, len(members) - 1)
+        keys = np.stack([features.codes[name][members] for name in MATCHED]
+                        + [features.band[members].astype(np.int32)], axis=1)
+        profiles, inverse = np.unique(keys, axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        grouped = members[np.argsort(inverse, kind='stable')]
+        offsets = np.r_[0, np.cumsum(np.bincount(inverse, minlength=len(profiles)))]
+
+        # k + 1 лучших профилей всегда содержат k + 1 товар (в каждом профиле есть товар)
+        kk = min(k + 1, len(profiles))
+        for start in range(0, len(profiles), ROW_BLOCK):
+            rows = np.arange(start, min(start + ROW_BLOCK, len(profiles)))
+            block = _profile_points(profiles, rows)
+            best = np.argpartition(-block, kk - 1, axis=1)[:, :kk]
+            best_points = np.take_along_axis(block, best, axis=1)
+            ranked = np.lexsort((best, -best_points), axis=1)
+            best = np.take_along_axis(best, ranked, axis=1)
+            best_points = np.take_along_axis(best_points, ranked, axis=1)
+
+            for row, profile in enumerate(rows):
+                # Кандидаты: до k + 1 товаров из каждого лучшего профиля по порядку
+                parts = [grouped[offsets[q]:min(offsets[q + 1], offsets[q] + k + 1)] for q in best[row]]
+                candidates = np.concatenate(parts)[:k + 1]
+                candidate_points = np.repeat(best_points[row], [len(p) for p in parts])[:k + 1]
+
+                owners = grouped[offsets[profile]:offsets[profile + 1]]
+                # Сам товар исключается; stable-сортировка сохраняет порядок остальных
+                is_self = candidates[None, :] == owners[:, None]
+                pick = np.argsort(is_self, axis=1, kind='stable')[:, :k]
+                sources.append(np.repeat(owners, k))
+                targets.append(candidates[pick].ravel())
+                scores.append(candidate_points[pick].ravel().astype(np.float32) / 100)
+    if not sources:
+        return np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0, np.float32)
+    return np.concatenate(sources), np.concatenate(targets), np.concatenate(scores)
+
+
+def copurchase_pairs(position):
+    """Пары товаров из одних заказов: (a, b, число заказов), a и b - позиции в признаках"""
+    counts = Counter()
+    result = db.session.execute(
+        select(Order.items_json).execution_options(stream_results=True, yield_per=1000)
+    )
+    for (items_json,) in result:
+        try:
+            items = json.loads(items_json or '[]')
+        except ValueError:
+            continue
+        found = sorted({position[i['product_id']] for i in items[:MAX_ORDER_ITEMS]
+                        if i.get('product_id') in position})
+        for x in range(len(found)):
+            for y in range(x + 1, len(found)):
+                counts[found[x], found[y]] += 1
+    if not counts:
+        return np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0, np.float32)
+    pairs = np.array(list(counts.keys()), dtype=np.int64)
+    values = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+    # Сходство симметрично: пара учитывается в обе стороны
+    a = np.concatenate([pairs[:, 0], pairs[:, 1]])
+    b = np.concatenate([pairs[:, 1], pairs[:, 0]])
+    return a, b, np.concatenate([values, values])
+
+
+def top_k_per_source(sources, targets, scores, top_k):
+    """Оставить по top_k лучших (без повторов) на каждый исходный товар"""
+    order = np.lexsort((-scores, targets, sources))
+    sources, targets, scores = sources[order], targets[order], scores[order]
+    # Повтор пары (товар нашелся и по признакам, и по покупкам) - оставляем лучший
+    keep = np.ones(len(sources), dtype=bool)
+    keep[1:] = (sources[1:] != sources[:-1]) | (targets[1:] != targets[:-1])
+    sources, targets, scores = sources[keep], targets[keep], scores[keep]
+
+    order = np.lexsort((-scores, sources))
+    sources, targets, scores = sources[order], targets[order], scores[order]
+    starts = np.r_[0, np.flatnonzero(np.diff(sources)) + 1]
+    ranks = np.arange(len(sources)) - np.repeat(starts, np.diff(np.r_[starts, len(sources)]))
+    keep = ranks < top_k
+    return sources[keep], targets[keep], scores[keep], ranks[keep]
+
+
+def build_recommendations(top_k=8):
+    """Пересчитать product_recommendations. Возвращает (товаров, строк)"""
+    rows = db.session.execute(
+        select(Product.id, Product.category, Product.brand, Product.material,
+               Product.color, Product.price)
+        .where(Product.is_active == True).order_by(Product.id)
+    ).all()
+    if not rows:
+        return 0, 0
+    features = Features(rows)
+    position = {int(pid): i for i, pid in enumerate(features.ids)}
+
+    a_src, a_dst, a_score = attribute_neighbors(features, top_k)
+    c_src, c_dst, c_count = copurchase_pairs(position)
+    c_score = features.score(c_src, c_dst) + COPURCHASE_WEIGHT * np.log1p(c_count)
+
+    sources, targets, scores, ranks = top_k_per_source(
+        np.concatenate([a_src, c_src]), np.concatenate([a_dst, c_dst]),
+        np.concatenate([a_score, c_score]).astype(np.float32), top_k
+    )
+
+    # Замена таблицы целиком в одной транзакции: читатели видят старые данные до commit
+    db.session.execute(delete(ProductRecommendation))
+    ids = features.ids
+    table = ProductRecommendation.__table__
+    for start in range(0, len(sources), INSERT_BATCH):
+        end = start + INSERT_BATCH
+        db.session.execute(table.insert(), [
+            {'product_id': p, 'rank': r, 'similar_id': s, 'score': round(float(v), 4)}
+            for p, r, s, v in zip(ids[sources[start:end]].tolist(), ranks[start:end].tolist(),
+                                  ids[targets[start:end]].tolist(), scores[start:end].tolist())
+        ])
+    db.session.commit()
+    return len(rows), len(sources)
@@ -0,0 +1,192 @@
+# reservations.py - снятие просроченных резервов товара по неоплаченным заказам
+import os
+import socket
+import logging
+import time
+import threading
+import click
+from datetime import datetime, timedelta
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import select, update, delete, bindparam
+from models import db, Product, Order, StockReservation, Notification, OutboxEvent
+from leases import acquire_lease
+from notifications import order_status_notification
+from outbox import order_event_rows
+
+logger = logging.getLogger('VogueEliteWeb')
+
+reservations_cli = AppGroup('reservations', help='Резервы товара под неоплаченные заказы.')
+
+LEASE_NAME = 'reservation-sweeper'
+
+# updated_at - явно: по нему меняется версия выгрузок каталога (catalog_version)
+_products = Product.__table__
+_release_stock = _products.update()\
+    .where(_products.c.id == bindparam('product_id'))\
+    .values(stock=_products.c.stock + bindparam('quantity'),
+            reserved=_products.c.reserved - bindparam('quantity'),
+            updated_at=bindparam('now'))
+# Резерв проданного товара закрывается: товар уходит из reserved, на склад не возвращается
+_close_reserved = _products.update()\
+    .where(_products.c.id == bindparam('product_id'))\
+    .values(reserved=_products.c.reserved - bindparam('quantity'))
+
+
+class ReservationSweeper:
+    """Возврат на склад товара из новых заказов, не оплаченных за RESERVATION_TTL_MINUTES.
+
+    Каждый резерв - строка stock_reservations с временем истечения. Уборщик
+    читает только просроченные строки по индексу expires_at, порциями по
+    RESERVATION_SWEEP_BATCH, и снимает их одной транзакцией на порцию.
+    Фоновый поток есть в каждом воркере gunicorn, но работает только владелец
+    аренды job_leases. clock можно подменить для проверки без ожидания.
+    """
+
+    def __init__(self, app=None, clock=datetime.utcnow):
+        self.clock = clock
+        self.ttl = timedelta(minutes=30)
+        self.interval = 60
+        self.batch_size = 500
+        self.on_release = None
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._thread = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app, on_release=None):
+        self.ttl = timedelta(minutes=app.config.get('RESERVATION_TTL_MINUTES', 30))
+        self.interval = app.config.get('RESERVATION_SWEEP_INTERVAL', 60)
+        self.batch_size = app.config.get('RESERVATION_SWEEP_BATCH', 500)
+        self.on_release = on_release
+        app.extensions['reservations'] = self
+
+    def expires_at(self, now=None):
+        """Когда истечет резерв, созданный сейчас"""
+        return (now or self.clock()) + self.ttl
+
+    # ========== АРЕНДА ==========
+
+    def acquire_lease(self, now=None):
+        """Взять или продлить аренду. True, если уборку выполняет этот процесс"""
+        now = now or self.clock()
+        return acquire_lease(LEASE_NAME, self.owner, now, now + timedelta(seconds=self.interval * 3))
+
+    # ========== УБОРКА ==========
+
+    def sweep_batch(self, now=None):
+        """Снять одну порцию просроченных резервов. Возвращает число строк ledger"""
+        now = now or self.clock()
+        due = db.session.execute(
+            select(StockReservation.id, StockReservation.order_id,
+                   StockReservation.product_id, StockReservation.quantity)
+            .where(StockReservation.expires_at <= now)
+            .order_by(StockReservation.expires_at, StockReservation.id)
+            .limit(self.batch_size)
+        ).all()
+        if not due:
+            return 0
+
+        # Заказ отменяется, только если он все еще ждет оплаты и его не взял в
+        # работу администратор (status 'new'); проверка и смена статуса - один
+        # UPDATE, поэтому оплата или смена статуса не проскочат между ними
+        order_ids = {row.order_id for row in due}
+        cancelled = db.session.execute(
+            update(Order)
+            .where(Order.id.in_(order_ids), Order.status == 'new',
+                   Order.payment_status == 'pending')
+            .values(status='cancelled', payment_status='expired', updated_at=now)
+            .returning(Order.id, Order.user_id, Order.order_number)
+        ).all()
+        expired = {order.id for order in cancelled}
+        if cancelled:
+            db.session.execute(Notification.__table__.insert(), [
+                dict(order_status_notification(order.user_id, order.order_number, 'cancelled', now),
+                     order_id=order.id)
+                for order in cancelled
+            ])
+            db.session.execute(OutboxEvent.__table__.insert(), [
+                dict(row, order_id=order.id)
+                for order in cancelled
+                for row in order_event_rows('cancelled', now=now)
+            ])
+
+        # Заказ, отмененный администратором, тоже возвращает товар на склад;
+        # остальные (оплаченные, в работе) товар продали
+        returned = set(expired)
+        if order_ids - expired:
+            returned.update(db.session.scalars(
+                select(Order.id).where(Order.id.in_(order_ids - expired), Order.status == 'cancelled')
+            ))
+        released, sold = {}, {}
+        for row in due:
+            target = released if row.order_id in returned else sold
+            target[row.product_id] = target.get(row.product_id, 0) + row.quantity
+        if released:
+            db.session.execute(_release_stock, [
+                {'product_id': product_id, 'quantity': quantity, 'now': now}
+                for product_id, quantity in released.items()
+            ])
+        # Резервы оплаченных и принятых в работу заказов закрываются: товар продан
+        if sold:
+            db.session.execute(_close_reserved, [
+                {'product_id': product_id, 'quantity': quantity}
+                for product_id, quantity in sold.items()
+            ])
+
+        db.session.execute(
+            delete(StockReservation).where(StockReservation.id.in_([row.id for row in due]))
+        )
+        db.session.commit()
+
+        if expired:
+            logger.info(f"Снят резерв по {len(expired)} неоплаченным заказам")
+            if self.on_release:
+                self.on_release()
+        return len(due)
+
+    def sweep(self, now=None):
+        """Снять все резервы, просроченные к now. Возвращает число строк ledger"""
+        now = now or self.clock()
+        total = 0
+        while True:
+            count = self.sweep_batch(now)
+            total += count
+            if count < self.batch_size:
+                return total
+
+    def run_once(self, now=None):
+        """Уборка под арендой; None, если аренда у другого процесса"""
+        now = now or self.clock()
+        if not self.acquire_lease(now):
+            return None
+        return self.sweep(now)
+
+    # ========== ФОНОВЫЙ ПОТОК ==========
+
+    def start(self, app):
+        """Запустить фоновую уборку в текущем процессе (после fork)"""
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._thread = threading.Thread(target=self._loop, args=(app,), daemon=True)
+        self._thread.start()
+
+    def _loop(self, app):
+        while True:
+            time.sleep(self.interval)
+            with app.app_context():
+                try:
+                    self.run_once()
+                except Exception:
+                    db.session.rollback()
+                    logger.exception("Ошибка при снятии просроченных резервов")
+
+
+@reservations_cli.command('sweep')
+def sweep_command():
+    """Снять просроченные резервы (под той же арендой, что и воркеры)."""
+    sweeper = current_app.extensions['reservations']
+    released = sweeper.run_once()
+    if released is None:
+        click.echo('Уборку сейчас выполняет другой процесс')
+    else:
+        click.echo(f'Закрыто резервов: {released}')
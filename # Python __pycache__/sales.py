@@ -0,0 +1,142 @@
+# sales.py - аналитика продаж по order_items и перенос старых заказов из items_json
+import json
+import time
+import click
+from datetime import datetime, timedelta
+from flask.cli import AppGroup
+from sqlalchemy import func, insert, select, exists
+from models import db, Order, OrderItem, Product
+
+sales_cli = AppGroup('sales', help='Аналитика продаж и обслуживание order_items.')
+
+
+def _period_filter(query, since=None, until=None):
+    if since is not None:
+        query = query.where(OrderItem.created_at >= since)
+    if until is not None:
+        query = query.where(OrderItem.created_at < until)
+    return query
+
+
+def top_products(since=None, until=None, limit=10):
+    """Самые продаваемые товары по выручке"""
+    revenue = func.sum(OrderItem.price * OrderItem.quantity).label('revenue')
+    query = select(
+        OrderItem.product_id,
+        func.max(OrderItem.article).label('article'),
+        func.max(OrderItem.name).label('name'),
+        func.sum(OrderItem.quantity).label('units'),
+        revenue
+    ).group_by(OrderItem.product_id).order_by(revenue.desc()).limit(limit)
+    rows = db.session.execute(_period_filter(query, since, until))
+    return [dict(row._mapping) for row in rows]
+
+
+def units_by_article(since=None, until=None):
+    """Продано штук по каждому артикулу"""
+    units = func.sum(OrderItem.quantity).label('units')
+    query = select(OrderItem.article, units)\
+        .group_by(OrderItem.article).order_by(units.desc())
+    rows = db.session.execute(_period_filter(query, since, until))
+    return [dict(row._mapping) for row in rows]
+
+
+def revenue_by_category(since=None, until=None):
+    """Выручка и количество по категориям"""
+    revenue = func.sum(OrderItem.price * OrderItem.quantity).label('revenue')
+    query = select(
+        OrderItem.category,
+        func.sum(OrderItem.quantity).label('units'),
+        revenue
+    ).group_by(OrderItem.category).order_by(revenue.desc())
+    rows = db.session.execute(_period_filter(query, since, until))
+    return [dict(row._mapping) for row in rows]
+
+
+def sales_report(days=365, limit=10):
+    """Все отчеты за последние days дней"""
+    since = datetime.utcnow() - timedelta(days=days)
+    return {
+        'since': since.isoformat(),
+        'top_products': top_products(since=since, limit=limit),
+        'units_by_article': units_by_article(since=since),
+        'revenue_by_category': revenue_by_category(since=since),
+    }
+
+
+def backfill_order_items(chunk_size=1000, echo=None):
+    """Заполнить order_items для заказов, у которых есть только items_json.
+
+    Заказы читаются порциями по id (keyset), каждая порция - отдельная
+    транзакция, поэтому память постоянна, а прерванный запуск можно повторить.
+    """
+    last_id = 0
+    orders_done = items_done = 0
+    has_items = exists().where(OrderItem.order_id == Order.id)
+    while True:
+        rows = db.session.execute(
+            select(Order.id, Order.items_json, Order.created_at)
+            .where(Order.id > last_id, ~has_items)
+            .order_by(Order.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        batch = []
+        for order_id, items_json, created_at in rows:
+            try:
+                items = json.loads(items_json or '[]')
+            except ValueError:
+                continue
+            for item in items:
+                batch.append({
+                    'order_id': order_id,
+                    'product_id': item.get('product_id'),
+                    'article': item.get('article'),
+                    'name': item.get('name'),
+                    'price': item.get('price') or 0,
+                    'quantity': item.get('quantity') or 0,
+                    'size': item.get('size'),
+                    'color': item.get('color'),
+                    'created_at': created_at,
+                })
+
+        # Категории товаров порции одним запросом
+        product_ids = {row['product_id'] for row in batch if row['product_id']}
+        categories = dict(db.session.execute(
+            select(Product.id, Product.category).where(Product.id.in_(product_ids))
+        ).all()) if product_ids else {}
+        for row in batch:
+            row['category'] = categories.get(row['product_id'])
+
+        if batch:
+            db.session.execute(insert(OrderItem), batch)
+        db.session.commit()
+        orders_done += len(rows)
+        items_done += len(batch)
+        if echo:
+            echo(f"  заказов: {orders_done}, позиций: {items_done}")
+    return orders_done, items_done
+
+
+@sales_cli.command('backfill-items')
+@click.option('--chunk-size', default=1000, show_default=True, help='Заказов в одной транзакции.')
+def backfill_items_command(chunk_size):
+    """Перенести позиции старых заказов из items_json в order_items."""
+    started = time.perf_counter()
+    orders_done, items_done = backfill_order_items(chunk_size, echo=click.echo)
+    click.echo(f"Готово: заказов {orders_done}, позиций {items_done} "
+               f"за {time.perf_counter() - started:.1f} с")
+
+
+@sales_cli.command('report')
+@click.option('--days', default=365, show_default=True)
+@click.option('--limit', default=10, show_default=True)
+def report_command(days, limit):
+    """Показать отчет по продажам."""
+    started = time.perf_counter()
+    report = sales_report(days=days, limit=limit)
+    click.echo(json.dumps(report, ensure_ascii=False, indent=2, default=str))
+    click.echo(f"Построено за {(time.perf_counter() - started) * 1000:.1f} мс")
@@ -0,0 +1,325 @@
+# shared_cache.py - общий для воркеров кэш: LRU в памяти процесса + SQLite (WAL) на машине
+import os
+import mmap
+import time
+import zlib
+import fcntl
+import pickle
+import struct
+import sqlite3
+import logging
+import threading
+import click
+from collections import OrderedDict
+from flask.cli import AppGroup
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger('VogueEliteWeb')
+
+cache_cli = AppGroup('cache', help='Общий кэш воркеров.')
+
+# Пространство имен данных каталога (списки товаров, категории, похожие товары)
+CATALOG = 'catalog'
+
+_MISSING = object()
+
+
+def private_directory(path):
+    """Каталог, доступный только владельцу процесса (0700).
+
+    Из общего кэша читается pickle: файл, подложенный другим пользователем
+    машины, - выполнение кода. Каталог чужого пользователя - RuntimeError,
+    открытый группе или всем - закрывается.
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    st = os.stat(path)
+    if st.st_uid != os.geteuid():
+        raise RuntimeError(f'Каталог кэша {path} принадлежит другому пользователю')
+    if st.st_mode & 0o077:
+        os.chmod(path, 0o700)
+    return path
+
+
+class VersionTable:
+    """Счетчики версий пространств имен в файле, отображенном в память.
+
+    Чтение версии - чтение 8 байт из общей страницы, без системных вызовов,
+    поэтому его можно делать на каждый get. Пространства имен раскладываются
+    по SLOTS ячейкам хешем: совпадение ячеек дает лишний промах, но не
+    устаревшие данные. Отображение, созданное до fork (preload_app),
+    остается общим для мастера и воркеров.
+    """
+    SLOTS = 4096
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self._fd).st_size < self.SLOTS * 8:
+            os.ftruncate(self._fd, self.SLOTS * 8)
+        self._map = mmap.mmap(self._fd, self.SLOTS * 8)
+
+    def _offset(self, namespace):
+        return zlib.crc32(namespace.encode()) % self.SLOTS * 8
+
+    def get(self, namespace):
+        return struct.unpack_from('<Q', self._map, self._offset(namespace))[0]
+
+    def bump(self, namespace):
+        """Новая версия: записи со старой версией перестают читаться во всех воркерах"""
+        offset = self._offset(namespace)
+        # lockf - блокировка процесса (flock общий у fork-потомков), Lock - потоков
+        with self._lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, 8, offset)
+            try:
+                version = struct.unpack_from('<Q', self._map, offset)[0] + 1
+                struct.pack_into('<Q', self._map, offset, version)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 8, offset)
+        return version
+
+
+class LocalVersions:
+    """Версии в памяти процесса (кэш без общего уровня)"""
+
+    def __init__(self):
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, namespace):
+        return self._versions.get(namespace, 0)
+
+    def bump(self, namespace):
+        with self._lock:
+            self._versions[namespace] = self._versions.get(namespace, 0) + 1
+            return self._versions[namespace]
+
+
+class SQLiteStore:
+    """Общий уровень: таблица key -> (версия, срок, pickle) в файле SQLite (WAL).
+
+    Соединение свое у каждого потока каждого процесса. Ошибки SQLite
+    (занятая база, диск) считаются промахом: кэш не должен ронять запрос.
+    """
+
+    def __init__(self, path, max_entries=50000):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        self._conn()
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        conn = sqlite3.connect(self.path, timeout=1, isolation_level=None, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                key TEXT PRIMARY KEY,
+                version INTEGER NOT NULL,
+                expires REAL NOT NULL,
+                value BLOB NOT NULL
+            ) WITHOUT ROWID
+        ''')
+        self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, key, version, now):
+        """(срок, байты) или None"""
+        try:
+            return self._conn().execute(
+                'SELECT expires, value FROM cache_entries WHERE key = ? AND version = ? AND expires > ?',
+                (key, version, now)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.debug(f"Общий кэш недоступен: {e}")
+            return None
+
+    def set(self, key, version, expires, value):
+        try:
+            conn = self._conn()
+            conn.execute('INSERT OR REPLACE INTO cache_entries VALUES (?, ?, ?, ?)',
+                         (key, version, expires, value))
+            self._writes += 1
+            if self._writes % 1000 == 0:
+                self.trim(conn)
+        except sqlite3.Error as e:
+            logger.debug(f"Общий кэш недоступен: {e}")
+
+    def trim(self, conn=None):
+        """Удалить просроченные записи и самые старые сверх max_entries"""
+        conn = conn or self._conn()
+        conn.execute('DELETE FROM cache_entries WHERE expires <= ?', (time.time(),))
+        excess = conn.execute('SELECT COUNT(*) FROM cache_entries').fetchone()[0] - self.max_entries
+        if excess > 0:
+            conn.execute('DELETE FROM cache_entries WHERE key IN '
+                         '(SELECT key FROM cache_entries ORDER BY expires LIMIT ?)', (excess,))
+
+    def clear(self):
+        self._conn().execute('DELETE FROM cache_entries')
+
+
+class SharedCache:
+    """Двухуровневый кэш с версиями пространств имен.
+
+    get_or_set(namespace, key, factory, ttl) ищет значение в LRU воркера,
+    затем в общем SQLite и только потом вызывает factory; вычисленное
+    значение видят все воркеры машины, поэтому доля попаданий не делится
+    на число воркеров. invalidate(namespace) увеличивает версию в общей
+    таблице: записи старой версии перестают читаться во всех воркерах
+    сразу, без рассылки. Значения должны переживать pickle и не меняться
+    после записи в кэш. CACHE_SHARED=0 оставляет только память процесса.
+    """
+
+    def __init__(self, app=None):
+        self.max_entries = 10000
+        self.default_ttl = 300
+        self.versions = LocalVersions()
+        self.store = None
+        self.stats = {'local': 0, 'shared': 0, 'miss': 0}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._watched = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.max_entries = app.config.get('CACHE_LOCAL_MAX_ENTRIES', 10000)
+        self.default_ttl = app.config.get('CACHE_DEFAULT_TTL', 300)
+        if app.config.get('CACHE_SHARED', True):
+            directory = private_directory(app.config['CACHE_DIR'])
+            self.versions = VersionTable(os.path.join(directory, 'versions.bin'))
+            self.store = SQLiteStore(os.path.join(directory, 'cache.db'),
+                                     app.config.get('CACHE_SHARED_MAX_ENTRIES', 50000))
+        app.extensions['shared_cache'] = self
+        if not event.contains(Session, 'after_flush', self._after_flush):
+            event.listen(Session, 'after_flush', self._after_flush)
+            event.listen(Session, 'after_commit', self._after_commit)
+            event.listen(Session, 'after_rollback', self._after_rollback)
+
+    @staticmethod
+    def _key(namespace, key):
+        parts = key if isinstance(key, (tuple, list)) else (key,)
+        return namespace + ':' + '\x1f'.join(str(p) for p in parts)
+
+    def get(self, namespace, key, default=None):
+        value = self._lookup(self._key(namespace, key), self.versions.get(namespace))
+        return default if value is _MISSING else value
+
+    def _lookup(self, full_key, version):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(full_key)
+            if entry is not None and entry[0] == version and entry[1] > now:
+                self._entries.move_to_end(full_key)
+                self.stats['local'] += 1
+                return entry[2]
+
+        if self.store is not None:
+            row = self.store.get(full_key, version, now)
+            if row is not None:
+                value = pickle.loads(row[1])
+                self._remember(full_key, version, row[0], value)
+                self.stats['shared'] += 1
+                return value
+        self.stats['miss'] += 1
+        return _MISSING
+
+    def set(self, namespace, key, value, ttl=None):
+        self._set(self._key(namespace, key), self.versions.get(namespace), value, ttl)
+
+    def _set(self, full_key, version, value, ttl):
+        expires = time.time() + (ttl if ttl is not None else self.default_ttl)
+        self._remember(full_key, version, expires, value)
+        if self.store is not None:
+            self.store.set(full_key, version, expires, pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+
+    def get_or_set(self, namespace, key, factory, ttl=None):
+        """Значение из кэша или factory(), записанное в оба уровня.
+
+        Значение записывается под версией, прочитанной до factory(): если
+        пространство сбросили, пока factory() читала БД, запись сразу
+        устаревает и не переживает инвалидацию.
+        """
+        full_key = self._key(namespace, key)
+        version = self.versions.get(namespace)
+        value = self._lookup(full_key, version)
+        if value is _MISSING:
+            value = factory()
+            self._set(full_key, version, value, ttl)
+        return value
+
+    def _remember(self, full_key, version, expires, value):
+        with self._lock:
+            self._entries[full_key] = (version, expires, value)
+            self._entries.move_to_end(full_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def version(self, namespace):
+        """Текущая версия: для своих кэшей, которым нужна только межворкерная инвалидация"""
+        return self.versions.get(namespace)
+
+    def invalidate(self, *namespaces):
+        """Сбросить пространства имен во всех воркерах"""
+        for namespace in namespaces:
+            self.versions.bump(namespace)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.store is not None:
+            self.store.clear()
+
+    # ========== ИНВАЛИДАЦИЯ ПО ЗАПИСИ В БД ==========
+
+    def watch(self, namespace, *models):
+        """Сбрасывать namespace после commit, изменившего строки моделей через ORM.
+
+        namespace - строка или функция от измененного объекта, например
+        lambda item: f"cart:{item.user_id}" для кэша корзины пользователя.
+        """
+        self._watched[namespace] = models
+
+    def _after_flush(self, session, flush_context):
+        stale = set()
+        for obj in (*session.new, *session.dirty, *session.deleted):
+            for namespace, models in self._watched.items():
+                if isinstance(obj, models):
+                    stale.add(namespace(obj) if callable(namespace) else namespace)
+        if stale:
+            session.info.setdefault('_shared_cache_stale', set()).update(stale)
+
+    def _after_commit(self, session):
+        stale = session.info.pop('_shared_cache_stale', None)
+        if stale:
+            self.invalidate(*stale)
+
+    def _after_rollback(self, session):
+        session.info.pop('_shared_cache_stale', None)
+
+
+@cache_cli.command('clear')
+def clear_command():
+    """Очистить общий кэш."""
+    from flask import current_app
+    cache = current_app.extensions['shared_cache']
+    cache.clear()
+    click.echo('Общий кэш очищен')
+
+
+@cache_cli.command('stats')
+def stats_command():
+    """Размер общего кэша."""
+    from flask import current_app
+    cache = current_app.extensions['shared_cache']
+    if cache.store is None:
+        click.echo('Общий уровень выключен (CACHE_SHARED=0)')
+        return
+    conn = cache.store._conn()
+    count, size = conn.execute('SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM cache_entries').fetchone()
+    click.echo(f"Записей: {count}, данных: {size / 1024:.1f} КБ ({cache.store.path})")
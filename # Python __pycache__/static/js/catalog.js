@@ -666,8 +666,8 @@ class CatalogManager {
                      loading="lazy"
                      class="product-main-image">
                 <div class="product-actions">
-                    <button class="action-btn wishlist-btn" title="В избранное">
-                        <i class="far fa-heart"></i>
+                    <button class="action-btn wishlist-btn ${this.isInList('wishlist', product.id) ? 'active' : ''}" title="В избранное">
+                        <i class="${this.isInList('wishlist', product.id) ? 'fas' : 'far'} fa-heart"></i>
                     </button>
                     <button class="action-btn quick-view-btn" title="Быстрый просмотр">
                         <i class="far fa-eye"></i>
@@ -1552,42 +1552,49 @@ class CatalogManager {
         }, 300);
     }
 
-    // Сохранение состояния избранного
+    // Сохранение состояния избранного: у вошедшего пользователя - на сервере
     saveWishlistState(productId, isInWishlist) {
-        try {
-            const wishlist = JSON.parse(localStorage.getItem('wishlist') || '[]');
-            const index = wishlist.indexOf(productId);
-            
-            if (isInWishlist && index === -1) {
-                wishlist.push(productId);
-            } else if (!isInWishlist && index !== -1) {
-                wishlist.splice(index, 1);
-            }
-            
-            localStorage.setItem('wishlist', JSON.stringify(wishlist));
-        } catch (error) {
-            console.error('Ошибка сохранения избранного:', error);
-        }
+        this.saveListState('wishlist', productId, isInWishlist);
     }
 
     // Сохранение состояния сравнения
     saveCompareState(productId, isInCompare) {
+        this.saveListState('compare', productId, isInCompare);
+    }
+
+    saveListState(kind, productId, isInList) {
+        const app = window.VogueElite;
+        if (app && app.state.user) {
+            app.queueListChange(kind, productId, isInList);
+            return;
+        }
+        
         try {
-            const compare = JSON.parse(localStorage.getItem('compare') || '[]');
-            const index = compare.indexOf(productId);
+            const list = JSON.parse(localStorage.getItem(kind) || '[]').map(Number);
+            const id = Number(productId);
+            const index = list.indexOf(id);
             
-            if (isInCompare && index === -1) {
-                compare.push(productId);
-            } else if (!isInCompare && index !== -1) {
-                compare.splice(index, 1);
+            if (isInList && index === -1) {
+                list.push(id);
+            } else if (!isInList && index !== -1) {
+                list.splice(index, 1);
             }
             
-            localStorage.setItem('compare', JSON.stringify(compare));
+            localStorage.setItem(kind, JSON.stringify(list));
         } catch (error) {
-            console.error('Ошибка сохранения сравнения:', error);
+            console.error('Ошибка сохранения списка:', error);
         }
     }
 
+    // Есть ли товар в избранном или сравнении (сервер или localStorage гостя)
+    isInList(kind, productId) {
+        const app = window.VogueElite;
+        const list = app && app.state.user
+            ? app.state[kind]
+            : JSON.parse(localStorage.getItem(kind) || '[]').map(Number);
+        return list.includes(Number(productId));
+    }
+
     // Сохранение фильтров
     saveFilters() {
         try {
@@ -0,0 +1,88 @@
+// Инициализация
+document.addEventListener('DOMContentLoaded', function() {
+    // Preloader
+    setTimeout(() => {
+        document.querySelector('.preloader').classList.add('loaded');
+    }, 1000);
+
+    // Mobile menu
+    const mobileToggle = document.querySelector('.mobile-menu-toggle');
+    const mobileClose = document.querySelector('.mobile-menu-close');
+    const mobileMenu = document.querySelector('.mobile-menu');
+
+    mobileToggle?.addEventListener('click', () => {
+        mobileMenu.classList.add('active');
+        document.body.style.overflow = 'hidden';
+    });
+
+    mobileClose?.addEventListener('click', () => {
+        mobileMenu.classList.remove('active');
+        document.body.style.overflow = '';
+    });
+
+    // Close alerts
+    document.querySelectorAll('.alert-close').forEach(button => {
+        button.addEventListener('click', function() {
+            this.closest('.alert').remove();
+        });
+    });
+
+    // Back to top
+    const backToTop = document.querySelector('.back-to-top');
+    window.addEventListener('scroll', () => {
+        if (window.pageYOffset > 300) {
+            backToTop.classList.add('visible');
+        } else {
+            backToTop.classList.remove('visible');
+        }
+    });
+
+    backToTop.addEventListener('click', () => {
+        window.scrollTo({ top: 0, behavior: 'smooth' });
+    });
+
+    // User menu dropdown
+    const userMenu = document.querySelector('.user-menu');
+    if (userMenu) {
+        userMenu.addEventListener('click', (e) => {
+            e.stopPropagation();
+            userMenu.classList.toggle('active');
+        });
+
+        document.addEventListener('click', () => {
+            userMenu.classList.remove('active');
+        });
+    }
+
+    // Notification
+    const notification = document.getElementById('notification');
+    const notificationClose = document.querySelector('.notification-close');
+
+    notificationClose?.addEventListener('click', () => {
+        notification.classList.remove('show');
+    });
+});
+
+// Вход через Telegram WebApp: initData проверяется на сервере, дальше работает сессия
+(function() {
+    const webApp = window.Telegram && window.Telegram.WebApp;
+    if (!webApp || !webApp.initData || document.body.dataset.authenticated === '1') {
+        return;
+    }
+    const params = new URLSearchParams(location.search);
+    fetch('/login/telegram', {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({
+            init_data: webApp.initData,
+            next: params.get('next') || location.pathname + location.search
+        })
+    })
+        .then(response => response.ok ? response.json() : null)
+        .then(data => {
+            if (data && data.success) {
+                location.replace(data.next);
+            }
+        })
+        .catch(() => {});
+})();
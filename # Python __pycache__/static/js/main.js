@@ -202,38 +202,100 @@ class VogueEliteApp {
         }
     }
 
-    // Загрузка избранного
+    // Загрузка избранного (только id; карточки - GET /api/wishlist)
     async loadWishlist() {
+        await this.loadProductList('wishlist');
+        this.updateWishlistUI();
+    }
+
+    // Загрузка списка сравнения
+    async loadCompareList() {
+        await this.loadProductList('compare');
+        this.updateCompareUI();
+    }
+
+    async loadProductList(kind) {
         try {
-            const response = await fetch(`${this.config.apiBase}/wishlist`, {
+            const response = await fetch(`${this.config.apiBase}/${kind}?cards=0`, {
                 credentials: 'include'
             });
             
             if (response.ok) {
-                this.state.wishlist = await response.json();
-                this.updateWishlistUI();
+                const data = await response.json();
+                this.state[kind] = data.ids;
+                
+                // Список, собранный до входа, переносится на сервер одной пачкой
+                const guestIds = JSON.parse(localStorage.getItem(kind) || '[]');
+                guestIds.map(Number).filter(id => !data.ids.includes(id))
+                    .forEach(id => this.queueListChange(kind, id, true));
+                localStorage.removeItem(kind);
             }
         } catch (error) {
-            console.error('Ошибка загрузки избранного:', error);
+            console.error(`Ошибка загрузки списка ${kind}:`, error);
         }
     }
 
-    // Загрузка списка сравнения
-    async loadCompareList() {
-        try {
-            const response = await fetch(`${this.config.apiBase}/compare`, {
-                credentials: 'include'
-            });
+    // Изменение избранного или сравнения: сразу в интерфейсе, на сервер - пачкой
+    queueListChange(kind, productId, add) {
+        const id = Number(productId);
+        const pending = this.pendingLists || (this.pendingLists = {});
+        const changes = pending[kind] || (pending[kind] = { add: new Set(), remove: new Set() });
+        
+        (add ? changes.remove : changes.add).delete(id);
+        (add ? changes.add : changes.remove).add(id);
+        
+        const list = this.state[kind];
+        const index = list.indexOf(id);
+        if (add && index === -1) list.push(id);
+        if (!add && index !== -1) list.splice(index, 1);
+        kind === 'wishlist' ? this.updateWishlistUI() : this.updateCompareUI();
+        
+        clearTimeout(this.listFlushTimer);
+        this.listFlushTimer = setTimeout(() => this.flushLists(), 1500);
+    }
+
+    // Отправка накопленных изменений; beacon - при закрытии страницы
+    async flushLists(useBeacon = false) {
+        const pending = this.pendingLists || {};
+        this.pendingLists = {};
+        clearTimeout(this.listFlushTimer);
+        
+        for (const [kind, changes] of Object.entries(pending)) {
+            if (!changes.add.size && !changes.remove.size) continue;
+            const body = JSON.stringify({ add: [...changes.add], remove: [...changes.remove] });
             
-            if (response.ok) {
-                this.state.compare = await response.json();
-                this.updateCompareUI();
+            if (useBeacon && navigator.sendBeacon) {
+                navigator.sendBeacon(`${this.config.apiBase}/${kind}`,
+                                     new Blob([body], { type: 'application/json' }));
+                continue;
+            }
+            try {
+                const response = await fetch(`${this.config.apiBase}/${kind}`, {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: body,
+                    credentials: 'include'
+                });
+                if (response.ok) {
+                    const data = await response.json();
+                    this.state[kind] = data.ids;
+                }
+            } catch (error) {
+                console.error(`Ошибка сохранения списка ${kind}:`, error);
             }
-        } catch (error) {
-            console.error('Ошибка загрузки списка сравнения:', error);
         }
     }
 
+    async syncWishlist() {
+        await this.flushLists();
+        this.updateWishlistUI();
+    }
+
+    async syncCompareList() {
+        await this.flushLists();
+        this.updateCompareUI();
+    }
+
     // Загрузка пользовательских предпочтений
     async loadUserPreferences() {
         try {
@@ -510,7 +572,13 @@ class VogueEliteApp {
             
             // Обновляем время сессии
             if (this.state.session.lastHiddenTime) {
-                this.state.session.hiddenDuration += Date.now() - this.state.session.lastHiddenTime;
+                const hidden = Date.now() - this.state.session.lastHiddenTime;
+                this.state.session.hiddenDuration += hidden;
+                
+                // Вкладка долго была скрыта - данные могли измениться в другой
+                if (hidden > 120000) {
+                    this.syncData();
+                }
             }
         }
     }
@@ -1230,17 +1298,56 @@ class VogueEliteApp {
             this.autoSave();
         }, 30000);
         
-        // Проверка новых уведомлений каждую минуту
+        // Уведомления приходят по SSE; данные синхронизируются при возврате на вкладку
         if (this.state.user) {
-            setInterval(() => {
-                this.checkForNotifications();
-            }, 60000);
+            this.connectNotifications();
+        }
+    }
+
+    // Поток уведомлений: сервер присылает события сам, ожидание не стоит запросов
+    connectNotifications() {
+        if (!window.EventSource) {
+            // Старые браузеры - опрос раз в минуту
+            this.notificationPoll = setInterval(() => this.checkForNotifications(), 60000);
+            return;
         }
+        if (this.notificationSource) return;
         
-        // Синхронизация данных каждые 2 минуты
-        setInterval(() => {
-            this.syncData();
-        }, 120000);
+        const source = new EventSource(`${this.config.apiBase}/notifications/stream`);
+        this.notificationSource = source;
+        source.addEventListener('notification', (event) => {
+            try {
+                this.showNewNotifications([JSON.parse(event.data)]);
+            } catch (error) {
+                console.error('Ошибка разбора уведомления:', error);
+            }
+        });
+        source.onerror = () => {
+            // Обрыв браузер переподключает сам; закрытый поток (503, 401) - повтор через 30 секунд
+            if (source.readyState === EventSource.CLOSED) {
+                this.notificationSource = null;
+                this.notificationRetry = setTimeout(() => this.connectNotifications(), 30000);
+            }
+        };
+    }
+
+    disconnectNotifications() {
+        clearTimeout(this.notificationRetry);
+        clearInterval(this.notificationPoll);
+        if (this.notificationSource) {
+            this.notificationSource.close();
+            this.notificationSource = null;
+        }
+    }
+
+    // Отметить показанные уведомления прочитанными
+    markNotificationsRead(ids) {
+        fetch(`${this.config.apiBase}/notifications/read`, {
+            method: 'POST',
+            credentials: 'include',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ ids })
+        }).catch(() => {});
     }
 
     // Автосохранение
@@ -1290,6 +1397,22 @@ class VogueEliteApp {
         await this.syncCompareList();
     }
 
+    // Ключ Idempotency-Key: повтор запроса с ним сервер не выполняет второй раз
+    newIdempotencyKey() {
+        if (window.crypto && crypto.randomUUID) {
+            return crypto.randomUUID();
+        }
+        return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+    }
+
+    // Отложить запрос до появления сети; ключ назначается сразу и переживает повторы
+    queueOfflineAction(url, options = {}) {
+        const offlineActions = JSON.parse(localStorage.getItem('offline_actions') || '[]');
+        options.headers = { ...(options.headers || {}), 'Idempotency-Key': this.newIdempotencyKey() };
+        offlineActions.push({ url, options });
+        localStorage.setItem('offline_actions', JSON.stringify(offlineActions));
+    }
+
     // Синхронизация оффлайн данных
     async syncOfflineData() {
         const offlineActions = JSON.parse(localStorage.getItem('offline_actions') || '[]');
@@ -1297,24 +1420,51 @@ class VogueEliteApp {
         if (offlineActions.length > 0) {
             this.showNotification('Синхронизация оффлайн данных...', 'info');
             
+            // Старым записям без ключа ключ назначается до первой отправки
+            offlineActions.forEach(action => {
+                action.options = action.options || {};
+                action.options.headers = action.options.headers || {};
+                if (!action.options.headers['Idempotency-Key']) {
+                    action.options.headers['Idempotency-Key'] = this.newIdempotencyKey();
+                }
+            });
+            localStorage.setItem('offline_actions', JSON.stringify(offlineActions));
+            
+            // Действия без ответа сервера остаются в очереди до следующего подключения
+            const pending = [];
             for (const action of offlineActions) {
                 try {
-                    await fetch(action.url, action.options);
+                    const response = await fetch(action.url, action.options);
+                    if (response.status === 409) {
+                        pending.push(action);
+                    }
                 } catch (error) {
                     console.error('Ошибка синхронизации:', error);
+                    pending.push(action);
                 }
             }
             
-            localStorage.removeItem('offline_actions');
-            this.showNotification('Синхронизация завершена', 'success');
+            if (pending.length) {
+                localStorage.setItem('offline_actions', JSON.stringify(pending));
+            } else {
+                localStorage.removeItem('offline_actions');
+                this.showNotification('Синхронизация завершена', 'success');
+            }
         }
     }
 
     // Показать новые уведомления
     showNewNotifications(notifications) {
         notifications.forEach(notification => {
-            this.showNotification(notification.message, notification.type || 'info');
+            const text = notification.title
+                ? [notification.title, notification.message].filter(Boolean).join('. ')
+                : notification.message;
+            this.showNotification(text, notification.type || 'info');
         });
+        const ids = notifications.map(n => n.id).filter(Boolean);
+        if (ids.length) {
+            this.markNotificationsRead(ids);
+        }
         
         // Обновляем счетчик уведомлений
         const notificationCount = document.querySelector('.notification-count');
@@ -1814,6 +1964,8 @@ class VogueEliteApp {
     destroy() {
         // Сохраняем данные
         this.autoSave();
+        this.flushLists(true);
+        this.disconnectNotifications();
         
         // Очищаем интервалы
         this.clearAllIntervals();
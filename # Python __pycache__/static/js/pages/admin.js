@@ -0,0 +1,592 @@
+document.addEventListener('DOMContentLoaded', function() {
+    // Sidebar Toggle
+    const sidebarToggle = document.getElementById('sidebar-toggle');
+    const mobileToggle = document.getElementById('mobile-toggle');
+    const adminSidebar = document.querySelector('.admin-sidebar');
+
+    sidebarToggle.addEventListener('click', function() {
+        adminSidebar.classList.toggle('collapsed');
+        const icon = this.querySelector('i');
+        if (adminSidebar.classList.contains('collapsed')) {
+            icon.className = 'fas fa-chevron-right';
+        } else {
+            icon.className = 'fas fa-chevron-left';
+        }
+    });
+
+    // Mobile Toggle
+    if (mobileToggle) {
+        mobileToggle.addEventListener('click', function() {
+            adminSidebar.classList.toggle('active');
+        });
+    }
+
+    // Check screen size for mobile
+    function checkScreenSize() {
+        if (window.innerWidth <= 992) {
+            adminSidebar.classList.remove('collapsed');
+            if (mobileToggle) mobileToggle.style.display = 'flex';
+            sidebarToggle.style.display = 'none';
+        } else {
+            if (mobileToggle) mobileToggle.style.display = 'none';
+            sidebarToggle.style.display = 'flex';
+        }
+    }
+
+    checkScreenSize();
+    window.addEventListener('resize', checkScreenSize);
+
+    // Menu Navigation
+    const menuItems = document.querySelectorAll('.menu-item[data-section]');
+    const sections = document.querySelectorAll('.admin-section');
+    const pageTitle = document.getElementById('page-title');
+    const breadcrumbItem = document.getElementById('breadcrumb-item');
+
+    // Menu titles mapping
+    const menuTitles = {
+        'dashboard': 'Дашборд',
+        'products': 'Все товары',
+        'add-product': 'Добавить товар',
+        'categories': 'Категории',
+        'inventory': 'Склад',
+        'orders': 'Все заказы',
+        'pending-orders': 'Заказы в ожидании',
+        'processing-orders': 'Заказы в обработке',
+        'customers': 'Все клиенты',
+        'vip-customers': 'VIP Клиенты',
+        'reviews': 'Отзывы',
+        'sales': 'Аналитика продаж',
+        'reports': 'Отчеты',
+        'settings': 'Настройки магазина',
+        'users': 'Администраторы',
+        'shipping': 'Настройки доставки'
+    };
+
+    menuItems.forEach(item => {
+        item.addEventListener('click', function(e) {
+            e.preventDefault();
+
+            const sectionId = this.getAttribute('data-section');
+
+            // Update active menu item
+            menuItems.forEach(i => i.classList.remove('active'));
+            this.classList.add('active');
+
+            // Hide all sections
+            sections.forEach(section => {
+                section.style.display = 'none';
+                section.classList.remove('active');
+            });
+
+            // Show selected section
+            const activeSection = document.getElementById(`${sectionId}-section`);
+            if (activeSection) {
+                activeSection.style.display = 'block';
+                activeSection.classList.add('active');
+
+                // Update page title
+                if (pageTitle && breadcrumbItem) {
+                    pageTitle.textContent = menuTitles[sectionId] || 'Админ-панель';
+                    breadcrumbItem.textContent = menuTitles[sectionId] || 'Раздел';
+                }
+            }
+
+            // Close sidebar on mobile
+            if (window.innerWidth <= 992) {
+                adminSidebar.classList.remove('active');
+            }
+        });
+    });
+
+    // Show section function
+    window.showSection = function(sectionId) {
+        const menuItem = document.querySelector(`.menu-item[data-section="${sectionId}"]`);
+        if (menuItem) {
+            menuItem.click();
+        }
+    };
+
+    // Image Upload
+    const imageUpload = document.getElementById('image-upload');
+    const uploadedImages = document.getElementById('uploaded-images');
+
+    if (imageUpload) {
+        imageUpload.addEventListener('click', function() {
+            const input = document.createElement('input');
+            input.type = 'file';
+            input.accept = 'image/*';
+            input.multiple = true;
+
+            input.addEventListener('change', function(e) {
+                const files = e.target.files;
+                for (let i = 0; i < Math.min(files.length, 5); i++) {
+                    const file = files[i];
+                    const reader = new FileReader();
+
+                    reader.onload = function(e) {
+                        const imageDiv = document.createElement('div');
+                        imageDiv.style.position = 'relative';
+                        imageDiv.style.borderRadius = 'var(--radius-md)';
+                        imageDiv.style.overflow = 'hidden';
+
+                        const img = document.createElement('img');
+                        img.src = e.target.result;
+                        img.style.width = '100%';
+                        img.style.height = '100px';
+                        img.style.objectFit = 'cover';
+
+                        const removeBtn = document.createElement('button');
+                        removeBtn.innerHTML = '<i class="fas fa-times"></i>';
+                        removeBtn.style.position = 'absolute';
+                        removeBtn.style.top = '5px';
+                        removeBtn.style.right = '5px';
+                        removeBtn.style.width = '24px';
+                        removeBtn.style.height = '24px';
+                        removeBtn.style.background = 'rgba(239, 68, 68, 0.9)';
+                        removeBtn.style.color = 'white';
+                        removeBtn.style.borderRadius = '50%';
+                        removeBtn.style.display = 'flex';
+                        removeBtn.style.alignItems = 'center';
+                        removeBtn.style.justifyContent = 'center';
+                        removeBtn.style.border = 'none';
+                        removeBtn.style.cursor = 'pointer';
+                        removeBtn.style.fontSize = '10px';
+
+                        removeBtn.addEventListener('click', function() {
+                            imageDiv.remove();
+                        });
+
+                        imageDiv.appendChild(img);
+                        imageDiv.appendChild(removeBtn);
+                        uploadedImages.appendChild(imageDiv);
+                    };
+
+                    reader.readAsDataURL(file);
+                }
+            });
+
+            input.click();
+        });
+    }
+
+    // Form Submissions
+    const forms = ['add-product-form', 'settings-form'];
+    forms.forEach(formId => {
+        const form = document.getElementById(formId);
+        if (form) {
+            form.addEventListener('submit', function(e) {
+                e.preventDefault();
+
+                const submitBtn = this.querySelector('button[type="submit"]');
+                const originalHtml = submitBtn.innerHTML;
+
+                // Show loading state
+                submitBtn.innerHTML = `
+                    <i class="fas fa-spinner fa-spin"></i>
+                    <span>Сохранение...</span>
+                `;
+                submitBtn.disabled = true;
+
+                // Simulate API call
+                setTimeout(() => {
+                    submitBtn.innerHTML = originalHtml;
+                    submitBtn.disabled = false;
+
+                    // Show success notification
+                    showNotification('Изменения успешно сохранены', 'success');
+
+                    // Redirect for product form
+                    if (formId === 'add-product-form') {
+                        setTimeout(() => {
+                            showSection('products');
+                        }, 1500);
+                    }
+                }, 2000);
+            });
+        }
+    });
+
+    // Table Actions
+    document.querySelectorAll('.btn-icon.edit').forEach(btn => {
+        btn.addEventListener('click', function() {
+            showNotification('Редактирование элемента', 'info');
+        });
+    });
+
+    document.querySelectorAll('.btn-icon.delete').forEach(btn => {
+        btn.addEventListener('click', function() {
+            if (confirm('Вы уверены, что хотите удалить этот элемент?')) {
+                const row = this.closest('tr');
+                row.style.opacity = '0';
+                row.style.transform = 'translateX(-20px)';
+
+                setTimeout(() => {
+                    row.remove();
+                    showNotification('Элемент успешно удален', 'success');
+                }, 300);
+            }
+        });
+    });
+
+    // Search Functionality
+    const searchInput = document.querySelector('.search-input');
+    if (searchInput) {
+        searchInput.addEventListener('keyup', function(e) {
+            if (e.key === 'Enter') {
+                showNotification(`Поиск: "${this.value}"`, 'info');
+            }
+        });
+    }
+
+    // Notification Button
+    const notificationBtn = document.querySelector('.notification-btn');
+    if (notificationBtn) {
+        notificationBtn.addEventListener('click', function() {
+            showNotification('У вас 5 новых уведомлений', 'info');
+            this.querySelector('.notification-badge').style.display = 'none';
+        });
+    }
+
+    // Admin Profile Dropdown
+    const adminProfile = document.getElementById('admin-profile');
+    if (adminProfile) {
+        adminProfile.addEventListener('click', function() {
+            // In real app, show dropdown menu
+            showNotification('Профиль администратора', 'info');
+        });
+    }
+
+    // Helper function to show notifications
+    function showNotification(message, type = 'info') {
+        const notification = document.getElementById('notification');
+        const notificationMessage = document.getElementById('notification-message');
+
+        if (!notification || !notificationMessage) {
+            // Create notification if doesn't exist
+            const notificationDiv = document.createElement('div');
+            notificationDiv.id = 'notification';
+            notificationDiv.style.cssText = `
+                position: fixed;
+                top: 20px;
+                right: 20px;
+                padding: 15px 20px;
+                background: linear-gradient(135deg, var(--gold) 0%, var(--gold-dark) 100%);
+                color: white;
+                border-radius: var(--radius-lg);
+                box-shadow: var(--shadow-lg);
+                z-index: 9999;
+                transform: translateX(150%);
+                transition: transform 0.3s ease;
+                display: flex;
+                align-items: center;
+                gap: 10px;
+            `;
+
+            const messageSpan = document.createElement('span');
+            messageSpan.id = 'notification-message';
+
+            const closeBtn = document.createElement('button');
+            closeBtn.innerHTML = '<i class="fas fa-times"></i>';
+            closeBtn.style.cssText = `
+                background: none;
+                border: none;
+                color: white;
+                cursor: pointer;
+                font-size: 14px;
+                margin-left: 10px;
+            `;
+
+            notificationDiv.appendChild(messageSpan);
+            notificationDiv.appendChild(closeBtn);
+            document.body.appendChild(notificationDiv);
+
+            closeBtn.addEventListener('click', function() {
+                notificationDiv.style.transform = 'translateX(150%)';
+            });
+        }
+
+        const notification = document.getElementById('notification');
+        const notificationMessage = document.getElementById('notification-message');
+
+        notificationMessage.textContent = message;
+
+        // Set color based on type
+        if (type === 'success') {
+            notification.style.background = 'linear-gradient(135deg, #10b981 0%, #059669 100%)';
+        } else if (type === 'error') {
+            notification.style.background = 'linear-gradient(135deg, #ef4444 0%, #dc2626 100%)';
+        } else if (type === 'warning') {
+            notification.style.background = 'linear-gradient(135deg, #f59e0b 0%, #d97706 100%)';
+        } else {
+            notification.style.background = 'linear-gradient(135deg, var(--gold) 0%, var(--gold-dark) 100%)';
+        }
+
+        notification.style.transform = 'translateX(0)';
+
+        setTimeout(() => {
+            notification.style.transform = 'translateX(150%)';
+        }, 3000);
+    }
+
+    // Initialize DataTables (mock data)
+    function initializeTables() {
+        // Product table sorting
+        const productTable = document.querySelector('#products-section .table');
+        if (productTable) {
+            const headers = productTable.querySelectorAll('th');
+            headers.forEach((header, index) => {
+                header.style.cursor = 'pointer';
+                header.addEventListener('click', function() {
+                    sortTable(productTable, index);
+                });
+            });
+        }
+    }
+
+    // Simple table sorting
+    function sortTable(table, column) {
+        const tbody = table.querySelector('tbody');
+        const rows = Array.from(tbody.querySelectorAll('tr'));
+
+        const isAscending = table.getAttribute('data-sort-dir') !== 'asc';
+
+        rows.sort((a, b) => {
+            const aVal = a.querySelectorAll('td')[column].textContent.trim();
+            const bVal = b.querySelectorAll('td')[column].textContent.trim();
+
+            // Handle numeric values
+            const aNum = parseFloat(aVal.replace(/[^\d.-]/g, ''));
+            const bNum = parseFloat(bVal.replace(/[^\d.-]/g, ''));
+
+            if (!isNaN(aNum) && !isNaN(bNum)) {
+                return isAscending ? aNum - bNum : bNum - aNum;
+            }
+
+            // Handle text values
+            return isAscending 
+                ? aVal.localeCompare(bVal)
+                : bVal.localeCompare(aVal);
+        });
+
+        // Clear and re-append rows
+        rows.forEach(row => tbody.appendChild(row));
+        table.setAttribute('data-sort-dir', isAscending ? 'asc' : 'desc');
+    }
+
+    // Export functionality
+    document.querySelectorAll('.btn-secondary .fa-download').forEach(icon => {
+        icon.closest('button').addEventListener('click', function() {
+            showNotification('Экспорт данных начат. Файл будет скачан в течение нескольких секунд.', 'success');
+
+            // Simulate download
+            setTimeout(() => {
+                showNotification('Экспорт завершен успешно!', 'success');
+            }, 1500);
+        });
+    });
+
+    // Filter functionality
+    document.querySelectorAll('.btn-secondary .fa-filter').forEach(icon => {
+        icon.closest('button').addEventListener('click', function() {
+            const tableTitle = this.closest('.table-header').querySelector('.table-title span').textContent;
+            showNotification(`Открыт фильтр для: ${tableTitle}`, 'info');
+        });
+    });
+
+    // Print functionality
+    document.querySelectorAll('.btn-icon .fa-print').forEach(icon => {
+        icon.closest('button').addEventListener('click', function() {
+            const row = this.closest('tr');
+            const orderId = row.querySelector('.order-id')?.textContent || 'Заказ';
+            showNotification(`Печать ${orderId}`, 'info');
+        });
+    });
+
+    // Email functionality
+    document.querySelectorAll('.btn-icon .fa-envelope').forEach(icon => {
+        icon.closest('button').addEventListener('click', function() {
+            const row = this.closest('tr');
+            const customerName = row.querySelector('td:nth-child(2) div div:first-child')?.textContent || 'Клиента';
+            showNotification(`Отправка email ${customerName}`, 'info');
+        });
+    });
+
+    // View functionality
+    document.querySelectorAll('.btn-icon .fa-eye').forEach(icon => {
+        icon.closest('button').addEventListener('click', function() {
+            const row = this.closest('tr');
+            const itemName = row.querySelector('td:nth-child(2) div div:first-child')?.textContent || 'Элемента';
+            showNotification(`Просмотр деталей: ${itemName}`, 'info');
+        });
+    });
+
+    // Calendar picker for charts
+    document.querySelectorAll('.btn-icon .fa-calendar').forEach(icon => {
+        icon.closest('button').addEventListener('click', function() {
+            showNotification('Выбор периода для графика', 'info');
+        });
+    });
+
+    // Sync button
+    document.querySelectorAll('.btn-icon .fa-sync').forEach(icon => {
+        icon.closest('button').addEventListener('click', function() {
+            showNotification('Обновление данных...', 'info');
+
+            // Simulate refresh
+            setTimeout(() => {
+                showNotification('Данные успешно обновлены', 'success');
+            }, 1000);
+        });
+    });
+
+    // Help button
+    document.querySelector('.fa-question-circle').closest('.action-btn').addEventListener('click', function() {
+        showNotification('Открывается документация и помощь', 'info');
+    });
+
+    // Initialize everything
+    initializeTables();
+
+    // Demo data refresh simulation
+    setInterval(() => {
+        // Update notification badge randomly
+        const badge = document.querySelector('.notification-badge');
+        if (badge && Math.random() > 0.7) {
+            badge.style.display = 'block';
+        }
+
+        // Update some random stats
+        const statCards = document.querySelectorAll('.stat-card');
+        if (statCards.length > 0 && Math.random() > 0.8) {
+            const randomCard = statCards[Math.floor(Math.random() * statCards.length)];
+            const statValue = randomCard.querySelector('.stat-value');
+            const statChange = randomCard.querySelector('.stat-change');
+
+            if (statValue && statChange) {
+                const currentValue = parseFloat(statValue.textContent.replace(/[^\d.-]/g, ''));
+                const change = Math.random() > 0.5 ? 1 : -1;
+                const newValue = currentValue + change * Math.random() * 50;
+
+                statValue.textContent = newValue.toLocaleString('ru-RU') + (statValue.textContent.includes('€') ? ' €' : '');
+
+                // Update change indicator
+                if (change > 0) {
+                    statChange.innerHTML = `<i class="fas fa-arrow-up"></i> <span>+${(Math.random() * 10).toFixed(1)}%</span>`;
+                    statChange.className = 'stat-change change-up';
+                } else {
+                    statChange.innerHTML = `<i class="fas fa-arrow-down"></i> <span>-${(Math.random() * 5).toFixed(1)}%</span>`;
+                    statChange.className = 'stat-change change-down';
+                }
+            }
+        }
+    }, 10000); // Update every 10 seconds
+
+    // Quick actions for dashboard
+    const quickActions = [
+        { icon: 'fa-plus', label: 'Быстрое добавление', section: 'add-product' },
+        { icon: 'fa-chart-pie', label: 'Аналитика', section: 'sales' },
+        { icon: 'fa-cog', label: 'Настройки', section: 'settings' },
+        { icon: 'fa-users', label: 'Клиенты', section: 'customers' }
+    ];
+
+    // Add quick actions to dashboard
+    const dashboardSection = document.getElementById('dashboard-section');
+    if (dashboardSection) {
+        const quickActionsDiv = document.createElement('div');
+        quickActionsDiv.className = 'overview-cards';
+        quickActionsDiv.style.marginTop = '40px';
+
+        quickActions.forEach(action => {
+            const card = document.createElement('div');
+            card.className = 'stat-card';
+            card.style.cursor = 'pointer';
+            card.style.textAlign = 'center';
+            card.style.flexDirection = 'column';
+            card.style.gap = '15px';
+
+            card.innerHTML = `
+                <div class="stat-icon">
+                    <i class="fas ${action.icon}"></i>
+                </div>
+                <div class="stat-info">
+                    <div class="stat-title">${action.label}</div>
+                </div>
+            `;
+
+            card.addEventListener('click', () => showSection(action.section));
+
+            quickActionsDiv.appendChild(card);
+        });
+
+        dashboardSection.querySelector('.dashboard-overview').appendChild(quickActionsDiv);
+    }
+
+    // Add keyboard shortcuts
+    document.addEventListener('keydown', function(e) {
+        // Ctrl + / for search focus
+        if (e.ctrlKey && e.key === '/') {
+            e.preventDefault();
+            const searchInput = document.querySelector('.search-input');
+            if (searchInput) {
+                searchInput.focus();
+            }
+        }
+
+        // Ctrl + D for dashboard
+        if (e.ctrlKey && e.key === 'd') {
+            e.preventDefault();
+            showSection('dashboard');
+        }
+
+        // Ctrl + P for products
+        if (e.ctrlKey && e.key === 'p') {
+            e.preventDefault();
+            showSection('products');
+        }
+
+        // Ctrl + O for orders
+        if (e.ctrlKey && e.key === 'o') {
+            e.preventDefault();
+            showSection('orders');
+        }
+
+        // Ctrl + S for settings
+        if (e.ctrlKey && e.key === 's') {
+            e.preventDefault();
+            showSection('settings');
+        }
+
+        // Escape to close sidebar on mobile
+        if (e.key === 'Escape' && window.innerWidth <= 992) {
+            adminSidebar.classList.remove('active');
+        }
+    });
+
+    // Add help tooltip for shortcuts
+    setTimeout(() => {
+        showNotification('Используйте Ctrl+/ для поиска, Ctrl+D для дашборда, Ctrl+P для товаров, Ctrl+O для заказов, Ctrl+S для настроек', 'info');
+    }, 5000);
+
+    // Add logout confirmation
+    const logoutLink = document.querySelector('.menu-item[href*="logout"]');
+    if (logoutLink) {
+        logoutLink.addEventListener('click', function(e) {
+            if (!confirm('Вы уверены, что хотите выйти из админ-панели?')) {
+                e.preventDefault();
+            }
+        });
+    }
+
+    // Add responsive behavior for tables
+    function makeTablesResponsive() {
+        document.querySelectorAll('.table-content').forEach(container => {
+            if (container.scrollWidth > container.clientWidth) {
+                container.style.border = '1px solid var(--border-color)';
+                container.style.borderRadius = 'var(--radius-md)';
+            }
+        });
+    }
+
+    window.addEventListener('resize', makeTablesResponsive);
+    makeTablesResponsive();
+});
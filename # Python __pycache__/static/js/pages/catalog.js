@@ -0,0 +1,405 @@
+document.addEventListener('DOMContentLoaded', function() {
+    // Price Range Slider
+    const rangeMin = document.getElementById('range-min');
+    const rangeMax = document.getElementById('range-max');
+    const minPrice = document.getElementById('min-price');
+    const maxPrice = document.getElementById('max-price');
+    const progress = document.querySelector('.price-slider .progress');
+
+    function updatePriceSlider() {
+        const minVal = parseInt(rangeMin.value);
+        const maxVal = parseInt(rangeMax.value);
+
+        if (maxVal - minVal < 100) {
+            if (rangeMin === document.activeElement) {
+                rangeMin.value = maxVal - 100;
+            } else {
+                rangeMax.value = minVal + 100;
+            }
+        }
+
+        minPrice.value = minVal;
+        maxPrice.value = maxVal;
+
+        const minPercent = (minVal / rangeMin.max) * 100;
+        const maxPercent = (maxVal / rangeMax.max) * 100;
+        progress.style.left = minPercent + '%';
+        progress.style.right = (100 - maxPercent) + '%';
+
+        filterProducts();
+    }
+
+    rangeMin.addEventListener('input', updatePriceSlider);
+    rangeMax.addEventListener('input', updatePriceSlider);
+
+    minPrice.addEventListener('change', function() {
+        rangeMin.value = this.value;
+        updatePriceSlider();
+    });
+
+    maxPrice.addEventListener('change', function() {
+        rangeMax.value = this.value;
+        updatePriceSlider();
+    });
+
+    // Checkbox Filters
+    const filterItems = document.querySelectorAll('.filter-item');
+    filterItems.forEach(item => {
+        const checkbox = item.querySelector('.filter-checkbox');
+        item.addEventListener('click', function() {
+            checkbox.classList.toggle('checked');
+            filterProducts();
+        });
+    });
+
+    // Color Filters
+    const colorItems = document.querySelectorAll('.color-item');
+    colorItems.forEach(item => {
+        item.addEventListener('click', function() {
+            colorItems.forEach(c => c.classList.remove('active'));
+            this.classList.add('active');
+            filterProducts();
+        });
+    });
+
+    // Size Filters
+    const sizeItems = document.querySelectorAll('.size-item');
+    sizeItems.forEach(item => {
+        item.addEventListener('click', function() {
+            if (this.classList.contains('active')) {
+                this.classList.remove('active');
+            } else {
+                sizeItems.forEach(s => s.classList.remove('active'));
+                this.classList.add('active');
+            }
+            filterProducts();
+        });
+    });
+
+    // View Toggle
+    const viewButtons = document.querySelectorAll('.view-btn');
+    const productsGrid = document.getElementById('products-grid');
+
+    viewButtons.forEach(button => {
+        button.addEventListener('click', function() {
+            const view = this.getAttribute('data-view');
+
+            viewButtons.forEach(btn => btn.classList.remove('active'));
+            this.classList.add('active');
+
+            productsGrid.classList.remove('grid-view', 'list-view', 'compact');
+            productsGrid.classList.add(view + '-view');
+
+            // Save preference to localStorage
+            localStorage.setItem('catalog-view', view);
+        });
+    });
+
+    // Restore view preference
+    const savedView = localStorage.getItem('catalog-view') || 'grid';
+    const savedViewButton = document.querySelector(`.view-btn[data-view="${savedView}"]`);
+    if (savedViewButton) {
+        savedViewButton.click();
+    }
+
+    // Grid Size Slider
+    const gridSizeSlider = document.getElementById('grid-size');
+    if (gridSizeSlider) {
+        gridSizeSlider.addEventListener('input', function() {
+            const size = this.value;
+            let minWidth;
+
+            switch(size) {
+                case '1': minWidth = 350; break;
+                case '2': minWidth = 280; break;
+                case '3': minWidth = 240; break;
+            }
+
+            productsGrid.style.gridTemplateColumns = `repeat(auto-fill, minmax(${minWidth}px, 1fr))`;
+
+            // Save preference
+            localStorage.setItem('grid-size', size);
+        });
+
+        // Restore grid size
+        const savedSize = localStorage.getItem('grid-size') || '2';
+        gridSizeSlider.value = savedSize;
+        gridSizeSlider.dispatchEvent(new Event('input'));
+    }
+
+    // Sort Select
+    const sortSelect = document.getElementById('sort-select');
+    sortSelect.addEventListener('change', function() {
+        sortProducts();
+        localStorage.setItem('catalog-sort', this.value);
+    });
+
+    // Restore sort preference
+    const savedSort = localStorage.getItem('catalog-sort');
+    if (savedSort) {
+        sortSelect.value = savedSort;
+    }
+
+    // Clear Filters
+    const clearFiltersBtn = document.querySelector('.clear-filters');
+    clearFiltersBtn.addEventListener('click', function() {
+        // Reset price
+        rangeMin.value = 0;
+        rangeMax.value = 10000;
+        updatePriceSlider();
+
+        // Reset checkboxes
+        filterItems.forEach(item => {
+            const checkbox = item.querySelector('.filter-checkbox');
+            checkbox.classList.remove('checked');
+        });
+
+        // Reset colors (select first)
+        colorItems.forEach((item, index) => {
+            item.classList.remove('active');
+            if (index === 0) item.classList.add('active');
+        });
+
+        // Reset sizes
+        sizeItems.forEach(item => item.classList.remove('active'));
+
+        // Reset sort
+        sortSelect.value = 'newest';
+
+        // Show all products
+        const allProducts = document.querySelectorAll('.product-card');
+        allProducts.forEach(product => {
+            product.style.display = 'block';
+        });
+    });
+
+    // Filter Products Function
+    function filterProducts() {
+        const allProducts = document.querySelectorAll('.product-card');
+        const minPrice = parseInt(rangeMin.value);
+        const maxPrice = parseInt(rangeMax.value);
+
+        // Get active filters
+        const activeBrands = Array.from(document.querySelectorAll('.filter-item[data-filter="brand"] .filter-checkbox.checked'))
+            .map(checkbox => checkbox.closest('.filter-item').getAttribute('data-value'));
+
+        const activeSpecials = Array.from(document.querySelectorAll('.filter-item[data-filter="special"] .filter-checkbox.checked'))
+            .map(checkbox => checkbox.closest('.filter-item').getAttribute('data-value'));
+
+        const activeColor = document.querySelector('.color-item.active')?.style.backgroundColor || '';
+        const activeSize = document.querySelector('.size-item.active')?.textContent.trim() || '';
+
+        allProducts.forEach(product => {
+            const productPrice = parseInt(product.getAttribute('data-price'));
+            const productBrand = product.getAttribute('data-brand');
+            const productColor = product.getAttribute('data-color');
+            const productSize = product.getAttribute('data-size');
+            const isNew = product.getAttribute('data-new') === 'true';
+            const isSale = product.getAttribute('data-sale') === 'true';
+            const isExclusive = product.getAttribute('data-exclusive') === 'true';
+
+            let shouldShow = true;
+
+            // Price filter
+            if (productPrice < minPrice || productPrice > maxPrice) {
+                shouldShow = false;
+            }
+
+            // Brand filter
+            if (activeBrands.length > 0 && !activeBrands.includes(productBrand)) {
+                shouldShow = false;
+            }
+
+            // Color filter (simplified)
+            if (activeColor && productColor.toLowerCase() !== getColorName(activeColor)) {
+                shouldShow = false;
+            }
+
+            // Size filter
+            if (activeSize && productSize !== activeSize) {
+                shouldShow = false;
+            }
+
+            // Special filters
+            if (activeSpecials.length > 0) {
+                let hasSpecial = false;
+                if (activeSpecials.includes('new') && isNew) hasSpecial = true;
+                if (activeSpecials.includes('sale') && isSale) hasSpecial = true;
+                if (activeSpecials.includes('exclusive') && isExclusive) hasSpecial = true;
+                if (activeSpecials.includes('limited') && isExclusive) hasSpecial = true;
+
+                if (!hasSpecial) {
+                    shouldShow = false;
+                }
+            }
+
+            product.style.display = shouldShow ? 'block' : 'none';
+        });
+
+        // Show empty state if no products
+        const visibleProducts = Array.from(allProducts).filter(p => p.style.display !== 'none');
+        const emptyState = document.querySelector('.catalog-empty');
+
+        if (visibleProducts.length === 0) {
+            if (!emptyState) {
+                // Create empty state if needed
+                const gridContainer = document.querySelector('.catalog-products-grid');
+                if (gridContainer) {
+                    gridContainer.innerHTML = `
+                        <div class="catalog-empty">
+                            <div class="catalog-empty-icon">
+                                <i class="fas fa-search"></i>
+                            </div>
+                            <h2>Товары не найдены</h2>
+                            <p>Попробуйте изменить параметры фильтрации</p>
+                            <button class="clear-filters" style="width: auto; padding: 15px 30px;">
+                                <i class="fas fa-times"></i>
+                                <span>Сбросить все фильтры</span>
+                            </button>
+                        </div>
+                    `;
+                }
+            }
+        } else if (emptyState) {
+            emptyState.remove();
+        }
+    }
+
+    // Sort Products Function
+    function sortProducts() {
+        const sortValue = sortSelect.value;
+        const grid = document.getElementById('products-grid');
+        const products = Array.from(grid.querySelectorAll('.product-card'));
+
+        products.sort((a, b) => {
+            const aPrice = parseInt(a.getAttribute('data-price'));
+            const bPrice = parseInt(b.getAttribute('data-price'));
+            const aRating = 4.5; // Simulated rating
+            const bRating = 4.0;
+            const aDiscount = a.querySelector('.badge-sale') ? 
+                parseInt(a.querySelector('.badge-sale').textContent.replace('-', '').replace('%', '')) : 0;
+            const bDiscount = b.querySelector('.badge-sale') ? 
+                parseInt(b.querySelector('.badge-sale').textContent.replace('-', '').replace('%', '')) : 0;
+
+            switch(sortValue) {
+                case 'price-low':
+                    return aPrice - bPrice;
+                case 'price-high':
+                    return bPrice - aPrice;
+                case 'rating':
+                    return bRating - aRating;
+                case 'discount':
+                    return bDiscount - aDiscount;
+                case 'newest':
+                default:
+                    return 0; // Keep original order for newest
+            }
+        });
+
+        // Reorder products in grid
+        products.forEach(product => grid.appendChild(product));
+    }
+
+    // Helper function to get color name from hex
+    function getColorName(hex) {
+        const colors = {
+            '#000000': 'черный',
+            '#ffffff': 'белый',
+            '#c41e3a': 'красный',
+            '#0f52ba': 'синий',
+            '#50c878': 'зеленый',
+            '#ffd700': 'золотой',
+            '#c0c0c0': 'серебряный',
+            '#800080': 'фиолетовый',
+            '#ff6b6b': 'розовый',
+            '#964b00': 'коричневый',
+            '#808080': 'серый',
+            '#ffa500': 'оранжевый'
+        };
+
+        // Convert RGB to hex
+        if (hex.startsWith('rgb')) {
+            const rgb = hex.match(/\d+/g).map(Number);
+            hex = rgbToHex(rgb[0], rgb[1], rgb[2]);
+        }
+
+        return colors[hex.toLowerCase()] || 'черный';
+    }
+
+    function rgbToHex(r, g, b) {
+        return "#" + ((1 << 24) + (r << 16) + (g << 8) + b).toString(16).slice(1);
+    }
+
+    // Add to cart functionality
+    const addToCartButtons = document.querySelectorAll('.btn-add-cart');
+    addToCartButtons.forEach(button => {
+        button.addEventListener('click', function() {
+            const productId = this.getAttribute('data-product-id');
+
+            // Show notification
+            const notification = document.getElementById('notification');
+            const notificationMessage = document.getElementById('notification-message');
+
+            notificationMessage.textContent = 'Товар добавлен в корзину';
+            notification.classList.add('show');
+
+            setTimeout(() => {
+                notification.classList.remove('show');
+            }, 3000);
+
+            // Update cart count
+            updateCartCount(1);
+
+            // Button feedback
+            const icon = this.querySelector('i');
+            const originalIcon = icon.className;
+            const originalText = this.querySelector('span').textContent;
+
+            icon.className = 'fas fa-check';
+            this.querySelector('span').textContent = 'Добавлено';
+            this.style.background = '#10b981';
+            this.style.color = 'white';
+
+            setTimeout(() => {
+                icon.className = originalIcon;
+                this.querySelector('span').textContent = originalText;
+                this.style.background = '';
+                this.style.color = '';
+            }, 2000);
+
+            // Send to server (AJAX)
+            fetch('/api/cart/add', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({
+                    product_id: productId,
+                    quantity: 1
+                }),
+                credentials: 'include'
+            }).catch(error => {
+                console.error('Error adding to cart:', error);
+            });
+        });
+    });
+
+    // Update cart count
+    function updateCartCount(increment = 0) {
+        const cartCountElement = document.getElementById('cart-count');
+        const mobileCartCountElement = document.getElementById('mobile-cart-count');
+
+        if (cartCountElement) {
+            let currentCount = parseInt(cartCountElement.textContent) || 0;
+            currentCount += increment;
+            cartCountElement.textContent = currentCount;
+
+            if (mobileCartCountElement) {
+                mobileCartCountElement.textContent = currentCount;
+            }
+        }
+    }
+
+    // Initialize filters
+    updatePriceSlider();
+});
@@ -0,0 +1,216 @@
+document.addEventListener('DOMContentLoaded', function() {
+    // Menu Navigation
+    const menuItems = document.querySelectorAll('.menu-item[data-section]');
+    const sections = document.querySelectorAll('.dashboard-section');
+
+    menuItems.forEach(item => {
+        item.addEventListener('click', function(e) {
+            e.preventDefault();
+
+            const sectionId = this.getAttribute('data-section');
+
+            // Update active menu item
+            menuItems.forEach(i => i.classList.remove('active'));
+            this.classList.add('active');
+
+            // Show corresponding section
+            sections.forEach(section => {
+                section.style.display = 'none';
+                section.classList.remove('active');
+            });
+
+            const activeSection = document.getElementById(`${sectionId}-section`);
+            if (activeSection) {
+                activeSection.style.display = 'block';
+                activeSection.classList.add('active');
+            }
+        });
+    });
+
+    // Avatar Upload
+    const avatarUpload = document.querySelector('.avatar-upload');
+    if (avatarUpload) {
+        avatarUpload.addEventListener('click', function() {
+            const input = document.createElement('input');
+            input.type = 'file';
+            input.accept = 'image/*';
+
+            input.addEventListener('change', function(e) {
+                const file = e.target.files[0];
+                if (file) {
+                    const reader = new FileReader();
+                    reader.onload = function(e) {
+                        const avatarImage = document.querySelector('.avatar-image');
+                        avatarImage.innerHTML = `<img src="${e.target.result}" style="width:100%;height:100%;border-radius:50%;object-fit:cover;">`;
+                    };
+                    reader.readAsDataURL(file);
+
+                    // Show notification
+                    showNotification('Фотография профиля успешно обновлена', 'success');
+                }
+            });
+
+            input.click();
+        });
+    }
+
+    // Wishlist Remove
+    const wishlistRemoveBtns = document.querySelectorAll('.wishlist-remove');
+    wishlistRemoveBtns.forEach(btn => {
+        btn.addEventListener('click', function() {
+            const item = this.closest('.wishlist-item');
+            item.style.opacity = '0';
+            item.style.transform = 'translateX(-20px)';
+
+            setTimeout(() => {
+                item.remove();
+                updateWishlistCount();
+                showNotification('Товар удален из избранного', 'info');
+            }, 300);
+        });
+    });
+
+    // Clear Wishlist
+    const clearWishlistBtn = document.getElementById('clear-wishlist');
+    if (clearWishlistBtn) {
+        clearWishlistBtn.addEventListener('click', function() {
+            if (confirm('Вы уверены, что хотите очистить все избранное?')) {
+                const items = document.querySelectorAll('.wishlist-item');
+                items.forEach((item, index) => {
+                    setTimeout(() => {
+                        item.style.opacity = '0';
+                        item.style.transform = 'translateX(-20px)';
+                    }, index * 100);
+                });
+
+                setTimeout(() => {
+                    items.forEach(item => item.remove());
+                    updateWishlistCount();
+                    showNotification('Избранное очищено', 'info');
+                }, items.length * 100);
+            }
+        });
+    }
+
+    // Update Wishlist Count
+    function updateWishlistCount() {
+        const wishlistItems = document.querySelectorAll('.wishlist-item');
+        const wishlistCount = document.querySelector('.menu-item[data-section="wishlist"] .menu-badge');
+        if (wishlistCount) {
+            wishlistCount.textContent = wishlistItems.length;
+        }
+    }
+
+    // Notification Actions
+    const markAllReadBtn = document.getElementById('mark-all-read');
+    if (markAllReadBtn) {
+        markAllReadBtn.addEventListener('click', function() {
+            const unreadNotifications = document.querySelectorAll('.notification-item.unread');
+            unreadNotifications.forEach(item => {
+                item.classList.remove('unread');
+            });
+
+            // Update notification count
+            const notificationCount = document.querySelector('.menu-item[data-section="notifications"] .menu-badge');
+            if (notificationCount) {
+                notificationCount.textContent = '0';
+            }
+
+            showNotification('Все уведомления прочитаны', 'success');
+        });
+    }
+
+    const clearNotificationsBtn = document.getElementById('clear-notifications');
+    if (clearNotificationsBtn) {
+        clearNotificationsBtn.addEventListener('click', function() {
+            if (confirm('Вы уверены, что хотите удалить все уведомления?')) {
+                const notifications = document.querySelectorAll('.notification-item');
+                notifications.forEach((item, index) => {
+                    setTimeout(() => {
+                        item.style.opacity = '0';
+                        item.style.transform = 'translateX(-20px)';
+                    }, index * 100);
+                });
+
+                setTimeout(() => {
+                    notifications.forEach(item => item.remove());
+
+                    // Update notification count
+                    const notificationCount = document.querySelector('.menu-item[data-section="notifications"] .menu-badge');
+                    if (notificationCount) {
+                        notificationCount.textContent = '0';
+                    }
+
+                    showNotification('Все уведомления удалены', 'info');
+                }, notifications.length * 100);
+            }
+        });
+    }
+
+    // Settings Form Submission
+    const settingsForm = document.getElementById('settings-form');
+    if (settingsForm) {
+        settingsForm.addEventListener('submit', function(e) {
+            e.preventDefault();
+
+            // Show loading state
+            const saveBtn = this.querySelector('.btn-save');
+            const originalHtml = saveBtn.innerHTML;
+            saveBtn.innerHTML = `
+                <i class="fas fa-spinner fa-spin"></i>
+                <span>Сохранение...</span>
+            `;
+            saveBtn.disabled = true;
+
+            // Simulate API call
+            setTimeout(() => {
+                saveBtn.innerHTML = originalHtml;
+                saveBtn.disabled = false;
+                showNotification('Настройки успешно сохранены', 'success');
+            }, 1500);
+        });
+    }
+
+    // Order Actions
+    document.querySelectorAll('.order-actions .btn-action').forEach(btn => {
+        btn.addEventListener('click', function() {
+            if (this.querySelector('.fa-eye')) {
+                showNotification('Просмотр деталей заказа', 'info');
+            } else if (this.querySelector('.fa-redo')) {
+                showNotification('Повторный заказ оформлен', 'success');
+            } else if (this.querySelector('.fa-truck')) {
+                showNotification('Отслеживание заказа открыто', 'info');
+            } else if (this.querySelector('.fa-times')) {
+                if (confirm('Вы уверены, что хотите отменить заказ?')) {
+                    showNotification('Заказ отменен', 'info');
+                }
+            }
+        });
+    });
+
+    // Helper function to show notifications
+    function showNotification(message, type = 'info') {
+        const notification = document.getElementById('notification');
+        const notificationMessage = document.getElementById('notification-message');
+
+        notificationMessage.textContent = message;
+
+        // Set color based on type
+        if (type === 'success') {
+            notification.style.background = 'linear-gradient(135deg, #10b981 0%, #059669 100%)';
+        } else if (type === 'error') {
+            notification.style.background = 'linear-gradient(135deg, #ef4444 0%, #dc2626 100%)';
+        } else {
+            notification.style.background = 'linear-gradient(135deg, var(--gold) 0%, var(--gold-dark) 100%)';
+        }
+
+        notification.classList.add('show');
+
+        setTimeout(() => {
+            notification.classList.remove('show');
+        }, 3000);
+    }
+
+    // Initialize
+    updateWishlistCount();
+});
@@ -0,0 +1,107 @@
+// Product Filtering
+document.addEventListener('DOMContentLoaded', function() {
+    const filterButtons = document.querySelectorAll('.filter-btn');
+    const productCards = document.querySelectorAll('.product-card');
+
+    filterButtons.forEach(button => {
+        button.addEventListener('click', function() {
+            // Remove active class from all buttons
+            filterButtons.forEach(btn => btn.classList.remove('active'));
+            // Add active class to clicked button
+            this.classList.add('active');
+
+            const filterValue = this.getAttribute('data-filter');
+
+            // Filter products
+            productCards.forEach(card => {
+                if (filterValue === 'all') {
+                    card.style.display = 'block';
+                } else {
+                    const categories = card.getAttribute('data-category');
+                    if (categories.includes(filterValue)) {
+                        card.style.display = 'block';
+                    } else {
+                        card.style.display = 'none';
+                    }
+                }
+            });
+        });
+    });
+
+    // Add to cart functionality
+    const addToCartButtons = document.querySelectorAll('.btn-add-cart');
+    const cartCountElement = document.getElementById('cart-count');
+    const mobileCartCountElement = document.getElementById('mobile-cart-count');
+    const notification = document.getElementById('notification');
+    const notificationMessage = document.getElementById('notification-message');
+
+    addToCartButtons.forEach(button => {
+        button.addEventListener('click', function() {
+            // Update cart count
+            let currentCount = parseInt(cartCountElement.textContent) || 0;
+            currentCount++;
+            cartCountElement.textContent = currentCount;
+            if (mobileCartCountElement) {
+                mobileCartCountElement.textContent = currentCount;
+            }
+
+            // Show notification
+            notificationMessage.textContent = 'Товар добавлен в корзину';
+            notification.classList.add('show');
+
+            // Auto hide notification after 3 seconds
+            setTimeout(() => {
+                notification.classList.remove('show');
+            }, 3000);
+
+            // Button animation
+            const icon = this.querySelector('i');
+            const originalIcon = icon.className;
+            const originalText = this.querySelector('span').textContent;
+
+            icon.className = 'fas fa-check';
+            this.querySelector('span').textContent = 'Добавлено';
+            this.style.background = '#10b981';
+
+            setTimeout(() => {
+                icon.className = originalIcon;
+                this.querySelector('span').textContent = originalText;
+                this.style.background = '';
+            }, 2000);
+        });
+    });
+
+    // Initialize Swiper
+    if (typeof Swiper !== 'undefined') {
+        const swiper = new Swiper('.swiper', {
+            direction: 'horizontal',
+            loop: true,
+            autoplay: {
+                delay: 5000,
+                disableOnInteraction: false,
+            },
+            pagination: {
+                el: '.swiper-pagination',
+                clickable: true,
+            },
+            navigation: {
+                nextEl: '.swiper-button-next',
+                prevEl: '.swiper-button-prev',
+            },
+            effect: 'fade',
+            fadeEffect: {
+                crossFade: true
+            },
+        });
+    }
+
+    // Parallax effect for hero section
+    window.addEventListener('scroll', function() {
+        const scrolled = window.pageYOffset;
+        const heroSection = document.querySelector('.hero-section');
+        if (heroSection) {
+            const rate = scrolled * 0.5;
+            heroSection.style.transform = `translate3d(0px, ${rate}px, 0px)`;
+        }
+    });
+});
@@ -0,0 +1,91 @@
+    document.addEventListener('DOMContentLoaded', function() {
+        // Print order functionality
+        const printButton = document.createElement('a');
+        printButton.className = 'btn-secondary';
+        printButton.innerHTML = `
+            <i class="fas fa-print"></i>
+            <span>Распечатать заказ</span>
+        `;
+        printButton.style.marginLeft = '20px';
+        printButton.href = '#';
+        printButton.addEventListener('click', function(e) {
+            e.preventDefault();
+            window.print();
+        });
+
+        // Add print button to action buttons
+        const actionButtons = document.querySelector('.action-buttons');
+        if (actionButtons) {
+            actionButtons.appendChild(printButton);
+        }
+
+        // Order status auto-update
+        function updateOrderStatus() {
+            const statusElement = document.querySelector('.order-status');
+            if (statusElement && statusElement.textContent === 'Обрабатывается') {
+                // Simulate status change (in real app, this would be API call)
+                setTimeout(() => {
+                    statusElement.textContent = 'Подтвержден';
+                    statusElement.style.background = 'rgba(59, 130, 246, 0.1)';
+                    statusElement.style.color = '#3b82f6';
+                }, 5000);
+            }
+        }
+
+        // Start auto-update
+        updateOrderStatus();
+
+        // Share order functionality
+        const shareButton = document.createElement('a');
+        shareButton.className = 'btn-secondary';
+        shareButton.innerHTML = `
+            <i class="fas fa-share-alt"></i>
+            <span>Поделиться</span>
+        `;
+        shareButton.style.marginLeft = '20px';
+        shareButton.href = '#';
+        shareButton.addEventListener('click', function(e) {
+            e.preventDefault();
+
+            if (navigator.share) {
+                navigator.share({
+                    title: 'Мой заказ в VOGUE ÉLITE',
+                    text: `Я только что оформил заказ в VOGUE ÉLITE на сумму ${document.querySelector('.total-amount').textContent}!`,
+                    url: window.location.href,
+                });
+            } else {
+                // Fallback: copy to clipboard
+                const orderText = `
+Заказ #${document.querySelector('.order-id').textContent}
+Сумма: ${document.querySelector('.total-amount').textContent}
+Статус: ${document.querySelector('.order-status').textContent}
+${window.location.href}
+                `.trim();
+
+                navigator.clipboard.writeText(orderText);
+
+                const notification = document.getElementById('notification');
+                const notificationMessage = document.getElementById('notification-message');
+
+                notificationMessage.textContent = 'Информация о заказе скопирована в буфер обмена';
+                notification.classList.add('show');
+
+                setTimeout(() => {
+                    notification.classList.remove('show');
+                }, 3000);
+            }
+        });
+
+        // Add share button to action buttons
+        if (actionButtons) {
+            actionButtons.appendChild(shareButton);
+        }
+
+        // Auto-scroll to order details
+        setTimeout(() => {
+            const orderCard = document.querySelector('.order-details-card');
+            if (orderCard) {
+                orderCard.scrollIntoView({ behavior: 'smooth', block: 'start' });
+            }
+        }, 1000);
+    });
@@ -0,0 +1,154 @@
+    document.addEventListener('DOMContentLoaded', function() {
+        const table = document.getElementById('ordersTable');
+        if (!table) {
+            return;
+        }
+        const tbody = table.querySelector('tbody');
+        const moreButton = document.getElementById('ordersMore');
+        const statusText = JSON.parse(table.dataset.statusText || '{}');
+
+        function formatAmount(amount) {
+            return Number(amount).toFixed(2) + ' €';
+        }
+
+        function formatDate(value) {
+            return new Date(value).toLocaleDateString('ru-RU');
+        }
+
+        function cell(text, className) {
+            const td = document.createElement('td');
+            if (className) {
+                td.className = className;
+            }
+            td.textContent = text;
+            return td;
+        }
+
+        // Строка заказа из /api/orders - та же разметка, что рендерит сервер
+        function orderRow(order) {
+            const row = document.createElement('tr');
+            row.className = 'order-row';
+            row.dataset.orderId = order.id;
+            row.appendChild(cell('#' + order.order_number, 'order-id'));
+            row.appendChild(cell(formatDate(order.created_at)));
+            row.appendChild(cell(formatAmount(order.final_amount)));
+
+            const status = document.createElement('span');
+            status.className = 'order-status status-' + order.status;
+            const label = statusText[order.status] || order.status;
+            status.textContent = label.charAt(0).toUpperCase() + label.slice(1);
+            const statusCell = document.createElement('td');
+            statusCell.appendChild(status);
+            row.appendChild(statusCell);
+
+            const toggle = document.createElement('button');
+            toggle.type = 'button';
+            toggle.className = 'btn-action order-toggle';
+            toggle.innerHTML = '<i class="fas fa-chevron-down"></i><span>Показать</span>';
+            const toggleCell = document.createElement('td');
+            toggleCell.appendChild(toggle);
+            row.appendChild(toggleCell);
+            return row;
+        }
+
+        function itemsRow(data) {
+            const row = document.createElement('tr');
+            row.className = 'order-items-row';
+            const td = document.createElement('td');
+            td.colSpan = 5;
+
+            const list = document.createElement('ul');
+            list.className = 'order-items';
+            data.items.forEach(function(item) {
+                const li = document.createElement('li');
+                const name = document.createElement('div');
+                name.textContent = item.name;
+                const meta = document.createElement('div');
+                meta.className = 'item-meta';
+                meta.textContent = [item.article, item.size, item.color].filter(Boolean).join(' · ');
+                name.appendChild(meta);
+                li.appendChild(name);
+                li.appendChild(document.createTextNode(
+                    item.quantity + ' × ' + formatAmount(item.price)));
+                list.appendChild(li);
+            });
+            td.appendChild(list);
+
+            if (data.delivery_address) {
+                const address = document.createElement('div');
+                address.className = 'order-items-address';
+                address.textContent = 'Доставка: ' + data.delivery_address;
+                td.appendChild(address);
+            }
+            row.appendChild(td);
+            return row;
+        }
+
+        function setToggleLabel(button, open) {
+            button.querySelector('i').className = open ? 'fas fa-chevron-up' : 'fas fa-chevron-down';
+            button.querySelector('span').textContent = open ? 'Скрыть' : 'Показать';
+        }
+
+        // Состав заказа грузится при первом раскрытии, дальше строка только скрывается
+        tbody.addEventListener('click', function(e) {
+            const button = e.target.closest('.order-toggle');
+            if (!button) {
+                return;
+            }
+            const row = button.closest('.order-row');
+            const details = row.nextElementSibling;
+            if (details && details.classList.contains('order-items-row')) {
+                details.hidden = !details.hidden;
+                setToggleLabel(button, !details.hidden);
+                return;
+            }
+
+            button.disabled = true;
+            fetch(table.dataset.itemsUrl.replace('{id}', row.dataset.orderId))
+                .then(function(response) {
+                    if (!response.ok) {
+                        throw new Error(response.status);
+                    }
+                    return response.json();
+                })
+                .then(function(data) {
+                    row.after(itemsRow(data));
+                    setToggleLabel(button, true);
+                })
+                .catch(function(error) {
+                    console.error('Не удалось загрузить состав заказа:', error);
+                })
+                .finally(function() {
+                    button.disabled = false;
+                });
+        });
+
+        if (!moreButton) {
+            return;
+        }
+
+        moreButton.addEventListener('click', function() {
+            const url = table.dataset.apiUrl + '?cursor=' + encodeURIComponent(moreButton.dataset.cursor);
+            moreButton.disabled = true;
+            fetch(url)
+                .then(function(response) {
+                    if (!response.ok) {
+                        throw new Error(response.status);
+                    }
+                    return response.json();
+                })
+                .then(function(data) {
+                    data.orders.forEach(function(order) {
+                        tbody.appendChild(orderRow(order));
+                    });
+                    moreButton.dataset.cursor = data.next_cursor || '';
+                    moreButton.hidden = !data.next_cursor;
+                })
+                .catch(function(error) {
+                    console.error('Не удалось загрузить заказы:', error);
+                })
+                .finally(function() {
+                    moreButton.disabled = false;
+                });
+        });
+    });
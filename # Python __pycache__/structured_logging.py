@@ -0,0 +1,240 @@
+# structured_logging.py - журнал через очередь: запись в фоновом потоке, JSON с контекстом запроса
+import os
+import sys
+import copy
+import json
+import time
+import uuid
+import queue
+import atexit
+import logging
+import logging.handlers
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from flask import g, request
+
+logger = logging.getLogger('VogueEliteWeb')
+
+# Поля контекста (request_id, update_id, chat_id...), которые попадают в каждую запись
+_context = ContextVar('log_context', default={})
+
+# Атрибуты LogRecord; остальное в записи - поля extra и контекста
+_STANDARD_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_listener = None
+
+
+@contextmanager
+def log_context(**fields):
+    """Добавить поля во все записи журнала внутри блока (в этом потоке/контексте)"""
+    token = _context.set({**_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+class JSONFormatter(logging.Formatter):
+    """Одна запись - одна строка JSON: время, уровень, логгер, текст, контекст и extra"""
+
+    def format(self, record):
+        data = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and not key.startswith('_'):
+                data[key] = value
+        if record.exc_text:
+            data['exc'] = record.exc_text
+        if record.stack_info:
+            data['stack'] = record.stack_info
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class ContextFilter(logging.Filter):
+    """Переносит поля log_context в запись в потоке, который ее создал"""
+
+    def filter(self, record):
+        for key, value in _context.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+class DebugSampler(logging.Filter):
+    """Пропускает первую и затем каждую N-ю DEBUG-запись каждого места вызова.
+
+    Ключ - файл и строка вызова, а не текст: сообщения с f-строками
+    различаются, место вызова - нет. В запись добавляется sampled=N, чтобы
+    при разборе журнала умножать счетчики.
+    """
+
+    def __init__(self, rate):
+        super().__init__()
+        self.every = max(1, round(1 / rate)) if rate > 0 else 0
+        self._seen = {}
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.every == 1:
+            return True
+        if not self.every:
+            return False
+        site = (record.pathname, record.lineno)
+        count = self._seen.get(site, 0) + 1
+        self._seen[site] = count
+        if count % self.every != 1:
+            return False
+        record.sampled = self.every
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler, который никогда не ждет: при полной очереди запись отбрасывается.
+
+    Число отброшенных записей сообщается предупреждением, как только в
+    очереди снова есть место.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._reported = 0
+        self._exc_formatter = logging.Formatter()
+
+    def prepare(self, record):
+        # Текст и трассировка вычисляются здесь: аргументы записи могут измениться после вызова
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self._exc_formatter.formatException(record.exc_info)
+        record.msg, record.args, record.exc_info = record.message, None, None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return
+        if self.dropped > self._reported:
+            lost, self._reported = self.dropped - self._reported, self.dropped
+            warning = logging.makeLogRecord({
+                'name': 'logging', 'levelno': logging.WARNING, 'levelname': 'WARNING',
+                'msg': f"Пропущено записей журнала: {lost} (очередь переполнена)",
+            })
+            try:
+                self.queue.put_nowait(warning)
+            except queue.Full:
+                pass
+
+
+def setup_logging(level='INFO', fmt='json', debug_sample=0.01, queue_size=10000, stream=None):
+    """Настроить корневой логгер: запись через очередь в фоновый поток.
+
+    Потоки запросов и обработчиков только кладут запись в очередь, форматирует
+    и пишет ее QueueListener. После fork (воркеры gunicorn) очередь и поток
+    создаются заново. Повторный вызов заменяет настройку.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+
+    writer = logging.StreamHandler(stream or sys.stderr)
+    writer.setFormatter(JSONFormatter() if fmt == 'json' else logging.Formatter(TEXT_FORMAT))
+    handler = DroppingQueueHandler(queue.Queue(queue_size))
+    handler.addFilter(DebugSampler(debug_sample))
+    handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    for old in root.handlers[:]:
+        root.removeHandler(old)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(handler.queue, writer, respect_handler_level=True)
+    _listener.start()
+    return handler
+
+
+def _restart_after_fork():
+    """Поток записи не переживает fork, а очередь могла остаться заблокированной"""
+    global _listener
+    if _listener is None:
+        return
+    handler = next((h for h in logging.getLogger().handlers if isinstance(h, DroppingQueueHandler)), None)
+    if handler is None:
+        return
+    handler.queue = queue.Queue(handler.queue.maxsize)
+    _listener = logging.handlers.QueueListener(handler.queue, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def _stop():
+    # Остаток очереди дописывается при выходе процесса
+    if _listener is not None:
+        _listener.stop()
+
+
+os.register_at_fork(after_in_child=_restart_after_fork)
+atexit.register(_stop)
+
+
+class RequestLogging:
+    """request_id и время запроса в журнале веб-приложения.
+
+    request_id берется из X-Request-ID (от прокси) или создается, попадает
+    во все записи запроса и возвращается в заголовке ответа. Завершение
+    запроса пишется DEBUG-записью (сэмплируется), медленнее
+    LOG_SLOW_REQUEST_MS - предупреждением.
+    """
+
+    def __init__(self, app=None):
+        self.slow_ms = 1000
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.slow_ms = app.config.get('LOG_SLOW_REQUEST_MS', 1000)
+        app.extensions['request_logging'] = self
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    @staticmethod
+    def _request_id():
+        incoming = request.headers.get('X-Request-ID', '')
+        if incoming and len(incoming) <= 64 and incoming.isprintable():
+            return incoming
+        return uuid.uuid4().hex[:16]
+
+    def _before_request(self):
+        g.request_id = self._request_id()
+        g._log_started = time.perf_counter()
+        g._log_token = _context.set({**_context.get(), 'request_id': g.request_id})
+
+    def _after_request(self, response):
+        started = g.get('_log_started')
+        if started is None:
+            return response
+        response.headers['X-Request-ID'] = g.request_id
+        duration_ms = round((time.perf_counter() - started) * 1000, 1)
+        level = logging.WARNING if duration_ms >= self.slow_ms else logging.DEBUG
+        logger.log(level, 'Запрос обработан', extra={
+            'method': request.method, 'path': request.path, 'endpoint': request.endpoint,
+            'status': response.status_code, 'duration_ms': duration_ms,
+        })
+        return response
+
+    def _teardown_request(self, exc):
+        token = g.pop('_log_token', None)
+        if token is not None:
+            try:
+                _context.reset(token)
+            except ValueError:  # контекст сменился (поток ответа)
+                pass
@@ -0,0 +1,137 @@
+# telegram_auth.py - вход через Telegram WebApp (проверка initData)
+import hmac
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from urllib.parse import parse_qsl
+from sqlalchemy.exc import IntegrityError
+from models import db, User
+
+
+class InitDataError(ValueError):
+    """initData не прошла проверку (status - код ответа: 400 для битых данных, 401 для подписи)"""
+
+    def __init__(self, message, status=401):
+        super().__init__(message)
+        self.status = status
+
+
+def check_init_data(init_data, secret, max_age, now=None):
+    """Проверить подпись initData и вернуть ее поля.
+
+    https://core.telegram.org/bots/webapps#validating-data-received-via-the-mini-app
+    """
+    if not init_data:
+        raise InitDataError('Нет данных Telegram', 400)
+    if not isinstance(init_data, str):
+        raise InitDataError('Неверный формат данных Telegram', 400)
+    fields = dict(parse_qsl(init_data, keep_blank_values=True))
+    received = fields.pop('hash', None)
+    if not received:
+        raise InitDataError('Нет подписи Telegram', 400)
+    data_check_string = '\n'.join(f"{k}={v}" for k, v in sorted(fields.items()))
+    try:
+        expected = hmac.new(secret, data_check_string.encode(), hashlib.sha256).hexdigest()
+        # Байты, а не str: compare_digest падает на не-ASCII строках
+        valid = hmac.compare_digest(expected.encode(), received.encode())
+    except UnicodeEncodeError:
+        raise InitDataError('Неверный формат данных Telegram', 400)
+    if not valid:
+        raise InitDataError('Неверная подпись Telegram')
+
+    try:
+        auth_date = int(fields.get('auth_date', 0))
+    except ValueError:
+        raise InitDataError('Неверная дата авторизации', 400)
+    if (now or time.time()) - auth_date > max_age:
+        raise InitDataError('Данные Telegram устарели, откройте магазин из бота заново')
+    try:
+        fields['user'] = json.loads(fields['user'])
+        int(fields['user']['id'])
+    except (KeyError, ValueError, TypeError):
+        raise InitDataError('Нет данных пользователя Telegram', 400)
+    fields['hash'] = received
+    return fields
+
+
+def upsert_user(tg_user):
+    """Найти или создать пользователя по telegram_id. Возвращает id"""
+    telegram_id = int(tg_user['id'])
+    profile = {
+        'username': tg_user.get('username'),
+        'first_name': tg_user.get('first_name') or tg_user.get('username') or str(telegram_id),
+        'last_name': tg_user.get('last_name'),
+    }
+    user = User.query.filter_by(telegram_id=telegram_id).first()
+    if user is None:
+        user = User(telegram_id=telegram_id, **profile)
+        db.session.add(user)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Параллельный вход того же пользователя уже создал строку
+            db.session.rollback()
+            user = User.query.filter_by(telegram_id=telegram_id).first()
+        return user.id
+
+    changed = False
+    for field, value in profile.items():
+        if getattr(user, field) != value:
+            setattr(user, field, value)
+            changed = True
+    if changed:
+        db.session.commit()
+    return user.id
+
+
+class TelegramAuth:
+    """Вход по initData Telegram WebApp.
+
+    Уже проверенные подписи хранятся в LRU до истечения срока initData:
+    повторное открытие магазина с теми же данными не пересчитывает HMAC
+    и не обращается к users.
+    """
+
+    def __init__(self, app=None):
+        self.secret = None
+        self.max_age = 86400
+        self.max_entries = 10000
+        self._verified = OrderedDict()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        # Ключ проверки: HMAC-SHA256 токена бота с ключом "WebAppData"
+        self.secret = hmac.new(b'WebAppData', app.config['BOT_TOKEN'].encode(), hashlib.sha256).digest()
+        self.max_age = app.config.get('TELEGRAM_AUTH_MAX_AGE', 86400)
+        self.max_entries = app.config.get('TELEGRAM_AUTH_CACHE_SIZE', 10000)
+        app.extensions['telegram_auth'] = self
+
+    def authenticate(self, init_data):
+        """id пользователя магазина для initData или InitDataError"""
+        now = time.time()
+        if not init_data or not isinstance(init_data, str):
+            raise InitDataError('Нет данных Telegram', 400)
+        try:
+            key = hashlib.sha256(init_data.encode()).digest()
+        except UnicodeEncodeError:
+            raise InitDataError('Неверный формат данных Telegram', 400)
+        with self._lock:
+            entry = self._verified.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._verified.move_to_end(key)
+                    return entry[1]
+                del self._verified[key]
+
+        fields = check_init_data(init_data, self.secret, self.max_age, now)
+        user_id = upsert_user(fields['user'])
+        expires = int(fields['auth_date']) + self.max_age
+        with self._lock:
+            self._verified[key] = (expires, user_id)
+            while len(self._verified) > self.max_entries:
+                self._verified.popitem(last=False)
+        return user_id
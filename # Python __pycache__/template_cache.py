@@ -0,0 +1,103 @@
+# template_cache.py - байткод шаблонов на диске и кэш отрендеренных фрагментов
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from shared_cache import SharedCache, private_directory
+
+
+class FragmentCacheExtension(Extension):
+    """Тег {% cache key[, ttl] %}...{% endcache %}.
+
+    key - любое выражение (строка или кортеж, например
+    ('product-card', product.id, product.updated_at)). Без ttl берется
+    FRAGMENT_CACHE_TTL. Все фрагменты сбрасываются при записи товаров
+    во всех воркерах.
+    """
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        if parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        else:
+            args.append(nodes.Const(None))
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(self.call_method('_render', args), [], [], body).set_lineno(lineno)
+
+    def _render(self, key, ttl, caller):
+        cache = self.environment.fragment_cache
+        if cache is None:
+            return caller()
+        return cache.get_or_render(key, ttl, caller)
+
+
+class FragmentCache:
+    """Отрендеренные фрагменты в общем кэше (пространство имен fragments)"""
+    NAMESPACE = 'fragments'
+
+    def __init__(self, cache=None, default_ttl=300):
+        self.cache = cache or SharedCache()
+        self.default_ttl = default_ttl
+
+    def get_or_render(self, key, ttl, render):
+        html = self.cache.get_or_set(self.NAMESPACE, key, lambda: str(render()),
+                                     ttl if ttl is not None else self.default_ttl)
+        return Markup(html)
+
+    def invalidate(self):
+        """Сбросить все фрагменты во всех воркерах (новая версия пространства имен)"""
+        self.cache.invalidate(self.NAMESPACE)
+
+
+class TemplateCache:
+    """Подключение байткод-кэша и кэша фрагментов к приложению"""
+
+    def __init__(self, app=None):
+        self.fragments = FragmentCache()
+        self._watched = ()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app, watch_models=(), cache=None):
+        # Скомпилированные шаблоны переживают перезапуск воркеров; байткод
+        # выполняется при загрузке, поэтому каталог закрыт от других пользователей
+        directory = private_directory(app.config['TEMPLATE_BYTECODE_DIR'])
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
+
+        if cache is not None:
+            self.fragments.cache = cache
+        self.fragments.default_ttl = app.config.get('FRAGMENT_CACHE_TTL', 300)
+        app.jinja_env.add_extension(FragmentCacheExtension)
+        app.jinja_env.fragment_cache = self.fragments
+        app.extensions['template_cache'] = self
+
+        self._watched = tuple(watch_models)
+        if not event.contains(Session, 'after_flush', self._after_flush):
+            event.listen(Session, 'after_flush', self._after_flush)
+            event.listen(Session, 'after_commit', self._after_commit)
+            event.listen(Session, 'after_rollback', self._after_rollback)
+
+    def invalidate(self):
+        """Явный сброс после массовых UPDATE, которые не проходят через ORM"""
+        self.fragments.invalidate()
+
+    # Запись товара через ORM сбрасывает фрагменты после успешного commit
+    def _after_flush(self, session, flush_context):
+        for obj in (*session.new, *session.dirty, *session.deleted):
+            if isinstance(obj, self._watched):
+                session.info['_fragments_stale'] = True
+                return
+
+    def _after_commit(self, session):
+        if session.info.pop('_fragments_stale', False):
+            self.invalidate()
+
+    def _after_rollback(self, session):
+        session.info.pop('_fragments_stale', None)
@@ -0,0 +1,65 @@
+# tests/conftest.py - общее окружение тестов: временные база и каталоги, приложение на чистой базе
+import os
+import logging
+import tempfile
+import pytest
+
+# Настройки читаются при импорте app: окружение задается до него
+WORKDIR = tempfile.mkdtemp(prefix='vogue_tests_')
+os.environ.update({
+    'DATABASE_URL': f"sqlite:///{os.path.join(WORKDIR, 'test.db')}",
+    'METRICS_DIR': os.path.join(WORKDIR, 'metrics'),
+    'CACHE_DIR': os.path.join(WORKDIR, 'cache'),
+    'FEED_CACHE_DIR': os.path.join(WORKDIR, 'feeds'),
+    'PROFILER_DIR': os.path.join(WORKDIR, 'profiles'),
+    'TEMPLATE_BYTECODE_DIR': os.path.join(WORKDIR, 'jinja'),
+})
+logging.disable(logging.CRITICAL)
+
+
+@pytest.fixture
+def app():
+    """Приложение на пустой базе с тестовыми товарами; кэши и лимиты сброшены"""
+    from app import app, shared_cache, identity_cache, rate_limiter, telegram_auth
+    from ratelimit import BucketTable
+    from models import db
+    from manage import create_schema, seed_products
+    with app.app_context():
+        db.drop_all()
+        create_schema()
+        seed_products()
+    shared_cache.clear()
+    identity_cache.invalidate()
+    telegram_auth._verified.clear()
+    rate_limiter.table = BucketTable(None, app.config['SECRET_KEY'].encode())
+    yield app
+
+
+@pytest.fixture
+def make_user(app):
+    """make_user(**поля) - создать покупателя, возвращает id"""
+    from models import db, User
+    created = []
+
+    def make_user(**fields):
+        number = len(created) + 1
+        fields.setdefault('first_name', f'Покупатель {number}')
+        fields.setdefault('telegram_id', 500000 + number)
+        with app.app_context():
+            user = User(**fields)
+            db.session.add(user)
+            db.session.commit()
+            created.append(user.id)
+            return user.id
+    return make_user
+
+
+@pytest.fixture
+def login(app):
+    """login(client, user_id) - сессия пользователя в тестовом клиенте"""
+    def login(client, user_id):
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user_id)
+            session['_fresh'] = True
+        return client
+    return login
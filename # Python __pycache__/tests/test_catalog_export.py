@@ -0,0 +1,51 @@
+# tests/test_catalog_export.py - фиды каталога: версия кэша и актуальность остатков
+import json
+from datetime import datetime, timedelta
+from catalog_export import catalog_version
+from models import db, Product, Order, StockReservation
+
+
+def feed_stock(client, product_id):
+    response = client.get('/feeds/catalog.jsonl')
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    return next(row['stock'] for row in rows if row['id'] == product_id)
+
+
+def reserve(app, user_id, product_id, quantity, expires_at):
+    with app.app_context():
+        product = db.session.get(Product, product_id)
+        product.stock -= quantity
+        product.reserved += quantity
+        order = Order(order_number=f'ORDTEST{product_id}', user_id=user_id, total_amount=1,
+                      final_amount=1, items_json='[]', payment_status='pending')
+        order.reservations.append(StockReservation(product_id=product_id, quantity=quantity,
+                                                   expires_at=expires_at))
+        db.session.add(order)
+        db.session.commit()
+
+
+def test_feed_is_served_from_cache_while_catalog_is_unchanged(app):
+    client = app.test_client()
+    first = client.get('/feeds/catalog.csv')
+    assert first.get_data(as_text=True).startswith('id,')
+    second = client.get('/feeds/catalog.csv', headers={'If-None-Match': first.headers['ETag'].strip('"')})
+    assert first.status_code == 200
+    assert second.status_code == 304
+
+
+def test_expired_reservation_refreshes_cached_feed(app, make_user):
+    user_id = make_user()
+    now = datetime.utcnow()
+    client = app.test_client()
+    with app.app_context():
+        stock = db.session.get(Product, 1).stock
+
+    reserve(app, user_id, 1, 2, expires_at=now)
+    assert feed_stock(client, 1) == stock - 2
+    with app.app_context():
+        before = catalog_version()
+        released = app.extensions['reservations'].sweep(now=now + timedelta(seconds=1))
+        assert released == 1
+        assert catalog_version() != before
+    assert feed_stock(client, 1) == stock
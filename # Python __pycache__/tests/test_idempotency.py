@@ -0,0 +1,105 @@
+# tests/test_idempotency.py - Idempotency-Key: повтор ответа, 409 во время выполнения, 422 на другое тело
+import sys
+from datetime import datetime, timedelta
+from flask import request
+from models import db, Cart, IdempotencyKey
+from idempotency import fingerprint
+
+ENDPOINT = 'shop.api_add_to_cart'
+BODY = {'product_id': 1, 'quantity': 1, 'size': 'M', 'color': 'Черный'}
+
+
+def add_to_cart(client, key, body=BODY):
+    return client.post('/api/cart/add', json=body, headers={'Idempotency-Key': key})
+
+
+def cart_quantity(app):
+    with app.app_context():
+        return db.session.query(db.func.coalesce(db.func.sum(Cart.quantity), 0)).scalar()
+
+
+def claim_key(app, user_id, key, locked_until):
+    """Ключ, занятый другим запросом того же пользователя с тем же телом"""
+    with app.test_request_context('/api/cart/add', method='POST', json=BODY):
+        digest = fingerprint(ENDPOINT, request.get_data())
+    now = datetime.utcnow()
+    with app.app_context():
+        db.session.add(IdempotencyKey(user_id=user_id, key=key, endpoint=ENDPOINT, fingerprint=digest,
+                                      state='processing', locked_until=locked_until,
+                                      expires_at=now + timedelta(days=1)))
+        db.session.commit()
+
+
+def test_repeated_request_replays_stored_response(app, make_user, login):
+    client = login(app.test_client(), make_user())
+    first = add_to_cart(client, 'add-1')
+    second = add_to_cart(client, 'add-1')
+
+    assert first.status_code == second.status_code == 200
+    assert second.get_json() == first.get_json()
+    assert second.headers['Idempotent-Replayed'] == 'true'
+    assert 'Idempotent-Replayed' not in first.headers
+    assert cart_quantity(app) == 1
+
+
+def test_keys_are_per_user_and_per_request(app, make_user, login):
+    client = login(app.test_client(), make_user())
+    add_to_cart(client, 'add-1')
+    add_to_cart(client, 'add-2')
+    add_to_cart(login(app.test_client(), make_user()), 'add-1')
+    assert cart_quantity(app) == 3
+
+
+def test_same_key_with_other_body_is_rejected(app, make_user, login):
+    client = login(app.test_client(), make_user())
+    add_to_cart(client, 'add-1')
+    response = add_to_cart(client, 'add-1', dict(BODY, quantity=3))
+    assert response.status_code == 422
+    assert cart_quantity(app) == 1
+
+
+def test_invalid_key_is_rejected(app, make_user, login):
+    client = login(app.test_client(), make_user())
+    assert add_to_cart(client, 'x' * 101).status_code == 400
+    assert cart_quantity(app) == 0
+
+
+def test_request_in_progress_answers_409(app, make_user, login):
+    user_id = make_user()
+    claim_key(app, user_id, 'add-1', locked_until=datetime.utcnow() + timedelta(minutes=1))
+
+    response = add_to_cart(login(app.test_client(), user_id), 'add-1')
+    assert response.status_code == 409
+    assert response.headers['Retry-After'] == '1'
+    assert cart_quantity(app) == 0
+
+
+def test_abandoned_key_is_taken_over(app, make_user, login):
+    user_id = make_user()
+    claim_key(app, user_id, 'add-1', locked_until=datetime.utcnow() - timedelta(seconds=1))
+
+    response = add_to_cart(login(app.test_client(), user_id), 'add-1')
+    assert response.status_code == 200
+    assert cart_quantity(app) == 1
+
+
+def test_server_error_releases_key(app, make_user, login, monkeypatch):
+    user_id = make_user()
+    client = login(app.test_client(), user_id)
+
+    class BrokenProduct:
+        class query:
+            @staticmethod
+            def get(ident):
+                raise RuntimeError('база недоступна')
+
+    monkeypatch.setattr(sys.modules['app'], 'Product', BrokenProduct)
+    assert add_to_cart(client, 'add-1').status_code == 500
+    with app.app_context():
+        assert db.session.get(IdempotencyKey, (user_id, 'add-1')) is None
+
+    monkeypatch.undo()
+    response = add_to_cart(client, 'add-1')
+    assert response.status_code == 200
+    assert 'Idempotent-Replayed' not in response.headers
+    assert cart_quantity(app) == 1
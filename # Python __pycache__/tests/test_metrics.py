@@ -0,0 +1,28 @@
+import pytest
+
+
+@pytest.fixture
+def metrics(app, monkeypatch):
+    from app import request_metrics
+    monkeypatch.setattr(request_metrics, 'token', None)
+    return request_metrics
+
+
+def test_metrics_hidden_without_token_in_production(app, metrics):
+    assert not app.debug and not app.testing
+    assert app.test_client().get('/metrics').status_code == 404
+
+
+def test_metrics_open_without_token_in_debug(app, metrics, monkeypatch):
+    monkeypatch.setattr(app, 'debug', True)
+    response = app.test_client().get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+
+
+def test_metrics_require_configured_token(app, metrics, monkeypatch):
+    monkeypatch.setattr(metrics, 'token', 'secret')
+    client = app.test_client()
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer secret'}).status_code == 200
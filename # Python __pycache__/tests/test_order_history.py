@@ -0,0 +1,86 @@
+# tests/test_order_history.py - история заказов: keyset-курсоры, страница /orders и состав заказа
+from datetime import datetime, timedelta
+import pytest
+from models import db, Order, OrderItem
+
+
+def add_orders(app, user_id, count, prefix='ORDHIST'):
+    """Заказы пользователя; по два заказа на одну секунду - проверка сортировки по id при равном created_at"""
+    start = datetime(2024, 1, 1, 12, 0, 0)
+    with app.app_context():
+        orders = []
+        for number in range(count):
+            order = Order(order_number=f'{prefix}{number:04d}', user_id=user_id, total_amount=100 + number,
+                          final_amount=100 + number, items_json='[]',
+                          created_at=start + timedelta(seconds=number // 2))
+            order.items.append(OrderItem(product_id=1, name='Товар', price=100, quantity=1))
+            orders.append(order)
+        db.session.add_all(orders)
+        db.session.commit()
+        return [order.id for order in orders]
+
+
+def walk(client, limit):
+    """Все страницы /api/orders по курсорам: (id заказов по порядку, число страниц)"""
+    ids, pages, cursor = [], 0, None
+    while True:
+        query = f'/api/orders?limit={limit}' + (f'&cursor={cursor}' if cursor else '')
+        response = client.get(query)
+        assert response.status_code == 200
+        data = response.get_json()
+        ids += [order['id'] for order in data['orders']]
+        pages += 1
+        cursor = data['next_cursor']
+        if not cursor:
+            return ids, pages
+
+
+@pytest.mark.parametrize('limit', [1, 2, 3, 7, 100])
+def test_cursor_round_trip_has_no_gaps_or_duplicates(app, make_user, login, limit):
+    user_id = make_user()
+    other_id = make_user()
+    created = add_orders(app, user_id, 7)
+    add_orders(app, other_id, 3, prefix='ORDOTHER')
+    client = login(app.test_client(), user_id)
+
+    ids, pages = walk(client, limit)
+    assert ids == sorted(created, reverse=True)
+    assert pages == max(1, -(-len(created) // limit))
+
+
+def test_invalid_cursor_is_rejected(app, make_user, login):
+    client = login(app.test_client(), make_user())
+    response = client.get('/api/orders?cursor=not-a-cursor')
+    assert response.status_code == 400
+
+
+def test_orders_page_renders_first_page_and_load_more(app, make_user, login):
+    user_id = make_user()
+    add_orders(app, user_id, 25)
+    client = login(app.test_client(), user_id)
+
+    response = client.get('/orders')
+    html = response.get_data(as_text=True)
+    assert response.status_code == 200
+    assert html.count('class="order-row"') == 20
+    assert 'id="ordersMore"' in html and 'data-cursor=""' not in html
+    assert 'ORDHIST0024' in html and 'ORDHIST0004' not in html
+
+
+def test_orders_page_without_orders(app, make_user, login):
+    client = login(app.test_client(), make_user())
+    response = client.get('/orders')
+    assert response.status_code == 200
+    assert 'Заказов пока нет' in response.get_data(as_text=True)
+
+
+def test_order_items_are_visible_only_to_owner(app, make_user, login):
+    owner_id = make_user()
+    order_id = add_orders(app, owner_id, 1)[0]
+
+    response = login(app.test_client(), owner_id).get(f'/api/orders/{order_id}/items')
+    assert response.status_code == 200
+    assert [item['name'] for item in response.get_json()['items']] == ['Товар']
+
+    response = login(app.test_client(), make_user()).get(f'/api/orders/{order_id}/items')
+    assert response.status_code == 403
@@ -0,0 +1,129 @@
+# tests/test_outbox.py - события заказов для бота: запись вместе с заказом, выдача и подтверждение
+from datetime import datetime, timedelta
+import pytest
+from models import db, Order, OutboxEvent
+
+
+@pytest.fixture
+def outbox(app, monkeypatch):
+    outbox = app.extensions['outbox']
+    monkeypatch.setattr(outbox, 'admin_ids', (111, 222))
+    return outbox
+
+
+def add_order(app, user_id, number='ORDOUT0001', commit=True):
+    with app.app_context():
+        order = Order(order_number=number, user_id=user_id, total_amount=100, final_amount=100,
+                      items_json='[]')
+        db.session.add(order)
+        db.session.flush()
+        if commit:
+            db.session.commit()
+        else:
+            db.session.rollback()
+        return order.id
+
+
+def events(app):
+    with app.app_context():
+        return [(e.kind, e.recipient, e.chat_id, e.status, e.state)
+                for e in OutboxEvent.query.order_by(OutboxEvent.id)]
+
+
+def test_new_order_and_status_change_write_events(app, make_user, outbox):
+    order_id = add_order(app, make_user())
+    with app.app_context():
+        db.session.get(Order, order_id).status = 'shipped'
+        db.session.commit()
+
+    assert events(app) == [
+        ('order_created', 'customer', None, 'new', 'pending'),
+        ('order_created', 'admin', 111, 'new', 'pending'),
+        ('order_created', 'admin', 222, 'new', 'pending'),
+        ('order_status', 'customer', None, 'shipped', 'pending'),
+    ]
+
+
+def test_rolled_back_order_leaves_no_events(app, make_user, outbox):
+    add_order(app, make_user(), commit=False)
+    assert events(app) == []
+
+
+def test_claimed_events_are_not_issued_twice_until_claim_expires(app, make_user, outbox):
+    telegram_id = 700001
+    add_order(app, make_user(telegram_id=telegram_id))
+    now = datetime.utcnow()
+    with app.app_context():
+        first = outbox.claim(limit=2, now=now)
+        assert [(e['recipient'], e['chat_id'], e['attempts']) for e in first] == \
+            [('customer', telegram_id, 1), ('admin', 111, 1)]
+        assert first[0]['order']['order_number'] == 'ORDOUT0001'
+
+        second = outbox.claim(limit=10, now=now)
+        assert [e['chat_id'] for e in second] == [222]
+        assert outbox.claim(limit=10, now=now) == []
+
+        # Бот упал и не подтвердил: после OUTBOX_CLAIM_SECONDS события выдаются снова
+        later = now + timedelta(seconds=outbox.claim_seconds + 1)
+        again = outbox.claim(limit=10, now=later)
+        assert [e['id'] for e in again] == [e['id'] for e in first + second]
+        assert {e['attempts'] for e in again} == {2}
+
+
+def test_ack_marks_sent_retries_and_gives_up(app, make_user, outbox):
+    add_order(app, make_user())
+    now = datetime.utcnow()
+    with app.app_context():
+        sent, retry, blocked = (e['id'] for e in outbox.claim(now=now))
+        assert outbox.ack(sent=[sent], failed=[{'id': retry, 'error': 'timeout', 'retry_after': 60},
+                                               {'id': blocked, 'error': 'blocked', 'retry': False}],
+                          now=now) == 1
+        # Повторное подтверждение ничего не меняет
+        assert outbox.ack(sent=[sent], now=now) == 0
+
+        states = {e.id: (e.state, e.available_at, e.last_error) for e in OutboxEvent.query}
+        assert states[sent][0] == 'sent'
+        assert states[retry] == ('pending', now + timedelta(seconds=60), 'timeout')
+        assert states[blocked][0] == 'failed'
+
+        assert outbox.claim(now=now) == []
+        assert [e['id'] for e in outbox.claim(now=now + timedelta(seconds=61))] == [retry]
+
+
+def test_event_fails_after_max_attempts(app, make_user, outbox, monkeypatch):
+    monkeypatch.setattr(outbox, 'max_attempts', 2)
+    add_order(app, make_user())
+    now = datetime.utcnow()
+    with app.app_context():
+        for attempt in range(2):
+            event_id = outbox.claim(limit=1, now=now)[0]['id']
+            outbox.ack(failed=[{'id': event_id, 'error': 'timeout', 'retry_after': 1}], now=now)
+            now += timedelta(seconds=2)
+        assert db.session.get(OutboxEvent, event_id).state == 'failed'
+
+
+def test_bot_endpoints_require_token(app, make_user, outbox):
+    add_order(app, make_user())
+    client = app.test_client()
+    assert client.post('/api/bot/outbox/claim', json={}).status_code == 401
+    assert client.post('/api/bot/outbox/claim', json={},
+                       headers={'Authorization': 'Bearer wrong'}).status_code == 401
+
+    headers = {'Authorization': f"Bearer {app.config['BOT_API_TOKEN']}"}
+    claimed = client.post('/api/bot/outbox/claim', json={'limit': 5}, headers=headers).get_json()['events']
+    assert len(claimed) == 3
+    response = client.post('/api/bot/outbox/ack', json={'sent': [e['id'] for e in claimed]}, headers=headers)
+    assert response.get_json() == {'success': True, 'sent': 3}
+
+
+def test_claim_rejects_bad_limit_and_clamps_large_one(app, make_user, outbox):
+    add_order(app, make_user())
+    client = app.test_client()
+    headers = {'Authorization': f"Bearer {app.config['BOT_API_TOKEN']}"}
+    for limit in ('abc', '5', 2.5, True, [1]):
+        response = client.post('/api/bot/outbox/claim', json={'limit': limit}, headers=headers)
+        assert response.status_code == 400
+        assert response.get_json()['success'] is False
+    response = client.post('/api/bot/outbox/claim', json={'limit': 10 ** 9}, headers=headers)
+    assert response.status_code == 200
+    assert len(response.get_json()['events']) == 3
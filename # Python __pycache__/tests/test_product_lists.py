@@ -0,0 +1,96 @@
+# tests/test_product_lists.py - избранное: первая запись, параллельные вкладки, счетчики
+import threading
+import pytest
+import product_lists
+from models import db, ProductList, WishlistCount
+
+
+def counts(app):
+    with app.app_context():
+        return {row.product_id: row.count for row in WishlistCount.query}
+
+
+def race_with(app, monkeypatch, competitor):
+    """Выполнить competitor() в другом соединении между чтением и записью списка"""
+    original = product_lists.max_items
+    raced = []
+
+    def max_items(kind):
+        if not raced:
+            raced.append(True)
+            def run():
+                with app.app_context():
+                    competitor()
+            thread = threading.Thread(target=run)
+            thread.start()
+            thread.join()
+        return original(kind)
+
+    monkeypatch.setattr(product_lists, 'max_items', max_items)
+    return raced
+
+
+@pytest.mark.parametrize('initial', [[], [3]], ids=['first-write', 'existing-list'])
+def test_parallel_tab_change_is_not_lost(app, make_user, monkeypatch, initial):
+    user_id = make_user()
+    if initial:
+        with app.app_context():
+            product_lists.update_list(user_id, 'wishlist', add=initial)
+    raced = race_with(app, monkeypatch, lambda: product_lists.update_list(user_id, 'wishlist', add=[2]))
+
+    with app.app_context():
+        ids = product_lists.update_list(user_id, 'wishlist', add=[1])
+        assert raced
+        assert ids == initial + [2, 1]
+        assert product_lists.get_ids(user_id, 'wishlist') == ids
+        assert ProductList.query.count() == 1
+    assert counts(app) == {pid: 1 for pid in ids}
+
+
+def test_first_wishlist_of_product_from_two_users(app, make_user, monkeypatch):
+    first, second = make_user(), make_user()
+    race_with(app, monkeypatch, lambda: product_lists.update_list(second, 'wishlist', add=[1]))
+
+    with app.app_context():
+        product_lists.update_list(first, 'wishlist', add=[1])
+    assert counts(app) == {1: 2}
+
+
+def test_concurrent_users_keep_counts_exact(app, make_user):
+    users = [make_user() for _ in range(6)]
+    barrier = threading.Barrier(len(users))
+    errors = []
+
+    def worker(user_id):
+        with app.app_context():
+            barrier.wait()
+            try:
+                product_lists.update_list(user_id, 'wishlist', add=[1, 2])
+            except Exception as e:  # pragma: no cover - падение проверяется ниже
+                errors.append(e)
+                db.session.rollback()
+
+    threads = [threading.Thread(target=worker, args=(u,)) for u in users]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert counts(app) == {1: 6, 2: 6}
+
+
+def test_remove_decrements_and_noop_writes_nothing(app, make_user):
+    user_id = make_user()
+    with app.app_context():
+        product_lists.update_list(user_id, 'wishlist', add=[1, 2])
+        assert product_lists.update_list(user_id, 'wishlist', add=[1]) == [1, 2]
+        assert product_lists.update_list(user_id, 'wishlist', remove=[1]) == [2]
+    assert counts(app) == {1: 0, 2: 1}
+
+
+def test_compare_list_does_not_touch_counts(app, make_user):
+    user_id = make_user()
+    with app.app_context():
+        assert product_lists.update_list(user_id, 'compare', add=[1, 2, 99]) == [1, 2]
+    assert counts(app) == {}
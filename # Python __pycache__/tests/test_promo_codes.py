@@ -0,0 +1,113 @@
+# tests/test_promo_codes.py - промокоды: скидка, сроки, общий лимит и лимит на покупателя
+from datetime import datetime, timedelta
+import pytest
+from models import db, Cart, Order, Product, PromoCode, PromoRedemption
+from promo_codes import PromoError, compile_promo, discount_for
+
+ITEMS = [('Платья', 600.0), ('Обувь', 400.0)]
+
+
+def promo(**fields):
+    fields = dict(dict(id=1, code='SALE', discount_type='percent', value=10), **fields)
+    return compile_promo(PromoCode(**fields))
+
+
+def add_promo(app, **fields):
+    with app.app_context():
+        db.session.add(PromoCode(**dict(dict(code='SALE', discount_type='percent', value=10), **fields)))
+        db.session.commit()
+
+
+def redeem(app, user_id, code='SALE'):
+    """Погашение в транзакции заказа, как при оформлении: ошибка откатывает заказ"""
+    table = app.extensions['promo_codes']
+    with app.app_context():
+        promo, _ = table.validate(code, ITEMS, 1000)
+        order = Order(order_number=f'ORDPROMO{user_id}{datetime.utcnow():%H%M%S%f}', user_id=user_id,
+                      total_amount=1000, final_amount=900, items_json='[]')
+        db.session.add(order)
+        try:
+            table.redeem(promo, user_id, order)
+        except PromoError:
+            db.session.rollback()
+            raise
+        db.session.commit()
+
+
+def used_count(app, code='SALE'):
+    with app.app_context():
+        return PromoCode.query.filter_by(code=code).one().used_count
+
+
+def test_discount_for():
+    assert discount_for(promo(), ITEMS, 1000) == 100
+    assert discount_for(promo(discount_type='fixed', value=1500), ITEMS, 1000) == 1000
+    assert discount_for(promo(categories='Обувь'), ITEMS, 1000) == 40
+    with pytest.raises(PromoError):
+        discount_for(promo(min_amount=2000), ITEMS, 1000)
+    with pytest.raises(PromoError):
+        discount_for(promo(categories='Сумки'), ITEMS, 1000)
+
+
+def test_validate_checks_code_and_dates(app):
+    now = datetime.utcnow()
+    add_promo(app, expires_at=now + timedelta(days=1))
+    add_promo(app, code='LATER', starts_at=now + timedelta(days=1))
+    add_promo(app, code='OFF', is_active=False)
+    table = app.extensions['promo_codes']
+    with app.app_context():
+        assert table.validate(' sale ', ITEMS, 1000)[1] == 100
+        for code in ('LATER', 'OFF', 'NOPE'):
+            with pytest.raises(PromoError):
+                table.validate(code, ITEMS, 1000)
+        with pytest.raises(PromoError):
+            table.validate('SALE', ITEMS, 1000, now=now + timedelta(days=2))
+
+
+def test_max_uses_limits_redemptions(app, make_user):
+    add_promo(app, max_uses=2)
+    users = [make_user() for _ in range(3)]
+    redeem(app, users[0])
+    redeem(app, users[1])
+    with pytest.raises(PromoError):
+        redeem(app, users[2])
+
+    assert used_count(app) == 2
+    with app.app_context():
+        assert PromoRedemption.query.count() == 2
+        # Исчерпанный код пропадает из таблицы в памяти
+        assert app.extensions['promo_codes'].lookup('SALE') is None
+
+
+def test_per_user_limit(app, make_user):
+    add_promo(app, per_user_limit=1, max_uses=10)
+    first, second = make_user(), make_user()
+    redeem(app, first)
+    with pytest.raises(PromoError):
+        redeem(app, first)
+    redeem(app, second)
+    # Отказ откатывает и увеличение счетчика
+    assert used_count(app) == 2
+
+
+def test_checkout_rejects_exhausted_code(app, make_user, login):
+    add_promo(app, max_uses=1)
+    clients = []
+    for _ in range(2):
+        user_id = make_user()
+        with app.app_context():
+            db.session.add(Cart(user_id=user_id, product_id=1, quantity=1, price_at_addition=100))
+            db.session.commit()
+        clients.append(login(app.test_client(), user_id))
+    with app.app_context():
+        stock = db.session.get(Product, 1).stock
+
+    body = {'address': 'Москва', 'payment_method': 'card', 'promo_code': 'sale'}
+    assert clients[0].post('/api/order/create', json=body).status_code == 200
+    response = clients[1].post('/api/order/create', json=body)
+    assert response.status_code == 400
+
+    assert used_count(app) == 1
+    with app.app_context():
+        assert Order.query.count() == 1
+        assert db.session.get(Product, 1).stock == stock - 1
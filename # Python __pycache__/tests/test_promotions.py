@@ -0,0 +1,62 @@
+# tests/test_promotions.py - акции: витрина показывает ту цену, которую списывает оформление заказа
+import re
+from datetime import datetime
+from models import db, Cart, Order, Product, Promotion
+from promotions import new_promotion
+
+NOW = datetime(2024, 1, 1, 12, 0, 0)
+
+
+def start_promotion(app, product_id, percent):
+    scheduler = app.extensions['promotions']
+    with app.app_context():
+        product = db.session.get(Product, product_id)
+        promotion = new_promotion('Распродажа', percent, 'articles', product.article, starts_at=NOW)
+        db.session.commit()
+        assert scheduler.apply(promotion, NOW) == 1
+        return promotion.id
+
+
+def shown_prices(html, css_class):
+    return [float(p) for p in re.findall(rf'class="{css_class}">\s*([\d.]+) €', html)]
+
+
+def test_shown_price_equals_charged_price(app, make_user, login):
+    with app.app_context():
+        base = db.session.get(Product, 1).price
+    start_promotion(app, 1, 20)
+    promo_price = round(base * 0.8)
+    with app.app_context():
+        product = db.session.get(Product, 1)
+        assert (product.price, product.old_price, product.discount) == (promo_price, base, 0)
+
+    user_id = make_user()
+    client = login(app.test_client(), user_id)
+    page = client.get('/product/1').get_data(as_text=True)
+    # Первая цена - блок товара, дальше - похожие товары
+    assert shown_prices(page, 'current-price')[0] == promo_price
+    assert shown_prices(page, 'original-price')[0] == base
+    assert '-20%' in page
+    catalog = client.get('/catalog').get_data(as_text=True)
+    assert promo_price in shown_prices(catalog, 'current-price')
+
+    with app.app_context():
+        db.session.add(Cart(user_id=user_id, product_id=1, quantity=1, price_at_addition=promo_price))
+        db.session.commit()
+    response = client.post('/api/order/create', json={'address': 'Москва', 'payment_method': 'card'})
+    assert response.status_code == 200
+    with app.app_context():
+        assert Order.query.filter_by(user_id=user_id).one().total_amount == promo_price
+
+
+def test_revert_restores_prices(app):
+    with app.app_context():
+        product = db.session.get(Product, 1)
+        before = (product.price, product.old_price, product.discount)
+    promotion_id = start_promotion(app, 1, 30)
+
+    scheduler = app.extensions['promotions']
+    with app.app_context():
+        assert scheduler.revert(db.session.get(Promotion, promotion_id), NOW) == 1
+        product = db.session.get(Product, 1)
+        assert (product.price, product.old_price, product.discount) == before
@@ -0,0 +1,13 @@
+# tests/test_query_budgets.py - каждый маршрут отвечает без ошибок и укладывается в бюджет SQL-запросов
+import io
+from flask import has_app_context
+from querybudget import check_route_budgets
+
+
+def test_all_routes_fit_query_budgets(app):
+    out = io.StringIO()
+    failures = check_route_budgets(app, out=out)
+    assert failures == [], out.getvalue()
+    # Потоковые ответы закрыты: контекст последнего запроса не остался активным
+    assert not has_app_context()
+
@@ -0,0 +1,117 @@
+# tests/test_ratelimit.py - корзины токенов: всплеск, отказ, пополнение и общий файл воркеров
+import os
+import sys
+import subprocess
+import pytest
+from ratelimit import BucketTable, RateLimiter, parse_rate
+
+
+def test_parse_rate():
+    assert parse_rate('60/minute') == (1.0, 60.0)
+    assert parse_rate('2/second') == (2.0, 2.0)
+    for rate in ('0/minute', '10/day', 'много'):
+        with pytest.raises(ValueError):
+            parse_rate(rate)
+
+
+def test_burst_then_deny_then_refill():
+    table = BucketTable(None, b'salt')
+    rate, capacity = parse_rate('3/minute')
+
+    assert [table.take('ip:1', rate, capacity, now=100.0) for _ in range(3)] == [0, 0, 0]
+    assert table.take('ip:1', rate, capacity, now=100.0) == pytest.approx(20)
+    # Отказ не тратит токен: через 10 с ждать остается 10 с
+    assert table.take('ip:1', rate, capacity, now=110.0) == pytest.approx(10)
+    assert table.take('ip:1', rate, capacity, now=120.0) == 0
+    assert table.take('ip:1', rate, capacity, now=120.0) > 0
+    # Пополнение не превышает емкость
+    assert [table.take('ip:1', rate, capacity, now=10000.0) for _ in range(4)][-1] > 0
+
+
+def test_check_without_consume_keeps_tokens():
+    table = BucketTable(None, b'salt')
+    rate, capacity = parse_rate('1/minute')
+    assert table.take('ip:1', rate, capacity, now=0.0, consume=False) == 0
+    assert table.take('ip:1', rate, capacity, now=0.0) == 0
+    assert table.take('ip:1', rate, capacity, now=0.0, consume=False) > 0
+
+
+def test_keys_have_separate_buckets():
+    table = BucketTable(None, b'salt')
+    rate, capacity = parse_rate('1/minute')
+    assert table.take('ip:1', rate, capacity, now=0.0) == 0
+    assert table.take('ip:2', rate, capacity, now=0.0) == 0
+    assert table.take('ip:1', rate, capacity, now=0.0) > 0
+
+
+def test_clock_going_backwards_refills_bucket():
+    table = BucketTable(None, b'salt')
+    rate, capacity = parse_rate('1/minute')
+    assert table.take('ip:1', rate, capacity, now=500.0) == 0
+    assert table.take('ip:1', rate, capacity, now=5.0) == 0
+
+
+def test_workers_share_buckets_through_file(tmp_path):
+    path = str(tmp_path / 'ratelimit.bin')
+    first, second = BucketTable(path, b'salt'), BucketTable(path, b'salt')
+    rate, capacity = parse_rate('2/minute')
+    assert first.take('u:1', rate, capacity, now=0.0) == 0
+    assert second.take('u:1', rate, capacity, now=0.0) == 0
+    assert first.take('u:1', rate, capacity, now=0.0) > 0
+
+
+def test_parse_overrides():
+    overrides = RateLimiter.parse_overrides('shop.api_products: ip=5/minute ; shop.api_cart_add:user=,ip=1/second')
+    assert overrides == {'shop.api_products': {'ip': '5/minute'},
+                         'shop.api_cart_add': {'user': None, 'ip': '1/second'}}
+
+
+def test_route_answers_429_with_retry_after(app, monkeypatch):
+    limiter = app.extensions['rate_limiter']
+    monkeypatch.setattr(limiter, 'overrides', {'shop.api_products': {'ip': '2/minute'}})
+    monkeypatch.setattr(limiter, '_limits', {})
+    client = app.test_client()
+
+    assert [client.get('/api/products').status_code for _ in range(2)] == [200, 200]
+    response = client.get('/api/products')
+    assert response.status_code == 429
+    assert 1 <= int(response.headers['Retry-After']) <= 30
+    # Другой адрес ограничивается отдельно
+    assert client.get('/api/products', environ_base={'REMOTE_ADDR': '10.0.0.2'}).status_code == 200
+
+
+def test_user_denial_does_not_spend_ip_tokens(app, make_user, login, monkeypatch):
+    limiter = app.extensions['rate_limiter']
+    monkeypatch.setattr(limiter, 'overrides', {'shop.api_add_to_cart': {'ip': '3/minute', 'user': '1/minute'}})
+    monkeypatch.setattr(limiter, '_limits', {})
+    body = {'product_id': 1, 'quantity': 1, 'size': 'M', 'color': 'Черный'}
+    busy = login(app.test_client(), make_user())
+
+    assert [busy.post('/api/cart/add', json=body).status_code for _ in range(4)] == [200, 429, 429, 429]
+    # С того же адреса: лимит IP потрачен одним разрешенным запросом
+    other = login(app.test_client(), make_user())
+    assert [other.post('/api/cart/add', json=body).status_code for _ in range(2)] == [200, 429]
+
+
+def test_clients_behind_proxy_have_separate_buckets(app, monkeypatch):
+    limiter = app.extensions['rate_limiter']
+    monkeypatch.setattr(limiter, 'proxy_hops', 1)
+    monkeypatch.setattr(limiter, 'overrides', {'shop.api_products': {'ip': '1/minute'}})
+    monkeypatch.setattr(limiter, '_limits', {})
+    client = app.test_client()
+
+    def get(address, spoofed='9.9.9.9'):
+        return client.get('/api/products', headers={'X-Forwarded-For': f'{spoofed}, {address}'}).status_code
+
+    # Адрес клиента - последний, его добавил доверенный прокси; подставленный клиентом не учитывается
+    assert [get('1.1.1.1'), get('2.2.2.2'), get('1.1.1.1', spoofed='8.8.8.8')] == [200, 200, 429]
+
+
+@pytest.mark.parametrize('environ, hops', [({'RENDER': 'true'}, 1), ({}, 0),
+                                           ({'RENDER': 'true', 'RATE_LIMIT_PROXY_HOPS': '2'}, 2)])
+def test_proxy_hops_default(environ, hops):
+    env = {k: v for k, v in os.environ.items() if k not in ('RENDER', 'RATE_LIMIT_PROXY_HOPS')}
+    output = subprocess.check_output(
+        [sys.executable, '-c', 'from config import config; print(config.RATE_LIMIT_PROXY_HOPS)'],
+        env=dict(env, **environ), cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert int(output) == hops
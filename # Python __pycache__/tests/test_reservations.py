@@ -0,0 +1,136 @@
+# tests/test_reservations.py - уборщик резервов: отмена неоплаченных заказов, возврат товара, аренда
+from datetime import datetime, timedelta
+import pytest
+from models import db, Product, Order, StockReservation, Notification, OutboxEvent
+from reservations import ReservationSweeper
+
+NOW = datetime(2024, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def sweeper(app):
+    return app.extensions['reservations']
+
+
+def place_order(app, user_id, number, lines, expires_at=NOW, payment_status='pending', status='new'):
+    """Заказ с резервами: lines - пары (товар, количество), товар снимается со склада"""
+    with app.app_context():
+        order = Order(order_number=number, user_id=user_id, total_amount=1, final_amount=1,
+                      items_json='[]', payment_status=payment_status, status=status)
+        for product_id, quantity in lines:
+            product = db.session.get(Product, product_id)
+            product.stock -= quantity
+            product.reserved += quantity
+            order.reservations.append(StockReservation(product_id=product_id, quantity=quantity,
+                                                       expires_at=expires_at))
+        db.session.add(order)
+        db.session.commit()
+        return order.id
+
+
+def stock(app, product_id):
+    with app.app_context():
+        product = db.session.get(Product, product_id)
+        return product.stock, product.reserved
+
+
+def test_expired_unpaid_order_is_cancelled_and_stock_returned(app, make_user, sweeper):
+    user_id = make_user()
+    before = stock(app, 1), stock(app, 2)
+    order_id = place_order(app, user_id, 'ORDRES0001', [(1, 2), (2, 1)])
+    assert stock(app, 1) == (before[0][0] - 2, before[0][1] + 2)
+
+    with app.app_context():
+        assert sweeper.sweep(now=NOW + timedelta(seconds=1)) == 2
+        order = db.session.get(Order, order_id)
+        assert (order.status, order.payment_status) == ('cancelled', 'expired')
+        assert StockReservation.query.count() == 0
+        assert [n.title for n in Notification.query.filter_by(user_id=user_id, order_id=order_id)][-1] == \
+            'Заказ ORDRES0001 отменен'
+        assert [e.status for e in OutboxEvent.query.filter_by(order_id=order_id, kind='order_status')] == \
+            ['cancelled']
+    assert (stock(app, 1), stock(app, 2)) == before
+
+
+def test_paid_order_reservation_is_closed_without_returning_stock(app, make_user, sweeper):
+    before = stock(app, 1)
+    order_id = place_order(app, make_user(), 'ORDRES0002', [(1, 2)], payment_status='paid')
+
+    with app.app_context():
+        assert sweeper.sweep(now=NOW + timedelta(seconds=1)) == 1
+        assert db.session.get(Order, order_id).status == 'new'
+        assert StockReservation.query.count() == 0
+    # Товар продан: со склада списан, из резерва ушел
+    assert stock(app, 1) == (before[0] - 2, before[1])
+
+
+@pytest.mark.parametrize('status', ['processing', 'shipped', 'delivered'])
+def test_order_in_work_is_not_cancelled(app, make_user, sweeper, status):
+    before = stock(app, 1)
+    order_id = place_order(app, make_user(), 'ORDRES0007', [(1, 2)], status=status)
+
+    with app.app_context():
+        assert sweeper.sweep(now=NOW + timedelta(seconds=1)) == 1
+        order = db.session.get(Order, order_id)
+        assert (order.status, order.payment_status) == (status, 'pending')
+        assert StockReservation.query.count() == 0
+    assert stock(app, 1) == (before[0] - 2, before[1])
+
+
+def test_order_cancelled_by_admin_returns_stock(app, make_user, sweeper):
+    before = stock(app, 1)
+    place_order(app, make_user(), 'ORDRES0008', [(1, 2)], status='cancelled')
+    with app.app_context():
+        assert sweeper.sweep(now=NOW + timedelta(seconds=1)) == 1
+    assert stock(app, 1) == before
+
+
+def test_reservation_is_kept_until_it_expires(app, make_user, sweeper):
+    order_id = place_order(app, make_user(), 'ORDRES0003', [(1, 1)], expires_at=NOW + timedelta(minutes=30))
+    with app.app_context():
+        assert sweeper.sweep(now=NOW) == 0
+        assert db.session.get(Order, order_id).payment_status == 'pending'
+        assert StockReservation.query.count() == 1
+
+
+def test_sweep_goes_through_all_batches(app, make_user, sweeper, monkeypatch):
+    monkeypatch.setattr(sweeper, 'batch_size', 2)
+    user_id = make_user()
+    before = stock(app, 3)
+    for number in range(5):
+        place_order(app, user_id, f'ORDRESB{number}', [(3, 1)])
+
+    with app.app_context():
+        assert sweeper.sweep(now=NOW + timedelta(seconds=1)) == 5
+        assert Order.query.filter_by(status='cancelled').count() == 5
+    assert stock(app, 3) == before
+
+
+def test_release_calls_on_release(app, make_user, sweeper, monkeypatch):
+    released = []
+    monkeypatch.setattr(sweeper, 'on_release', lambda: released.append(True))
+    place_order(app, make_user(), 'ORDRES0004', [(1, 1)], payment_status='paid')
+    with app.app_context():
+        sweeper.sweep(now=NOW + timedelta(seconds=1))
+    assert released == []
+
+    place_order(app, make_user(), 'ORDRES0005', [(1, 1)])
+    with app.app_context():
+        sweeper.sweep(now=NOW + timedelta(seconds=1))
+    assert released == [True]
+
+
+def test_only_lease_owner_sweeps(app, make_user, sweeper):
+    other = ReservationSweeper()
+    other.init_app(app)
+    app.extensions['reservations'] = sweeper
+    sweeper.owner, other.owner = 'worker-1', 'worker-2'
+    place_order(app, make_user(), 'ORDRES0006', [(1, 1)])
+
+    with app.app_context():
+        assert other.run_once(now=NOW - timedelta(seconds=1)) == 0
+        assert sweeper.run_once(now=NOW + timedelta(seconds=1)) is None
+        # Аренда, которую владелец не продлил, переходит к другому воркеру
+        later = NOW + timedelta(seconds=sweeper.interval * 3 + 1)
+        assert sweeper.run_once(now=later) == 1
+        assert other.run_once(now=later) is None
@@ -0,0 +1,96 @@
+# tests/test_shared_cache.py - двухуровневый кэш: попадания, версии и инвалидация
+import os
+import sys
+import stat
+import tempfile
+import subprocess
+import pytest
+from flask import Flask
+from shared_cache import SharedCache, private_directory
+
+
+def make_cache(directory, shared):
+    app = Flask(__name__)
+    app.config.update(CACHE_DIR=str(directory), CACHE_SHARED=shared)
+    return SharedCache(app)
+
+
+@pytest.fixture(params=[True, False], ids=['shared', 'local'])
+def cache(request, tmp_path):
+    return make_cache(tmp_path, request.param)
+
+
+def test_get_or_set_calls_factory_once(cache):
+    calls = []
+    for _ in range(3):
+        assert cache.get_or_set('catalog', 'page1', lambda: calls.append(1) or 'value') == 'value'
+    assert len(calls) == 1
+
+
+def test_invalidate_drops_namespace_only(cache):
+    cache.set('catalog', 'page1', 'old')
+    cache.set('cart:1', 'items', [1])
+    cache.invalidate('catalog')
+    assert cache.get('catalog', 'page1') is None
+    assert cache.get('cart:1', 'items') == [1]
+
+
+def test_invalidation_during_factory_is_not_lost(cache):
+    # Commit сбрасывает версию, пока factory читает БД: прочитанное - уже устаревшее
+    def factory():
+        cache.invalidate('catalog')
+        return 'stale'
+
+    assert cache.get_or_set('catalog', 'page1', factory) == 'stale'
+    assert cache.get('catalog', 'page1') is None
+    assert cache.get_or_set('catalog', 'page1', lambda: 'fresh') == 'fresh'
+
+
+def test_workers_share_values_and_invalidation(tmp_path):
+    first, second = make_cache(tmp_path, True), make_cache(tmp_path, True)
+    first.get_or_set('catalog', 'page1', lambda: 'value')
+    assert second.get_or_set('catalog', 'page1', lambda: 'other') == 'value'
+
+    second.invalidate('catalog')
+    assert first.get('catalog', 'page1') is None
+
+
+def test_stale_value_from_other_worker_is_not_served(tmp_path):
+    first, second = make_cache(tmp_path, True), make_cache(tmp_path, True)
+
+    def factory():
+        second.invalidate('catalog')
+        return 'stale'
+
+    first.get_or_set('catalog', 'page1', factory)
+    assert second.get('catalog', 'page1') is None
+
+
+def test_cache_directory_is_private(tmp_path):
+    directory = tmp_path / 'cache'
+    make_cache(directory, True)
+    assert stat.S_IMODE(os.stat(directory).st_mode) == 0o700
+
+    # Уже созданный открытый каталог закрывается
+    shared = tmp_path / 'shared'
+    shared.mkdir(mode=0o777)
+    os.chmod(shared, 0o777)
+    private_directory(str(shared))
+    assert stat.S_IMODE(os.stat(shared).st_mode) == 0o700
+
+
+@pytest.mark.skipif(os.geteuid() != 0, reason='chown чужому пользователю - только под root')
+def test_foreign_cache_directory_is_refused(tmp_path):
+    planted = tmp_path / 'planted'
+    planted.mkdir()
+    os.chown(planted, 12345, 12345)
+    with pytest.raises(RuntimeError):
+        make_cache(planted, True)
+
+
+def test_default_cache_directory_is_not_in_tmp():
+    env = {k: v for k, v in os.environ.items() if k not in ('CACHE_DIR', 'INSTANCE_DIR')}
+    output = subprocess.check_output(
+        [sys.executable, '-c', 'from config import config; print(config.CACHE_DIR)'],
+        env=env, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), text=True)
+    assert not output.strip().startswith(tempfile.gettempdir())
@@ -0,0 +1,63 @@
+import hmac
+import json
+import time
+import hashlib
+from urllib.parse import urlencode
+
+import pytest
+
+
+def sign(app, **fields):
+    """initData с подписью бота из конфигурации"""
+    fields.setdefault('auth_date', str(int(time.time())))
+    fields.setdefault('user', json.dumps({'id': 777, 'first_name': 'Анна'}))
+    secret = hmac.new(b'WebAppData', app.config['BOT_TOKEN'].encode(), hashlib.sha256).digest()
+    data_check_string = '\n'.join(f"{k}={v}" for k, v in sorted(fields.items()))
+    fields['hash'] = hmac.new(secret, data_check_string.encode(), hashlib.sha256).hexdigest()
+    return urlencode(fields)
+
+
+def login(client, payload):
+    return client.post('/login/telegram', json=payload)
+
+
+def test_signed_init_data_logs_in(app):
+    response = login(app.test_client(), {'init_data': sign(app), 'next': '/cart'})
+    assert response.status_code == 200
+    assert response.get_json() == {'success': True, 'next': '/cart'}
+
+
+@pytest.mark.parametrize('payload', [
+    {'init_data': 123},
+    {'init_data': ['a=1']},
+    {'init_data': {'hash': 'x'}},
+    {'init_data': 'auth_date=1'},
+    {'init_data': 'a=\ud800&hash=00'},
+    {},
+    ['init_data'],
+])
+def test_malformed_init_data_is_rejected_with_400(app, payload):
+    response = login(app.test_client(), payload)
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+
+
+@pytest.mark.parametrize('user', ['[]', '{"first_name": "Анна"}', '{"id": "abc"}', 'not json'])
+def test_signed_init_data_with_bad_user_is_rejected_with_400(app, user):
+    response = login(app.test_client(), {'init_data': sign(app, user=user)})
+    assert response.status_code == 400
+
+
+def test_wrong_signature_and_expired_data_are_401(app):
+    client = app.test_client()
+    forged = sign(app).replace('777', '778')
+    assert login(client, {'init_data': forged}).status_code == 401
+    assert login(client, {'init_data': 'auth_date=1&hash=é'}).status_code == 401
+    expired = sign(app, auth_date=str(int(time.time()) - 2 * 86400))
+    assert login(client, {'init_data': expired}).status_code == 401
+
+
+def test_non_string_next_falls_back_to_index(app):
+    response = login(app.test_client(), {'init_data': sign(app), 'next': 5})
+    assert response.status_code == 200
+    assert response.get_json()['next'] == '/'